@@ -109,7 +109,7 @@ interface ExportTask {
   backend: string
   repo_name: string
   snapshot: string
-  state: "queued" | "restoring" | "packing" | "completed" | "failed"
+  state: "queued" | "streaming" | "restoring" | "packing" | "completed" | "failed"
   message: string
   size_bytes: number
   output_path: string | null
@@ -1795,20 +1795,24 @@ function InspectModal({
           }),
         },
       )
-      // Poll until done. The export can take from seconds (small host
-      // config) to minutes (multi-GB pxar) — poll every 1.5s so the
-      // UI feels responsive without DoS-ing Flask.
-      let task: ExportTask | null = null
-      while (true) {
-        await new Promise((res) => setTimeout(res, 1500))
-        task = await fetchApi<ExportTask>(
-          `/api/host-backups/remote-archives/export/${encodeURIComponent(started.task_id)}`,
-        )
-        setExportTask(task)
-        if (task.state === "completed" || task.state === "failed") break
-      }
-      if (!task || task.state !== "completed") {
-        throw new Error(task?.error || "export did not complete")
+      // A "streaming" export is produced on the fly by the download
+      // request itself — nothing to wait for. Otherwise the server
+      // packs it in the background: poll until done. That can take
+      // from seconds (small host config) to minutes (multi-GB pxar) —
+      // poll every 1.5s so the UI feels responsive without DoS-ing Flask.
+      if (started.state !== "streaming") {
+        let task: ExportTask | null = null
+        while (true) {
+          await new Promise((res) => setTimeout(res, 1500))
+          task = await fetchApi<ExportTask>(
+            `/api/host-backups/remote-archives/export/${encodeURIComponent(started.task_id)}`,
+          )
+          setExportTask(task)
+          if (task.state === "completed" || task.state === "failed") break
+        }
+        if (!task || task.state !== "completed") {
+          throw new Error(task?.error || "export did not complete")
+        }
       }
       // Stream the resulting .tar.zst with a ticketed URL + <a download>.
       // Same rationale as downloadLocalArchive: bypass fetch+blob to
@@ -5266,6 +5270,16 @@ interface CapacityInfo {
   is_usb?: boolean
   remote?: boolean
   error?: string
+  // Poller bookkeeping: not probed yet / last probe failed but the
+  // numbers from the previous good probe are still shown.
+  pending?: boolean
+  stale?: boolean
+  last_error?: string
+  probed_at?: number
+  age_seconds?: number
+  // Forecast from the kept usage history (only once it spans a few hours).
+  growth_bytes_per_day?: number
+  days_until_full?: number
 }
 
 // Parse a Borg repository string into {user, host, remotePath} when
@@ -5379,38 +5393,21 @@ function DestinationsSection({
     return out
   })()
 
-  // Build the capacity-probe payload + key for SWR. The key includes
-  // every destination's id so SWR re-fetches when the list changes
-  // (add / remove). 30 s refresh keeps the bars roughly live without
-  // hammering ssh / pbs every render.
-  const capacityTargets = items.map((it) => {
-    if (it.kind === "local") return { id: it.id, kind: "local", path: it.path }
-    if (it.kind === "pbs") return { id: it.id, kind: "pbs", name: it.name, repository: it.repository }
-    if (it.isSsh && it.ssh) {
-      return {
-        id: it.id, kind: "borg-ssh",
-        host: it.ssh.host, user: it.ssh.user,
-        remote_path: it.ssh.remotePath,
-        key_path: it.sshKeyPath || "",
-      }
-    }
-    return { id: it.id, kind: "borg-local", path: it.repository }
-  })
+  // Capacity comes from the server-side poller cache in one call for
+  // every configured destination (same ids as `items`). The key still
+  // includes every id so SWR re-fetches when the list changes (add /
+  // remove). The 30 s refresh only reads the cache — the poller does
+  // the ssh / pbs probing on its own schedule.
   const capacityKey = items.length
-    ? `/api/host-backups/destinations/capacity?keys=${items.map((i) => i.id).join(",")}`
+    ? `/api/host-backups/destinations/capacity?keys=${items.map((i) => encodeURIComponent(i.id)).join(",")}`
     : null
   const { data: capacityResp } = useSWR<{ results: CapacityInfo[] }>(
     capacityKey,
-    () =>
-      fetchApi("/api/host-backups/destinations/capacity", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ targets: capacityTargets }),
-      }),
+    (key: string) => fetchApi(key),
     { refreshInterval: 30_000, revalidateOnFocus: false },
   )
   const capByEdid = new Map<string, CapacityInfo>(
-    (capacityResp?.results || []).map((r) => [r.id, r] as const),
+    (capacityResp?.results || []).filter((r) => !r.pending).map((r) => [r.id, r] as const),
   )
 
   async function removePbs(name: string, force = false) {
@@ -5917,6 +5914,16 @@ function DestinationRow({
         </div>
       </div>
 
+      {capacity?.days_until_full !== undefined && (
+        <p className="mt-3 text-[11px] text-muted-foreground">
+          Growing ~{formatBytes(capacity.growth_bytes_per_day ?? 0)}/day — full in ~{capacity.days_until_full} days at this rate
+        </p>
+      )}
+      {capacity?.stale && capacity.last_error && (
+        <p className="mt-3 text-[11px] text-muted-foreground italic">
+          Showing last known capacity — latest probe failed: {capacity.last_error}
+        </p>
+      )}
       {capacity?.error && (
         <p className="mt-3 text-[11px] text-muted-foreground italic">
           Capacity unavailable: {capacity.error}
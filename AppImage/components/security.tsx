@@ -175,6 +175,11 @@ export function Security() {
     proxmox_expected_warnings?: number
     proxmox_expected_suggestions?: number
     proxmox_context_applied?: boolean
+    diff?: {
+      previous_scan: string; previous_hardening_index: number | null; hardening_index_delta: number | null
+      new_warnings: LynisWarning[]; resolved_warnings: LynisWarning[]
+      new_suggestions: LynisSuggestion[]; resolved_suggestions: LynisSuggestion[]
+    } | null
   }
   const [lynisAuditRunning, setLynisAuditRunning] = useState(false)
   const [lynisReport, setLynisReport] = useState<LynisReport | null>(null)
@@ -3892,6 +3897,15 @@ ${(report.sections && report.sections.length > 0) ? `
                           <p className="text-[11px] text-muted-foreground">
                             {lynisReport.hostname || "System"} - {lynisReport.tests_performed} tests - PVE Score: {lynisReport.proxmox_adjusted_score ?? lynisReport.hardening_index ?? "N/A"}/100 - {lynisReport.warnings.length - (lynisReport.proxmox_expected_warnings ?? 0)} warnings - {lynisReport.suggestions.length - (lynisReport.proxmox_expected_suggestions ?? 0)} suggestions
                           </p>
+                          {lynisReport.diff && (
+                            <p className="text-[11px] text-muted-foreground">
+                              Since {lynisReport.diff.previous_scan.replace("T", " ").substring(0, 16) || "previous audit"}:{" "}
+                              <span className="text-red-500">+{lynisReport.diff.new_warnings.length}</span> /{" "}
+                              <span className="text-green-500">-{lynisReport.diff.resolved_warnings.length}</span> warnings,{" "}
+                              <span className="text-red-500">+{lynisReport.diff.new_suggestions.length}</span> /{" "}
+                              <span className="text-green-500">-{lynisReport.diff.resolved_suggestions.length}</span> suggestions
+                            </p>
+                          )}
                         </div>
                       </div>
                       <div className="flex items-center gap-2">
@@ -336,7 +336,10 @@ export const TerminalPanel: React.FC<TerminalPanelProps> = ({ websocketUrl, onCl
 
     const wsUrl = websocketUrl || getWebSocketUrl()
     // Append the single-use auth ticket so the backend handshake can validate.
-    const ws = new WebSocket(await getTicketedWsUrl(wsUrl))
+    // binary=1: PTY output arrives as raw UTF-8 binary frames, which
+    // xterm decodes itself (control messages like pong stay text).
+    const ws = new WebSocket(await getTicketedWsUrl(`${wsUrl}${wsUrl.includes("?") ? "&" : "?"}binary=1`))
+    ws.binaryType = "arraybuffer"
     
     ws.onopen = () => {
       // Successful connect — reset backoff state for this terminal.
@@ -380,7 +383,7 @@ export const TerminalPanel: React.FC<TerminalPanelProps> = ({ websocketUrl, onCl
       if (event.data === '{"type": "pong"}' || event.data === '{"type":"pong"}') {
         return
       }
-      terminal.term.write(event.data)
+      terminal.term.write(typeof event.data === "string" ? event.data : new Uint8Array(event.data))
     }
     
     ws.onerror = () => {
@@ -563,7 +566,10 @@ export const TerminalPanel: React.FC<TerminalPanelProps> = ({ websocketUrl, onCl
     let connectionTimedOut = false
 
     // Single-use auth ticket appended as ?ticket=... — see lib/terminal-ws.ts.
-    const ws = new WebSocket(await getTicketedWsUrl(wsUrl))
+    // binary=1: PTY output arrives as raw UTF-8 binary frames, which
+    // xterm decodes itself (control messages like pong stay text).
+    const ws = new WebSocket(await getTicketedWsUrl(`${wsUrl}${wsUrl.includes("?") ? "&" : "?"}binary=1`))
+    ws.binaryType = "arraybuffer"
     
     // Set connection timeout
     const timeoutId = setTimeout(() => {
@@ -619,7 +625,7 @@ export const TerminalPanel: React.FC<TerminalPanelProps> = ({ websocketUrl, onCl
       if (event.data === '{"type": "pong"}' || event.data === '{"type":"pong"}') {
         return
       }
-      term.write(event.data)
+      term.write(typeof event.data === "string" ? event.data : new Uint8Array(event.data))
     }
 
     ws.onerror = (error) => {
@@ -83,10 +83,14 @@ export async function fetchApi<T>(endpoint: string, options?: RequestInit): Prom
     headers["Authorization"] = `Bearer ${token}`
   }
 
+  // GETs use "no-cache": the browser keeps the last body and always
+  // revalidates it with If-None-Match, so an unchanged poll comes back
+  // as an empty 304 from the server instead of the full JSON again.
+  const method = (options?.method || "GET").toUpperCase()
   const response = await fetch(url, {
     ...options,
     headers,
-    cache: "no-store",
+    cache: method === "GET" ? "no-cache" : "no-store",
   })
 
     if (!response.ok) {
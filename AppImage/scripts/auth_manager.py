@@ -83,6 +83,108 @@ def ensure_config_dir():
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _default_auth_config():
+    return {
+        "enabled": False,
+        "username": None,
+        "password_hash": None,
+        "declined": False,
+        "configured": False,
+        "totp_enabled": False,
+        "totp_secret": None,
+        "backup_codes": [],
+        "api_tokens": [],
+        "revoked_tokens": [],
+        "display_name": None,
+    }
+
+
+# Parsed auth.json shared by every request. `require_auth` and friends used
+# to open + json.load the file on every protected call (the dashboard fires
+# several per tab every 5 s); now it's parsed once and re-read only when the
+# file's (inode, mtime_ns, size) signature changes. `save_auth_config`
+# writes via rename, so an in-process save always changes the inode and a
+# write from another process is picked up on the next request.
+# The state dict is replaced wholesale on reload, never mutated, so readers
+# don't need the lock. It also owns the verified-token LRU — a reload
+# (secret rotation, revocation, auth disabled) starts with an empty one.
+_AUTH_STATE_LOCK = threading.Lock()
+_AUTH_STATE = {'sig': None, 'config': None}
+_VERIFIED_TOKEN_CACHE_SIZE = 256
+# Cap for tokens without an `exp` claim — still re-verified periodically.
+_VERIFIED_TOKEN_MAX_AGE = 300
+
+
+def _auth_file_signature():
+    try:
+        st = AUTH_CONFIG_FILE.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _read_auth_config_file():
+    with open(AUTH_CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+    # Ensure all required fields exist
+    config.setdefault("declined", False)
+    config.setdefault("configured", config.get("enabled", False) or config.get("declined", False))
+    config.setdefault("totp_enabled", False)
+    config.setdefault("totp_secret", None)
+    config.setdefault("backup_codes", [])
+    config.setdefault("api_tokens", [])
+    config.setdefault("revoked_tokens", [])
+    config.setdefault("display_name", None)
+    return config
+
+
+def get_auth_state():
+    """Return the current parsed auth state (read-only — don't mutate).
+
+    Keys: `config` (the auth.json dict), `required` (auth enabled and not
+    declined), `enabled`, `revoked` (frozenset of revoked token hashes),
+    `verified` (LRU of verified tokens) and `verified_lock`.
+    """
+    global _AUTH_STATE
+    sig = _auth_file_signature()
+    state = _AUTH_STATE
+    if state['config'] is not None and state['sig'] == sig:
+        return state
+    with _AUTH_STATE_LOCK:
+        state = _AUTH_STATE
+        if state['config'] is not None and state['sig'] == sig:
+            return state
+        if sig is None:
+            config = _default_auth_config()
+        else:
+            try:
+                config = _read_auth_config_file()
+            except Exception as e:
+                print(f"Error loading auth config: {e}")
+                # Keep serving the last good config rather than flipping
+                # auth off on a transient read error; `sig` stays stale so
+                # the next call retries.
+                if state['config'] is not None:
+                    return state
+                return _build_auth_state(None, _default_auth_config())
+        _AUTH_STATE = _build_auth_state(sig, config)
+        return _AUTH_STATE
+
+
+def _build_auth_state(sig, config):
+    from collections import OrderedDict
+    enabled = bool(config.get("enabled", False))
+    return {
+        'sig': sig,
+        'config': config,
+        'enabled': enabled,
+        'required': enabled and not config.get("declined", False),
+        'revoked': frozenset(config.get("revoked_tokens", [])),
+        'verified': OrderedDict(),
+        'verified_lock': threading.Lock(),
+    }
+
+
 def load_auth_config():
     """
     Load authentication configuration from file
@@ -99,61 +201,34 @@ def load_auth_config():
         "api_tokens": list,    # List of stored API token metadata
         "revoked_tokens": list # List of revoked token hashes
     }
+
+    Served from the cached auth state; callers get their own deep copy so
+    the usual load → modify → save_auth_config() flow can't leak edits
+    into the shared state before they're written.
     """
-    if not AUTH_CONFIG_FILE.exists():
-        return {
-            "enabled": False,
-            "username": None,
-            "password_hash": None,
-            "declined": False,
-            "configured": False,
-            "totp_enabled": False,
-            "totp_secret": None,
-            "backup_codes": [],
-            "api_tokens": [],
-            "revoked_tokens": [],
-            "display_name": None,
-        }
-    
-    try:
-        with open(AUTH_CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-            # Ensure all required fields exist
-            config.setdefault("declined", False)
-            config.setdefault("configured", config.get("enabled", False) or config.get("declined", False))
-            config.setdefault("totp_enabled", False)
-            config.setdefault("totp_secret", None)
-            config.setdefault("backup_codes", [])
-            config.setdefault("api_tokens", [])
-            config.setdefault("revoked_tokens", [])
-            config.setdefault("display_name", None)
-            return config
-    except Exception as e:
-        print(f"Error loading auth config: {e}")
-        return {
-            "enabled": False,
-            "username": None,
-            "password_hash": None,
-            "declined": False,
-            "configured": False,
-            "totp_enabled": False,
-            "totp_secret": None,
-            "backup_codes": [],
-            "api_tokens": [],
-            "revoked_tokens": [],
-            "display_name": None,
-        }
+    import copy
+    return copy.deepcopy(get_auth_state()['config'])
 
 
 def save_auth_config(config):
-    """Save authentication configuration to file"""
+    """Save authentication configuration to file (atomically: temp file +
+    rename, so concurrent readers never see a half-written auth.json)."""
     ensure_config_dir()
+    tmp_path = AUTH_CONFIG_FILE.with_name(f".{AUTH_CONFIG_FILE.name}.{os.getpid()}.tmp")
     try:
-        with open(AUTH_CONFIG_FILE, 'w') as f:
+        fd = os.open(str(tmp_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
             json.dump(config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, AUTH_CONFIG_FILE)
         return True
     except Exception as e:
         print(f"Error saving auth config: {e}")
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
         return False
 
 
@@ -166,11 +241,11 @@ def _get_jwt_secret():
     persisted it never changes (rotation would log out every active session).
     Audit Tier 4 #22.
     """
-    config = load_auth_config()
-    sec = config.get("jwt_secret")
+    sec = get_auth_state()['config'].get("jwt_secret")
     if isinstance(sec, str) and len(sec) >= 32:
         _audit_api_tokens_against_jwt_secret(sec)
         return sec
+    config = load_auth_config()
     new_secret = secrets.token_urlsafe(48)
     config["jwt_secret"] = new_secret
     save_auth_config(config)
@@ -349,38 +424,75 @@ def generate_token(username):
         return None
 
 
-# In-memory cache for revoked_tokens to avoid hitting disk on every request.
-# Invalidated by both TTL and the auth.json mtime so a revocation from another
-# process/restart still propagates within seconds.
-_REVOKED_CACHE = {'set': None, 'mtime': 0.0, 'fetched_at': 0.0}
-_REVOKED_TTL = 30.0
+def _get_revoked_tokens_cached():
+    """Return a frozenset of revoked-token hashes from the cached auth state."""
+    return get_auth_state()['revoked']
 
 
-def _get_revoked_tokens_cached():
-    """Return a frozenset of revoked-token hashes, cached for ~30s."""
-    import time
-    now = time.monotonic()
+def _invalidate_revoked_cache():
+    """Force a re-read of auth.json on the next verify_token call."""
+    global _AUTH_STATE
+    with _AUTH_STATE_LOCK:
+        _AUTH_STATE = {'sig': None, 'config': None}
+
+
+def _decode_token(token):
+    """Decode and verify `token` against the per-install secret.
+
+    `iss`/`aud` claims are validated when present; tokens issued before
+    the iss/aud rollout (no claims) fall back to a permissive decode so
+    active sessions don't break on upgrade. Raises jwt.InvalidTokenError
+    (incl. ExpiredSignatureError) like jwt.decode.
+    """
     try:
-        mtime = AUTH_CONFIG_FILE.stat().st_mtime
-    except OSError:
-        mtime = 0.0
-    if (
-        _REVOKED_CACHE['set'] is not None
-        and now - _REVOKED_CACHE['fetched_at'] < _REVOKED_TTL
-        and mtime == _REVOKED_CACHE['mtime']
-    ):
-        return _REVOKED_CACHE['set']
-    config = load_auth_config()
-    revoked = frozenset(config.get("revoked_tokens", []))
-    _REVOKED_CACHE['set'] = revoked
-    _REVOKED_CACHE['mtime'] = mtime
-    _REVOKED_CACHE['fetched_at'] = now
-    return revoked
+        return jwt.decode(
+            token,
+            _get_jwt_secret(),
+            algorithms=[JWT_ALGORITHM],
+            audience=JWT_AUDIENCE,
+            issuer=JWT_ISSUER,
+        )
+    except (jwt.MissingRequiredClaimError, jwt.InvalidAudienceError, jwt.InvalidIssuerError):
+        return jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
 
 
-def _invalidate_revoked_cache():
-    """Force a re-read on the next verify_token call."""
-    _REVOKED_CACHE['set'] = None
+def _verify_token_cached(token):
+    """Return `(username, scope)` for a valid token, `(None, None)` for a
+    revoked one, raising like `_decode_token` otherwise.
+
+    Successful verifications are memoized in the auth state's LRU, keyed
+    by token hash, until the token's `exp` — every dashboard poll carries
+    the same bearer token, and re-running the HMAC + claim checks for each
+    one is wasted work. Revocation is checked before the LRU, and any
+    auth.json change (secret rotation, new revocation) swaps in a fresh
+    state with an empty LRU.
+    """
+    state = get_auth_state()
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    if token_hash in state['revoked']:
+        return None, None
+
+    now = time.time()
+    cache = state['verified']
+    with state['verified_lock']:
+        hit = cache.get(token_hash)
+        if hit is not None:
+            if now < hit[2]:
+                cache.move_to_end(token_hash)
+                return hit[0], hit[1]
+            del cache[token_hash]
+
+    payload = _decode_token(token)
+    username = payload.get('username')
+    scope = payload.get('scope', 'full_admin')
+    exp = payload.get('exp')
+    valid_until = float(exp) if isinstance(exp, (int, float)) else now + _VERIFIED_TOKEN_MAX_AGE
+    with state['verified_lock']:
+        cache[token_hash] = (username, scope, valid_until)
+        cache.move_to_end(token_hash)
+        while len(cache) > _VERIFIED_TOKEN_CACHE_SIZE:
+            cache.popitem(last=False)
+    return username, scope
 
 
 def verify_token_full(token):
@@ -394,18 +506,7 @@ def verify_token_full(token):
     if not JWT_AVAILABLE or not token:
         return None, None
     try:
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        if token_hash in _get_revoked_tokens_cached():
-            return None, None
-        try:
-            payload = jwt.decode(
-                token, _get_jwt_secret(),
-                algorithms=[JWT_ALGORITHM],
-                audience=JWT_AUDIENCE, issuer=JWT_ISSUER,
-            )
-        except (jwt.MissingRequiredClaimError, jwt.InvalidAudienceError, jwt.InvalidIssuerError):
-            payload = jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
-        return payload.get('username'), payload.get('scope', 'full_admin')
+        return _verify_token_cached(token)
     except jwt.ExpiredSignatureError:
         return None, None
     except jwt.InvalidTokenError:
@@ -456,30 +557,13 @@ def verify_token(token):
         return None
 
     try:
-        # Revoked-token list is cached in memory (TTL + mtime) so high-RPS
-        # endpoints don't reread auth.json from disk on every @require_auth call.
-        token_hash = hashlib.sha256(token.encode()).hexdigest()
-        if token_hash in _get_revoked_tokens_cached():
-            return None
-
-        # Verify against the per-install secret first. Tokens issued under the
-        # legacy hardcoded secret were forgeable by anyone with read access to
-        # the public repo — those are intentionally rejected so users get a
-        # one-time relogin to mint a fresh token.
-        # `iss`/`aud` claims are validated when present; tokens issued before
-        # the iss/aud rollout (no claims) fall back to a permissive decode so
-        # active sessions don't break on upgrade.
-        try:
-            payload = jwt.decode(
-                token,
-                _get_jwt_secret(),
-                algorithms=[JWT_ALGORITHM],
-                audience=JWT_AUDIENCE,
-                issuer=JWT_ISSUER,
-            )
-        except (jwt.MissingRequiredClaimError, jwt.InvalidAudienceError, jwt.InvalidIssuerError):
-            payload = jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
-        return payload.get('username')
+        # Verified against the cached auth state (revocation list, secret)
+        # and memoized until `exp`, so high-RPS endpoints neither reread
+        # auth.json nor redo signature verification on every @require_auth
+        # call. Tokens issued under the legacy hardcoded secret were
+        # forgeable by anyone with read access to the public repo — those
+        # are intentionally rejected so users get a one-time relogin.
+        return _verify_token_cached(token)[0]
     except jwt.ExpiredSignatureError:
         _log_auth_failure_throttled("Token has expired")
         return None
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: stdlib JSON provider vs ProxMenuxJSONProvider (orjson).
+Usage: python3 bench_json_provider.py [payload.json ...] [--rounds N]
+
+Pass responses recorded from a live node to time real payloads, e.g.:
+  curl -s -H "Authorization: Bearer $TOKEN" http://localhost:8008/api/hardware > hardware.json
+  curl -s -H "Authorization: Bearer $TOKEN" "http://localhost:8008/api/node/metrics?timeframe=week" > metrics.json
+  curl -s -H "Authorization: Bearer $TOKEN" "http://localhost:8008/api/logs?limit=10000" > logs.json
+  python3 bench_json_provider.py hardware.json metrics.json logs.json
+
+Without arguments, synthetic payloads shaped like those three endpoints
+are used.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from json_provider import ProxMenuxJSONProvider
+
+
+def synthetic_payloads():
+    rnd = random.Random(42)
+    now = int(time.time())
+
+    hardware = {
+        "cpu": {"model": "AMD EPYC 7402P 24-Core Processor", "cores": 24, "threads": 48,
+                "flags": ["fpu", "vme", "de", "pse", "tsc", "msr", "pae", "mce"] * 20},
+        "memory_modules": [{"slot": f"DIMM{i}", "size": "32 GB", "type": "DDR4",
+                            "speed": "3200 MT/s", "manufacturer": "Samsung"} for i in range(8)],
+        "storage_devices": [{
+            "name": f"sd{chr(97 + i)}", "model": "ST8000VN004", "serial": f"ZA{i:06d}",
+            "size": 8001563222016, "temperature": rnd.randint(28, 45),
+            "smart_attributes": [{"id": a, "name": f"Attr_{a}", "value": rnd.randint(90, 200),
+                                  "worst": rnd.randint(90, 200), "raw": str(rnd.randint(0, 99999))}
+                                 for a in range(1, 30)],
+        } for i in range(12)],
+        "pci_devices": [{"slot": f"0000:{i:02x}:00.0", "class": "Ethernet controller",
+                         "vendor": "Intel Corporation", "device": "I350 Gigabit",
+                         "driver": "igb"} for i in range(40)],
+    }
+
+    metrics = {
+        "node": "pve",
+        "timeframe": "week",
+        "data": [{
+            "time": now - i * 60,
+            "cpu": rnd.random(), "iowait": rnd.random() / 10, "loadavg": rnd.random() * 4,
+            "memused": rnd.randint(10**9, 6 * 10**10), "memtotal": 6.8 * 10**10,
+            "netin": rnd.random() * 10**6, "netout": rnd.random() * 10**6,
+            "rootused": rnd.randint(10**9, 10**11), "roottotal": 10**11,
+        } for i in range(10080)],
+    }
+
+    units = ["pvedaemon", "pveproxy", "kernel", "systemd", "cron", "sshd"]
+    logs = {
+        "logs": [{
+            "timestamp": f"2026-10-18 12:{i // 60 % 60:02d}:{i % 60:02d}",
+            "level": rnd.choice(["info", "warning", "error"]),
+            "service": rnd.choice(units),
+            "message": f"starting task UPID:pve:{i:08X}:vzdump:{100 + i % 30}:root@pam: ünïcode ✓",
+            "source": "journal", "pid": str(rnd.randint(100, 99999)), "hostname": "pve",
+        } for i in range(10000)],
+        "total": 10000,
+    }
+
+    return [("hardware (synthetic)", hardware), ("node/metrics (synthetic)", metrics),
+            ("logs (synthetic)", logs)]
+
+
+def load_payloads(paths):
+    payloads = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            payloads.append((os.path.basename(path), json.load(f)))
+    return payloads
+
+
+def time_it(func, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = sys.argv[1:]
+    rounds = 20
+    if "--rounds" in args:
+        idx = args.index("--rounds")
+        rounds = int(args[idx + 1])
+        del args[idx:idx + 2]
+
+    payloads = load_payloads(args) if args else synthetic_payloads()
+
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+    fast = ProxMenuxJSONProvider(app)
+
+    print(f"orjson: {'available' if json_provider.orjson is not None else 'NOT installed (fallback path)'}")
+    print(f"best of {rounds} rounds\n")
+    print(f"{'payload':<28} {'size':>10} {'stdlib':>10} {'provider':>10} {'speedup':>8}")
+
+    with app.app_context():
+        for name, obj in payloads:
+            size = len(fast.dumps_bytes(obj))
+            t_std = time_it(lambda: stdlib.response(obj), rounds)
+            t_fast = time_it(lambda: fast.response(obj), rounds)
+            if json.loads(stdlib.response(obj).get_data()) != json.loads(fast.response(obj).get_data()):
+                print(f"[WARN] {name}: outputs decode differently")
+            print(f"{name:<28} {size / 1024:>8.0f}KB {t_std * 1000:>8.2f}ms "
+                  f"{t_fast * 1000:>8.2f}ms {t_std / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
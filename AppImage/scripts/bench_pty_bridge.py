@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: old 10 ms/4 KB PTY forwarding loop vs pty_bridge.
+Usage: python3 bench_pty_bridge.py [--mb N] [--slow-ms N]
+
+Runs a synthetic high-output command (N MB of mixed ASCII / multibyte
+UTF-8 lines, like `apt upgrade` or `journalctl -f` output) in a real PTY,
+forwards it with each loop into an in-memory sink, and reports
+throughput, frame count, process CPU time and how many characters were
+lost to split multibyte sequences. --slow-ms adds a per-frame delay to
+the sink to emulate a slow WebSocket.
+"""
+
+import os
+import pty
+import select
+import subprocess
+import sys
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+from pty_bridge import pump_pty_output
+
+LINE = "Get:42 http://deb.debian.org bookworm/main amd64 libc6 2.36-9 [2.8 MB] ─ ✓ ñandú €\n"
+
+
+def old_loop(master_fd, send):
+    """The loop flask_terminal_routes used before pty_bridge."""
+    while True:
+        r, _, _ = select.select([master_fd], [], [], 0.01)
+        if master_fd in r:
+            try:
+                data = os.read(master_fd, 4096)
+            except OSError:
+                break
+            if not data:
+                break
+            send(data.decode("utf-8", errors="ignore"))
+
+
+def run(label, forward, mb, slow_ms):
+    lines = int(mb * 1024 * 1024 / len(LINE.encode()))
+    master_fd, slave_fd = pty.openpty()
+    proc = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys; line = {LINE!r}; w = sys.stdout.write\n"
+         f"for _ in range({lines}): w(line)\nsys.stdout.flush()"],
+        stdin=slave_fd, stdout=slave_fd, stderr=slave_fd, close_fds=True,
+    )
+    os.close(slave_fd)
+
+    frames = 0
+    chars = 0
+
+    def send(payload):
+        nonlocal frames, chars
+        frames += 1
+        chars += len(payload.decode("utf-8", errors="replace")) if isinstance(payload, bytes) else len(payload)
+        if slow_ms:
+            time.sleep(slow_ms / 1000.0)
+
+    cpu0 = time.process_time()
+    t0 = time.perf_counter()
+    forward(master_fd, send)
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    proc.wait()
+    os.close(master_fd)
+
+    expected = lines * len(LINE.replace("\n", "\r\n"))
+    print(f"{label:<22} {mb / elapsed:>8.1f} MB/s {frames:>8} frames "
+          f"{cpu * 1000:>8.0f} ms CPU {expected - chars:>8} chars lost")
+
+
+def main():
+    args = sys.argv[1:]
+    mb = float(args[args.index("--mb") + 1]) if "--mb" in args else 20.0
+    slow_ms = float(args[args.index("--slow-ms") + 1]) if "--slow-ms" in args else 0.0
+
+    print(f"{mb:.0f} MB synthetic output, sink delay {slow_ms:.1f} ms/frame\n")
+    run("old (10ms / 4KB)", old_loop, mb, slow_ms)
+    run("pty_bridge (text)", lambda fd, send: pump_pty_output(fd, send), mb, slow_ms)
+    run("pty_bridge (binary)", lambda fd, send: pump_pty_output(fd, send, binary=True), mb, slow_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -121,10 +121,22 @@ cp "$SCRIPT_DIR/health_persistence.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "
 cp "$SCRIPT_DIR/flask_health_routes.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  flask_health_routes.py not found"
 cp "$SCRIPT_DIR/flask_proxmenux_routes.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  flask_proxmenux_routes.py not found"
 cp "$SCRIPT_DIR/post_install_versions.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  post_install_versions.py not found"
+cp "$SCRIPT_DIR/guest_registry.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  guest_registry.py not found"
+cp "$SCRIPT_DIR/fs_probe.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  fs_probe.py not found"
+cp "$SCRIPT_DIR/inspect_cache.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  inspect_cache.py not found"
+cp "$SCRIPT_DIR/lxc_mount_inventory.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  lxc_mount_inventory.py not found"
 cp "$SCRIPT_DIR/mount_monitor.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  mount_monitor.py not found"
 cp "$SCRIPT_DIR/lxc_mount_points.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  lxc_mount_points.py not found"
 cp "$SCRIPT_DIR/disk_temperature_history.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  disk_temperature_history.py not found"
+cp "$SCRIPT_DIR/pve_task_index.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  pve_task_index.py not found"
+cp "$SCRIPT_DIR/static_assets.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  static_assets.py not found"
+cp "$SCRIPT_DIR/json_provider.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  json_provider.py not found"
+cp "$SCRIPT_DIR/fail2ban_socket.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  fail2ban_socket.py not found"
+cp "$SCRIPT_DIR/pty_bridge.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  pty_bridge.py not found"
+cp "$SCRIPT_DIR/log_broadcaster.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  log_broadcaster.py not found"
 cp "$SCRIPT_DIR/health_thresholds.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  health_thresholds.py not found"
+cp "$SCRIPT_DIR/pkg_index_cache.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  pkg_index_cache.py not found"
+cp "$SCRIPT_DIR/lxc_pkg_state.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  lxc_pkg_state.py not found"
 cp "$SCRIPT_DIR/managed_installs.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  managed_installs.py not found"
 cp "$SCRIPT_DIR/flask_terminal_routes.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  flask_terminal_routes.py not found"
 cp "$SCRIPT_DIR/hardware_monitor.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  hardware_monitor.py not found"
@@ -141,6 +153,7 @@ cp "$SCRIPT_DIR/ai_context_enrichment.py" "$APP_DIR/usr/bin/" 2>/dev/null || ech
 cp "$SCRIPT_DIR/startup_grace.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  startup_grace.py not found"
 cp "$SCRIPT_DIR/flask_notification_routes.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  flask_notification_routes.py not found"
 cp "$SCRIPT_DIR/oci_manager.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  oci_manager.py not found"
+cp "$SCRIPT_DIR/oci_image_pull.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  oci_image_pull.py not found"
 cp "$SCRIPT_DIR/flask_oci_routes.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  flask_oci_routes.py not found"
 cp "$SCRIPT_DIR/oci/description_templates.py" "$APP_DIR/usr/bin/" 2>/dev/null || echo "⚠️  description_templates.py not found"
 
@@ -234,6 +247,19 @@ if [ -d "$APPIMAGE_ROOT/out" ]; then
         cp -r "$APPIMAGE_ROOT/public"/* "$APP_DIR/web/" 2>/dev/null || true
     fi
     cp "$APPIMAGE_ROOT/package.json" "$APP_DIR/web/"
+
+    # Precompressed siblings for the static asset layer (static_assets.py
+    # serves foo.js.br / foo.js.gz when the browser accepts them).
+    echo "🗜️  Precompressing web assets..."
+    find "$APP_DIR/web" -type f -size +1k \( -name '*.js' -o -name '*.mjs' -o -name '*.css' \
+        -o -name '*.html' -o -name '*.json' -o -name '*.map' -o -name '*.svg' -o -name '*.txt' \
+        -o -name '*.xml' -o -name '*.webmanifest' -o -name '*.ico' \) -print0 |
+        while IFS= read -r -d '' f; do
+            gzip -9 -n -k -f "$f"
+            if command -v brotli >/dev/null 2>&1; then
+                brotli -q 11 -k -f "$f"
+            fi
+        done
     
     echo "✅ Next.js static export copied successfully"
 else
@@ -0,0 +1,397 @@
+"""Fail2Ban state via the server's control socket.
+
+The Security page (`get_fail2ban_details`), tool detection and the
+health monitor's `_check_fail2ban_bans` each built their view of Fail2Ban
+from a serial chain of `fail2ban-client` runs — `--version`, `systemctl
+is-active`, `status`, then `status <jail>` plus three `get <jail> …` per
+jail. Every one of those is a fresh Python interpreter importing the
+fail2ban package, ~300 ms apiece, so a host with four jails spent several
+seconds per refresh.
+
+`fail2ban-client` is only a thin front end for the server socket: each
+command is a pickled argv list terminated by ``<F2B_END_COMMAND>``, and the
+answer a pickled ``(code, value)`` tuple. `Fail2BanSocket` speaks that
+protocol directly, so the whole snapshot is one connection and a handful
+of sub-millisecond round trips. Replies are unpickled with a restricted
+unpickler: builtins only, with fail2ban's own objects (e.g. the IPAddr
+entries in a ban list) reduced to their text.
+
+If the socket can't be used (not running as root, unknown reply format)
+the snapshot falls back to `fail2ban-client`, with the per-jail calls run
+concurrently instead of one after another.
+
+`get_snapshot()` caches the result for a few seconds so the Security
+page, tool detection and the health check share one refresh; writers
+(unban, jail config changes) call `invalidate()`.
+"""
+
+import builtins
+import io
+import pickle
+import re
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SOCKET_PATH = "/var/run/fail2ban/fail2ban.sock"
+_F2B_CONF_FILES = ("/etc/fail2ban/fail2ban.local", "/etc/fail2ban/fail2ban.conf")
+
+_END = b"<F2B_END_COMMAND>"
+_CLOSE = b"<F2B_CLOSE_COMMAND>"
+_SOCKET_TIMEOUT = 3
+_MAX_REPLY_BYTES = 16 * 1024 * 1024
+
+_SNAPSHOT_TTL = 10
+_JAIL_SETTINGS = ("findtime", "bantime", "maxretry")
+_CLI_WORKERS = 6
+_CLI_TIMEOUT = 10
+
+_SAFE_BUILTINS = {
+    "set", "frozenset", "list", "tuple", "dict", "str", "bytes", "bytearray",
+    "int", "float", "bool", "complex", "slice", "range",
+}
+
+_snapshot_lock = threading.Lock()
+_snapshot = {"data": None, "at": 0.0}
+
+
+class Fail2BanError(Exception):
+    """The server refused a command or the reply couldn't be read."""
+
+
+class _Opaque:
+    """Stand-in for a fail2ban-internal object found in a reply."""
+
+    def __new__(cls, *args, **kwargs):
+        obj = super().__new__(cls)
+        obj.args = args
+        obj.state = None
+        return obj
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __setstate__(self, state):
+        self.state = state
+
+    def text(self):
+        for arg in self.args:
+            if isinstance(arg, str):
+                return arg
+        state = self.state
+        if isinstance(state, tuple) and len(state) == 2:
+            # (dict, slots) form used for classes with __slots__
+            merged = {}
+            for part in state:
+                if isinstance(part, dict):
+                    merged.update(part)
+            state = merged
+        if isinstance(state, dict):
+            for key in ("_raw", "raw", "_addr", "ip"):
+                if isinstance(state.get(key), str):
+                    return state[key]
+        return ""
+
+
+def _reconstructor(cls, base, state):
+    # copyreg path for classes subclassing a builtin (str subclasses, …)
+    if isinstance(base, type) and base.__module__ == "builtins" and base is not object:
+        return base(state) if state is not None else base()
+    return _Opaque(state)
+
+
+class _SafeUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module == "builtins":
+            obj = getattr(builtins, name, None)
+            if isinstance(obj, type) and (name in _SAFE_BUILTINS or issubclass(obj, BaseException)):
+                return obj
+        elif module == "copyreg" and name == "_reconstructor":
+            return _reconstructor
+        elif module.startswith("fail2ban."):
+            return _Opaque
+        raise pickle.UnpicklingError(f"refusing to load {module}.{name}")
+
+
+def _plain(value):
+    """Reply value with any stand-in objects turned into strings."""
+    if isinstance(value, _Opaque):
+        return value.text()
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {_plain(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def get_socket_path():
+    """Socket path from fail2ban.local / fail2ban.conf, else the default."""
+    for conf in _F2B_CONF_FILES:
+        try:
+            with open(conf, "r") as f:
+                for line in f:
+                    m = re.match(r"^\s*socket\s*=\s*(\S+)", line)
+                    if m:
+                        return m.group(1)
+        except OSError:
+            continue
+    return DEFAULT_SOCKET_PATH
+
+
+class Fail2BanSocket:
+    """One connection to the Fail2Ban server; `send` is one round trip."""
+
+    def __init__(self, path=None, timeout=_SOCKET_TIMEOUT):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(path or get_socket_path())
+        except OSError:
+            self._sock.close()
+            raise
+        self._buf = b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, *command):
+        """Run one command (``send("status", "sshd")``) and return its value."""
+        payload = pickle.dumps([str(c) for c in command], 4)
+        self._sock.sendall(payload + _END)
+        raw = self._read_message()
+        try:
+            code, value = _SafeUnpickler(io.BytesIO(raw)).load()
+        except Exception as e:
+            raise Fail2BanError(f"unreadable reply to {command[0]!r}: {e}")
+        if code != 0:
+            raise Fail2BanError(str(_plain(value)))
+        return _plain(value)
+
+    def _read_message(self):
+        while True:
+            idx = self._buf.find(_END)
+            if idx >= 0:
+                message = self._buf[:idx]
+                self._buf = self._buf[idx + len(_END):]
+                return message
+            if len(self._buf) > _MAX_REPLY_BYTES:
+                raise Fail2BanError("reply too large")
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise Fail2BanError("connection closed by server")
+            self._buf += chunk
+
+    def close(self):
+        try:
+            self._sock.sendall(_CLOSE + _END)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+def _pairs(value):
+    """fail2ban status replies are lists of (label, value) pairs."""
+    out = {}
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, (list, tuple)) and len(item) == 2:
+                out[item[0]] = item[1]
+    return out
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _empty_jail(name):
+    return {
+        "name": name,
+        "currently_failed": 0,
+        "total_failed": 0,
+        "currently_banned": 0,
+        "total_banned": 0,
+        "banned_ips": [],
+        "findtime": "",
+        "bantime": "",
+        "maxretry": "",
+    }
+
+
+def _jail_from_status(name, status):
+    jail = _empty_jail(name)
+    top = _pairs(status)
+    flt = _pairs(top.get("Filter"))
+    act = _pairs(top.get("Actions"))
+    jail["currently_failed"] = _to_int(flt.get("Currently failed"))
+    jail["total_failed"] = _to_int(flt.get("Total failed"))
+    jail["currently_banned"] = _to_int(act.get("Currently banned"))
+    jail["total_banned"] = _to_int(act.get("Total banned"))
+    banned = act.get("Banned IP list") or []
+    if isinstance(banned, str):
+        banned = banned.split()
+    jail["banned_ips"] = [str(ip).strip() for ip in banned if str(ip).strip()]
+    return jail
+
+
+def _jail_names(value):
+    jail_list = _pairs(value).get("Jail list", "")
+    if isinstance(jail_list, (list, tuple)):
+        return [str(j).strip() for j in jail_list if str(j).strip()]
+    return [j.strip() for j in str(jail_list).split(",") if j.strip()]
+
+
+def _collect_socket(snap):
+    with Fail2BanSocket() as conn:
+        version = str(conn.send("version")).strip()
+        snap["version"] = f"Fail2Ban v{version}" if version else ""
+        snap["active"] = True
+        for name in _jail_names(conn.send("status")):
+            jail = _jail_from_status(name, conn.send("status", name))
+            for key in _JAIL_SETTINGS:
+                try:
+                    jail[key] = str(conn.send("get", name, key))
+                except Fail2BanError:
+                    pass
+            snap["jails"].append(jail)
+    snap["source"] = "socket"
+
+
+def _cli(*args):
+    try:
+        result = subprocess.run(
+            ["fail2ban-client", *args],
+            capture_output=True, text=True, timeout=_CLI_TIMEOUT
+        )
+        return result.returncode, result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return -1, ""
+
+
+def _parse_cli_status(name, out):
+    jail = _empty_jail(name)
+    fields = {
+        "Currently failed:": "currently_failed",
+        "Total failed:": "total_failed",
+        "Currently banned:": "currently_banned",
+        "Total banned:": "total_banned",
+    }
+    for line in out.splitlines():
+        line = line.strip()
+        for label, key in fields.items():
+            if label in line:
+                jail[key] = _to_int(line.split(":", 1)[1].strip())
+        if "Banned IP list:" in line:
+            jail["banned_ips"] = line.split(":", 1)[1].split()
+    return jail
+
+
+def _collect_cli(snap):
+    rc, out = _cli("--version")
+    if rc == 0 and out:
+        snap["version"] = out.split("\n")[0].strip()
+    try:
+        active = subprocess.run(
+            ["systemctl", "is-active", "fail2ban"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() == "active"
+    except (OSError, subprocess.TimeoutExpired):
+        active = False
+    snap["active"] = active
+    snap["source"] = "cli"
+    if not active:
+        return
+
+    rc, out = _cli("status")
+    names = []
+    if rc == 0:
+        for line in out.splitlines():
+            if "Jail list:" in line:
+                names = [j.strip() for j in line.split(":", 1)[1].split(",") if j.strip()]
+    if not names:
+        return
+
+    calls = [(name, None) for name in names] + [(name, key) for name in names for key in _JAIL_SETTINGS]
+    with ThreadPoolExecutor(max_workers=min(_CLI_WORKERS, len(calls))) as pool:
+        results = list(pool.map(
+            lambda call: _cli("status", call[0]) if call[1] is None else _cli("get", call[0], call[1]),
+            calls,
+        ))
+
+    jails = {name: _empty_jail(name) for name in names}
+    for (name, key), (rc, out) in zip(calls, results):
+        if rc != 0:
+            continue
+        if key is None:
+            parsed = _parse_cli_status(name, out)
+            for k in ("currently_failed", "total_failed", "currently_banned", "total_banned", "banned_ips"):
+                jails[name][k] = parsed[k]
+        elif out:
+            jails[name][key] = out.strip()
+    snap["jails"] = [jails[name] for name in names]
+
+
+def _collect():
+    snap = {
+        "installed": False,
+        "active": False,
+        "version": "",
+        "jails": [],
+        "source": None,
+        "fetched_at": time.time(),
+    }
+    if not (shutil.which("fail2ban-client") or shutil.which("fail2ban-server")):
+        return snap
+    snap["installed"] = True
+    try:
+        _collect_socket(snap)
+    except (OSError, Fail2BanError):
+        # No socket (server down), no permission, or a reply we can't
+        # read — the CLI path reports all of those properly.
+        snap.update(active=False, jails=[])
+        _collect_cli(snap)
+    return snap
+
+
+def get_snapshot(max_age=_SNAPSHOT_TTL):
+    """
+    Fail2Ban state: installed / active / version and per-jail counters,
+    banned IPs and findtime / bantime / maxretry. Cached for `max_age`
+    seconds; concurrent callers share one refresh. Treat as read-only.
+    """
+    with _snapshot_lock:
+        data = _snapshot["data"]
+        if data is not None and time.monotonic() - _snapshot["at"] < max_age:
+            return data
+        data = _collect()
+        _snapshot["data"] = data
+        _snapshot["at"] = time.monotonic()
+        return data
+
+
+def invalidate():
+    """Force the next `get_snapshot` to refresh (after bans / config changes)."""
+    _snapshot["at"] = 0.0
+
+
+def jail_banned_ips(jail):
+    """Current banned IPs of one jail, uncached, or None if it can't be read."""
+    try:
+        with Fail2BanSocket() as conn:
+            return set(_jail_from_status(jail, conn.send("status", jail))["banned_ips"])
+    except (OSError, Fail2BanError):
+        pass
+    rc, out = _cli("status", jail)
+    if rc != 0:
+        return None
+    return set(_parse_cli_status(jail, out)["banned_ips"])
@@ -6,9 +6,11 @@ ProxMenux OCI Routes
 REST API endpoints for OCI container app management.
 """
 
+import json
 import logging
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 
+import oci_image_pull
 import oci_manager
 from jwt_middleware import require_auth
 
@@ -29,11 +31,18 @@ def get_catalog():
     """
     List all available apps from the catalog.
     
+    Query params:
+        category: only apps of this category
+        q: case-insensitive search on id, name, category and summary
+
     Returns:
         List of apps with basic info and installation status.
     """
     try:
-        apps = oci_manager.list_available_apps()
+        apps = oci_manager.list_available_apps(
+            category=request.args.get("category") or None,
+            query=request.args.get("q") or None,
+        )
         return jsonify({
             "success": True,
             "apps": apps
@@ -286,6 +295,80 @@ def deploy_app():
         }), 500
 
 
+# =================================================================
+# Image Pull Endpoints
+# =================================================================
+
+@oci_bp.route("/pulls", methods=["POST"])
+@require_auth
+def start_pull():
+    """
+    Start pulling an OCI image into a template in the background.
+    A pull of the same image:tag + storage already running is joined.
+    
+    Body:
+        {
+            "image": "docker.io/tailscale/tailscale",
+            "tag": "stable",
+            "storage": "local"
+        }
+    
+    Returns:
+        The pull job (poll /pulls/<job_id> or follow /pulls/<job_id>/stream).
+    """
+    try:
+        data = request.get_json() or {}
+        image = data.get("image")
+        if not image:
+            return jsonify({"success": False, "message": "image is required"}), 400
+        started = oci_manager.pull_oci_image(
+            image, data.get("tag") or "latest",
+            data.get("storage") or oci_manager.DEFAULT_STORAGE, wait=False)
+        if not started.get("success"):
+            return jsonify(started), 400
+        job = oci_image_pull.get_job(started["job_id"])
+        return jsonify({"success": True, "job": job.snapshot()})
+    except Exception as e:
+        logger.error(f"Failed to start pull: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@oci_bp.route("/pulls", methods=["GET"])
+@require_auth
+def list_pulls():
+    """List running and recently finished pull jobs."""
+    return jsonify({"success": True, "jobs": oci_image_pull.list_jobs()})
+
+
+@oci_bp.route("/pulls/<job_id>", methods=["GET"])
+@require_auth
+def get_pull(job_id: str):
+    """Current state and progress of a pull job."""
+    job = oci_image_pull.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Pull job not found"}), 404
+    return jsonify({"success": True, "job": job.snapshot()})
+
+
+@oci_bp.route("/pulls/<job_id>/stream", methods=["GET"])
+@require_auth
+def stream_pull(job_id: str):
+    """Server-sent events: one ``data:`` event with the job snapshot per
+    progress change, ending when the pull finishes."""
+    job = oci_image_pull.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Pull job not found"}), 404
+    
+    def generate():
+        for snapshot in job.watch(keepalive=15):
+            if snapshot is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(snapshot)}\n\n"
+    
+    return Response(generate(), mimetype="text/event-stream")
+
+
 # =================================================================
 # Lifecycle Action Endpoints
 # =================================================================
@@ -545,6 +628,21 @@ def update_auth_key(app_id: str):
         }), 500
 
 
+@oci_bp.route("/installed/update-check", methods=["GET"])
+@require_auth
+def installed_update_check_all():
+    """Update check for every installed app in one request. Same cache
+    and ``?force=1`` semantics as the per-app route; apps are probed in
+    parallel (bounded) server-side."""
+    try:
+        force = request.args.get("force", "").lower() in ("1", "true", "yes")
+        results = oci_manager.check_apps_updates(force=force)
+        return jsonify({"success": True, "apps": results})
+    except Exception as e:
+        logger.error(f"Failed to check app updates: {e}")
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 @oci_bp.route("/installed/<app_id>/update-check", methods=["GET"])
 @require_auth
 def installed_update_check(app_id: str):
@@ -15,10 +15,17 @@ from datetime import datetime
 from pathlib import Path
 import uuid
 
+from log_broadcaster import LogBroadcaster
+
 # Allowed shape for interaction_id / session_id used as components of a file path.
 # Bounded length, no separators, no path traversal characters. See audit Tier 1 #11.
 _SAFE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
 
+# Finished sessions (and their compacted log entries) are kept this long so
+# the UI can still fetch the result / replay the log, then reaped.
+_SESSION_TTL = 3600
+_REAP_INTERVAL = 300
+
 class ScriptRunner:
     """Manages script execution with real-time log streaming and menu interactions"""
     
@@ -27,6 +34,8 @@ class ScriptRunner:
         self.log_dir = Path("/var/log/proxmenux/scripts")
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.interaction_handlers = {}
+        self._reaper_started = False
+        self._reaper_lock = threading.Lock()
     
     def create_session(self, script_name):
         """Create a new script execution session"""
@@ -40,8 +49,11 @@ class ScriptRunner:
             'status': 'initializing',
             'process': None,
             'exit_code': None,
-            'pending_interaction': None
+            'pending_interaction': None,
+            'broadcaster': None,
+            'finished_at': None
         }
+        self._ensure_reaper()
         
         return session_id
     
@@ -94,67 +106,41 @@ class ScriptRunner:
             print(f"[DEBUG] Process started with PID: {process.pid}", file=sys.stderr, flush=True)
             session['process'] = process
             
-            lines_read = [0]  # Lista para compartir entre threads
-            
-            def monitor_output():
-                print(f"[DEBUG] monitor_output thread started for session {session_id}", file=sys.stderr, flush=True)
-                print(f"[DEBUG] Will monitor log file: {log_file}", file=sys.stderr, flush=True)
-                
+            lines_read = [0]
+
+            def parse_line(line):
+                # Runs once per line on the broadcaster's tailer thread; the
+                # result is what every /api/scripts/logs subscriber receives.
+                if not line.strip():
+                    return None
+                lines_read[0] += 1
+                if 'WEB_INTERACTION:' in line:
+                    print(f"[DEBUG] Detected WEB_INTERACTION line: {line}", file=sys.stderr, flush=True)
+                    session['pending_interaction'] = line
                 try:
-                    # Read log file in real-time (similar to tail -f)
-                    last_position = 0
-                    
-                    # Wait a moment for script to start writing
-                    time.sleep(0.5)
-                    
-                    while process.poll() is None or last_position < os.path.getsize(log_file):
-                        try:
-                            if os.path.exists(log_file):
-                                with open(log_file, 'r') as log_f:
-                                    log_f.seek(last_position)
-                                    new_lines = log_f.readlines()
-                                    
-                                    for line in new_lines:
-                                        decoded_line = line.rstrip()
-                                        if decoded_line:  # Skip empty lines
-                                            lines_read[0] += 1
-                                            print(f"[DEBUG] Read line {lines_read[0]} from log: {decoded_line[:100]}...", file=sys.stderr, flush=True)
-                                            
-                                            # Check for interaction requests in the line
-                                            if 'WEB_INTERACTION:' in decoded_line:
-                                                print(f"[DEBUG] Detected WEB_INTERACTION line: {decoded_line}", file=sys.stderr, flush=True)
-                                                session['pending_interaction'] = decoded_line
-                                    
-                                    last_position = log_f.tell()
-                        
-                        except Exception as e:
-                            print(f"[DEBUG ERROR] Error reading log file: {e}", file=sys.stderr, flush=True)
-                        
-                        time.sleep(0.1)  # Poll every 100ms
-                    
-                    print(f"[DEBUG] monitor_output thread finished. Total lines read: {lines_read[0]}", file=sys.stderr, flush=True)
-                    
-                except Exception as e:
-                    print(f"[DEBUG ERROR] Exception in monitor_output: {e}", file=sys.stderr, flush=True)
-            
-            monitor_thread = threading.Thread(target=monitor_output, daemon=False)
-            monitor_thread.start()
-            
+                    return json.dumps(json.loads(line))
+                except json.JSONDecodeError:
+                    return json.dumps({'type': 'raw', 'message': line.strip()})
+
+            session['broadcaster'] = LogBroadcaster(
+                log_file,
+                parse=parse_line,
+                is_done=lambda: process.poll() is not None,
+            )
+
             print(f"[DEBUG] Waiting for process to complete...", file=sys.stderr, flush=True)
-            
+
             # Wait for completion
             process.wait()
             print(f"[DEBUG] Process exited with code: {process.returncode}", file=sys.stderr, flush=True)
-            
-            monitor_thread.join(timeout=30)
-            if monitor_thread.is_alive():
-                print(f"[DEBUG WARNING] monitor_thread still alive after 30s timeout", file=sys.stderr, flush=True)
-            else:
-                print(f"[DEBUG] monitor_thread joined successfully", file=sys.stderr, flush=True)
-            
+
+            if not session['broadcaster'].wait_closed(timeout=30):
+                print(f"[DEBUG WARNING] log broadcaster still draining after 30s timeout", file=sys.stderr, flush=True)
+
             session['exit_code'] = process.returncode
             session['status'] = 'completed' if process.returncode == 0 else 'failed'
             session['end_time'] = datetime.now().isoformat()
+            session['finished_at'] = time.time()
             
             print(f"[DEBUG] Script execution completed. Lines captured: {lines_read[0]}", file=sys.stderr, flush=True)
             
@@ -169,6 +155,7 @@ class ScriptRunner:
             print(f"[DEBUG ERROR] Exception in execute_script: {e}", file=sys.stderr, flush=True)
             session['status'] = 'error'
             session['error'] = str(e)
+            session['finished_at'] = time.time()
             return {
                 'success': False,
                 'error': str(e)
@@ -223,56 +210,68 @@ class ScriptRunner:
 
         return {'success': True}
     
-    def stream_logs(self, session_id):
-        """Generator that yields log entries as they are written"""
+    def stream_logs(self, session_id, offset=0, keepalive=None):
+        """
+        Generator that yields ``(index, entry)`` log entries from `offset`
+        on, replaying what was already written and then following the
+        session live. Every viewer subscribes to the session's single
+        broadcaster, so lines are read and parsed once however many are
+        attached. `keepalive` is forwarded to `LogBroadcaster.subscribe`.
+        """
         if session_id not in self.active_sessions:
-            yield json.dumps({'type': 'error', 'message': 'Invalid session ID'})
+            yield None, json.dumps({'type': 'error', 'message': 'Invalid session ID'})
             return
         
         session = self.active_sessions[session_id]
-        log_file = session['log_file']
         
-        # Wait for log file to be created
+        # Wait for the script to be started (the broadcaster is attached then)
         timeout = 10
         start = time.time()
-        while not os.path.exists(log_file) and (time.time() - start) < timeout:
+        while session.get('broadcaster') is None and session['status'] in ['initializing', 'running'] \
+                and (time.time() - start) < timeout:
             time.sleep(0.1)
         
-        if not os.path.exists(log_file):
-            yield json.dumps({'type': 'error', 'message': 'Log file not created'})
+        broadcaster = session.get('broadcaster')
+        if broadcaster is None:
+            yield None, json.dumps({'type': 'error', 'message': 'Log file not created'})
             return
         
-        # Stream log file
-        with open(log_file, 'r') as f:
-            # Start from beginning
-            f.seek(0)
-            
-            while session['status'] in ['initializing', 'running']:
-                line = f.readline()
-                if line:
-                    # Try to parse as JSON, yield as-is if not JSON
-                    try:
-                        log_entry = json.loads(line.strip())
-                        yield json.dumps(log_entry)
-                    except json.JSONDecodeError:
-                        yield json.dumps({'type': 'raw', 'message': line.strip()})
-                else:
-                    time.sleep(0.1)
-            
-            # Read any remaining lines after completion
-            for line in f:
-                try:
-                    log_entry = json.loads(line.strip())
-                    yield json.dumps(log_entry)
-                except json.JSONDecodeError:
-                    yield json.dumps({'type': 'raw', 'message': line.strip()})
+        yield from broadcaster.subscribe(offset, keepalive=keepalive)
     
     def cleanup_session(self, session_id):
         """Clean up a completed session"""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-            return {'success': True}
-        return {'success': False, 'error': 'Session not found'}
+        session = self.active_sessions.pop(session_id, None)
+        if session is None:
+            return {'success': False, 'error': 'Session not found'}
+        broadcaster = session.get('broadcaster')
+        if broadcaster is not None and not broadcaster.closed:
+            broadcaster.close()
+        return {'success': True}
+    
+    def _ensure_reaper(self):
+        """Start the thread that reclaims finished sessions (once)."""
+        with self._reaper_lock:
+            if self._reaper_started:
+                return
+            self._reaper_started = True
+        threading.Thread(target=self._reap_loop, daemon=True, name="script-session-reaper").start()
+    
+    def _reap_loop(self):
+        while True:
+            time.sleep(_REAP_INTERVAL)
+            try:
+                self.reap_sessions()
+            except Exception as e:
+                print(f"[DEBUG ERROR] Session reaper: {e}", file=sys.stderr, flush=True)
+    
+    def reap_sessions(self, ttl=_SESSION_TTL):
+        """Drop sessions that finished more than `ttl` seconds ago."""
+        cutoff = time.time() - ttl
+        expired = [sid for sid, s in list(self.active_sessions.items())
+                   if s.get('finished_at') is not None and s['finished_at'] < cutoff]
+        for sid in expired:
+            self.cleanup_session(sid)
+        return len(expired)
 
 # Global instance
 script_runner = ScriptRunner()
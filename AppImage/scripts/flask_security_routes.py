@@ -147,6 +147,23 @@ def firewall_edit_rule():
         return jsonify({"success": False, "message": str(e)}), 500
 
 
+@security_bp.route('/api/security/firewall/rules/bulk', methods=['POST'])
+@require_auth
+def firewall_bulk_rules():
+    """Apply several rule adds/edits/deletes in one write + reload"""
+    if not security_manager:
+        return jsonify({"success": False, "message": "Security manager not available"}), 500
+    try:
+        data = request.json or {}
+        success, message = security_manager.apply_firewall_changes(data.get("changes"))
+        if success:
+            return jsonify({"success": True, "message": message})
+        else:
+            return jsonify({"success": False, "message": message}), 400
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
 @security_bp.route('/api/security/firewall/monitor-port', methods=['POST'])
 @require_auth
 def firewall_add_monitor_port():
@@ -33,6 +33,8 @@ except ImportError:
     pass
 
 import glob
+import gzip
+import hashlib
 import json
 import logging
 import math
@@ -50,6 +52,7 @@ import tempfile
 import time
 import threading
 import urllib.parse
+import zlib
 import hardware_monitor
 from health_persistence import health_persistence
 import xml.etree.ElementTree as ET
@@ -59,7 +62,7 @@ from pathlib import Path
 
 import jwt
 import psutil
-from flask import Flask, jsonify, request, send_file, send_from_directory, Response, after_this_request
+from flask import Flask, jsonify, request, send_file, Response
 from flask_cors import CORS
 
 # Ensure local imports work even if working directory changes
@@ -79,6 +82,12 @@ from flask_notification_routes import notification_bp  # noqa: E402
 from flask_oci_routes import oci_bp  # noqa: E402
 from notification_manager import notification_manager  # noqa: E402
 import post_install_versions  # noqa: E402  — Sprint 12A: detect post-install function updates
+from json_provider import ProxMenuxJSONProvider  # noqa: E402
+import fail2ban_socket  # noqa: E402
+import guest_registry  # noqa: E402
+import inspect_cache  # noqa: E402
+import pve_task_index  # noqa: E402
+import static_assets  # noqa: E402
 from jwt_middleware import require_auth, require_auth_or_ticket  # noqa: E402
 import auth_manager  # noqa: E402
 
@@ -167,6 +176,8 @@ def get_proxmox_node_name() -> str:
 # Flask application and Blueprints
 # -------------------------------------------------------------------
 app = Flask(__name__)
+# orjson-backed jsonify when available, stdlib otherwise (see json_provider).
+app.json = ProxMenuxJSONProvider(app)
 # DoS / cost-amplification cap (audit Tier 3.1 — sin body-size cap en POSTs).
 # Without this an authenticated client could POST a 100 MB body to /api/notifications/test-ai
 # (or any other AI endpoint) and stall the dispatch thread plus rack up real
@@ -258,6 +269,88 @@ def _apply_security_headers(response):
     return response
 
 
+# -------------------------------------------------------------------
+# JSON compression + conditional GET
+# -------------------------------------------------------------------
+# The dashboard polls large JSON (/api/hardware, /api/storage,
+# /api/network, /api/health/full, /api/logs, /api/node/metrics …) every
+# few seconds and most polls return exactly what the previous one did.
+# Every JSON GET gets a strong ETag — the one the view set itself (e.g.
+# from a snapshot version) or a hash of the payload — and a matching
+# If-None-Match is answered with an empty 304. Bodies above
+# `_JSON_COMPRESS_MIN_BYTES` are gzip/br-encoded when the client accepts
+# it; the encoded representation's ETag carries the coding as a suffix so
+# caches never mix them up. `private, no-cache` lets the browser keep the
+# body and revalidate instead of refetching it.
+_JSON_COMPRESS_MIN_BYTES = 1400
+_JSON_GZIP_LEVEL = 5
+_JSON_BROTLI_QUALITY = 4
+
+try:
+    import brotli as _json_brotli
+except ImportError:
+    _json_brotli = None
+
+
+def _json_etag_matches(base):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        if candidate == base or candidate.startswith(base + '-'):
+            return True
+    return False
+
+
+@app.after_request
+def _compress_json_response(response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    if response.mimetype != 'application/json' or response.direct_passthrough \
+            or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    try:
+        data = response.get_data()
+        base, _weak = response.get_etag()
+        if not base:
+            base = hashlib.blake2b(data, digest_size=12).hexdigest()
+        response.headers.setdefault('Cache-Control', 'private, no-cache')
+        response.vary.add('Accept-Encoding')
+
+        encoding = None
+        if len(data) >= _JSON_COMPRESS_MIN_BYTES:
+            accepted = static_assets.accepted_encodings()
+            if 'br' in accepted and _json_brotli is not None:
+                encoding = 'br'
+            elif 'gzip' in accepted:
+                encoding = 'gzip'
+        etag = f'{base}-{encoding}' if encoding else base
+
+        if _json_etag_matches(base):
+            not_modified = app.response_class(status=304)
+            for header in ('Cache-Control', 'Vary'):
+                not_modified.headers[header] = response.headers[header]
+            not_modified.set_etag(etag)
+            return not_modified
+
+        if encoding == 'br':
+            response.set_data(_json_brotli.compress(data, quality=_JSON_BROTLI_QUALITY))
+        elif encoding == 'gzip':
+            response.set_data(gzip.compress(data, compresslevel=_JSON_GZIP_LEVEL))
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+    except Exception as e:
+        print(f"[ProxMenux] JSON response post-processing failed: {e}")
+    return response
+
+
 # -------------------------------------------------------------------
 # Fail2Ban application-level ban check (for reverse proxy scenarios)
 # -------------------------------------------------------------------
@@ -265,12 +358,11 @@ def _apply_security_headers(response):
 # the real client IP because the TCP connection comes from the proxy.
 # This middleware checks if the client's real IP (from X-Forwarded-For)
 # is banned in the 'proxmenux' fail2ban jail and blocks at app level.
-import subprocess as _f2b_subprocess
 import time as _f2b_time
 import shutil as _f2b_shutil
 
-# Cache banned IPs for 30 seconds to avoid calling fail2ban-client on every request
-_f2b_banned_cache = {"ips": set(), "ts": 0, "ttl": 30}
+import ipaddress as _f2b_ipaddress
+
 # One-time check at module import — when Fail2Ban isn't installed we want
 # the @app.before_request middleware to be a no-op. Without this guard
 # every HTTP request to the Monitor went through _f2b_get_banned_ips() →
@@ -281,37 +373,153 @@ _f2b_banned_cache = {"ips": set(), "ts": 0, "ttl": 30}
 # Fixed in v1.2.1.4 perf audit.
 _F2B_BINARY = _f2b_shutil.which("fail2ban-client")
 
+# The ban set used to be a 30 s TTL cache refreshed from inside
+# before_request, so every 30 s some request paid a `fail2ban-client`
+# round trip and a fresh ban took up to 30 s to bite. A background
+# watcher now owns it: one authoritative `status` read at start, then it
+# tails /var/log/fail2ban.log once a second and applies Ban / Unban lines
+# for our jail as they land. A periodic full `status` resync catches
+# anything the log can't tell us (bans set while the log was rotated
+# away, a jail reload). When the log isn't readable (logtarget=journal)
+# the watcher simply polls `status` on a short interval instead.
+# The request path only does a set lookup on an immutable snapshot.
+_F2B_JAIL = "proxmenux"
+_F2B_LOG_FILE = "/var/log/fail2ban.log"
+_F2B_TAIL_INTERVAL = 1.0
+_F2B_RESYNC_INTERVAL = 300
+_F2B_POLL_INTERVAL = 10
+
+_f2b_ban_state = {"exact": frozenset(), "networks": ()}
+_F2B_WATCHER_STARTED = False
+_f2b_watcher_lock = threading.Lock()
+
+
+def _f2b_set_bans(entries):
+    """Publish a new ban snapshot from an iterable of IP / CIDR strings.
+    Plain addresses go into a frozenset for O(1) lookups; real prefixes
+    (e.g. a manual `banip 198.51.100.0/24`) into a short network tuple."""
+    global _f2b_ban_state
+    exact, networks = set(), []
+    for entry in entries:
+        try:
+            if "/" in entry:
+                net = _f2b_ipaddress.ip_network(entry, strict=False)
+                if net.num_addresses == 1:
+                    exact.add(str(net.network_address))
+                else:
+                    networks.append(net)
+            else:
+                exact.add(str(_f2b_ipaddress.ip_address(entry)))
+        except ValueError:
+            exact.add(entry)
+    _f2b_ban_state = {"exact": frozenset(exact), "networks": tuple(networks)}
+
 
-def _f2b_get_banned_ips():
-    """Get currently banned IPs from the proxmenux jail, with caching."""
-    if _F2B_BINARY is None:
-        # Fail2Ban isn't installed on this host. Skip the subprocess
-        # entirely; the @app.before_request middleware will see an empty
-        # banned-IPs set and let every request through (which is the
-        # correct behaviour — there's no Fail2Ban to honour).
-        return _f2b_banned_cache["ips"]
-    now = _f2b_time.time()
-    if now - _f2b_banned_cache["ts"] < _f2b_banned_cache["ttl"]:
-        return _f2b_banned_cache["ips"]
-    try:
-        result = _f2b_subprocess.run(
-            [_F2B_BINARY, "status", "proxmenux"],
-            capture_output=True, text=True, timeout=5
-        )
-        if result.returncode == 0:
-            for line in result.stdout.splitlines():
-                if "Banned IP list:" in line:
-                    ip_str = line.split(":", 1)[1].strip()
-                    banned = set(ip.strip() for ip in ip_str.split() if ip.strip())
-                    _f2b_banned_cache["ips"] = banned
+def _f2b_status_banned():
+    """Authoritative ban list for our jail (server socket, falling back to
+    `fail2ban-client status <jail>`), or None when it can't be queried."""
+    try:
+        return fail2ban_socket.jail_banned_ips(_F2B_JAIL)
     except Exception:
+        return None
+
+
+def _f2b_watcher_loop():
+    try:
+        from security_manager import parse_fail2ban_log_line
+    except Exception:
+        parse_fail2ban_log_line = None
+
+    current = _f2b_status_banned() or set()
+    _f2b_set_bans(current)
+    last_sync = _f2b_time.monotonic()
+    log_inode, log_pos = None, 0
+    try:
+        st = os.stat(_F2B_LOG_FILE)
+        log_inode, log_pos = st.st_ino, st.st_size
+    except OSError:
         pass
-    # Always update the timestamp — even on exception / non-zero rc /
-    # missing jail. Caches the negative result for the same TTL so a
-    # transient Fail2Ban outage doesn't trigger one subprocess call per
-    # HTTP request until it recovers.
-    _f2b_banned_cache["ts"] = now
-    return _f2b_banned_cache["ips"]
+
+    while True:
+        _f2b_time.sleep(_F2B_TAIL_INTERVAL)
+        log_ok = False
+        resync = False
+        if parse_fail2ban_log_line is not None:
+            try:
+                st = os.stat(_F2B_LOG_FILE)
+                if st.st_ino != log_inode or st.st_size < log_pos:
+                    # Rotated or truncated — start over on the new file.
+                    log_inode, log_pos = st.st_ino, 0
+                if st.st_size > log_pos:
+                    with open(_F2B_LOG_FILE, "rb") as f:
+                        f.seek(log_pos)
+                        chunk = f.read()
+                    # Only consume complete lines.
+                    consumed = chunk.rfind(b"\n") + 1
+                    log_pos += consumed
+                    changed = False
+                    for line in chunk[:consumed].decode("utf-8", errors="replace").splitlines():
+                        event = parse_fail2ban_log_line(line)
+                        if event is None:
+                            # Jail (re)start / server shutdown — bans may
+                            # have been flushed or restored wholesale.
+                            if f"'{_F2B_JAIL}'" in line or "Shutdown in progress" in line:
+                                resync = True
+                            continue
+                        if event["jail"] != _F2B_JAIL:
+                            continue
+                        if event["action"] == "ban" and event["ip"] not in current:
+                            current.add(event["ip"])
+                            changed = True
+                        elif event["action"] == "unban" and event["ip"] in current:
+                            current.discard(event["ip"])
+                            changed = True
+                    if changed:
+                        _f2b_set_bans(current)
+                log_ok = True
+            except OSError:
+                log_inode, log_pos = None, 0
+
+        interval = _F2B_RESYNC_INTERVAL if log_ok else _F2B_POLL_INTERVAL
+        if resync or _f2b_time.monotonic() - last_sync >= interval:
+            banned = _f2b_status_banned()
+            if banned is not None:
+                current = banned
+                _f2b_set_bans(current)
+            last_sync = _f2b_time.monotonic()
+
+
+def _ensure_f2b_watcher():
+    """Start the ban watcher once. Checked and set under the lock — two
+    concurrent first requests must not both spawn a watcher."""
+    global _F2B_WATCHER_STARTED
+    if _F2B_WATCHER_STARTED or _F2B_BINARY is None:
+        return
+    with _f2b_watcher_lock:
+        if _F2B_WATCHER_STARTED:
+            return
+        _F2B_WATCHER_STARTED = True
+    threading.Thread(target=_f2b_watcher_loop, daemon=True, name="f2b-ban-watcher").start()
+
+
+def _f2b_is_banned(client_ip):
+    """Return True when `client_ip` is in the proxmenux jail's ban set."""
+    state = _f2b_ban_state
+    if client_ip in state["exact"]:
+        return True
+    if not state["networks"] and ":" not in client_ip:
+        return False
+    try:
+        addr = _f2b_ipaddress.ip_address(client_ip)
+    except ValueError:
+        return False
+    mapped = getattr(addr, "ipv4_mapped", None)
+    if mapped is not None:
+        addr = mapped
+    if str(addr) in state["exact"]:
+        return True
+    return any(addr in net for net in state["networks"] if net.version == addr.version)
+
 
 # XFF / X-Real-IP are only honored when the operator opts in by setting
 # PROXMENUX_TRUST_PROXY=1 (deployment is behind a real reverse proxy that the
@@ -336,9 +544,9 @@ def _f2b_get_client_ip():
 @app.before_request
 def check_fail2ban_ban():
     """Block requests from IPs banned by fail2ban (works with reverse proxies)."""
+    _ensure_f2b_watcher()
     client_ip = _f2b_get_client_ip()
-    banned_ips = _f2b_get_banned_ips()
-    if client_ip in banned_ips:
+    if _f2b_is_banned(client_ip):
         return jsonify({
             "success": False,
             "message": "Access denied. Your IP has been temporarily banned due to too many failed login attempts."
@@ -1557,6 +1765,196 @@ def get_cached_pvesh_storage_list():
     return _pvesh_cache['storage_list'] or []
 
 
+
+# Backup content index. `/api/backups` used to walk every backup-capable
+# storage serially with `pvesh get …/content`, and `/api/vms/<id>/backups`
+# repeated the same walk per guest — one stale NFS/CIFS mount held the
+# whole response for the full timeout. The index enumerates all storages
+# in parallel, each against its own deadline; a storage that misses it is
+# marked unavailable (keeping its last-known entries) and skipped for
+# `_BACKUP_INDEX_UNAVAILABLE_BACKOFF` so the next refresh doesn't block on
+# it again. TaskWatcher invalidates the index when a vzdump / prune /
+# volume-delete task finishes, so the TTL only covers changes made behind
+# PVE's back (e.g. a PBS-side prune).
+_BACKUP_INDEX_TTL = 120
+_BACKUP_INDEX_STORAGE_TIMEOUT = 8
+_BACKUP_INDEX_MAX_WORKERS = 6
+_BACKUP_INDEX_UNAVAILABLE_BACKOFF = 60
+_BACKUP_INDEX_INVALIDATING_TASKS = ('vzdump', 'imgdel', 'prunebackups')
+
+_backup_index = {
+    'built_at': 0.0,
+    'generation': 0,      # bumped by _backup_index_invalidate()
+    'built_generation': -1,
+    # (entries_by_storage, by_vmid, storage_states):
+    #   storage_id -> [entry, …]
+    #   vmid (str) -> [entry, …]
+    #   storage_id -> {'status', 'error', 'checked_at', 'count'}
+    # Rebuilt as new dicts and swapped in as one tuple, so readers
+    # iterating a view without the lock never see it change.
+    'view': ({}, {}, {}),
+}
+_backup_index_lock = threading.Lock()
+
+
+def _backup_index_parse_item(storage_id: str, item: dict):
+    """Normalise one `pvesh …/content` row into an index entry, or None
+    for non-backup content."""
+    if item.get('content') != 'backup':
+        return None
+    volid = item.get('volid', '')
+    backup_type = item.get('subtype', '')
+    if not backup_type:
+        if 'vzdump-qemu-' in volid:
+            backup_type = 'qemu'
+        elif 'vzdump-lxc-' in volid:
+            backup_type = 'lxc'
+    vmid = item.get('vmid')
+    if vmid is None and backup_type in ('qemu', 'lxc'):
+        try:
+            vmid = volid.split(f'vzdump-{backup_type}-')[1].split('-')[0]
+        except Exception:
+            vmid = None
+    return {
+        'volid': volid,
+        'storage': storage_id,
+        'vmid': str(vmid) if vmid is not None else None,
+        'type': backup_type or None,
+        'size': item.get('size', 0) or 0,
+        'ctime': item.get('ctime', 0) or 0,
+        'notes': item.get('notes', ''),
+    }
+
+
+def _backup_index_list_storage(storage_id: str) -> list:
+    result = subprocess.run(
+        ['pvesh', 'get', f'/nodes/localhost/storage/{storage_id}/content',
+         '--content', 'backup', '--output-format', 'json'],
+        capture_output=True, text=True, timeout=_BACKUP_INDEX_STORAGE_TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError((result.stderr or result.stdout or 'pvesh failed').strip()[:200])
+    entries = []
+    for item in json.loads(result.stdout or '[]'):
+        entry = _backup_index_parse_item(storage_id, item)
+        if entry:
+            entries.append(entry)
+    return entries
+
+
+def _backup_index_invalidate() -> None:
+    """Mark the index stale; the next reader rebuilds it. Deliberately
+    lock-free — it runs on TaskWatcher's thread and must not wait behind
+    a refresh that's stuck on a slow storage. A refresh already in
+    progress records the generation it started from, so an invalidation
+    landing mid-refresh still forces another rebuild."""
+    _backup_index['generation'] += 1
+
+
+def _backup_index_on_task_completed(task_type, vmid, status, upid, endtime) -> None:
+    if task_type in _BACKUP_INDEX_INVALIDATING_TASKS:
+        _backup_index_invalidate()
+
+
+try:
+    from notification_events import register_task_completion_listener
+    register_task_completion_listener(_backup_index_on_task_completed)
+except Exception as e:
+    print(f"[backup-index] task completion hook unavailable: {e}")
+
+
+def _backup_index_refresh() -> None:
+    """Re-enumerate every backup-capable storage in parallel. Caller
+    holds `_backup_index_lock`."""
+    from concurrent.futures import ThreadPoolExecutor, wait
+    generation = _backup_index['generation']
+    now = time.time()
+    storages = get_cached_pvesh_storage_list() or []
+    wanted = []
+    for storage in storages:
+        storage_id = storage.get('storage')
+        if not storage_id:
+            continue
+        if 'backup' not in (storage.get('content') or '') and storage.get('type') != 'pbs':
+            continue
+        wanted.append(storage_id)
+
+    old_entries, _old_by_vmid, old_states = _backup_index['view']
+    # Fresh dicts (storages removed from storage.cfg dropped); the
+    # published view is never modified in place.
+    entries = {sid: v for sid, v in old_entries.items() if sid in wanted}
+    states = {sid: v for sid, v in old_states.items() if sid in wanted}
+
+    todo = []
+    for storage_id in wanted:
+        state = states.get(storage_id)
+        if state and state['status'] == 'unavailable' and \
+           now - state['checked_at'] < _BACKUP_INDEX_UNAVAILABLE_BACKOFF:
+            continue
+        todo.append(storage_id)
+
+    if todo:
+        pool = ThreadPoolExecutor(max_workers=min(_BACKUP_INDEX_MAX_WORKERS, len(todo)),
+                                  thread_name_prefix='backup-index')
+        futures = {pool.submit(_backup_index_list_storage, sid): sid for sid in todo}
+        # Small grace over the per-call timeout so subprocess gets to
+        # report its own TimeoutExpired before we give up on the future.
+        done, pending = wait(futures, timeout=_BACKUP_INDEX_STORAGE_TIMEOUT + 2)
+        pool.shutdown(wait=False)
+        for fut in done:
+            storage_id = futures[fut]
+            try:
+                entries[storage_id] = fut.result()
+                states[storage_id] = {'status': 'ok', 'error': None, 'checked_at': now,
+                                      'count': len(entries[storage_id])}
+            except subprocess.TimeoutExpired:
+                states[storage_id] = {'status': 'unavailable', 'error': 'timed out',
+                                      'checked_at': now,
+                                      'count': len(entries.get(storage_id, []))}
+            except Exception as e:
+                states[storage_id] = {'status': 'unavailable', 'error': str(e)[:200],
+                                      'checked_at': now,
+                                      'count': len(entries.get(storage_id, []))}
+        for fut in pending:
+            storage_id = futures[fut]
+            states[storage_id] = {'status': 'unavailable', 'error': 'timed out',
+                                  'checked_at': now,
+                                  'count': len(entries.get(storage_id, []))}
+
+    by_vmid: dict = {}
+    for storage_entries in entries.values():
+        for entry in storage_entries:
+            if entry['vmid'] is not None:
+                by_vmid.setdefault(entry['vmid'], []).append(entry)
+    _backup_index['view'] = (entries, by_vmid, states)
+    _backup_index['built_at'] = now
+    _backup_index['built_generation'] = generation
+
+
+def get_backup_index():
+    """Return `(entries_by_storage, by_vmid, storage_states)` from the
+    backup content index, rebuilding it when stale. Single-flight like
+    `get_cached_pvesh_cluster_resources_vm`: concurrent callers after an
+    invalidation wait for one rebuild instead of each spawning pvesh.
+    The dicts are a consistent snapshot that a rebuild never mutates;
+    callers must not modify them either."""
+    def _fresh():
+        return _backup_index['built_generation'] == _backup_index['generation'] and \
+            time.time() - _backup_index['built_at'] < _BACKUP_INDEX_TTL
+
+    if not _fresh():
+        with _backup_index_lock:
+            if not _fresh():
+                try:
+                    _backup_index_refresh()
+                except Exception as e:
+                    print(f"[backup-index] refresh failed: {e}")
+    return _backup_index['view']
+
+
+def _backup_index_unavailable(storage_states: dict) -> list:
+    return sorted(sid for sid, st in storage_states.items() if st.get('status') != 'ok')
+
 def get_cached_sensors_output():
     """Get sensors output with 10s cache."""
     global _sensors_cache
@@ -2407,8 +2805,17 @@ def get_vm_lxc_names():
                     }
 
         else:
-            # print(f"[v0] pvesh command failed: {result.stderr}")
-            pass
+            # pvesh unavailable (pveproxy restarting, cluster FS busy):
+            # names still come from the parsed guest configs.
+            for guest in guest_registry.all_guests():
+                if not guest['local']:
+                    continue
+                vmid = int(guest['vmid'])
+                vm_lxc_map[vmid] = {
+                    'name': guest['name'] or f'VM-{vmid}',
+                    'type': 'lxc' if guest['type'] == 'ct' else 'vm',
+                    'status': 'running' if guest_registry.is_running(vmid) else 'stopped',
+                }
     except FileNotFoundError:
         # print("[v0] pvesh command not found - Proxmox not installed")
         pass
@@ -2422,44 +2829,14 @@ def get_vm_lxc_names():
 def serve_dashboard():
     """Serve the main dashboard page from Next.js build"""
     try:
-        appimage_root = os.environ.get('APPDIR')
-        if not appimage_root:
-            # Fallback: detect from script location
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            if base_dir.endswith('usr/bin'):
-                # We're in usr/bin/, go up 2 levels to AppImage root
-                appimage_root = os.path.dirname(os.path.dirname(base_dir))
-            else:
-                # Fallback: assume we're in the root
-                appimage_root = os.path.dirname(base_dir)
-        
-        # print(f"[v0] Detected AppImage root: {appimage_root}")
-        pass
-        
-        index_path = os.path.join(appimage_root, 'web', 'index.html')
-        abs_path = os.path.abspath(index_path)
-        
-        # print(f"[v0] Looking for index.html at: {abs_path}")
-        pass
-        
-        if os.path.exists(abs_path):
-            # print(f"[v0] ✅ Found index.html, serving from: {abs_path}")
-            pass
-            return send_file(abs_path)
-        
-        # If not found, show detailed error
-
+        response = static_assets.serve('index.html')
+        if response is not None:
+            return response
 
-        web_dir = os.path.join(appimage_root, 'web')
-        if os.path.exists(web_dir):
-            # print(f"[v0] Contents of {web_dir}:")
-            pass
-            for item in os.listdir(web_dir):
-                # print(f"[v0]   - {item}")
-                pass
-        else:
-            # print(f"[v0] Web directory does not exist: {web_dir}")
-            pass
+        # If not found, show detailed error
+        web_dir = static_assets.get_web_root()
+        abs_path = os.path.join(web_dir, 'index.html')
+        appimage_root = os.path.dirname(web_dir)
         
         return f'''
         <!DOCTYPE html>
@@ -2553,25 +2930,10 @@ def serve_sw():
 
 @app.route('/_next/<path:filename>')
 def serve_next_static(filename):
-    """Serve Next.js static files"""
+    """Serve Next.js static files (immutable-cached, precompressed)"""
     try:
-        appimage_root = os.environ.get('APPDIR')
-        if not appimage_root:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            if base_dir.endswith('usr/bin'):
-                appimage_root = os.path.dirname(os.path.dirname(base_dir))
-            else:
-                appimage_root = os.path.dirname(base_dir)
-        
-        static_dir = os.path.join(appimage_root, 'web', '_next')
-        file_path = os.path.join(static_dir, filename)
-        
-        if os.path.exists(file_path):
-            return send_file(file_path)
-        
-        # print(f"[v0] ❌ Next.js static file not found: {file_path}")
-        pass
-        return '', 404
+        response = static_assets.serve(f'_next/{filename}')
+        return response if response is not None else ('', 404)
     except Exception as e:
         # print(f"Error serving Next.js static file {filename}: {e}")
         pass
@@ -2581,21 +2943,8 @@ def serve_next_static(filename):
 def serve_static_files(filename):
     """Serve static files (icons, etc.)"""
     try:
-        appimage_root = os.environ.get('APPDIR')
-        if not appimage_root:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            if base_dir.endswith('usr/bin'):
-                appimage_root = os.path.dirname(os.path.dirname(base_dir))
-            else:
-                appimage_root = os.path.dirname(base_dir)
-        
-        web_dir = os.path.join(appimage_root, 'web')
-        file_path = os.path.join(web_dir, filename)
-        
-        if os.path.exists(file_path):
-            return send_from_directory(web_dir, filename)
-        
-        return '', 404
+        response = static_assets.serve(filename)
+        return response if response is not None else ('', 404)
     except Exception as e:
         # print(f"Error serving static file {filename}: {e}")
         pass
@@ -2605,29 +2954,8 @@ def serve_static_files(filename):
 def serve_images(filename):
     """Serve image files"""
     try:
-        appimage_root = os.environ.get('APPDIR')
-        if not appimage_root:
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            if base_dir.endswith('usr/bin'):
-                appimage_root = os.path.dirname(os.path.dirname(base_dir))
-            else:
-                appimage_root = os.path.dirname(base_dir)
-        
-        image_dir = os.path.join(appimage_root, 'web', 'images')
-        file_path = os.path.join(image_dir, filename)
-        abs_path = os.path.abspath(file_path)
-        
-        # print(f"[v0] Looking for image: {filename} at {abs_path}")
-        pass
-        
-        if os.path.exists(abs_path):
-            # print(f"[v0] ✅ Serving image from: {abs_path}")
-            pass
-            return send_from_directory(image_dir, filename)
-        
-        # print(f"[v0] ❌ Image not found: {abs_path}")
-        pass
-        return '', 404
+        response = static_assets.serve(f'images/{filename}')
+        return response if response is not None else ('', 404)
     except Exception as e:
         # print(f"Error serving image {filename}: {e}")
         pass
@@ -7320,9 +7648,7 @@ def _sriov_pci_render_node(bdf):
 def _sriov_guest_running(guest_type, gid):
     """Best-effort status check. Returns True if running, False otherwise."""
     try:
-        cmd = ['qm' if guest_type == 'vm' else 'pct', 'status', str(gid)]
-        r = subprocess.run(cmd, capture_output=True, text=True, timeout=3)
-        return 'running' in (r.stdout or '').lower()
+        return guest_registry.is_running(gid)
     except Exception:
         return False
 
@@ -7330,65 +7656,42 @@ def _sriov_guest_running(guest_type, gid):
 def _sriov_find_guest_consumer(bdf):
     """Find the VM or LXC that consumes a given VF (or PF) on the host.
 
-    VMs: scan /etc/pve/qemu-server/*.conf for a `hostpci<N>: ` line that
-         references the BDF (short or full form, possibly alongside other
-         ids separated by ';' and trailing options after ',').
-    LXCs: resolve the BDF to its DRM render node (if any) and scan
-         /etc/pve/lxc/*.conf for `dev<N>:` or `lxc.mount.entry:` lines that
-         reference that node.
+    VMs: a local VM whose `hostpci<N>:` entry references the BDF (short or
+         full form, possibly alongside other ids separated by ';').
+    LXCs: resolve the BDF to its DRM render node (if any) and look for a
+         local CT whose `dev<N>:` or `lxc.mount.entry:` lines pass that
+         node through.
+
+    Both lookups are served by guest_registry's indexes, so the GPU modal
+    doesn't re-read every guest config per VF.
 
     Returns {type, id, name, running} or None.
     """
-    short_bdf = bdf[5:] if bdf.startswith('0000:') else bdf
     full_bdf = bdf if bdf.startswith('0000:') else f'0000:{bdf}'
 
-    # ── VM scan ──
     try:
-        for conf in sorted(glob.glob('/etc/pve/qemu-server/*.conf')):
-            try:
-                with open(conf, 'r') as f:
-                    text = f.read()
-            except OSError:
-                continue
-            if re.search(
-                rf'^hostpci\d+:\s*[^\n]*(?:0000:)?{re.escape(short_bdf)}(?:[,;\s]|$)',
-                text, re.MULTILINE,
-            ):
-                vmid = os.path.basename(conf)[:-5]  # strip '.conf'
-                nm = re.search(r'^name:\s*(\S+)', text, re.MULTILINE)
-                name = nm.group(1) if nm else ''
-                return {
-                    'type': 'vm',
-                    'id': vmid,
-                    'name': name,
-                    'running': _sriov_guest_running('vm', vmid),
-                }
+        vmid = guest_registry.by_pci(bdf)
+        if vmid:
+            return {
+                'type': 'vm',
+                'id': vmid,
+                'name': guest_registry.name(vmid),
+                'running': _sriov_guest_running('vm', vmid),
+            }
     except Exception:
         pass
 
-    # ── LXC scan (via render node) ──
     render_node = _sriov_pci_render_node(full_bdf)
     if render_node:
         try:
-            for conf in sorted(glob.glob('/etc/pve/lxc/*.conf')):
-                try:
-                    with open(conf, 'r') as f:
-                        text = f.read()
-                except OSError:
-                    continue
-                if re.search(
-                    rf'^(?:dev\d+|lxc\.mount\.entry):\s*[^\n]*{re.escape(render_node)}(?:[,;\s]|$)',
-                    text, re.MULTILINE,
-                ):
-                    ctid = os.path.basename(conf)[:-5]
-                    nm = re.search(r'^hostname:\s*(\S+)', text, re.MULTILINE)
-                    name = nm.group(1) if nm else ''
-                    return {
-                        'type': 'lxc',
-                        'id': ctid,
-                        'name': name,
-                        'running': _sriov_guest_running('lxc', ctid),
-                    }
+            ctid = guest_registry.by_device(render_node)
+            if ctid:
+                return {
+                    'type': 'lxc',
+                    'id': ctid,
+                    'name': guest_registry.name(ctid),
+                    'running': _sriov_guest_running('lxc', ctid),
+                }
         except Exception:
             pass
 
@@ -11235,75 +11538,30 @@ def api_backups():
     try:
         backups = []
 
-        # Get list of storage locations (shared 30s cache — same
-        # underlying call also serves /api/backup-storages and
-        # /api/vms/<id>/backups).
-        try:
-            storages = get_cached_pvesh_storage_list()
-            if storages:
-                # For each storage, get backup files
-                for storage in storages:
-                    storage_id = storage.get('storage')
-                    storage_type = storage.get('type')
-                    
-                    # Only check storages that can contain backups
-                    if storage_type in ['dir', 'nfs', 'cifs', 'pbs']:
-                        try:
-                            # Get content of storage
-                            content_result = subprocess.run(
-                                ['pvesh', 'get', f'/nodes/localhost/storage/{storage_id}/content', '--output-format', 'json'],
-                                capture_output=True, text=True, timeout=10)
-                            
-                            if content_result.returncode == 0:
-                                contents = json.loads(content_result.stdout)
-                                
-                                for item in contents:
-                                    if item.get('content') == 'backup':
-                                        # Parse backup information
-                                        volid = item.get('volid', '')
-                                        size = item.get('size', 0)
-                                        ctime = item.get('ctime', 0)
-                                        
-                                        # Extract VMID from volid (format: storage:backup/vzdump-qemu-100-...)
-                                        vmid = None
-                                        backup_type = None
-                                        if 'vzdump-qemu-' in volid:
-                                            backup_type = 'qemu'
-                                            try:
-                                                vmid = volid.split('vzdump-qemu-')[1].split('-')[0]
-                                            except:
-                                                pass
-                                        elif 'vzdump-lxc-' in volid:
-                                            backup_type = 'lxc'
-                                            try:
-                                                vmid = volid.split('vzdump-lxc-')[1].split('-')[0]
-                                            except:
-                                                pass
-                                        
-                                        backups.append({
-                                            'volid': volid,
-                                            'storage': storage_id,
-                                            'vmid': vmid,
-                                            'type': backup_type,
-                                            'size': size,
-                                            'size_human': format_bytes(size),
-                                            'created': datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M:%S'),
-                                            'timestamp': ctime
-                                        })
-                        except Exception as e:
-                            # print(f"Error getting content for storage {storage_id}: {e}")
-                            pass
-                            continue
-        except Exception as e:
-            # print(f"Error getting storage list: {e}")
-            pass
-        
+        # Served from the backup content index (parallel per-storage
+        # enumeration, invalidated by vzdump completions).
+        entries_by_storage, _by_vmid, storage_states = get_backup_index()
+        for storage_entries in entries_by_storage.values():
+            for entry in storage_entries:
+                ctime = entry['ctime']
+                backups.append({
+                    'volid': entry['volid'],
+                    'storage': entry['storage'],
+                    'vmid': entry['vmid'],
+                    'type': entry['type'],
+                    'size': entry['size'],
+                    'size_human': format_bytes(entry['size']),
+                    'created': datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M:%S'),
+                    'timestamp': ctime
+                })
+
         # Sort by creation time (newest first)
         backups.sort(key=lambda x: x['timestamp'], reverse=True)
-        
+
         return jsonify({
             'backups': backups,
-            'total': len(backups)
+            'total': len(backups),
+            'unavailable_storages': _backup_index_unavailable(storage_states),
         })
         
     except Exception as e:
@@ -11488,138 +11746,124 @@ def api_vm_backups(vmid):
     """Get list of backups for a specific VM/LXC"""
     try:
         backups = []
-        
-        # Get current node name
-        node_result = subprocess.run(['hostname'], capture_output=True, text=True, timeout=5)
-        node = node_result.stdout.strip() if node_result.returncode == 0 else 'localhost'
 
-        # Get list of storage locations (shared 30s cache)
-        storages = get_cached_pvesh_storage_list()
-        if storages:
-            for storage in storages:
-                storage_id = storage.get('storage')
-                storage_type = storage.get('type')
-                content = storage.get('content', '')
+        # Indexed lookup — no per-guest storage rescan.
+        _entries, by_vmid, storage_states = get_backup_index()
+        for entry in by_vmid.get(str(vmid), []):
+            ctime = entry['ctime']
+            backups.append({
+                'volid': entry['volid'],
+                'storage': entry['storage'],
+                'type': entry['type'] or '',
+                'size': entry['size'],
+                'size_human': format_bytes(entry['size']),
+                'timestamp': ctime,
+                'date': datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M') if ctime else '',
+                'notes': entry['notes']
+            })
 
-                # Only check storages that can contain backups
-                if 'backup' in content or storage_type == 'pbs':
-                    try:
-                        # Use --vmid filter to get only backups for this VM
-                        content_result = subprocess.run(
-                            ['pvesh', 'get', f'/nodes/{node}/storage/{storage_id}/content', 
-                             '--vmid', str(vmid), '--output-format', 'json'],
-                            capture_output=True, text=True, timeout=30
-                        )
-                        
-                        if content_result.returncode == 0:
-                            contents = json.loads(content_result.stdout)
-                            
-                            for item in contents:
-                                if item.get('content') == 'backup':
-                                    # Get backup type from subtype field (PBS) or parse volid (local)
-                                    backup_type = item.get('subtype', '')
-                                    if not backup_type:
-                                        volid = item.get('volid', '')
-                                        if 'vzdump-qemu-' in volid:
-                                            backup_type = 'qemu'
-                                        elif 'vzdump-lxc-' in volid:
-                                            backup_type = 'lxc'
-                                    
-                                    size = item.get('size', 0)
-                                    ctime = item.get('ctime', 0)
-                                    notes = item.get('notes', '')
-                                    
-                                    backups.append({
-                                        'volid': item.get('volid', ''),
-                                        'storage': storage_id,
-                                        'type': backup_type,
-                                        'size': size,
-                                        'size_human': format_bytes(size),
-                                        'timestamp': ctime,
-                                        'date': datetime.fromtimestamp(ctime).strftime('%Y-%m-%d %H:%M') if ctime else '',
-                                        'notes': notes
-                                    })
-                    except Exception as e:
-                        continue
-        
         # Sort by timestamp (newest first)
         backups.sort(key=lambda x: x['timestamp'], reverse=True)
-        
+
         return jsonify({
             'backups': backups,
             'vmid': vmid,
-            'total': len(backups)
+            'total': len(backups),
+            'unavailable_storages': _backup_index_unavailable(storage_states),
         })
         
     except Exception as e:
         return jsonify({'error': str(e), 'backups': [], 'total': 0})
 
+def _format_task_event(task):
+    """Shape a `pve_task_index` row the way /api/events has always
+    returned it (formatted dates, human duration, UI level)."""
+    starttime = task.get('starttime', 0)
+    endtime = task.get('endtime', 0)
+    status = task.get('status', 'unknown')
+
+    # Calculate duration
+    duration = ''
+    if endtime and starttime:
+        duration_sec = endtime - starttime
+        if duration_sec < 60:
+            duration = f"{duration_sec}s"
+        elif duration_sec < 3600:
+            duration = f"{duration_sec // 60}m {duration_sec % 60}s"
+        else:
+            hours = duration_sec // 3600
+            minutes = (duration_sec % 3600) // 60
+            duration = f"{hours}h {minutes}m"
+
+    # Determine level based on status
+    level = {
+        'ok': 'info',
+        'running': 'warning',
+        'warning': 'warning',
+        'error': 'error',
+    }[pve_task_index.status_category(status)]
+
+    return {
+        'upid': task.get('upid', ''),
+        'type': task.get('type', 'unknown'),
+        'status': status,
+        'level': level,
+        'node': task.get('node', 'unknown'),
+        'user': task.get('user', 'unknown'),
+        'vmid': task.get('vmid', ''),
+        'starttime': datetime.fromtimestamp(starttime).strftime('%Y-%m-%d %H:%M:%S') if starttime else '',
+        'endtime': datetime.fromtimestamp(endtime).strftime('%Y-%m-%d %H:%M:%S') if endtime else 'Running',
+        'duration': duration,
+        'seq': task.get('seq'),
+    }
+
+
 @app.route('/api/events', methods=['GET'])
 @require_auth
 def api_events():
-    """Get recent Proxmox events and tasks"""
+    """Get recent Proxmox events and tasks.
+
+    Served from the incremental task index TaskWatcher feeds (no pvesh).
+    Query params: `limit` (default 50), `offset`, `type` and `status`
+    (comma-separated; status is running/ok/warning/error), `vmid`, and
+    `since` — the `cursor` from a previous response, to get only tasks
+    that started or changed since then.
+    """
     try:
-        limit = request.args.get('limit', '50')
-        events = []
-        
+        def _int_arg(name, default, lo=0, hi=None):
+            try:
+                value = int(request.args.get(name, default))
+            except (TypeError, ValueError):
+                value = default
+            value = max(lo, value)
+            return min(hi, value) if hi is not None else value
+
+        def _list_arg(name):
+            raw = request.args.get(name, '')
+            return [v.strip() for v in raw.split(',') if v.strip()] or None
+
+        since = request.args.get('since')
         try:
-            result = subprocess.run(['pvesh', 'get', '/cluster/tasks', '--output-format', 'json'], 
-                                  capture_output=True, text=True, timeout=10)
-            
-            if result.returncode == 0:
-                tasks = json.loads(result.stdout)
-                
-                for task in tasks[:int(limit)]:
-                    upid = task.get('upid', '')
-                    task_type = task.get('type', 'unknown')
-                    status = task.get('status', 'unknown')
-                    node = task.get('node', 'unknown')
-                    user = task.get('user', 'unknown')
-                    vmid = task.get('id', '')
-                    starttime = task.get('starttime', 0)
-                    endtime = task.get('endtime', 0)
-                    
-                    # Calculate duration
-                    duration = ''
-                    if endtime and starttime:
-                        duration_sec = endtime - starttime
-                        if duration_sec < 60:
-                            duration = f"{duration_sec}s"
-                        elif duration_sec < 3600:
-                            duration = f"{duration_sec // 60}m {duration_sec % 60}s"
-                        else:
-                            hours = duration_sec // 3600
-                            minutes = (duration_sec % 3600) // 60
-                            duration = f"{hours}h {minutes}m"
-                    
-                    # Determine level based on status
-                    level = 'info'
-                    if status == 'OK':
-                        level = 'info'
-                    elif status in ['stopped', 'error']:
-                        level = 'error'
-                    elif status == 'running':
-                        level = 'warning'
-                    
-                    events.append({
-                        'upid': upid,
-                        'type': task_type,
-                        'status': status,
-                        'level': level,
-                        'node': node,
-                        'user': user,
-                        'vmid': str(vmid) if vmid else '',
-                        'starttime': datetime.fromtimestamp(starttime).strftime('%Y-%m-%d %H:%M:%S') if starttime else '',
-                        'endtime': datetime.fromtimestamp(endtime).strftime('%Y-%m-%d %H:%M:%S') if endtime else 'Running',
-                        'duration': duration
-                    })
-        except Exception as e:
-            # print(f"Error getting events: {e}")
-            pass
-        
+            since = int(since) if since not in (None, '') else None
+        except ValueError:
+            return jsonify({'error': 'since must be an integer cursor', 'events': [], 'total': 0}), 400
+
+        result = pve_task_index.query_tasks(
+            types=_list_arg('type'),
+            vmid=request.args.get('vmid') or None,
+            statuses=_list_arg('status'),
+            limit=_int_arg('limit', 50, lo=1, hi=1000),
+            offset=_int_arg('offset', 0),
+            since=since,
+        )
+        events = [_format_task_event(t) for t in result['tasks']]
+
         return jsonify({
             'events': events,
-            'total': len(events)
+            'total': len(events),
+            'cursor': result['cursor'],
+            'has_more': result['has_more'],
+            'reset': result['reset'],
         })
         
     except Exception as e:
@@ -12876,11 +13120,30 @@ def respond_to_script():
 @app.route('/api/scripts/logs/<session_id>', methods=['GET'])
 @require_auth
 def stream_script_logs(session_id):
-    """Stream logs from a running script"""
+    """Stream logs from a running script.
+
+    Each event carries its log index as ``id`` so a reconnecting
+    EventSource (``Last-Event-ID``) or ``?offset=N`` resumes from there
+    instead of replaying the whole log.
+    """
     try:
+        try:
+            last_event_id = request.headers.get('Last-Event-ID')
+            if last_event_id is not None:
+                offset = int(last_event_id) + 1
+            else:
+                offset = int(request.args.get('offset', 0))
+        except ValueError:
+            offset = 0
+
         def generate():
-            for log_entry in script_runner.stream_logs(session_id):
-                yield f"data: {log_entry}\n\n"
+            for index, log_entry in script_runner.stream_logs(session_id, offset, keepalive=15):
+                if log_entry is None:
+                    yield ": keepalive\n\n"
+                elif index is None:
+                    yield f"data: {log_entry}\n\n"
+                else:
+                    yield f"id: {index}\ndata: {log_entry}\n\n"
         
         return Response(generate(), mimetype='text/event-stream')
     except Exception as e:
@@ -15251,13 +15514,10 @@ def _resolve_pbs_fingerprint(repo_name: str) -> str:
     return ''
 
 
-def _capacity_pbs(repo_name: str, repository: str) -> dict:
-    """`proxmox-backup-client status --output-format json` against the
-    datastore. Password resolution walks both the proxmenux sidecar
-    AND Proxmox's own `/etc/pve/priv/storage/<name>.pw` so PBS storages
-    auto-discovered from the Datacenter work out of the box."""
-    if not repository:
-        return {'error': 'no repository'}
+def _pbs_status_env(repo_name: str) -> dict:
+    """Client env for a PBS status call. Password resolution walks both
+    the proxmenux sidecar AND Proxmox's own `/etc/pve/priv/storage/<name>.pw`
+    so PBS storages auto-discovered from the Datacenter work out of the box."""
     env = dict(os.environ)
     pw = _resolve_pbs_password(repo_name)
     if pw:
@@ -15265,6 +15525,17 @@ def _capacity_pbs(repo_name: str, repository: str) -> dict:
     fp = _resolve_pbs_fingerprint(repo_name)
     if fp:
         env['PBS_FINGERPRINT'] = fp
+    return env
+
+
+def _capacity_pbs(repo_name: str, repository: str, env: dict | None = None) -> dict:
+    """`proxmox-backup-client status --output-format json` against the
+    datastore. `env` lets the capacity poller pass secrets it already
+    resolved for this cycle; otherwise they are resolved here."""
+    if not repository:
+        return {'error': 'no repository'}
+    if env is None:
+        env = _pbs_status_env(repo_name)
     try:
         # 30 s — `proxmox-backup-client status` is consistently fast
         # against a healthy datastore but can stall on TLS handshake
@@ -15298,52 +15569,363 @@ def _capacity_pbs(repo_name: str, repository: str) -> dict:
     }
 
 
-@app.route('/api/host-backups/destinations/capacity', methods=['POST'])
-@require_auth
-def api_host_backups_dest_capacity():
-    """Capacity probe for a batch of destinations. Body:
-    {
-      targets: [
-        {id, kind: "local",      path},
-        {id, kind: "borg-local", path},
-        {id, kind: "borg-ssh",   host, user, remote_path, key_path?},
-        {id, kind: "pbs",        name, repository},
-      ]
-    }
-    Returns the same `id` back paired with the capacity payload so the
-    UI doesn't need to figure out which entry maps to which result.
+# ── Destination capacity poller ──
+# Capacity used to be probed inline, one destination after another,
+# on every 30 s refresh of the Destinations panel: an ssh round-trip
+# per Borg target and up to 30 s of `proxmox-backup-client status`
+# per PBS repo, all inside the request. Now a background thread probes
+# every destination concurrently (per-destination deadline, a hung
+# probe never delays the others) and the endpoints answer from cache.
+#
+# The poller runs every _DEST_CAPACITY_ACTIVE_INTERVAL while somebody
+# is looking at the panel and falls back to _DEST_CAPACITY_IDLE_INTERVAL
+# otherwise — often enough to keep the usage history continuous for
+# the "days until full" forecast without ssh-ing to remote hosts every
+# minute for nobody. History is persisted so a Monitor restart doesn't
+# reset the forecast.
+
+_DEST_CAPACITY_ACTIVE_INTERVAL = 60
+_DEST_CAPACITY_IDLE_INTERVAL = 900
+_DEST_CAPACITY_ACTIVE_WINDOW = 300   # a request within 5 min = "active"
+_DEST_CAPACITY_PROBE_TIMEOUT = 40    # > the 30 s PBS status timeout
+_DEST_CAPACITY_MAX_WORKERS = 8
+_DEST_CAPACITY_TARGETS_TTL = 300     # re-read destination configs + secrets
+# Any change to these invalidates the cached target list right away, so
+# a freshly added destination doesn't wait out the TTL.
+_DEST_CAPACITY_CONFIG_FILES = (
+    '/etc/pve/storage.cfg',
+    f'{_BACKUP_STATE_DIR}/pbs-manual-configs.txt',
+    f'{_BACKUP_STATE_DIR}/borg-targets.txt',
+    f'{_BACKUP_STATE_DIR}/local-target.conf',
+)
+_DEST_CAPACITY_HISTORY_INTERVAL = 900
+_DEST_CAPACITY_HISTORY_MAX_AGE = 14 * 86400
+_DEST_CAPACITY_FORECAST_MIN_SPAN = 6 * 3600
+_DEST_CAPACITY_HISTORY_FILE = '/var/lib/proxmenux/dest-capacity-history.json'
+
+_dest_capacity_lock = threading.Lock()
+_dest_capacity_wakeup = threading.Event()
+_dest_capacity_state = {
+    'results': {},           # key → {'capacity': dict, 'probed_at': float}
+    'history': {},           # key → [[ts, used, total], ...]
+    'requested': {},         # key → (target dict posted by the UI, last posted)
+    'in_flight': set(),      # keys with a probe still running
+    'configured': None,      # cached _dest_capacity_configured_targets()
+    'configured_time': 0.0,
+    'configured_sig': None,
+    'last_request': 0.0,
+    'history_loaded': False,
+}
+_DEST_CAPACITY_POLLER_STARTED = False
+
+
+def _dest_capacity_key(t: dict) -> str:
+    """Identity of a probe, independent of the UI's row id — two rows
+    pointing at the same path share one probe and one history."""
+    kind = (t.get('kind') or '').strip()
+    if kind in ('local', 'borg-local'):
+        return f"fs:{(t.get('path') or '').strip()}"
+    if kind == 'borg-ssh':
+        return f"ssh:{t.get('user', '')}@{t.get('host', '')}:{t.get('remote_path', '')}"
+    if kind == 'pbs':
+        return f"pbs:{t.get('name', '')}:{t.get('repository', '')}"
+    return f'unknown:{kind}'
+
+
+def _dest_capacity_probe(t: dict) -> dict:
+    kind = (t.get('kind') or '').strip()
+    if kind == 'local' or kind == 'borg-local':
+        return _capacity_local((t.get('path') or '').strip())
+    if kind == 'borg-ssh':
+        return _capacity_borg_ssh(
+            (t.get('host') or '').strip(),
+            (t.get('user') or '').strip(),
+            (t.get('remote_path') or '').strip(),
+            (t.get('key_path') or '').strip(),
+        )
+    if kind == 'pbs':
+        return _capacity_pbs(
+            (t.get('name') or '').strip(),
+            (t.get('repository') or '').strip(),
+            env=t.get('env'),
+        )
+    return {'error': f'unknown kind: {kind}'}
 
-    Failures per-entry are not 500s — the whole call still returns 200
-    with `{error: "..."}` for the entries we couldn't measure."""
-    payload = request.get_json(silent=True) or {}
-    targets = payload.get('targets') or []
-    if not isinstance(targets, list):
-        return jsonify({'error': 'targets must be a list'}), 400
-    results: list = []
-    for t in targets:
-        if not isinstance(t, dict):
-            continue
-        tid = t.get('id')
-        kind = (t.get('kind') or '').strip()
-        cap: dict
-        if kind == 'local' or kind == 'borg-local':
-            cap = _capacity_local((t.get('path') or '').strip())
-        elif kind == 'borg-ssh':
-            cap = _capacity_borg_ssh(
-                (t.get('host') or '').strip(),
-                (t.get('user') or '').strip(),
-                (t.get('remote_path') or '').strip(),
-                (t.get('key_path') or '').strip(),
-            )
-        elif kind == 'pbs':
-            cap = _capacity_pbs(
-                (t.get('name') or '').strip(),
-                (t.get('repository') or '').strip(),
-            )
+
+def _dest_capacity_configured_targets() -> list:
+    """Every configured destination as a probe target, with the same
+    ids the Destinations panel uses. PBS secrets are resolved once here
+    and reused by every probe until the list is refreshed."""
+    now = time.time()
+    sig = []
+    for path in _DEST_CAPACITY_CONFIG_FILES:
+        try:
+            st = os.stat(path)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    with _dest_capacity_lock:
+        cached = _dest_capacity_state['configured']
+        if (cached is not None and _dest_capacity_state['configured_sig'] == sig
+                and now - _dest_capacity_state['configured_time'] < _DEST_CAPACITY_TARGETS_TTL):
+            return cached
+    targets: list = []
+    for e in _list_local_targets():
+        targets.append({'id': f"local:{e['path']}", 'kind': 'local', 'path': e['path']})
+    for r in _list_pbs_destinations():
+        targets.append({'id': f"pbs:{r['name']}:{r['repository']}", 'kind': 'pbs',
+                        'name': r['name'], 'repository': r['repository'],
+                        'env': _pbs_status_env(r['name'])})
+    for r in _list_borg_destinations():
+        m = re.match(r'^ssh://([^@]+)@([^/]+)/(.+)$', r['repository'])
+        if m:
+            targets.append({'id': f"borg:{r['name']}", 'kind': 'borg-ssh',
+                            'user': m.group(1), 'host': m.group(2),
+                            'remote_path': '/' + m.group(3),
+                            'key_path': r.get('ssh_key_path') or ''})
         else:
-            cap = {'error': f'unknown kind: {kind}'}
-        results.append({'id': tid, **cap})
-    return jsonify({'results': results})
+            targets.append({'id': f"borg:{r['name']}", 'kind': 'borg-local',
+                            'path': r['repository']})
+    with _dest_capacity_lock:
+        _dest_capacity_state['configured'] = targets
+        _dest_capacity_state['configured_time'] = now
+        _dest_capacity_state['configured_sig'] = sig
+    return targets
+
+
+def _dest_capacity_load_history() -> None:
+    try:
+        with open(_DEST_CAPACITY_HISTORY_FILE) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            with _dest_capacity_lock:
+                for key, samples in data.items():
+                    if isinstance(samples, list):
+                        _dest_capacity_state['history'].setdefault(key, samples)
+    except (OSError, ValueError):
+        pass
+
+
+def _dest_capacity_save_history() -> None:
+    with _dest_capacity_lock:
+        snapshot = {k: list(v) for k, v in _dest_capacity_state['history'].items()}
+    try:
+        os.makedirs(os.path.dirname(_DEST_CAPACITY_HISTORY_FILE), exist_ok=True)
+        tmp = f'{_DEST_CAPACITY_HISTORY_FILE}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, _DEST_CAPACITY_HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def _dest_capacity_record(key: str, cap: dict, now: float) -> bool:
+    """Store a probe result. Errors keep the last good numbers (flagged
+    stale) so a flaky ssh link doesn't blank the bar. Returns True when
+    a history sample was appended."""
+    with _dest_capacity_lock:
+        prev = _dest_capacity_state['results'].get(key)
+        if cap.get('error') and prev and not prev['capacity'].get('error'):
+            prev['capacity'] = {**prev['capacity'], 'stale': True, 'last_error': cap['error']}
+            return False
+        _dest_capacity_state['results'][key] = {'capacity': cap, 'probed_at': now}
+        used, total = cap.get('used'), cap.get('total')
+        if not isinstance(used, (int, float)) or not isinstance(total, (int, float)):
+            return False
+        hist = _dest_capacity_state['history'].setdefault(key, [])
+        if hist and now - hist[-1][0] < _DEST_CAPACITY_HISTORY_INTERVAL:
+            return False
+        hist.append([int(now), int(used), int(total)])
+        cutoff = now - _DEST_CAPACITY_HISTORY_MAX_AGE
+        while hist and hist[0][0] < cutoff:
+            hist.pop(0)
+        return True
+
+
+def _dest_capacity_forecast(key: str, available) -> dict:
+    """Least-squares growth of `used` over the kept history. Only
+    reported once the samples span _DEST_CAPACITY_FORECAST_MIN_SPAN —
+    a forecast from two points ten minutes apart is noise."""
+    with _dest_capacity_lock:
+        hist = list(_dest_capacity_state['history'].get(key, []))
+    if len(hist) < 3 or hist[-1][0] - hist[0][0] < _DEST_CAPACITY_FORECAST_MIN_SPAN:
+        return {}
+    n = len(hist)
+    mean_t = sum(h[0] for h in hist) / n
+    mean_u = sum(h[1] for h in hist) / n
+    var_t = sum((h[0] - mean_t) ** 2 for h in hist)
+    if var_t <= 0:
+        return {}
+    slope = sum((h[0] - mean_t) * (h[1] - mean_u) for h in hist) / var_t
+    growth_per_day = int(slope * 86400)
+    out = {'growth_bytes_per_day': growth_per_day, 'history_span_seconds': hist[-1][0] - hist[0][0]}
+    if growth_per_day > 0 and isinstance(available, (int, float)):
+        out['days_until_full'] = round(available / growth_per_day, 1)
+    return out
+
+
+def _dest_capacity_probe_all(targets: list) -> None:
+    """Probe `targets` concurrently. Each probe gets its own deadline;
+    anything still running afterwards is left to finish on its own
+    (its key stays in `in_flight`, so the next cycle won't stack a
+    second probe on a hung mount or ssh session)."""
+    from concurrent.futures import ThreadPoolExecutor, wait
+    todo: dict = {}
+    with _dest_capacity_lock:
+        for t in targets:
+            key = _dest_capacity_key(t)
+            if key in todo or key in _dest_capacity_state['in_flight']:
+                continue
+            _dest_capacity_state['in_flight'].add(key)
+            todo[key] = t
+    if not todo:
+        return
+
+    def _run(key, t):
+        try:
+            cap = _dest_capacity_probe(t)
+        except Exception as e:
+            cap = {'error': str(e)[:200]}
+        sampled = _dest_capacity_record(key, cap, time.time())
+        with _dest_capacity_lock:
+            _dest_capacity_state['in_flight'].discard(key)
+        return sampled
+
+    pool = ThreadPoolExecutor(max_workers=min(_DEST_CAPACITY_MAX_WORKERS, len(todo)),
+                              thread_name_prefix='dest-capacity')
+    futures = {pool.submit(_run, k, t): k for k, t in todo.items()}
+    done, pending = wait(futures, timeout=_DEST_CAPACITY_PROBE_TIMEOUT)
+    pool.shutdown(wait=False)
+    now = time.time()
+    for fut in pending:
+        key = futures[fut]
+        _dest_capacity_record(key, {'error': 'probe timed out'}, now)
+    if any(f.result() for f in done if not f.exception()):
+        _dest_capacity_save_history()
+
+
+def _dest_capacity_poller_loop() -> None:
+    if not _dest_capacity_state['history_loaded']:
+        _dest_capacity_load_history()
+        _dest_capacity_state['history_loaded'] = True
+    while True:
+        try:
+            targets = list(_dest_capacity_configured_targets())
+            with _dest_capacity_lock:
+                # Forget ad-hoc targets the UI stopped asking about
+                # (destination removed, panel closed for good).
+                cutoff = time.time() - _DEST_CAPACITY_HISTORY_INTERVAL * 4
+                requested = _dest_capacity_state['requested']
+                for key in [k for k, (_t, seen) in requested.items() if seen < cutoff]:
+                    requested.pop(key, None)
+                targets.extend(t for t, _seen in requested.values())
+            _dest_capacity_probe_all(targets)
+        except Exception as e:
+            print(f"[ProxMenux] capacity poller cycle failed: {e}")
+        active = time.time() - _dest_capacity_state['last_request'] < _DEST_CAPACITY_ACTIVE_WINDOW
+        _dest_capacity_wakeup.wait(_DEST_CAPACITY_ACTIVE_INTERVAL if active else _DEST_CAPACITY_IDLE_INTERVAL)
+        _dest_capacity_wakeup.clear()
+
+
+def _ensure_dest_capacity_poller() -> None:
+    """Start the poller once. Checked and set under the lock — two
+    concurrent first requests must not both spawn a loop."""
+    global _DEST_CAPACITY_POLLER_STARTED
+    if _DEST_CAPACITY_POLLER_STARTED:
+        return
+    with _dest_capacity_lock:
+        if _DEST_CAPACITY_POLLER_STARTED:
+            return
+        _DEST_CAPACITY_POLLER_STARTED = True
+    threading.Thread(target=_dest_capacity_poller_loop, daemon=True).start()
+
+
+def _dest_capacity_result(tid, key: str) -> dict:
+    with _dest_capacity_lock:
+        entry = _dest_capacity_state['results'].get(key)
+        entry = dict(entry) if entry else None
+    if not entry:
+        return {'id': tid, 'pending': True}
+    cap = entry['capacity']
+    out = {'id': tid, **cap, 'probed_at': int(entry['probed_at']),
+           'age_seconds': int(time.time() - entry['probed_at'])}
+    if not cap.get('error'):
+        out.update(_dest_capacity_forecast(key, cap.get('available')))
+    return out
+
+
+def _dest_capacity_touch() -> None:
+    """Mark the panel as watched; wake an idle poller right away."""
+    now = time.time()
+    was_idle = now - _dest_capacity_state['last_request'] >= _DEST_CAPACITY_ACTIVE_WINDOW
+    _dest_capacity_state['last_request'] = now
+    _ensure_dest_capacity_poller()
+    if was_idle:
+        _dest_capacity_wakeup.set()
+
+
+@app.route('/api/host-backups/destinations/capacity', methods=['GET'])
+@require_auth
+def api_host_backups_dest_capacity_all():
+    """Cached capacity of every configured destination in one call,
+    keyed by the same ids as the Destinations panel. Each entry carries
+    `probed_at` / `age_seconds` and, once enough history exists,
+    `growth_bytes_per_day` + `days_until_full`. Destinations never
+    probed before (first load, freshly added) are probed right away,
+    concurrently; one still running past the probe deadline comes back
+    as {id, pending: true}."""
+    _dest_capacity_touch()
+    targets = _dest_capacity_configured_targets()
+    with _dest_capacity_lock:
+        missing = [t for t in targets
+                   if _dest_capacity_key(t) not in _dest_capacity_state['results']]
+    if missing:
+        _dest_capacity_probe_all(missing)
+    return jsonify({'results': [_dest_capacity_result(t['id'], _dest_capacity_key(t))
+                                for t in targets]})
+
+
+@app.route('/api/host-backups/destinations/capacity', methods=['POST'])
+@require_auth
+def api_host_backups_dest_capacity():
+    """Capacity for a batch of destinations. Body:
+    {
+      targets: [
+        {id, kind: "local",      path},
+        {id, kind: "borg-local", path},
+        {id, kind: "borg-ssh",   host, user, remote_path, key_path?},
+        {id, kind: "pbs",        name, repository},
+      ]
+    }
+    Returns the same `id` back paired with the capacity payload so the
+    UI doesn't need to figure out which entry maps to which result.
+
+    Answers from the poller cache; targets never seen before are probed
+    right away (concurrently, bounded by _DEST_CAPACITY_PROBE_TIMEOUT)
+    and then kept in the poller's rotation. Failures per-entry are not
+    500s — the whole call still returns 200 with `{error: "..."}` for
+    the entries we couldn't measure."""
+    payload = request.get_json(silent=True) or {}
+    targets = payload.get('targets') or []
+    if not isinstance(targets, list):
+        return jsonify({'error': 'targets must be a list'}), 400
+    _dest_capacity_touch()
+    wanted: list = []
+    missing: list = []
+    for t in targets:
+        if not isinstance(t, dict):
+            continue
+        t = {k: v for k, v in t.items() if k != 'env'}
+        key = _dest_capacity_key(t)
+        wanted.append((t.get('id'), key))
+        with _dest_capacity_lock:
+            _dest_capacity_state['requested'][key] = (t, time.time())
+            known = key in _dest_capacity_state['results']
+        if not known:
+            missing.append(t)
+    if missing:
+        _dest_capacity_probe_all(missing)
+    return jsonify({'results': [_dest_capacity_result(tid, key) for tid, key in wanted]})
 
 
 @app.route('/api/host-backups/calendar-preview', methods=['POST'])
@@ -17069,15 +17651,133 @@ def api_host_backups_extra_paths_remove():
 #
 # Listing is cheap (snapshot metadata only — milliseconds, no payload
 # download). Export is on-demand: only when the operator clicks Download
-# do we extract the snapshot to a local staging dir and pack it as a
-# .tar.zst, so the PBS / Borg server sees no load while the operator is
-# just browsing.
+# do we touch the payload, so the PBS / Borg server sees no load while
+# the operator is just browsing.
+#
+# Exports stream whenever the backend allows it: Borg through
+# `borg export-tar <repo>::<archive> -`, PBS through a read-only FUSE
+# mount of hostcfg.pxar fed to `tar`. Either way the tar goes through
+# `zstd` straight into the HTTP response (chunked, no Content-Length),
+# so nothing is staged on the node's disk. PBS hosts without FUSE fall
+# back to the original restore-to-staging + pack worker.
+#
+# Task records expire on their own timer (_schedule_export_expiry), so
+# no request has to sweep the export dir; _cleanup_stale_exports only
+# runs once at startup to drop what a previous process left behind.
 
 _REMOTE_EXPORT_DIR = '/var/lib/proxmenux/exports'
-_REMOTE_EXPORT_TTL = 3600  # auto-clean staging directories untouched for > 1h
+_REMOTE_EXPORT_TTL = 3600  # task records + packed files expire after 1h
+_REMOTE_EXPORT_RESUME_TTL = 900  # a downloaded tarball stays this long for resumes
 _remote_export_tasks: dict = {}
 _remote_export_lock = threading.Lock()
 
+# Streamed exports trade ratio for throughput: -19 (used by the packing
+# worker) runs at a few MB/s and would become the bottleneck of the
+# download itself.
+_EXPORT_STREAM_ZSTD_LEVEL = '-3'
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# Optional bandwidth cap for archive downloads, in KiB/s (0 = unlimited).
+# Per request it can be overridden with `?rate_kbps=`, e.g. to keep a
+# restore pull from saturating the management NIC.
+try:
+    _DOWNLOAD_RATE_KBPS = max(0, int(os.environ.get('PROXMENUX_DOWNLOAD_RATE_KBPS', '0') or 0))
+except ValueError:
+    _DOWNLOAD_RATE_KBPS = 0
+
+
+def _download_rate_kbps() -> int:
+    """Effective cap for this request: `?rate_kbps=` or the env default."""
+    raw = request.args.get('rate_kbps', '')
+    try:
+        return max(0, int(raw)) if raw else _DOWNLOAD_RATE_KBPS
+    except ValueError:
+        return _DOWNLOAD_RATE_KBPS
+
+
+def _throttled_chunks(read, rate_kbps: int, limit: int | None = None):
+    """Yield `read(n)` chunks until EOF (or `limit` bytes), sleeping as
+    needed to hold the average at `rate_kbps`. 0 means unlimited."""
+    rate = rate_kbps * 1024
+    started = time.monotonic()
+    sent = 0
+    while limit is None or sent < limit:
+        n = _DOWNLOAD_CHUNK_SIZE if limit is None else min(_DOWNLOAD_CHUNK_SIZE, limit - sent)
+        chunk = read(n)
+        if not chunk:
+            break
+        sent += len(chunk)
+        yield chunk
+        if rate:
+            ahead = sent / rate - (time.monotonic() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def _archive_etag(path: str, st: os.stat_result) -> str:
+    """The ETag send_file(etag=True) would compute, so If-Range from a
+    resumed download matches whichever path served the first part."""
+    return f'{st.st_mtime}-{st.st_size}-{zlib.adler32(path.encode()) & 0xFFFFFFFF}'
+
+
+def _send_archive_file(path: str, download_name: str, mimetype: str, rate_kbps: int = 0):
+    """send_file with resumable downloads. Unthrottled requests go to
+    send_file (conditional=True → Range/If-Range/ETag handled by
+    werkzeug, zero-copy where the server supports it). Throttled ones
+    need our own generator, so Range and If-Range are honoured here by
+    hand with the same ETag. Single byte ranges only — that is what
+    download managers and `curl -C -` send when resuming. The file is
+    opened before returning, so the caller may unlink it once the
+    response is built."""
+    if rate_kbps <= 0:
+        return send_file(path, as_attachment=True, download_name=download_name,
+                         mimetype=mimetype, conditional=True,
+                         etag=_archive_etag(path, os.stat(path)))
+
+    f = open(path, 'rb')
+    try:
+        st = os.fstat(f.fileno())
+        size = st.st_size
+        etag = _archive_etag(path, st)
+        start, stop, status = 0, size, 200
+        if request.range is not None:
+            if_range = request.if_range
+            fresh = True
+            if if_range.etag is not None:
+                fresh = if_range.etag == etag
+            elif if_range.date is not None:
+                fresh = int(st.st_mtime) <= int(if_range.date.timestamp())
+            if fresh:
+                span = request.range.range_for_length(size)
+                if span is None:
+                    f.close()
+                    resp = Response(status=416)
+                    resp.headers['Content-Range'] = f'bytes */{size}'
+                    return resp
+                start, stop = span
+                status = 206
+        f.seek(start)
+    except BaseException:
+        f.close()
+        raise
+
+    def _generate():
+        try:
+            yield from _throttled_chunks(f.read, rate_kbps, limit=stop - start)
+        finally:
+            f.close()
+
+    resp = Response(_generate(), status=status, mimetype=mimetype, direct_passthrough=True)
+    # A generator that never started doesn't run its finally.
+    resp.call_on_close(f.close)
+    resp.headers['Content-Length'] = str(stop - start)
+    resp.headers['Accept-Ranges'] = 'bytes'
+    resp.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    if status == 206:
+        resp.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+    resp.set_etag(etag)
+    resp.last_modified = st.st_mtime
+    return resp
+
 
 def _pbs_secret_for(repo_name: str) -> tuple[str, str]:
     """Return (password, fingerprint) for the named PBS repo, looking
@@ -17119,6 +17819,57 @@ def _pbs_secret_for(repo_name: str) -> tuple[str, str]:
     return pass_text, fp_text
 
 
+def _pbs_restore_env(repo: dict) -> tuple[dict | None, str | None]:
+    """Environment for proxmox-backup-client restore/mount against
+    `repo`. Returns (env, error)."""
+    pwd, fp = _pbs_secret_for(repo['name'])
+    if not pwd:
+        return None, f"no password for PBS repo \"{repo['name']}\""
+    env = {**os.environ, 'PBS_PASSWORD': pwd}
+    if fp:
+        env['PBS_FINGERPRINT'] = fp
+    # Load the scrypt-unlock passphrase stored during import. Without
+    # this env var proxmox-backup-client can't decrypt a scrypt
+    # keyfile at restore time and fails with "no password input
+    # mechanism available". kdf=none keyfiles don't need it (empty
+    # file → env stays empty). Matches how the scheduled runner
+    # resolves PBS_ENCRYPTION_PASSWORD in run_scheduled_backup.sh.
+    try:
+        if os.path.isfile(_PBS_KEYFILE_PASS_PATH) and os.path.getsize(_PBS_KEYFILE_PASS_PATH) > 0:
+            with open(_PBS_KEYFILE_PASS_PATH, 'r') as _pf:
+                env['PBS_ENCRYPTION_PASSWORD'] = _pf.read()
+    except OSError:
+        pass
+    return env, None
+
+
+def _pbs_mount_archive(repo: dict, snapshot: str, mountpoint: str, env: dict) -> bool:
+    """Mount `hostcfg.pxar` of a snapshot read-only at `mountpoint` via
+    FUSE. Only the chunks that are actually read get fetched, so this
+    is the cheap way to walk or stream a PBS host backup. Returns False
+    on hosts without FUSE (LXC-hosted Monitor, missing /dev/fuse)."""
+    cmd = ['proxmox-backup-client', 'mount', '--repository', repo['repository'],
+           snapshot, 'hostcfg.pxar', mountpoint]
+    if os.path.isfile(_PBS_KEYFILE_PATH):
+        cmd.extend(['--keyfile', _PBS_KEYFILE_PATH])
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env=env)
+    except (subprocess.TimeoutExpired, OSError):
+        return False
+    return r.returncode == 0 and os.path.ismount(mountpoint)
+
+
+def _pbs_umount(mountpoint: str) -> None:
+    try:
+        subprocess.run(['umount', mountpoint], capture_output=True, timeout=30)
+    except (subprocess.TimeoutExpired, OSError):
+        pass
+    try:
+        os.rmdir(mountpoint)
+    except OSError:
+        pass
+
+
 def _list_pbs_snapshots_for_repo(repo: dict, timeout: int = 15) -> tuple[list, str | None]:
     """Run proxmox-backup-client snapshot list for one PBS config and
     return (snapshots, error). Snapshots come back as the raw JSON the
@@ -17444,108 +18195,67 @@ def _list_borg_archives_for_target(target: dict, timeout: int = 30) -> tuple[lis
     return out, None
 
 
-def _run_borg_export(task_id: str, target: dict, archive_name: str, output_path: str):
-    """Background worker: `borg extract` one archive into a staging
-    directory and pack the result as a .tar.zst. Same shape and
-    progress states as _run_pbs_export so the UI can poll generically."""
-    import shutil, time
-    def _update(**kw):
-        with _remote_export_lock:
-            _remote_export_tasks[task_id].update(kw, updated_at=time.time())
-
-    staging = os.path.join(_REMOTE_EXPORT_DIR, f'staging-{task_id}')
-    try:
-        os.makedirs(staging, exist_ok=True)
-        os.chmod(staging, 0o700)
-        env = _borg_env_for(target)
-
-        # 1) Extract the archive. borg extract writes into cwd, so we
-        #    cd to a fresh subdirectory under staging.
-        target_tree = os.path.join(staging, 'tree')
-        os.makedirs(target_tree, exist_ok=True)
-        _update(state='restoring', message='Extracting from Borg repo')
-        r = subprocess.run(
-            ['borg', 'extract', f'{target["repository"]}::{archive_name}'],
-            capture_output=True, text=True, timeout=3600, env=env,
-            cwd=target_tree,
-        )
-        if r.returncode != 0:
-            _update(state='failed', error=(r.stderr.strip() or 'borg extract failed'))
-            return
+def _safe_export_id() -> str:
+    """Generate a collision-free identifier for a single export run."""
+    from datetime import datetime
+    import secrets
+    return f'{datetime.now().strftime("%Y%m%d%H%M%S")}-{secrets.token_hex(3)}'
 
-        # 2) Pack as .tar.zst.
-        _update(state='packing', message='Compressing as tar.zst')
-        with open(output_path, 'wb') as out:
-            tar_p = subprocess.Popen(
-                ['tar', '-C', target_tree, '-cf', '-', '.'],
-                stdout=subprocess.PIPE,
-            )
-            zstd_p = subprocess.Popen(
-                ['zstd', '-T0', '-19', '-q'],
-                stdin=tar_p.stdout,
-                stdout=out,
-            )
-            if tar_p.stdout:
-                tar_p.stdout.close()
-            zstd_rc = zstd_p.wait(timeout=3600)
-            tar_rc = tar_p.wait(timeout=60)
-        if zstd_rc != 0 or tar_rc != 0:
-            _update(state='failed', error=f'archive packing failed (tar={tar_rc}, zstd={zstd_rc})')
-            return
 
-        size = os.path.getsize(output_path)
-        _update(state='completed', message='Export ready', size_bytes=size, output_path=output_path)
-    except Exception as e:
-        _update(state='failed', error=str(e))
-    finally:
+def _release_export_task(task: dict) -> None:
+    """Free whatever a task still holds on disk: the packed tarball of
+    a worker export or the FUSE mount of a prepared PBS stream."""
+    output_path = task.get('output_path')
+    if output_path:
         try:
-            if os.path.isdir(staging):
-                shutil.rmtree(staging)
+            os.remove(output_path)
         except OSError:
             pass
+    mountpoint = task.get('mountpoint')
+    if mountpoint:
+        _pbs_umount(mountpoint)
 
 
-def _safe_export_id() -> str:
-    """Generate a collision-free identifier for a single export run."""
-    from datetime import datetime
-    import secrets
-    return f'{datetime.now().strftime("%Y%m%d%H%M%S")}-{secrets.token_hex(3)}'
+def _expire_export_task(task_id: str) -> None:
+    with _remote_export_lock:
+        task = _remote_export_tasks.get(task_id)
+        remaining = (task or {}).get('keep_until', 0) - time.time()
+        if task and remaining <= 0:
+            _remote_export_tasks.pop(task_id, None)
+    if task and remaining > 0:
+        _schedule_export_expiry(task_id, remaining)
+    elif task:
+        _release_export_task(task)
+
+
+def _schedule_export_expiry(task_id: str, delay: float = _REMOTE_EXPORT_TTL) -> None:
+    """Forget a finished / prepared task after _REMOTE_EXPORT_TTL if the
+    operator never downloads it. A task that was already claimed is gone
+    by then and the timer is a no-op; one whose `keep_until` lies ahead
+    (a packed tarball being downloaded) is re-armed until then."""
+    timer = threading.Timer(delay, _expire_export_task, args=(task_id,))
+    timer.daemon = True
+    timer.start()
 
 
 def _cleanup_stale_exports():
-    """Drop staging dirs and finished tar files older than _REMOTE_EXPORT_TTL.
-    Called opportunistically on each new export request — no separate
-    cron is needed."""
+    """Startup sweep: task records live in memory only, so anything left
+    in _REMOTE_EXPORT_DIR by a previous process (packed tarballs,
+    staging trees, PBS stream mounts) can never be downloaded again."""
     if not os.path.isdir(_REMOTE_EXPORT_DIR):
         return
-    import time
-    now = time.time()
+    import shutil
     for name in os.listdir(_REMOTE_EXPORT_DIR):
         full = os.path.join(_REMOTE_EXPORT_DIR, name)
-        try:
-            st = os.stat(full)
-        except OSError:
-            continue
-        if now - st.st_mtime < _REMOTE_EXPORT_TTL:
-            continue
-        if os.path.isdir(full):
-            try:
-                import shutil
-                shutil.rmtree(full)
-            except OSError:
-                pass
+        if os.path.ismount(full):
+            _pbs_umount(full)
+        elif os.path.isdir(full):
+            shutil.rmtree(full, ignore_errors=True)
         else:
             try:
                 os.remove(full)
             except OSError:
                 pass
-    # Also forget completed task records older than the TTL so they
-    # don't pile up forever.
-    with _remote_export_lock:
-        for tid in list(_remote_export_tasks):
-            task = _remote_export_tasks[tid]
-            if task['state'] in ('completed', 'failed') and now - task.get('updated_at', 0) > _REMOTE_EXPORT_TTL:
-                _remote_export_tasks.pop(tid, None)
 
 
 def _run_pbs_export(task_id: str, repo: dict, snapshot: str, output_path: str):
@@ -17562,25 +18272,10 @@ def _run_pbs_export(task_id: str, repo: dict, snapshot: str, output_path: str):
         os.makedirs(staging, exist_ok=True)
         os.chmod(staging, 0o700)
 
-        pwd, fp = _pbs_secret_for(repo['name'])
-        if not pwd:
-            _update(state='failed', error=f"no password for PBS repo \"{repo['name']}\"")
+        env, err = _pbs_restore_env(repo)
+        if not env:
+            _update(state='failed', error=err)
             return
-        env = {**os.environ, 'PBS_PASSWORD': pwd}
-        if fp:
-            env['PBS_FINGERPRINT'] = fp
-        # Load the scrypt-unlock passphrase stored during import. Without
-        # this env var proxmox-backup-client can't decrypt a scrypt
-        # keyfile at restore time and fails with "no password input
-        # mechanism available". kdf=none keyfiles don't need it (empty
-        # file → env stays empty). Matches how the scheduled runner
-        # resolves PBS_ENCRYPTION_PASSWORD in run_scheduled_backup.sh.
-        try:
-            if os.path.isfile(_PBS_KEYFILE_PASS_PATH) and os.path.getsize(_PBS_KEYFILE_PASS_PATH) > 0:
-                with open(_PBS_KEYFILE_PASS_PATH, 'r') as _pf:
-                    env['PBS_ENCRYPTION_PASSWORD'] = _pf.read()
-        except OSError:
-            pass
 
         # 1) Pull the .pxar archive out of the snapshot. PBS stores the
         # host backup as `hostcfg.pxar.didx`; restoring it as `hostcfg.pxar`
@@ -17644,12 +18339,13 @@ def _run_pbs_export(task_id: str, repo: dict, snapshot: str, output_path: str):
         _update(state='failed', error=str(e))
     finally:
         # Drop the staging tree once we're done — only the final tarball
-        # stays around until the operator downloads it.
+        # stays around until the operator downloads it (or it expires).
         try:
             if os.path.isdir(staging):
                 shutil.rmtree(staging)
         except OSError:
             pass
+        _schedule_export_expiry(task_id)
 
 
 @app.route('/api/host-backups/remote-archives/export', methods=['POST'])
@@ -17657,10 +18353,12 @@ def _run_pbs_export(task_id: str, repo: dict, snapshot: str, output_path: str):
 def api_host_backups_remote_archive_export():
     """Kick off an on-demand export. Body:
       {backend: 'pbs'|'borg', repo_name, snapshot}
-    Returns a task_id the UI polls for progress and uses to fetch the
-    resulting .tar.zst once ready."""
+    Returns a task_id the UI uses to fetch the resulting .tar.zst.
+    Borg — and PBS when the snapshot can be FUSE-mounted — come back
+    as state 'streaming': the download endpoint streams the archive
+    directly and there is nothing to poll. Otherwise a background
+    worker packs the export and the UI polls until 'completed'."""
     import time
-    _cleanup_stale_exports()
     payload = request.get_json(silent=True) or {}
     backend = (payload.get('backend') or '').strip().lower()
     if backend not in ('pbs', 'borg'):
@@ -17686,24 +18384,52 @@ def api_host_backups_remote_archive_export():
     output_path = os.path.join(
         _REMOTE_EXPORT_DIR, f'{backend}-{repo_name}-{safe_snap}.tar.zst'
     )
+    task = {
+        'task_id': task_id,
+        'backend': backend,
+        'repo_name': repo_name,
+        'snapshot': snapshot,
+        'state': 'queued',
+        'message': 'Queued',
+        'created_at': time.time(),
+        'updated_at': time.time(),
+        'output_path': None,
+        'size_bytes': 0,
+        'error': None,
+    }
+
+    # Streamable: register the task as ready and let the download
+    # endpoint run the pipeline. PBS is mounted here so a host without
+    # FUSE still gets the worker fallback below.
+    stream_source = None
+    if backend == 'borg':
+        stream_source = {'cmd': ['borg', 'export-tar', f'{repo["repository"]}::{snapshot}', '-'],
+                         'env': _borg_env_for(repo)}
+    else:
+        env, _err = _pbs_restore_env(repo)
+        mountpoint = os.path.join(_REMOTE_EXPORT_DIR, f'mnt-{task_id}')
+        os.makedirs(mountpoint, mode=0o700, exist_ok=True)
+        if env and _pbs_mount_archive(repo, snapshot, mountpoint, env):
+            task['mountpoint'] = mountpoint
+            stream_source = {'cmd': ['tar', '-C', mountpoint, '-cf', '-', '.'], 'env': None}
+        else:
+            try:
+                os.rmdir(mountpoint)
+            except OSError:
+                pass
+    if stream_source:
+        task.update(state='streaming', message='Ready to stream', stream=stream_source)
+        with _remote_export_lock:
+            _remote_export_tasks[task_id] = task
+        _schedule_export_expiry(task_id)
+        return jsonify({'task_id': task_id, 'state': 'streaming'}), 202
+
     with _remote_export_lock:
-        _remote_export_tasks[task_id] = {
-            'task_id': task_id,
-            'backend': backend,
-            'repo_name': repo_name,
-            'snapshot': snapshot,
-            'state': 'queued',
-            'message': 'Queued',
-            'created_at': time.time(),
-            'updated_at': time.time(),
-            'output_path': None,
-            'size_bytes': 0,
-            'error': None,
-        }
+        _remote_export_tasks[task_id] = task
 
-    worker = _run_pbs_export if backend == 'pbs' else _run_borg_export
+    # Borg always streams; only PBS without FUSE gets here.
     t = threading.Thread(
-        target=worker,
+        target=_run_pbs_export,
         args=(task_id, repo, snapshot, output_path),
         daemon=True,
     )
@@ -17722,43 +18448,100 @@ def api_host_backups_remote_archive_export_status(task_id):
         if not task:
             return jsonify({'error': 'task not found or expired'}), 404
         # Defensive copy — the worker keeps mutating the original.
-        return jsonify({k: v for k, v in task.items()})
+        # The stream command carries repo credentials in its env.
+        return jsonify({k: v for k, v in task.items() if k != 'stream'})
 
 
 @app.route('/api/host-backups/remote-archives/export/<task_id>/download', methods=['GET'])
 @require_auth_or_ticket
 def api_host_backups_remote_archive_export_download(task_id):
-    """Stream the packed export to the browser. Same auth + send_file
-    pattern as the local archive download. Cleans up the tarball after
-    the response is dispatched so the staging area doesn't grow."""
+    """Stream the export to the browser. Streaming tasks run their
+    pipeline now (see _stream_export_response); packed ones go out
+    through the same send_file path as the local archive download and
+    the tarball stays for _REMOTE_EXPORT_RESUME_TTL after the last
+    request so Range resumes find it. Honours `?rate_kbps=` like the
+    local download."""
     with _remote_export_lock:
         task = _remote_export_tasks.get(task_id)
+        if task and task['state'] == 'streaming':
+            # One-shot: claim the task so a second click can't start a
+            # second pipeline against the same mount.
+            _remote_export_tasks.pop(task_id, None)
     if not task:
         return jsonify({'error': 'task not found or expired'}), 404
+    if task['state'] == 'streaming':
+        return _stream_export_response(task, _download_rate_kbps())
     if task['state'] != 'completed':
         return jsonify({'error': f'task is in state "{task["state"]}", not completed'}), 409
     output_path = task.get('output_path')
     if not output_path or not os.path.isfile(output_path):
         return jsonify({'error': 'output file missing'}), 500
     download_name = os.path.basename(output_path)
+    # Keep the tarball a while past each request so an interrupted
+    # download can resume with Range; the expiry timer removes it.
+    with _remote_export_lock:
+        task['keep_until'] = max(task.get('keep_until', 0),
+                                 time.time() + _REMOTE_EXPORT_RESUME_TTL)
+    return _send_archive_file(output_path, download_name,
+                              'application/x-zstd-compressed-tar', _download_rate_kbps())
+
+
+def _stream_export_response(task: dict, rate_kbps: int):
+    """Run `<tar producer> | zstd` and pipe it into a chunked response.
+    The first chunk is awaited before answering so a producer that dies
+    right away (bad passphrase, unreachable repo) still surfaces as a
+    proper error status instead of an empty download. Client aborts
+    close the generator, which kills the pipeline and releases the
+    PBS mount."""
+    stream = task['stream']
+    safe_snap = task['snapshot'].replace('/', '_')
+    download_name = f"{task['backend']}-{task['repo_name']}-{safe_snap}.tar.zst"
+    errf = tempfile.TemporaryFile()
+    try:
+        producer = subprocess.Popen(stream['cmd'], stdout=subprocess.PIPE,
+                                    stderr=errf, env=stream['env'])
+        compressor = subprocess.Popen(['zstd', '-T0', _EXPORT_STREAM_ZSTD_LEVEL, '-q', '-c'],
+                                      stdin=producer.stdout, stdout=subprocess.PIPE)
+    except OSError as e:
+        errf.close()
+        _release_export_task(task)
+        return jsonify({'error': str(e)}), 500
+    producer.stdout.close()
 
-    @after_this_request
-    def _cleanup(response):
+    def _finish():
+        for proc in (producer, compressor):
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        compressor.stdout.close()
+        errf.close()
+        _release_export_task(task)
+
+    first = compressor.stdout.read1(_DOWNLOAD_CHUNK_SIZE)
+    if not first:
+        producer.wait()
+        errf.seek(0)
+        err = errf.read().decode('utf-8', errors='replace').strip()
+        _finish()
+        return jsonify({'error': (err or f'{stream["cmd"][0]} produced no data')[:500]}), 502
+
+    def _generate():
         try:
-            if os.path.exists(output_path):
-                os.remove(output_path)
-        except OSError:
-            pass
-        with _remote_export_lock:
-            _remote_export_tasks.pop(task_id, None)
-        return response
+            yield first
+            yield from _throttled_chunks(compressor.stdout.read1, rate_kbps)
+            if producer.wait() != 0:
+                # Headers are long gone; all we can do is truncate the
+                # download (zstd will flag it) and leave a trace.
+                errf.seek(0)
+                print(f"[ProxMenux] export stream {task['task_id']} failed: "
+                      f"{errf.read().decode('utf-8', errors='replace').strip()[:300]}")
+        finally:
+            _finish()
 
-    return send_file(
-        output_path,
-        as_attachment=True,
-        download_name=download_name,
-        mimetype='application/x-zstd-compressed-tar',
-    )
+    resp = Response(_generate(), mimetype='application/x-zstd-compressed-tar',
+                    direct_passthrough=True)
+    resp.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    return resp
 
 
 _BACKUP_TAR_SUFFIXES = ('.tar', '.tar.zst', '.tar.gz')
@@ -17824,12 +18607,9 @@ def api_host_backups_archives():
 # to read manifest + restore plan + file list out of ANY backup —
 # PBS, Borg, or local. The trick is that PBS and Borg snapshots
 # aren't files: they have to be extracted to a staging directory
-# first. These helpers + endpoint do exactly that, reuse the four
-# restore-side shell scripts (parse_manifest / run_restore), and
-# clean the staging tree before returning.
-# Staging lives under /tmp/pmnx-inspect-XXX and is removed in the
-# `finally` block — there's nothing to leak even if the request
-# fails mid-flight.
+# first. The report itself only needs a few small members, so it
+# goes through the streaming harvest below; the full extract here
+# is what /restore/prepare (and the PBS no-FUSE fallback) use.
 
 def _inspect_extract_to_staging(source: str, repo_dict: dict, snapshot: str, staging: str) -> tuple:
     """Pull a snapshot into <staging>. Returns (ok, error_message).
@@ -17934,11 +18714,449 @@ def _inspect_normalize_layout(staging: str) -> bool:
     return False
 
 
-def _inspect_compose_json(staging: str) -> dict:
+# ──────────────────────────────────────────────────────────────
+# Streaming metadata harvest — the fast path behind View Contents
+# ──────────────────────────────────────────────────────────────
+# A full extract of a multi-GB host backup to /tmp just to render
+# the manifest, the restore plan and a 5000-entry file list is
+# wasteful: every report section reads a handful of small members
+# (manifest.json, metadata/*, the guest .conf files the rollback
+# plan counts, components_status.json). Everything else only needs
+# its NAME and SIZE, which the tar headers already carry.
+#
+# So instead of extracting, we walk the archive once as a stream:
+#   - local .tar / .tar.gz / .tar.zst → tarfile (zstd via a pipe)
+#   - Borg → `borg export-tar <repo>::<snap> -` piped into tarfile
+#   - PBS  → `proxmox-backup-client mount` of hostcfg.pxar, walked
+#            lazily through FUSE; full restore only as a fallback
+# and write just the report members into a tiny canonical staging
+# (rootfs/ + metadata/ + manifest.json) that the restore-side shell
+# scripts accept exactly like a full extract.
+#
+# The harvested staging is kept under _INSPECT_CACHE_ROOT keyed by
+# the archive fingerprint, so the manifest / preflight / inspect
+# endpoints of the same archive never decompress it twice. The
+# composed report is additionally memoized in-process; because the
+# plan and rollback sections compare the backup against the LIVE
+# host, that memo is also keyed by a cheap host-state token.
+
+_INSPECT_CACHE_ROOT = '/tmp/pmnx-inspect-cache'
+_INSPECT_CACHE_MAX_ENTRIES = 8
+_INSPECT_MEMBER_MAX_BYTES = 16 * 1024 * 1024  # metadata sidecars are KBs
+_INSPECT_FILES_LIMIT = 5000
+_INSPECT_FILES_MAX_DEPTH = 6
+_INSPECT_REPORT_TTL = 3600  # 1 hour
+_INSPECT_REPORT_MAX_ENTRIES = 16
+_INSPECT_STREAM_TIMEOUT = 900
+
+# Host files whose change can alter the plan/rollback sections of
+# a report. Stat-only — reading them would defeat the purpose.
+_INSPECT_HOST_STATE_FILES = (
+    '/etc/pve/.version',
+    '/etc/pve/storage.cfg',
+    '/etc/network/interfaces',
+    f'{_BACKUP_STATE_DIR}/components_status.json',
+)
+
+_INSPECT_REPORT_CACHE: dict = {}  # fingerprint → {report, host, ts}
+_inspect_cache_lock = threading.Lock()
+_inspect_build_locks: dict = {}   # cache key → Lock (single-flight per archive)
+
+
+def _inspect_fingerprint(source: str, repo_dict: dict, snapshot: str) -> str:
+    """Identity of an archive for caching. PBS snapshots are immutable
+    by name; Borg archive names are unique within a repo; local files
+    are identified by inode + size + mtime so an overwrite with the
+    same name invalidates the entry. Returns '' when the archive can't
+    be identified (e.g. the local file vanished)."""
+    if source == 'pbs':
+        return f"pbs:{repo_dict.get('repository', '')}:{snapshot}"
+    if source == 'borg':
+        return f"borg:{repo_dict.get('repository', '')}::{snapshot}"
+    if source == 'local':
+        path = repo_dict.get('path') or ''
+        try:
+            st = os.stat(path)
+        except OSError:
+            return ''
+        return f'local:{os.path.realpath(path)}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}'
+    return ''
+
+
+def _inspect_host_state_token() -> str:
+    parts = []
+    for p in _INSPECT_HOST_STATE_FILES:
+        try:
+            st = os.stat(p)
+            parts.append(f'{st.st_mtime_ns}:{st.st_size}')
+        except OSError:
+            parts.append('-')
+    return '|'.join(parts)
+
+
+def _inspect_classify_member(name: str) -> tuple:
+    """Map an archive member name onto the canonical staging layout.
+    Returns (section, rel_parts):
+      'manifest' — the top-level manifest.json (root or one level in)
+      'metadata' — anything under metadata/ (root or one level in)
+      'rootfs'   — anything under rootfs/ (root or one level in, the
+                   Borg-with-absolute-paths case)
+      'flat'     — everything else; only used when the archive turns
+                   out to have no rootfs/ at all (legacy flat layout)
+      ''         — not a usable path
+    Mirrors the three cases _inspect_normalize_layout handles."""
+    parts = [p for p in name.split('/') if p and p != '.']
+    if not parts or '..' in parts:
+        return '', []
+    if parts[-1] == 'manifest.json' and len(parts) <= 2:
+        return 'manifest', parts
+    for idx in (0, 1):
+        if len(parts) > idx + 1 and parts[idx] in ('rootfs', 'metadata'):
+            return parts[idx], parts[idx + 1:]
+    return 'flat', parts
+
+
+def _inspect_wants_rootfs_member(rel_parts: list) -> bool:
+    """rootfs members the report actually reads: guest configs for the
+    rollback plan, and the ProxMenux component state."""
+    if (len(rel_parts) == 6 and rel_parts[:3] == ['etc', 'pve', 'nodes']
+            and rel_parts[4] in ('qemu-server', 'lxc')
+            and rel_parts[5].endswith('.conf')):
+        return True
+    return rel_parts == ['usr', 'local', 'share', 'proxmenux', 'components_status.json']
+
+
+def _inspect_harvest_new(staging: str) -> dict:
+    """State for one pass over an archive: the wanted members land in
+    <staging>, the capped file listing accumulates here. Flat-layout
+    members are parked under <staging>/.flat and only promoted to
+    rootfs/ by _inspect_harvest_finish() if no real rootfs/ member
+    was ever seen."""
+    return {
+        'staging': staging,
+        'rootfs': {'files': [], 'truncated': False},
+        'flat': {'files': [], 'truncated': False},
+        'saw_rootfs': False,
+    }
+
+
+def _inspect_harvest_write(harvest: dict, rel_target: str, opener) -> None:
+    staging = harvest['staging']
+    target = os.path.normpath(os.path.join(staging, rel_target))
+    if not target.startswith(staging.rstrip(os.sep) + os.sep):
+        return
+    fobj = opener()
+    if fobj is None:
+        return
+    try:
+        data = fobj.read(_INSPECT_MEMBER_MAX_BYTES + 1)
+    finally:
+        fobj.close()
+    if len(data) > _INSPECT_MEMBER_MAX_BYTES:
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+
+def _inspect_harvest_add(harvest: dict, name: str, size: int, is_file: bool, opener) -> None:
+    """Feed one member. `opener()` returns a readable file object for
+    regular files; it is only called for members the report reads."""
+    section, rel = _inspect_classify_member(name)
+    if not section:
+        return
+    if section == 'manifest':
+        if is_file:
+            _inspect_harvest_write(harvest, 'manifest.json', opener)
+        return
+    if section == 'metadata':
+        if is_file:
+            _inspect_harvest_write(harvest, os.path.join('metadata', *rel), opener)
+        return
+    if section == 'rootfs':
+        harvest['saw_rootfs'] = True
+        prefix = 'rootfs'
+    else:
+        prefix = '.flat'
+    if is_file and _inspect_wants_rootfs_member(rel):
+        _inspect_harvest_write(harvest, os.path.join(prefix, *rel), opener)
+    # Same depth cap the os.walk listing used to apply.
+    if len(rel) - 1 > _INSPECT_FILES_MAX_DEPTH:
+        return
+    listing = harvest[section]
+    if len(listing['files']) >= _INSPECT_FILES_LIMIT:
+        listing['truncated'] = True
+        return
+    listing['files'].append({'path': '/' + '/'.join(rel), 'size': size if is_file else 0})
+
+
+def _inspect_harvest_finish(harvest: dict):
+    """Settle the layout. Returns (files, truncated), or None when the
+    archive had neither rootfs/ nor a flat etc/var/root/usr tree."""
+    staging = harvest['staging']
+    flat_dir = os.path.join(staging, '.flat')
+    if harvest['saw_rootfs']:
+        shutil.rmtree(flat_dir, ignore_errors=True)
+        listing = harvest['rootfs']
+    else:
+        listing = harvest['flat']
+        tops = {f['path'].split('/')[1] for f in listing['files']}
+        if not tops & {'etc', 'var', 'root', 'usr'}:
+            return None
+        if os.path.isdir(flat_dir):
+            os.rename(flat_dir, os.path.join(staging, 'rootfs'))
+    os.makedirs(os.path.join(staging, 'rootfs'), exist_ok=True)
+    os.makedirs(os.path.join(staging, 'metadata'), exist_ok=True)
+    return listing['files'], listing['truncated']
+
+
+def _inspect_harvest_tar_stream(fileobj, harvest: dict, mode: str = 'r|') -> None:
+    """Walk a tar (stream or seekable file) once, feeding every member
+    to the harvest. In 'r|' mode member data is only read for the few
+    members the harvest opens; the rest is skipped by the tar reader."""
+    import tarfile
+    with tarfile.open(fileobj=fileobj, mode=mode) as tf:
+        for member in tf:
+            if not (member.isfile() or member.issym() or member.islnk()):
+                continue
+            _inspect_harvest_add(harvest, member.name, member.size, member.isfile(),
+                                 lambda m=member: tf.extractfile(m))
+
+
+def _inspect_harvest_pipe(cmd: list, harvest: dict, env: dict | None = None) -> tuple:
+    """Run `cmd` (which writes a tar to stdout) and stream it into the
+    harvest. stderr goes to a temp file so a chatty tool can't fill
+    the pipe and deadlock; a watchdog kills the producer after
+    _INSPECT_STREAM_TIMEOUT. Returns (ok, error_message)."""
+    import tarfile
+    with tempfile.TemporaryFile() as errf:
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errf, env=env)
+        except OSError as e:
+            return False, str(e)
+        watchdog = threading.Timer(_INSPECT_STREAM_TIMEOUT, proc.kill)
+        watchdog.daemon = True
+        watchdog.start()
+        stream_err = None
+        try:
+            _inspect_harvest_tar_stream(proc.stdout, harvest)
+        except (tarfile.TarError, OSError, EOFError) as e:
+            stream_err = str(e)
+        finally:
+            proc.stdout.close()
+            rc = proc.wait()
+            watchdog.cancel()
+        # -SIGPIPE is expected: tarfile stops at the end-of-archive
+        # marker and the producer may still have padding to flush.
+        if rc not in (0, -13):
+            errf.seek(0)
+            err = errf.read().decode('utf-8', errors='replace').strip()
+            return False, (err or stream_err or f'{cmd[0]} exited {rc}')[:500]
+        if stream_err:
+            return False, stream_err[:500]
+    return True, None
+
+
+def _inspect_harvest_tree(root: str, harvest: dict) -> None:
+    """Same as the tar walk but over a directory (PBS FUSE mount or a
+    fallback full extract). Descent is pruned past the listing depth
+    so a FUSE walk doesn't pull directory chunks nobody will see."""
+    max_depth = _INSPECT_FILES_MAX_DEPTH + 2  # + rootfs/ + wrapper dir
+    for dirpath, dirs, fnames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        depth = 0 if rel_dir == '.' else rel_dir.count(os.sep) + 1
+        if depth >= max_depth:
+            dirs[:] = []
+        for fn in fnames:
+            full = os.path.join(dirpath, fn)
+            try:
+                st = os.lstat(full)
+            except OSError:
+                continue
+            is_file = os.path.isfile(full) and not os.path.islink(full)
+            _inspect_harvest_add(harvest, os.path.relpath(full, root), st.st_size, is_file,
+                                 lambda p=full: open(p, 'rb'))
+
+
+def _inspect_harvest_pbs(repo_dict: dict, snapshot: str, harvest: dict) -> tuple:
+    """Mount hostcfg.pxar read-only and walk it; only the chunks for
+    the directory entries and the wanted members get fetched. Hosts
+    without FUSE fall back to the classic full restore into a scratch
+    dir, which is then walked and dropped."""
+    env, err = _pbs_restore_env(repo_dict)
+    if not env:
+        return False, err
+    mnt = tempfile.mkdtemp(prefix='pmnx-inspect-mnt-')
+    if _pbs_mount_archive(repo_dict, snapshot, mnt, env):
+        try:
+            _inspect_harvest_tree(mnt, harvest)
+            return True, None
+        finally:
+            _pbs_umount(mnt)
+    try:
+        os.rmdir(mnt)
+    except OSError:
+        pass
+
+    scratch = tempfile.mkdtemp(prefix='pmnx-inspect-')
+    try:
+        ok, err = _inspect_extract_to_staging('pbs', repo_dict, snapshot, scratch)
+        if not ok:
+            return False, err
+        _inspect_harvest_tree(scratch, harvest)
+        return True, None
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _inspect_harvest_source(source: str, repo_dict: dict, snapshot: str, harvest: dict) -> tuple:
+    """Dispatch the single streaming pass per backend. Returns (ok, error)."""
+    import tarfile
+    if source == 'pbs':
+        return _inspect_harvest_pbs(repo_dict, snapshot, harvest)
+
+    if source == 'borg':
+        cmd = ['borg', 'export-tar', f"{repo_dict['repository']}::{snapshot}", '-']
+        return _inspect_harvest_pipe(cmd, harvest, env=_borg_env_for(repo_dict))
+
+    if source == 'local':
+        archive_path = repo_dict.get('path') or ''
+        if not os.path.isfile(archive_path):
+            return False, f'local archive not found: {archive_path}'
+        if archive_path.endswith('.tar.zst'):
+            return _inspect_harvest_pipe(['zstd', '-d', '-q', '--long=27', '-c', archive_path], harvest)
+        try:
+            if archive_path.endswith(('.tar.gz', '.tgz')):
+                with open(archive_path, 'rb') as f:
+                    _inspect_harvest_tar_stream(f, harvest, mode='r|gz')
+            elif archive_path.endswith('.tar'):
+                # Uncompressed: random-access mode seeks over member
+                # data instead of reading it.
+                with open(archive_path, 'rb') as f:
+                    _inspect_harvest_tar_stream(f, harvest, mode='r:')
+            else:
+                return False, f'unknown archive type: {archive_path}'
+        except (tarfile.TarError, OSError, EOFError) as e:
+            return False, str(e)[:500]
+        return True, None
+
+    return False, f'unknown source: {source}'
+
+
+def _inspect_cache_gc() -> None:
+    """Keep only the _INSPECT_CACHE_MAX_ENTRIES most recently used
+    harvests and drop abandoned half-built ones. Trees a request is
+    building or reading are pinned and never removed (inspect_cache)."""
+    inspect_cache.gc(_INSPECT_CACHE_ROOT, _INSPECT_CACHE_MAX_ENTRIES,
+                     _INSPECT_STREAM_TIMEOUT * 2)
+
+
+def _inspect_metadata_staging(source: str, repo_dict: dict, snapshot: str) -> tuple:
+    """Return (staging, files, truncated, error) for an archive, using
+    the on-disk harvest cache when the fingerprint matches. `staging`
+    is a canonical rootfs/+metadata/ tree holding only the members the
+    reports read; `files` is the capped listing for the Files tab.
+    Concurrent requests for the same archive share one harvest.
+
+    A returned `staging` is pinned so cache GC leaves it alone; release
+    it with `inspect_cache.unpin(staging)` once done with it."""
+    import hashlib
+    fingerprint = _inspect_fingerprint(source, repo_dict, snapshot)
+    if not fingerprint:
+        return None, None, False, 'archive not found'
+    key = hashlib.sha256(fingerprint.encode()).hexdigest()[:24]
+    final = os.path.join(_INSPECT_CACHE_ROOT, key)
+    inspect_cache.pin(final)
+    try:
+        result = _inspect_harvest_cached(source, repo_dict, snapshot, fingerprint, key, final)
+    except BaseException:
+        inspect_cache.unpin(final)
+        raise
+    if not result[0]:
+        inspect_cache.unpin(final)
+    return result
+
+
+def _inspect_harvest_cached(source: str, repo_dict: dict, snapshot: str,
+                            fingerprint: str, key: str, final: str) -> tuple:
+    """Body of _inspect_metadata_staging; the caller holds a pin on `final`."""
+    listing_path = os.path.join(final, 'files.json')
+
+    def _load_cached():
+        try:
+            with open(listing_path) as f:
+                listing = json.load(f)
+            os.utime(final)
+            return final, listing.get('files', []), bool(listing.get('truncated')), None
+        except (OSError, ValueError):
+            return None
+
+    cached = _load_cached()
+    if cached:
+        return cached
+
+    with _inspect_cache_lock:
+        build_lock = _inspect_build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        cached = _load_cached()
+        if cached:
+            return cached
+        os.makedirs(_INSPECT_CACHE_ROOT, mode=0o700, exist_ok=True)
+        _inspect_cache_gc()
+        building = tempfile.mkdtemp(prefix=f'.{key}-', dir=_INSPECT_CACHE_ROOT)
+        inspect_cache.pin(building)
+        building_pin = building
+        try:
+            harvest = _inspect_harvest_new(building)
+            ok, err = _inspect_harvest_source(source, repo_dict, snapshot, harvest)
+            if not ok:
+                return None, None, False, err
+            settled = _inspect_harvest_finish(harvest)
+            if settled is None:
+                return None, None, False, 'archive layout not recognized — no rootfs/ found'
+            files, truncated = settled
+            with open(os.path.join(building, 'files.json'), 'w') as f:
+                json.dump({'fingerprint': fingerprint, 'files': files, 'truncated': truncated}, f)
+            shutil.rmtree(final, ignore_errors=True)
+            os.rename(building, final)
+            building = None
+            return final, files, truncated, None
+        finally:
+            if building:
+                shutil.rmtree(building, ignore_errors=True)
+            inspect_cache.unpin(building_pin)
+            with _inspect_cache_lock:
+                _inspect_build_locks.pop(key, None)
+
+
+def _inspect_report_cache_get(fingerprint: str, host_token: str):
+    with _inspect_cache_lock:
+        entry = _INSPECT_REPORT_CACHE.get(fingerprint)
+    if not entry:
+        return None
+    if entry['host'] != host_token or time.monotonic() - entry['ts'] > _INSPECT_REPORT_TTL:
+        return None
+    return entry['report']
+
+
+def _inspect_report_cache_set(fingerprint: str, host_token: str, report: dict) -> None:
+    with _inspect_cache_lock:
+        _INSPECT_REPORT_CACHE[fingerprint] = {
+            'report': report, 'host': host_token, 'ts': time.monotonic(),
+        }
+        while len(_INSPECT_REPORT_CACHE) > _INSPECT_REPORT_MAX_ENTRIES:
+            oldest = min(_INSPECT_REPORT_CACHE, key=lambda k: _INSPECT_REPORT_CACHE[k]['ts'])
+            _INSPECT_REPORT_CACHE.pop(oldest, None)
+
+
+def _inspect_compose_json(staging: str, files: list | None = None,
+                          files_truncated: bool = False) -> dict:
     """Run the restore-aware scripts against the normalized staging and
     merge their JSON outputs into one dict the UI can render. Best-
     effort: a failure in one section reports an error in that section
-    only, the rest of the report still comes back."""
+    only, the rest of the report still comes back. `files` is the
+    listing captured during a streaming harvest; when omitted the
+    rootfs/ of a full extract is walked instead."""
     scripts_dir = f'{_PROXMENUX_SCRIPTS_DIR}/backup_restore/restore'
     out: dict = {}
 
@@ -17990,16 +19208,20 @@ def _inspect_compose_json(staging: str) -> dict:
     # ── File listing (capped, for the Files tab) ──
     rootfs = os.path.join(staging, 'rootfs')
     metadata = os.path.join(staging, 'metadata')
-    if os.path.isdir(rootfs):
-        files: list = []
-        limit = 5000
+    if files is not None:
+        out['files'] = files
+        out['files_truncated'] = files_truncated
+        out['files_total_count'] = len(files)
+    elif os.path.isdir(rootfs):
+        files = []
+        limit = _INSPECT_FILES_LIMIT
         truncated = False
         for root, dirs, fnames in os.walk(rootfs):
             rel_dir = os.path.relpath(root, rootfs)
             if rel_dir == '.':
                 rel_dir = ''
             depth = rel_dir.count(os.sep) + (1 if rel_dir else 0)
-            if depth > 6:
+            if depth > _INSPECT_FILES_MAX_DEPTH:
                 dirs[:] = []
                 continue
             for fn in fnames:
@@ -18057,9 +19279,10 @@ def _inspect_compose_json(staging: str) -> dict:
 @app.route('/api/host-backups/inspect-archive', methods=['POST'])
 @require_auth
 def api_host_backups_inspect_archive():
-    """One-shot 'View Contents' endpoint for any backend. Extracts the
-    snapshot to a temp staging dir, runs the restore-side tools, then
-    cleans up. Body:
+    """One-shot 'View Contents' endpoint for any backend. Streams the
+    snapshot once to harvest the report members (cached per archive
+    fingerprint), then runs the restore-side tools against that small
+    staging. Body:
       {source: "pbs"|"borg"|"local", repo_name?, snapshot?, path?}
     """
     payload = request.get_json(silent=True) or {}
@@ -18097,20 +19320,21 @@ def api_host_backups_inspect_archive():
             return jsonify({'error': f'local archive not found: {path}'}), 404
         repo_dict = {'path': path}
 
-    import tempfile
-    staging = tempfile.mkdtemp(prefix='pmnx-inspect-')
+    fingerprint = _inspect_fingerprint(source, repo_dict, snapshot)
+    host_token = _inspect_host_state_token()
+    cached = _inspect_report_cache_get(fingerprint, host_token)
+    if cached is not None:
+        return jsonify(cached)
+
+    staging, files, truncated, err = _inspect_metadata_staging(source, repo_dict, snapshot)
+    if not staging:
+        return jsonify({'error': err}), 500
     try:
-        ok, err = _inspect_extract_to_staging(source, repo_dict, snapshot, staging)
-        if not ok:
-            return jsonify({'error': err}), 500
-        if not _inspect_normalize_layout(staging):
-            return jsonify({'error': 'archive layout not recognized — no rootfs/ found'}), 500
-        return jsonify(_inspect_compose_json(staging))
+        report = _inspect_compose_json(staging, files, truncated)
     finally:
-        try:
-            shutil.rmtree(staging, ignore_errors=True)
-        except OSError:
-            pass
+        inspect_cache.unpin(staging)
+    _inspect_report_cache_set(fingerprint, host_token, report)
+    return jsonify(report)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -18381,7 +19605,9 @@ def api_host_backups_restore_cleanup():
 def api_host_backups_archive_manifest(archive_id):
     """Extract the manifest.json embedded inside a backup archive,
     using scripts/backup_restore/restore/parse_manifest.sh. Returns the
-    unwrapped manifest (i.e. without the proxmenux_backup_manifest key)."""
+    unwrapped manifest (i.e. without the proxmenux_backup_manifest key).
+    Reads from the cached metadata harvest when available so repeat
+    views don't decompress the archive again."""
     archive_path = _find_backup_archive_path(archive_id)
     if not archive_path:
         return jsonify({'error': 'archive not found'}), 404
@@ -18391,11 +19617,14 @@ def api_host_backups_archive_manifest(archive_id):
         return jsonify({'error': 'restore tooling not installed on this host',
                         'install_hint': 'Run the ProxMenux installer to deploy scripts/backup_restore/'}), 503
 
+    staging, _files, _truncated, _err = _inspect_metadata_staging('local', {'path': archive_path}, '')
     try:
-        r = subprocess.run(['bash', parse_script, archive_path],
+        r = subprocess.run(['bash', parse_script, staging or archive_path],
                            capture_output=True, text=True, timeout=30)
     except (subprocess.TimeoutExpired, OSError) as e:
         return jsonify({'error': f'parser invocation failed: {e}'}), 500
+    finally:
+        inspect_cache.unpin(staging)
 
     if r.returncode != 0:
         return jsonify({'error': r.stderr.strip() or 'parse_manifest exited non-zero'}), 422
@@ -18412,7 +19641,9 @@ def api_host_backups_archive_preflight(archive_id):
     """Run the dry-run preflight + storage + network + driver-plan report
     for this archive against the current host. Body: {"mode": "<mode>"}.
     Modes match restore_modes.sh: full, storage_only, network_only, base,
-    custom. Returns the combined run_restore.sh JSON report."""
+    custom. Returns the combined run_restore.sh JSON report. Every
+    sub-script re-reads the manifest, so they are pointed at the cached
+    metadata harvest instead of decompressing the archive each time."""
     archive_path = _find_backup_archive_path(archive_id)
     if not archive_path:
         return jsonify({'error': 'archive not found'}), 404
@@ -18427,13 +19658,16 @@ def api_host_backups_archive_preflight(archive_id):
         return jsonify({'error': 'restore tooling not installed on this host',
                         'install_hint': 'Run the ProxMenux installer to deploy scripts/backup_restore/'}), 503
 
+    staging, _files, _truncated, _err = _inspect_metadata_staging('local', {'path': archive_path}, '')
     try:
         r = subprocess.run(
-            ['bash', run_script, archive_path, '--mode', mode, '--json'],
+            ['bash', run_script, staging or archive_path, '--mode', mode, '--json'],
             capture_output=True, text=True, timeout=120
         )
     except (subprocess.TimeoutExpired, OSError) as e:
         return jsonify({'error': f'preflight invocation failed: {e}'}), 500
+    finally:
+        inspect_cache.unpin(staging)
 
     # run_restore.sh exits non-zero when preflight has fails; we still
     # want to surface the report so the UI can show what failed.
@@ -18523,20 +19757,19 @@ def api_host_backups_archive_prepare_restore(archive_id):
 @require_auth_or_ticket
 def api_host_backups_archive_download(archive_id):
     """Stream the .tar.zst archive back to the operator with a sane
-    Content-Disposition. send_file handles range requests + streaming
-    so the Flask process doesn't hold the whole archive in memory —
-    important since these can be hundreds of MB."""
+    Content-Disposition. Range / If-Range requests resume an interrupted
+    download, and `?rate_kbps=` (or PROXMENUX_DOWNLOAD_RATE_KBPS) caps
+    the bandwidth. The file is streamed in chunks so the Flask process
+    never holds the whole archive in memory — these can be many GB.
+    Note that the single-use `?ticket=` is consumed by the first
+    request; resuming clients authenticate with the Bearer header."""
     archive_path = _find_backup_archive_path(archive_id)
     if not archive_path:
         return jsonify({'error': 'archive not found'}), 404
     if not os.path.isfile(archive_path):
         return jsonify({'error': 'archive path is not a regular file'}), 500
-    return send_file(
-        archive_path,
-        as_attachment=True,
-        download_name=os.path.basename(archive_path),
-        mimetype='application/x-zstd-compressed-tar',
-    )
+    return _send_archive_file(archive_path, os.path.basename(archive_path),
+                              'application/x-zstd-compressed-tar', _download_rate_kbps())
 
 
 @app.route('/api/host-backups/archives/<path:archive_id>', methods=['DELETE'])
@@ -18824,6 +20057,7 @@ if __name__ == '__main__':
 
     # ── Notification Service ──
     try:
+        pve_task_index.start()
         notification_manager.start()
         if notification_manager._enabled:
             print(f"[ProxMenux] Notification service started (channels: {list(notification_manager._channels.keys())})")
@@ -18832,6 +20066,18 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"[ProxMenux] Notification service failed to start: {e}")
 
+    # ── Remote export leftovers from a previous run ──
+    try:
+        _cleanup_stale_exports()
+    except Exception as e:
+        print(f"[ProxMenux] export dir cleanup failed: {e}")
+
+    # ── Dashboard static assets (index + content hashes for ETags) ──
+    try:
+        static_assets.warm_index()
+    except Exception as e:
+        print(f"[ProxMenux] static asset index failed: {e}")
+
     # Check for SSL configuration
     ssl_ctx = None
     ssl_cert = None
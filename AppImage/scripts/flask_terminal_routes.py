@@ -11,7 +11,6 @@ import os
 import pty
 import re
 import secrets
-import select
 import struct
 import fcntl
 import termios
@@ -23,6 +22,8 @@ import tempfile
 import base64
 
 from jwt_middleware import require_auth
+from pty_bridge import pump_pty_output
+from log_broadcaster import LogBroadcaster
 
 # Allowed shape for interaction_id used as a file path component when writing
 # the response file. Bounded length, no separators, no path traversal. See
@@ -92,9 +93,8 @@ def _ws_auth_check():
     — same semantics as the @require_auth decorator on REST routes.
     """
     try:
-        from auth_manager import load_auth_config
-        config = load_auth_config()
-        if not config.get("enabled", False) or config.get("declined", False):
+        from auth_manager import get_auth_state
+        if not get_auth_state()['required']:
             return True
     except Exception:
         # If auth status can't be loaded (DB error / missing module), fail
@@ -205,24 +205,9 @@ def set_winsize(fd, rows, cols):
     except Exception as e:
         print(f"Error setting window size: {e}")
 
-def read_and_forward_output(master_fd, ws):
-    """Read from PTY and send to WebSocket"""
-    while True:
-        try:
-            # Use select with timeout to check if data is available
-            r, _, _ = select.select([master_fd], [], [], 0.01)
-            if master_fd in r:
-                try:
-                    data = os.read(master_fd, 4096)
-                    if data:
-                        ws.send(data.decode('utf-8', errors='ignore'))
-                    else:
-                        break
-                except OSError:
-                    break
-        except Exception as e:
-            print(f"Error reading from PTY: {e}")
-            break
+def read_and_forward_output(master_fd, ws, binary=False):
+    """Read from PTY and send to WebSocket (see pty_bridge for framing)"""
+    pump_pty_output(master_fd, ws.send, binary=binary)
 
 @sock.route('/ws/terminal')
 def terminal_websocket(ws):
@@ -292,10 +277,12 @@ def terminal_websocket(ws):
     # Set initial terminal size
     set_winsize(master_fd, 30, 120)
     
-    # Start thread to read PTY output and forward to WebSocket
+    # Start thread to read PTY output and forward to WebSocket. Clients
+    # that set `binaryType = "arraybuffer"` ask for raw binary frames with
+    # `?binary=1`; everyone else keeps getting text frames.
     output_thread = threading.Thread(
         target=read_and_forward_output,
-        args=(master_fd, ws),
+        args=(master_fd, ws, request.args.get('binary') == '1'),
         daemon=True
     )
     output_thread.start()
@@ -486,87 +473,65 @@ def script_websocket(ws, session_id):
     # Set terminal size
     set_winsize(master_fd, 30, 120)
     
-    def monitor_web_log():
-        last_position = 0
-        
-        while script_process.poll() is None:
+    def parse_web_interaction(line):
+        line = line.strip()
+        if not line.startswith('WEB_INTERACTION:'):
+            return None
+        try:
+            # Parse: WEB_INTERACTION:type:id:title_b64:message_b64[:options_json]
+            parts = line[16:].split(':', 4)
+            interaction_type = parts[0]
+            interaction_id = parts[1]
+            title_b64 = parts[2]
+            message_b64 = parts[3]
+            
+            title = base64.b64decode(title_b64).decode('utf-8')
+            message = base64.b64decode(message_b64).decode('utf-8')
+            
+            interaction_data = {
+                'type': 'web_interaction',
+                'interaction': {
+                    'type': interaction_type,
+                    'id': interaction_id,
+                    'title': title,
+                    'message': message
+                }
+            }
+            
+            # Parse options for menu
+            if interaction_type == 'menu' and len(parts) > 4:
+                options_json = parts[4]
+                interaction_data['interaction']['options'] = json.loads(options_json)
+            
+            # Parse default for inputbox
+            if interaction_type == 'inputbox' and len(parts) > 4:
+                default_b64 = parts[4]
+                interaction_data['interaction']['default'] = base64.b64decode(default_b64).decode('utf-8')
+            
+            return json.dumps(interaction_data)
+        except Exception:
+            return None
+    
+    # One inotify-driven tailer for the web log instead of a 10 ms poll loop.
+    web_log = LogBroadcaster(
+        web_log_path,
+        parse=parse_web_interaction,
+        is_done=lambda: script_process.poll() is not None,
+    )
+    
+    def forward_web_interactions():
+        for _, interaction in web_log.subscribe():
             try:
-                if os.path.exists(web_log_path):
-                    with open(web_log_path, 'r') as f:
-                        f.seek(last_position)
-                        new_lines = f.readlines()
-                        last_position = f.tell()
-                        
-                        for line in new_lines:
-                            line = line.strip()
-                            if line.startswith('WEB_INTERACTION:'):
-                                try:
-                                    # Parse: WEB_INTERACTION:type:id:title_b64:message_b64[:options_json]
-                                    parts = line[16:].split(':', 4)
-                                    interaction_type = parts[0]
-                                    interaction_id = parts[1]
-                                    title_b64 = parts[2]
-                                    message_b64 = parts[3]
-                                    
-                                    title = base64.b64decode(title_b64).decode('utf-8')
-                                    message = base64.b64decode(message_b64).decode('utf-8')
-                                    
-                                    interaction_data = {
-                                        'type': 'web_interaction',
-                                        'interaction': {
-                                            'type': interaction_type,
-                                            'id': interaction_id,
-                                            'title': title,
-                                            'message': message
-                                        }
-                                    }
-                                    
-                                    # Parse options for menu
-                                    if interaction_type == 'menu' and len(parts) > 4:
-                                        options_json = parts[4]
-                                        interaction_data['interaction']['options'] = json.loads(options_json)
-                                    
-                                    # Parse default for inputbox
-                                    if interaction_type == 'inputbox' and len(parts) > 4:
-                                        default_b64 = parts[4]
-                                        interaction_data['interaction']['default'] = base64.b64decode(default_b64).decode('utf-8')
-                                    
-                                    # Send interaction to WebSocket
-                                    ws.send(json.dumps(interaction_data))
-                                    
-                                except Exception as e:
-                                    pass
-                
-                time.sleep(0.01)
-            except Exception as e:
+                ws.send(interaction)
+            except Exception:
                 break
     
-    web_log_thread = threading.Thread(target=monitor_web_log, daemon=True)
+    web_log_thread = threading.Thread(target=forward_web_interactions, daemon=True)
     web_log_thread.start()
     
     # Thread to read script output and forward to WebSocket
     def read_script_output():
-        while True:
-            try:
-                r, _, _ = select.select([master_fd], [], [], 0.01)
-                if master_fd in r:
-                    try:
-                        data = os.read(master_fd, 4096)
-                        if not data:
-                            break
-                        
-                        text = data.decode('utf-8', errors='ignore')
-                        
-                        # Send raw text to terminal
-                        try:
-                            ws.send(text)
-                        except Exception as e:
-                            break
-                            
-                    except OSError as e:
-                        break
-            except Exception as e:
-                break
+        pump_pty_output(master_fd, ws.send)
         
         script_process.wait()
         exit_code = script_process.returncode if script_process.returncode is not None else 0
@@ -649,6 +614,8 @@ def script_websocket(ws, session_id):
         except:
             pass
         
+        web_log.close()
+        
         try:
             os.close(web_log_fd)
             os.unlink(web_log_path)
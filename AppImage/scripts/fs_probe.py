@@ -0,0 +1,364 @@
+"""Timeout-safe ``stat``/``statvfs`` for paths that may sit on a stale mount.
+
+A stale NFS/CIFS handle blocks ``os.stat``/``os.statvfs`` in the kernel
+(sometimes for good), so ``mount_monitor``, ``lxc_mount_inventory`` and
+``lxc_mount_points`` forked ``stat``, ``df`` or ``mountpoint`` once per
+mount and per sweep just to be able to time the call out. With a few
+dozen CTs that is hundreds of short-lived processes every health cycle.
+
+This module keeps a small pool of long-lived probe workers — this same
+file run as a script — that make the syscalls in-process and answer over
+a pipe, one JSON line per path. The parent hands each idle worker the
+next path of the batch and enforces a per-path deadline: a worker still
+stuck past it is killed and replaced, and the rest of the batch carries
+on over the other workers. A sweep forks nothing unless a mount actually
+hangs.
+
+Ops:
+
+  * ``stat``       — ``{ok, error}``
+  * ``statvfs``    — ``{ok, error, total_bytes, used_bytes, available_bytes}``
+                     (``df -B1`` semantics)
+  * ``probe``      — ``stat``, then ``statvfs`` when the path answered
+  * ``mountpoint`` — ``{ok, error, exists, is_mountpoint}`` like
+                     ``mountpoint -q`` (bind mounts included)
+
+A timed-out op comes back as ``{ok: False, timed_out: True, error}``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+_DEFAULT_TIMEOUT = float(os.environ.get("PROXMENUX_MOUNT_STAT_TIMEOUT", "2"))
+_MAX_WORKERS = 3
+# How long a caller waits for a worker when all of them are busy before
+# probing in a throwaway thread instead.
+_CHECKOUT_WAIT = 10
+_OPS = ("stat", "statvfs", "probe", "mountpoint")
+
+_EMPTY_CAPACITY = {"total_bytes": None, "used_bytes": None, "available_bytes": None}
+
+_pool = threading.Condition()
+_idle: list["_Worker"] = []
+_live = 0
+# Killed workers not reaped yet — a task stuck in uninterruptible sleep
+# only exits once the syscall returns.
+_abandoned: list[subprocess.Popen] = []
+
+
+# ─── Worker side ─────────────────────────────────────────────────────────────
+
+def _unescape(field: str) -> str:
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+
+def _mount_points() -> set[str]:
+    out = set()
+    with open("/proc/self/mountinfo", "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) > 4:
+                out.add(_unescape(parts[4]))
+    return out
+
+
+def _do(op: str, path: str) -> dict[str, Any]:
+    """Run one op in this process. Never raises for filesystem errors."""
+    if op not in _OPS:
+        return {"ok": False, "error": f"unknown op {op!r}"}
+    if op == "mountpoint":
+        try:
+            if not os.path.exists(path):
+                return {"ok": True, "error": None, "exists": False, "is_mountpoint": False}
+            real = os.path.realpath(path)
+            is_mp = real in _mount_points() or os.path.ismount(real)
+        except OSError as e:
+            return {"ok": False, "error": str(e), "exists": None, "is_mountpoint": None}
+        return {"ok": True, "error": None, "exists": True, "is_mountpoint": is_mp}
+
+    out: dict[str, Any] = {"ok": True, "error": None}
+    if op in ("stat", "probe"):
+        try:
+            os.stat(path)
+        except OSError as e:
+            out = {"ok": False, "error": f"cannot stat '{path}': {e.strerror or e}"}
+            return dict(out, **_EMPTY_CAPACITY) if op == "probe" else out
+    if op in ("statvfs", "probe"):
+        try:
+            st = os.statvfs(path)
+        except OSError as e:
+            if op == "statvfs":
+                out = {"ok": False, "error": f"cannot statvfs '{path}': {e.strerror or e}"}
+            out.update(_EMPTY_CAPACITY)
+        else:
+            total = st.f_blocks * st.f_frsize
+            out.update({
+                "total_bytes": total,
+                "used_bytes": total - st.f_bfree * st.f_frsize,
+                "available_bytes": st.f_bavail * st.f_frsize,
+            })
+    return out
+
+
+def _worker_main() -> None:
+    # The parent kills us on a deadline; SIGINT from a terminal should
+    # not print a traceback into the server log.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for line in sys.stdin:
+        try:
+            req = json.loads(line)
+            resp = _do(req["op"], req["path"])
+        except (ValueError, KeyError, TypeError) as e:
+            resp = {"ok": False, "error": f"bad request: {e}"}
+        sys.stdout.write(json.dumps(resp) + "\n")
+        sys.stdout.flush()
+
+
+# ─── Parent side ─────────────────────────────────────────────────────────────
+
+class _Worker:
+    def __init__(self) -> None:
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, close_fds=True,
+        )
+        self.fd = self.proc.stdout.fileno()
+        self._buf = b""
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def send(self, op: str, path: str) -> None:
+        self.proc.stdin.write((json.dumps({"op": op, "path": path}) + "\n").encode())
+        self.proc.stdin.flush()
+
+    def read(self) -> Optional[dict[str, Any]]:
+        """Consume what is readable; return the response once a full
+        line arrived. Raises EOFError when the worker went away."""
+        chunk = os.read(self.fd, 65536)
+        if not chunk:
+            raise EOFError("probe worker exited")
+        self._buf += chunk
+        if b"\n" not in self._buf:
+            return None
+        line, self._buf = self._buf.split(b"\n", 1)
+        return json.loads(line)
+
+    def close(self) -> None:
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+def _reap() -> None:
+    _abandoned[:] = [p for p in _abandoned if p.poll() is None]
+
+
+def _retire(worker: _Worker, kill: bool) -> None:
+    global _live
+    if kill:
+        try:
+            worker.proc.kill()
+        except OSError:
+            pass
+    worker.close()
+    with _pool:
+        if worker.proc.poll() is None:
+            _abandoned.append(worker.proc)
+        _live -= 1
+        _reap()
+        _pool.notify_all()
+
+
+def _spawn_locked() -> Optional[_Worker]:
+    global _live
+    try:
+        worker = _Worker()
+    except OSError as e:
+        print(f"[fs_probe] cannot start probe worker: {e}")
+        return None
+    _live += 1
+    return worker
+
+
+def _checkout(want: int) -> list[_Worker]:
+    """Up to `want` workers, at least one unless the pool stays busy for
+    `_CHECKOUT_WAIT` seconds or workers can't be started."""
+    global _live
+    got: list[_Worker] = []
+    deadline = time.monotonic() + _CHECKOUT_WAIT
+    with _pool:
+        _reap()
+        while True:
+            while _idle and len(got) < want:
+                worker = _idle.pop()
+                if worker.alive():
+                    got.append(worker)
+                else:
+                    worker.close()
+                    _live -= 1
+            while len(got) < want and _live < _MAX_WORKERS:
+                worker = _spawn_locked()
+                if worker is None:
+                    return got
+                got.append(worker)
+            remaining = deadline - time.monotonic()
+            if got or remaining <= 0:
+                return got
+            _pool.wait(remaining)
+
+
+def _release(workers: list[_Worker]) -> None:
+    with _pool:
+        _idle.extend(workers)
+        _pool.notify_all()
+
+
+def _run_in_thread(op: str, path: str, timeout: float) -> dict[str, Any]:
+    box: dict[str, Any] = {}
+    t = threading.Thread(target=lambda: box.update(r=_do(op, path)), daemon=True)
+    t.start()
+    t.join(timeout)
+    return box.get("r") or _timed_out(op, timeout)
+
+
+def _timed_out(op: str, timeout: float) -> dict[str, Any]:
+    out = {"ok": False, "timed_out": True, "error": f"{op} timed out after {timeout:g}s"}
+    if op in ("statvfs", "probe"):
+        out.update(_EMPTY_CAPACITY)
+    if op == "mountpoint":
+        out.update({"exists": None, "is_mountpoint": None})
+    return out
+
+
+def run(ops: list[tuple[str, str]], timeout: float = _DEFAULT_TIMEOUT) -> list[dict[str, Any]]:
+    """Run ``(op, path)`` pairs across the worker pool, each with its own
+    `timeout`; results come back in input order."""
+    results: list[Optional[dict[str, Any]]] = [None] * len(ops)
+    if not ops:
+        return []
+    pending = deque(range(len(ops)))
+    workers = _checkout(min(_MAX_WORKERS, len(ops)))
+    busy: dict[_Worker, tuple[int, float]] = {}
+    try:
+        while pending and workers or busy:
+            for w in list(workers):
+                if not pending:
+                    break
+                if w in busy:
+                    continue
+                i = pending.popleft()
+                try:
+                    w.send(*ops[i])
+                except OSError:
+                    pending.appendleft(i)
+                    workers.remove(w)
+                    _retire(w, kill=True)
+                    continue
+                busy[w] = (i, time.monotonic() + timeout)
+            if not busy:
+                continue
+            wait = max(0.0, min(d for _, d in busy.values()) - time.monotonic())
+            by_fd = {w.fd: w for w in busy}
+            readable, _, _ = select.select(list(by_fd), [], [], wait)
+            for fd in readable:
+                w = by_fd[fd]
+                try:
+                    resp = w.read()
+                except (EOFError, OSError, ValueError) as e:
+                    i, _ = busy.pop(w)
+                    results[i] = {"ok": False, "error": f"probe worker failed: {e}"}
+                    workers.remove(w)
+                    _retire(w, kill=True)
+                    continue
+                if resp is not None:
+                    i, _ = busy.pop(w)
+                    results[i] = resp
+            now = time.monotonic()
+            for w, (i, deadline) in list(busy.items()):
+                if deadline > now:
+                    continue
+                busy.pop(w)
+                results[i] = _timed_out(ops[i][0], timeout)
+                workers.remove(w)
+                _retire(w, kill=True)
+            # Replace killed workers while there is work left for them.
+            wanted = min(_MAX_WORKERS, len(pending) + len(busy))
+            if pending and len(workers) < wanted:
+                with _pool:
+                    while len(workers) < wanted and _live < _MAX_WORKERS:
+                        worker = _spawn_locked()
+                        if worker is None:
+                            break
+                        workers.append(worker)
+    except BaseException:
+        for w in busy:
+            workers.remove(w)
+            _retire(w, kill=True)
+        busy.clear()
+        raise
+    finally:
+        _release(workers)
+
+    # No worker could be had (pool exhausted or exec failing): fall back
+    # to a daemon thread per path so the caller still gets a deadline.
+    while pending:
+        i = pending.popleft()
+        results[i] = _run_in_thread(ops[i][0], ops[i][1], timeout)
+    return results  # type: ignore[return-value]
+
+
+# ─── Convenience wrappers ────────────────────────────────────────────────────
+
+def stat_paths(paths: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[dict[str, Any]]:
+    """``{reachable, error, timed_out}`` per path."""
+    return [
+        {"reachable": r["ok"], "error": r["error"], "timed_out": r.get("timed_out", False)}
+        for r in run([("stat", p) for p in paths], timeout)
+    ]
+
+
+def statvfs_paths(paths: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[dict[str, Optional[int]]]:
+    """``{total_bytes, used_bytes, available_bytes}`` per path; None values
+    when the path could not be read in time."""
+    return [
+        {k: r.get(k) for k in _EMPTY_CAPACITY}
+        for r in run([("statvfs", p) for p in paths], timeout)
+    ]
+
+
+def probe_paths(paths: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[dict[str, Any]]:
+    """``stat`` then ``statvfs`` per path: ``{reachable, error, timed_out,
+    total_bytes, used_bytes, available_bytes}``. Capacity is only read
+    when the stat answered, so a stale mount costs one timeout."""
+    return [
+        {"reachable": r["ok"], "error": r["error"], "timed_out": r.get("timed_out", False),
+         **{k: r.get(k) for k in _EMPTY_CAPACITY}}
+        for r in run([("probe", p) for p in paths], timeout)
+    ]
+
+
+def mountpoint_paths(paths: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[dict[str, Any]]:
+    """``{exists, is_mountpoint, error}`` per host path."""
+    return [
+        {"exists": r.get("exists"), "is_mountpoint": r.get("is_mountpoint"), "error": r["error"]}
+        for r in run([("mountpoint", p) for p in paths], timeout)
+    ]
+
+
+if __name__ == "__main__":
+    _worker_main()
@@ -0,0 +1,320 @@
+"""Parsed index of every VM/CT config in the cluster.
+
+Guest name and existence lookups were spread over the monitor —
+``HealthMonitor``, ``JournalWatcher``, ``TaskWatcher``,
+``HealthPersistence`` and the SR-IOV consumer lookup each opened
+``/etc/pve/{qemu-server,lxc}/<vmid>.conf`` or ran ``qm``/``pct`` on their
+own, per event. A burst of guest starts (node boot, HA recovery) fired a
+few hundred config reads and ``qm status`` forks for the same handful of
+guests.
+
+This module parses all guest configs once and keeps them in sync with
+pmxcfs:
+
+  * ``/etc/pve/.version`` carries a cluster-wide counter that pmxcfs bumps
+    on every write. It is read at most every ``_RECHECK_INTERVAL``
+    seconds; while it doesn't move, lookups are pure dict hits;
+  * when it moves, ``/etc/pve/.vmlist`` lists every guest (vmid → node,
+    type, version) and only configs whose per-guest version changed are
+    re-parsed. pmxcfs keeps mtimes to the second, so a same-size edit
+    within one second would slip past a stat signature; the version
+    doesn't. Outside pmxcfs (tests, a broken cluster FS) the node
+    directories are listed instead and (mtime, size) is the signature.
+
+Lookups are by vmid, name, MAC, PCI address, CT device path and storage.
+Only the current config counts — snapshot sections are ignored.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Optional
+
+import lxc_mount_inventory
+
+_PVE_DIR = "/etc/pve"
+_QEMU_RUN_DIR = "/var/run/qemu-server"
+_PROC = "/proc"
+_RECHECK_INTERVAL = 2.0
+
+_CONF_DIRS = {"vm": "qemu-server", "ct": "lxc"}
+_VMLIST_TYPES = {"qemu": "vm", "lxc": "ct"}
+
+_MAC_RE = re.compile(r"=((?:[0-9a-f]{2}:){5}[0-9a-f]{2})(?:,|$)", re.IGNORECASE)
+_NET_KEY_RE = re.compile(r"^net\d+$")
+_PCI_KEY_RE = re.compile(r"^hostpci\d+$")
+_DEV_KEY_RE = re.compile(r"^dev\d+$")
+_DISK_KEY_RE = re.compile(
+    r"^(?:(?:scsi|sata|ide|virtio|efidisk|tpmstate|unused|mp)\d+|rootfs)$"
+)
+
+_lock = threading.RLock()
+_state: dict[str, Any] = {"token": None, "checked_at": 0.0, "node": None}
+_guests: dict[str, dict[str, Any]] = {}
+_sigs: dict[str, tuple] = {}
+_by_name: dict[str, list[str]] = {}
+_by_mac: dict[str, str] = {}
+_by_pci: dict[str, str] = {}
+_by_device: dict[str, str] = {}
+_by_storage: dict[str, list[str]] = {}
+
+
+# ─── Parsing ─────────────────────────────────────────────────────────────────
+
+def _short_bdf(bdf: str) -> str:
+    bdf = bdf.strip().lower()
+    return bdf[5:] if bdf.startswith("0000:") else bdf
+
+
+def parse_config(text: str, gtype: str) -> dict[str, Any]:
+    """Parse the current section of a guest config (everything before the
+    first ``[snapshot]`` header)."""
+    out: dict[str, Any] = {
+        "name": "", "onboot": False, "macs": [], "pci": [], "storages": [], "devices": [],
+    }
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("["):
+            break
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            continue
+        key, value = key.strip(), value.strip()
+        if key in ("name", "hostname"):
+            out["name"] = out["name"] or value
+        elif key == "onboot":
+            out["onboot"] = value == "1"
+        elif _NET_KEY_RE.match(key):
+            m = _MAC_RE.search(value)
+            if m:
+                out["macs"].append(m.group(1).lower())
+        elif gtype == "vm" and _PCI_KEY_RE.match(key):
+            ids = value.split(",", 1)[0]
+            if ids.startswith("host="):
+                ids = ids[5:]
+            if not ids.startswith("mapping="):
+                out["pci"].extend(_short_bdf(i) for i in ids.split(";") if i.strip())
+        elif _DISK_KEY_RE.match(key):
+            volume = value.split(",", 1)[0]
+            if ":" in volume and not volume.startswith("/"):
+                storage = volume.split(":", 1)[0]
+                if storage not in out["storages"]:
+                    out["storages"].append(storage)
+        elif gtype == "ct" and _DEV_KEY_RE.match(key):
+            path = value.split(",", 1)[0]
+            out["devices"].append(path[5:] if path.startswith("path=") else path)
+        elif gtype == "ct" and key == "lxc.mount.entry" and value:
+            out["devices"].append(value.split()[0])
+    return out
+
+
+# ─── Refresh ─────────────────────────────────────────────────────────────────
+
+def _local_node() -> str:
+    if _state["node"] is None:
+        try:
+            _state["node"] = os.path.basename(os.readlink(f"{_PVE_DIR}/local"))
+        except OSError:
+            _state["node"] = socket.gethostname().split(".", 1)[0]
+    return _state["node"]
+
+
+def _read_token() -> Optional[int]:
+    try:
+        with open(f"{_PVE_DIR}/.version", "r") as f:
+            return int(json.load(f).get("version"))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def _list_guests() -> dict[str, tuple[str, str, Optional[int]]]:
+    """vmid → (type, node, version), from ``.vmlist`` or the node
+    directories (version None there)."""
+    try:
+        with open(f"{_PVE_DIR}/.vmlist", "r") as f:
+            ids = json.load(f).get("ids") or {}
+        return {
+            str(vmid): (_VMLIST_TYPES[v.get("type")], v.get("node", ""), v.get("version"))
+            for vmid, v in ids.items() if v.get("type") in _VMLIST_TYPES
+        }
+    except (OSError, ValueError, AttributeError):
+        pass
+    out: dict[str, tuple[str, str, Optional[int]]] = {}
+    nodes_dir = f"{_PVE_DIR}/nodes"
+    try:
+        nodes = sorted(os.listdir(nodes_dir))
+    except OSError:
+        nodes = []
+    for node in nodes:
+        for gtype, sub in _CONF_DIRS.items():
+            try:
+                names = os.listdir(f"{nodes_dir}/{node}/{sub}")
+            except OSError:
+                continue
+            for fn in names:
+                if fn.endswith(".conf") and fn[:-5].isdigit():
+                    out.setdefault(fn[:-5], (gtype, node, None))
+    return out
+
+
+def _conf_path(vmid: str, gtype: str, node: str) -> str:
+    return f"{_PVE_DIR}/nodes/{node}/{_CONF_DIRS[gtype]}/{vmid}.conf"
+
+
+def _rebuild_indexes() -> None:
+    _by_name.clear()
+    _by_mac.clear()
+    _by_pci.clear()
+    _by_device.clear()
+    _by_storage.clear()
+    for vmid in sorted(_guests, key=int):
+        g = _guests[vmid]
+        if g["name"]:
+            _by_name.setdefault(g["name"].lower(), []).append(vmid)
+        for mac in g["macs"]:
+            _by_mac.setdefault(mac, vmid)
+        for storage in g["storages"]:
+            _by_storage.setdefault(storage, []).append(vmid)
+        # PCI and device passthrough only mean something on this node.
+        if g["local"]:
+            for bdf in g["pci"]:
+                _by_pci.setdefault(bdf, vmid)
+            for dev in g["devices"]:
+                _by_device.setdefault(dev, vmid)
+
+
+def _refresh(force: bool = False) -> None:
+    now = time.monotonic()
+    with _lock:
+        if not force and _state["checked_at"] and now - _state["checked_at"] < _RECHECK_INTERVAL:
+            return
+        _state["checked_at"] = now
+        token = _read_token()
+        if not force and token is not None and token == _state["token"]:
+            return
+
+        listed = _list_guests()
+        local = _local_node()
+        changed = False
+        for vmid in list(_guests):
+            if vmid not in listed:
+                del _guests[vmid]
+                _sigs.pop(vmid, None)
+                changed = True
+        for vmid, (gtype, node, version) in listed.items():
+            path = _conf_path(vmid, gtype, node)
+            if version is not None:
+                sig = (path, "version", version)
+            else:
+                try:
+                    st = os.stat(path)
+                    sig = (path, st.st_mtime_ns, st.st_size)
+                except OSError:
+                    sig = (path, None, None)
+            if vmid in _guests and _sigs.get(vmid) == sig:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    parsed = parse_config(f.read(), gtype)
+            except OSError:
+                parsed = parse_config("", gtype)
+            parsed.update({"vmid": vmid, "type": gtype, "node": node, "local": node == local})
+            _guests[vmid] = parsed
+            _sigs[vmid] = sig
+            changed = True
+        if changed:
+            _rebuild_indexes()
+        _state["token"] = token
+
+
+# ─── Lookups ─────────────────────────────────────────────────────────────────
+
+def get(vmid: Any) -> Optional[dict[str, Any]]:
+    """``{vmid, type ('vm'|'ct'), node, local, name, onboot, macs, pci,
+    storages, devices}`` or None when no such guest exists."""
+    _refresh()
+    with _lock:
+        g = _guests.get(str(vmid).strip())
+        return copy.deepcopy(g) if g else None
+
+
+def exists(vmid: Any, local: bool = False) -> bool:
+    """Guest config exists (on this node when `local`)."""
+    _refresh()
+    with _lock:
+        g = _guests.get(str(vmid).strip())
+        return bool(g) and (g["local"] or not local)
+
+
+def name(vmid: Any) -> str:
+    _refresh()
+    with _lock:
+        g = _guests.get(str(vmid).strip())
+        return g["name"] if g else ""
+
+
+def all_guests() -> list[dict[str, Any]]:
+    _refresh()
+    with _lock:
+        return [copy.deepcopy(_guests[v]) for v in sorted(_guests, key=int)]
+
+
+def by_name(guest_name: str) -> list[str]:
+    _refresh()
+    with _lock:
+        return list(_by_name.get((guest_name or "").lower(), []))
+
+
+def by_mac(mac: str) -> Optional[str]:
+    _refresh()
+    with _lock:
+        return _by_mac.get((mac or "").lower())
+
+
+def by_pci(bdf: str) -> Optional[str]:
+    """Local VM with a ``hostpciN`` entry for `bdf` (short or full form)."""
+    _refresh()
+    with _lock:
+        return _by_pci.get(_short_bdf(bdf or ""))
+
+
+def by_device(path: str) -> Optional[str]:
+    """Local CT passing `path` through (``devN:`` / ``lxc.mount.entry``)."""
+    _refresh()
+    with _lock:
+        return _by_device.get(path)
+
+
+def by_storage(storage: str) -> list[str]:
+    _refresh()
+    with _lock:
+        return list(_by_storage.get(storage, []))
+
+
+def is_running(vmid: Any) -> bool:
+    """Guest runs on this node: the QEMU pidfile points at a live process
+    of that VM, or the CT is among the running LXCs."""
+    g = get(vmid)
+    if g is None or not g["local"]:
+        return False
+    if g["type"] == "ct":
+        return lxc_mount_inventory.container(g["vmid"]) is not None
+    try:
+        with open(f"{_QEMU_RUN_DIR}/{g['vmid']}.pid", "r") as f:
+            pid = f.read().strip()
+        with open(f"{_PROC}/{pid}/cmdline", "rb") as f:
+            args = f.read().split(b"\0")
+    except (OSError, ValueError):
+        return False
+    try:
+        return args[args.index(b"-id") + 1] == g["vmid"].encode()
+    except (ValueError, IndexError):
+        return False
@@ -18,7 +18,7 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 import re
 
-from health_persistence import health_persistence, disk_base_name
+from health_persistence import health_persistence, disk_base_name, changed_vm_guests
 
 try:
     from proxmox_storage_monitor import proxmox_storage_monitor
@@ -45,6 +45,8 @@ DEBUG_PERF = False
 # ─── Startup Grace Period ────────────────────────────────────────────────────
 # Import centralized startup grace management for consistent behavior
 import startup_grace
+import fail2ban_socket
+import guest_registry
 
 def _is_startup_health_grace() -> bool:
     """Check if we're within the startup health grace period (5 min).
@@ -466,6 +468,11 @@ class HealthMonitor:
         self.network_baseline = {}
         self.io_error_history = defaultdict(list)
         self.failed_vm_history = set()  # Track VMs that failed to start
+        # VM/CT check state diff: last seen {vmid: {type, status}} of the
+        # guests on this node (None until the first cycle) and the vms
+        # error keys that were already reconciled against it.
+        self._vm_state_snapshot: Optional[Dict[str, Dict[str, str]]] = None
+        self._vm_error_keys_seen: set = set()
         self.persistent_log_patterns = defaultdict(lambda: {'count': 0, 'first_seen': 0, 'last_seen': 0})
         self._unknown_counts = {}  # Track consecutive UNKNOWN cycles per category
         self._last_cleanup_time = 0  # Throttle cleanup_old_errors calls
@@ -3438,63 +3445,21 @@ class HealthMonitor:
         return False
     
     def _resolve_vm_name(self, vmid: str) -> str:
-        """Resolve VMID to guest name from PVE config files."""
+        """Resolve VMID to guest name from the parsed PVE configs."""
         if not vmid:
             return ''
-        for base in ['/etc/pve/qemu-server', '/etc/pve/lxc']:
-            conf = os.path.join(base, f'{vmid}.conf')
-            try:
-                with open(conf) as f:
-                    for line in f:
-                        if line.startswith('hostname:') or line.startswith('name:'):
-                            return line.split(':', 1)[1].strip()
-            except (OSError, IOError):
-                continue
-        return ''
+        return guest_registry.name(vmid)
     
     def _vm_ct_exists(self, vmid: str) -> bool:
-        """Check if a VM or CT exists by verifying its config file."""
-        import os
-        # Check VM config
-        vm_conf = f'/etc/pve/qemu-server/{vmid}.conf'
-        if os.path.exists(vm_conf):
-            return True
-        # Check CT config (local node and cluster nodes)
-        for base in ['/etc/pve/lxc', '/etc/pve/nodes']:
-            if base == '/etc/pve/lxc':
-                ct_conf = f'{base}/{vmid}.conf'
-                if os.path.exists(ct_conf):
-                    return True
-            else:
-                # Check all cluster nodes
-                if os.path.isdir(base):
-                    for node in os.listdir(base):
-                        ct_conf = f'{base}/{node}/lxc/{vmid}.conf'
-                        if os.path.exists(ct_conf):
-                            return True
-        return False
+        """Check if a VM or CT exists anywhere in the cluster."""
+        return guest_registry.exists(vmid)
     
     def _is_vm_running(self, vmid: str) -> bool:
-        """Check if a VM or CT is currently running."""
-        import subprocess
+        """Check if a VM or CT is currently running on this node."""
         try:
-            # Check VM status
-            result = subprocess.run(
-                ['qm', 'status', vmid],
-                capture_output=True, text=True, timeout=2
-            )
-            if result.returncode == 0 and 'running' in result.stdout.lower():
-                return True
-            # Check CT status
-            result = subprocess.run(
-                ['pct', 'status', vmid],
-                capture_output=True, text=True, timeout=2
-            )
-            if result.returncode == 0 and 'running' in result.stdout.lower():
-                return True
+            return guest_registry.is_running(vmid)
         except Exception:
-            pass
-        return False
+            return False
     
     def _check_vms_cts_optimized(self) -> Dict[str, Any]:
         """
@@ -3659,10 +3624,45 @@ class HealthMonitor:
             return {'status': 'UNKNOWN', 'reason': f'VM/CT check unavailable: {str(e)}', 'checks': {}, 'dismissable': True}
     
     # Modified to use persistence
+    def _local_guest_states(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """vmid → {'type': 'vm'|'ct', 'status'} for every guest on this node,
+        from the shared pvesh cluster-resources cache. Falls back to the
+        parsed configs when pvesh returned nothing although guests exist;
+        None when neither source can be read."""
+        try:
+            import flask_server  # deferred — avoids circular import at module load
+            resources = flask_server.get_cached_pvesh_cluster_resources_vm() or []
+            local_node = flask_server.get_proxmox_node_name()
+        except Exception:
+            resources, local_node = [], None
+        if resources and local_node:
+            return {
+                str(r['vmid']): {
+                    'type': 'ct' if r.get('type') == 'lxc' else 'vm',
+                    'status': r.get('status', 'unknown'),
+                }
+                for r in resources
+                if r.get('node') == local_node and r.get('vmid') is not None
+            }
+        try:
+            return {
+                g['vmid']: {
+                    'type': g['type'],
+                    'status': 'running' if guest_registry.is_running(g['vmid']) else 'stopped',
+                }
+                for g in guest_registry.all_guests() if g['local']
+            }
+        except Exception:
+            return None
+
     def _check_vms_cts_with_persistence(self) -> Dict[str, Any]:
         """
         Check VMs/CTs with persistent error tracking.
         Errors persist until VM starts or 48h elapsed.
+
+        Guest state is diffed against the previous cycle, so persistence
+        is only touched for guests that started, stopped or disappeared
+        (or whose error is new) — in one batched transaction.
         """
         try:
             issues = []
@@ -3670,6 +3670,21 @@ class HealthMonitor:
             
             # Get active (non-dismissed) errors
             persistent_errors = health_persistence.get_active_errors('vms')
+            active_keys = {e['error_key'] for e in persistent_errors}
+            
+            current = self._local_guest_states()
+            changed = changed_vm_guests(current, self._vm_state_snapshot,
+                                        active_keys, self._vm_error_keys_seen)
+            # Auto-resolve errors of guests that are now running or deleted
+            resolved = set(health_persistence.reconcile_vm_errors(changed)) if changed else set()
+            if current is not None:
+                self._vm_state_snapshot = current
+                self._vm_error_keys_seen = active_keys - resolved
+            
+            def guest_running(vmid: str) -> bool:
+                if current is not None:
+                    return (current.get(vmid) or {}).get('status') == 'running'
+                return self._is_vm_running(vmid)
             
             # Also get dismissed errors to show them as INFO
             dismissed_errors = health_persistence.get_dismissed_errors()
@@ -3679,11 +3694,11 @@ class HealthMonitor:
             for error in persistent_errors:
                 error_key = error['error_key']
                 
-                if error_key.startswith(('vm_', 'ct_', 'vmct_')):
-                    vm_id = error_key.split('_', 1)[1]
-                    # Check if VM is running using persistence helper
-                    if health_persistence.check_vm_running(vm_id):
-                        continue  # Error auto-resolved if VM is now running
+                if error_key in resolved:
+                    continue  # Guest is running again or was deleted
+                if error_key.startswith(('vm_', 'ct_', 'vmct_')) and \
+                        guest_running(error_key.split('_', 1)[1]):
+                    continue  # Running guest: only its config errors stay open
                 
                 # Still active, add to details. `details` may be persisted
                 # as SQL NULL / JSON null → deserializes to Python None, and
@@ -3737,10 +3752,10 @@ class HealthMonitor:
                             continue
                         
                         # Skip if VM is now running - the QMP error is stale/resolved
-                        # This prevents re-detecting old journal entries after VM recovery
-                        if self._is_vm_running(vmid):
-                            # Auto-resolve any existing error for this VM
-                            health_persistence.check_vm_running(vmid)
+                        # This prevents re-detecting old journal entries after VM recovery.
+                        # An existing error for it was resolved by reconcile_vm_errors
+                        # when the state diff saw the VM start.
+                        if guest_running(vmid):
                             continue
                         
                         vm_name = self._resolve_vm_name(vmid)
@@ -5068,7 +5083,7 @@ class HealthMonitor:
     def _check_fail2ban_bans(self) -> Dict[str, Any]:
         """
         Check if fail2ban is installed and if there are currently banned IPs.
-        Cached for 60 seconds to avoid hammering fail2ban-client.
+        Cached for 60 seconds on top of the shared fail2ban_socket snapshot.
         
         Returns:
           {'installed': bool, 'active': bool, 'status': str, 'detail': str,
@@ -5084,24 +5099,17 @@ class HealthMonitor:
         result = {'installed': False, 'active': False, 'status': 'OK', 'detail': 'Not installed', 'banned_count': 0, 'jails': [], 'banned_ips': []}
         
         try:
-            # Check if fail2ban-client exists
-            which_result = subprocess.run(
-                ['which', 'fail2ban-client'],
-                capture_output=True, text=True, timeout=2
-            )
-            if which_result.returncode != 0:
+            # Shared, briefly cached snapshot (socket round trips, not a
+            # chain of fail2ban-client runs) — see fail2ban_socket.
+            snap = fail2ban_socket.get_snapshot()
+            if not snap['installed']:
                 self.cached_results[cache_key] = result
                 self.last_check_times[cache_key] = current_time
                 return result
             
             result['installed'] = True
             
-            # Check if fail2ban service is active
-            active_check = subprocess.run(
-                ['systemctl', 'is-active', 'fail2ban'],
-                capture_output=True, text=True, timeout=2
-            )
-            if active_check.stdout.strip() != 'active':
+            if not snap['active']:
                 result['detail'] = 'Fail2Ban installed but service not active'
                 self.cached_results[cache_key] = result
                 self.last_check_times[cache_key] = current_time
@@ -5109,20 +5117,7 @@ class HealthMonitor:
             
             result['active'] = True
             
-            # Get list of active jails
-            jails_result = subprocess.run(
-                ['fail2ban-client', 'status'],
-                capture_output=True, text=True, timeout=3
-            )
-            
-            jails = []
-            if jails_result.returncode == 0:
-                for line in jails_result.stdout.split('\n'):
-                    if 'Jail list:' in line:
-                        jail_str = line.split('Jail list:')[1].strip()
-                        jails = [j.strip() for j in jail_str.split(',') if j.strip()]
-                        break
-            
+            jails = [jail['name'] for jail in snap['jails']]
             if not jails:
                 result['detail'] = 'Fail2Ban active, no jails configured'
                 self.cached_results[cache_key] = result
@@ -5136,29 +5131,11 @@ class HealthMonitor:
             all_banned_ips = []
             jails_with_bans = []
             
-            for jail in jails:
-                try:
-                    jail_result = subprocess.run(
-                        ['fail2ban-client', 'status', jail],
-                        capture_output=True, text=True, timeout=2
-                    )
-                    if jail_result.returncode == 0:
-                        for line in jail_result.stdout.split('\n'):
-                            if 'Currently banned:' in line:
-                                try:
-                                    count = int(line.split('Currently banned:')[1].strip())
-                                    if count > 0:
-                                        total_banned += count
-                                        jails_with_bans.append(jail)
-                                except (ValueError, IndexError):
-                                    pass
-                            elif 'Banned IP list:' in line:
-                                ips_str = line.split('Banned IP list:')[1].strip()
-                                if ips_str:
-                                    ips = [ip.strip() for ip in ips_str.split() if ip.strip()]
-                                    all_banned_ips.extend(ips[:10])  # Limit to 10 IPs per jail
-                except Exception:
-                    pass
+            for jail in snap['jails']:
+                if jail['currently_banned'] > 0:
+                    total_banned += jail['currently_banned']
+                    jails_with_bans.append(jail['name'])
+                all_banned_ips.extend(jail['banned_ips'][:10])  # Limit to 10 IPs per jail
             
             result['banned_count'] = total_banned
             result['banned_ips'] = all_banned_ips[:20]  # Max 20 total
@@ -6135,9 +6112,9 @@ class HealthMonitor:
         # Cheap pre-check: bail out when there are no running LXCs. On
         # nodes without CTs, the previous version still paid ~860ms per
         # cycle for a `pvesh /cluster/resources` call that produced no
-        # actionable data. We reuse the `lxc-start` /proc walk that
-        # `mount_monitor` already exposes — costs ~1-5ms regardless of
-        # process count.
+        # actionable data. The running-CT set comes from the shared
+        # `lxc_mount_inventory` (via `mount_monitor`), which only walks
+        # /proc when a CT started or stopped.
         if MOUNT_MONITOR_AVAILABLE and not mount_monitor._has_any_running_lxc():
             return None
 
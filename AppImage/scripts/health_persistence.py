@@ -18,18 +18,19 @@ import sqlite3
 import json
 import os
 import re
-import subprocess
 import threading
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
-# `re` and `subprocess` are used in the SMART AUTO-RESOLVE block of
-# `_cleanup_old_errors_impl` (qm/pct status calls + error_key parsing). They
-# were not imported, so the entire auto-resolve loop hit NameError every 5
-# minutes and got silently swallowed by the surrounding `except Exception:
-# pass`. Audit Tier 5 (Health stack — imports faltantes).
+import guest_registry
+
+# `re` is used in the SMART AUTO-RESOLVE block of `_cleanup_old_errors_impl`
+# (error_key parsing). It was not imported, so the entire auto-resolve loop
+# hit NameError every 5 minutes and got silently swallowed by the
+# surrounding `except Exception: pass`. Audit Tier 5 (Health stack —
+# imports faltantes).
 
 import re as _re_disk_base
 
@@ -59,6 +60,35 @@ def disk_base_name(name):
     return bare
 
 
+def _vm_error_vmids(keys) -> set:
+    return {k.split('_', 1)[1] for k in keys if k.startswith(('vm_', 'ct_', 'vmct_'))}
+
+
+def changed_vm_guests(current: Optional[Dict[str, Dict[str, str]]],
+                      previous: Optional[Dict[str, Dict[str, str]]],
+                      active_keys: set, seen_keys: set) -> Dict[str, Optional[Dict[str, str]]]:
+    """Guests whose persisted errors need a look this cycle — the input
+    of `HealthPersistence.reconcile_vm_errors`.
+
+    Diffs the guest states in `current` (vmid → ``{'type', 'status'}``)
+    against `previous` (started, stopped, added, removed) and adds the
+    guests of error keys in `active_keys` that weren't in `seen_keys`
+    last cycle. Only guests that actually have an active
+    ``vm_/ct_/vmct_`` error are returned — vmid → current state, or
+    None when the guest is gone. With no `previous` (first cycle) every
+    guest with an error is returned; with no `current` nothing is.
+    """
+    if current is None:
+        return {}
+    with_errors = _vm_error_vmids(active_keys)
+    if previous is None:
+        candidates = with_errors
+    else:
+        candidates = {v for v in current.keys() | previous.keys() if current.get(v) != previous.get(v)}
+        candidates |= _vm_error_vmids(active_keys - seen_keys)
+    return {v: current.get(v) for v in candidates & with_errors}
+
+
 class HealthPersistence:
     """Manages persistent health error tracking"""
     
@@ -727,47 +757,51 @@ class HealthPersistence:
     def _resolve_error_impl(self, error_key, reason):
         with self._db_connection() as conn:
             cursor = conn.cursor()
-            now = datetime.now().isoformat()
+            self._resolve_error_in_cursor(cursor, error_key, reason, datetime.now().isoformat())
+            conn.commit()
 
-            # Persist `reason` into the dedicated resolution_reason column
-            # (and tag resolution_type='auto' so the audit log can tell
-            # auto-resolves apart from explicit admin clears). Previously
-            # this UPDATE only touched resolved_at, so the `reason` arg
-            # every caller passes — including the new
-            # `_reconcile_stale_disk_warnings` pass — was silently dropped
-            # and the resolution_reason column stayed NULL for every
-            # auto-resolved error.
-            cursor.execute('''
-                UPDATE errors
-                SET resolved_at = ?,
-                    resolution_type = COALESCE(resolution_type, 'auto'),
-                    resolution_reason = ?
-                WHERE error_key = ? AND resolved_at IS NULL
-            ''', (now, reason, error_key))
-
-            if cursor.rowcount > 0:
-                # Reload the resolved error's details so the resolution
-                # event can name the same entity that was named when it
-                # was created — otherwise "Storage 'Tuxis' unavailable"
-                # comes back as "Resolved - Storage" with no identity.
-                cursor.execute(
-                    'SELECT details FROM errors WHERE error_key = ? ORDER BY id DESC LIMIT 1',
-                    (error_key,),
-                )
-                row = cursor.fetchone()
-                stored_details = None
-                if row and row[0]:
-                    try:
-                        stored_details = json.loads(row[0])
-                    except Exception:
-                        stored_details = None
-                self._record_event(cursor, 'resolved', error_key, {
-                    'reason': reason,
-                    'entity': self._entity_from_details(stored_details),
-                    'details': stored_details or {},
-                })
+    def _resolve_error_in_cursor(self, cursor, error_key, reason, now) -> bool:
+        """Resolve one error inside the caller's transaction. Returns True
+        when an unresolved row was closed."""
+        # Persist `reason` into the dedicated resolution_reason column
+        # (and tag resolution_type='auto' so the audit log can tell
+        # auto-resolves apart from explicit admin clears). Previously
+        # this UPDATE only touched resolved_at, so the `reason` arg
+        # every caller passes — including the new
+        # `_reconcile_stale_disk_warnings` pass — was silently dropped
+        # and the resolution_reason column stayed NULL for every
+        # auto-resolved error.
+        cursor.execute('''
+            UPDATE errors
+            SET resolved_at = ?,
+                resolution_type = COALESCE(resolution_type, 'auto'),
+                resolution_reason = ?
+            WHERE error_key = ? AND resolved_at IS NULL
+        ''', (now, reason, error_key))
 
-            conn.commit()
+        if cursor.rowcount > 0:
+            # Reload the resolved error's details so the resolution
+            # event can name the same entity that was named when it
+            # was created — otherwise "Storage 'Tuxis' unavailable"
+            # comes back as "Resolved - Storage" with no identity.
+            cursor.execute(
+                'SELECT details FROM errors WHERE error_key = ? ORDER BY id DESC LIMIT 1',
+                (error_key,),
+            )
+            row = cursor.fetchone()
+            stored_details = None
+            if row and row[0]:
+                try:
+                    stored_details = json.loads(row[0])
+                except Exception:
+                    stored_details = None
+            self._record_event(cursor, 'resolved', error_key, {
+                'reason': reason,
+                'entity': self._entity_from_details(stored_details),
+                'details': stored_details or {},
+            })
+            return True
+        return False
     
     def is_error_active(self, error_key: str, category: Optional[str] = None) -> bool:
         """
@@ -1348,32 +1382,17 @@ class HealthPersistence:
                         if vmid_match:
                             vmid = vmid_match.group(1)
                             try:
-                                vm_running = False
-                                ct_running = False
-                                vm_exists = False
-                                ct_exists = False
-
-                                result_vm = subprocess.run(
-                                    ['qm', 'status', vmid],
-                                    capture_output=True, text=True, timeout=2)
-                                if result_vm.returncode == 0:
-                                    vm_exists = True
-                                    vm_running = 'running' in result_vm.stdout.lower()
-
-                                if not vm_exists:
-                                    result_ct = subprocess.run(
-                                        ['pct', 'status', vmid],
-                                        capture_output=True, text=True, timeout=2)
-                                    if result_ct.returncode == 0:
-                                        ct_exists = True
-                                        ct_running = 'running' in result_ct.stdout.lower()
-
-                                if not vm_exists and not ct_exists:
+                                # Same scope as `qm status` / `pct status`:
+                                # guests whose config lives on this node.
+                                exists_here = guest_registry.exists(vmid, local=True)
+                                running = exists_here and guest_registry.is_running(vmid)
+
+                                if not exists_here:
                                     cursor.execute('''
                                         UPDATE errors SET resolved_at = ?
                                         WHERE error_key = ? AND resolved_at IS NULL
                                     ''', (now_iso, vm_ek))
-                                elif vm_running or ct_running:
+                                elif running:
                                     reason_lower = (vm_reason or '').lower()
                                     is_persistent = any(x in reason_lower for x in [
                                         'device', 'missing', 'does not exist', 'permission',
@@ -1863,42 +1882,15 @@ class HealthPersistence:
         conn.close()
     
     def _check_vm_ct_exists(self, vmid: str) -> bool:
-        """Check if a VM or CT exists (not just running, but exists at all).
-        
-        Uses 'qm config' and 'pct config' which return success even for stopped VMs/CTs,
-        but fail if the VM/CT doesn't exist.
+        """Check if a VM or CT exists on this node (not just running, but
+        exists at all) — same scope as 'qm config' / 'pct config', read
+        from the parsed guest configs instead of forking either.
         """
-        import subprocess
-        
         try:
-            # Try VM first
-            result = subprocess.run(
-                ['qm', 'config', vmid],
-                capture_output=True,
-                text=True,
-                timeout=3
-            )
-            if result.returncode == 0:
-                return True
-            
-            # Try CT
-            result = subprocess.run(
-                ['pct', 'config', vmid],
-                capture_output=True,
-                text=True,
-                timeout=3
-            )
-            if result.returncode == 0:
-                return True
-            
-            return False
-        except subprocess.TimeoutExpired:
-            # On timeout, assume it exists to avoid false positives
+            return guest_registry.exists(vmid, local=True)
+        except Exception:
+            # If we can't determine, assume it exists to avoid false positives
             return True
-        except Exception as e:
-            # On other errors (command not found, etc.), check if it's a "not found" error
-            # If we can't determine, assume it doesn't exist to allow cleanup
-            return False
     
     def check_vm_running(self, vm_id: str) -> bool:
         """
@@ -1915,42 +1907,12 @@ class HealthPersistence:
         
         Returns True if running/resolved, False otherwise.
         """
-        import subprocess
-        
         try:
-            vm_exists = False
-            ct_exists = False
-            is_running = False
-            vm_type = None
-            
-            # Check qm status for VMs
-            result_vm = subprocess.run(
-                ['qm', 'status', vm_id],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            
-            if result_vm.returncode == 0:
-                vm_exists = True
-                vm_type = 'vm'
-                if 'running' in result_vm.stdout.lower():
-                    is_running = True
-            
-            # Check pct status for containers
-            if not vm_exists:
-                result_ct = subprocess.run(
-                    ['pct', 'status', vm_id],
-                    capture_output=True,
-                    text=True,
-                    timeout=2
-                )
-                
-                if result_ct.returncode == 0:
-                    ct_exists = True
-                    vm_type = 'ct'
-                    if 'running' in result_ct.stdout.lower():
-                        is_running = True
+            guest = guest_registry.get(vm_id)
+            vm_exists = bool(guest and guest['local'] and guest['type'] == 'vm')
+            ct_exists = bool(guest and guest['local'] and guest['type'] == 'ct')
+            vm_type = guest['type'] if vm_exists or ct_exists else None
+            is_running = (vm_exists or ct_exists) and guest_registry.is_running(vm_id)
             
             # If neither VM nor CT exists, resolve ALL related errors
             if not vm_exists and not ct_exists:
@@ -1975,10 +1937,9 @@ class HealthPersistence:
                     if row:
                         reason = (row[1] or '').lower()
                         # Check if this is a persistent config error that won't be fixed by restart
-                        is_persistent_config = any(indicator in reason for indicator in [
-                            'device', 'missing', 'does not exist', 'permission', 
-                            'not found', 'no such', 'invalid'
-                        ])
+                        is_persistent_config = any(
+                            indicator in reason for indicator in self._VM_PERSISTENT_ERROR_HINTS
+                        )
                         
                         if not is_persistent_config:
                             # Transient error - resolve it
@@ -1992,6 +1953,55 @@ class HealthPersistence:
         except Exception:
             return False
     
+    # Reasons that a guest restart won't fix — kept open while it runs.
+    _VM_PERSISTENT_ERROR_HINTS = (
+        'device', 'missing', 'does not exist', 'permission',
+        'not found', 'no such', 'invalid',
+    )
+
+    def reconcile_vm_errors(self, guests: Dict[str, Optional[Dict[str, Any]]]) -> List[str]:
+        """Batched `check_vm_running` for the guests whose state changed.
+
+        `guests` maps vmid → ``{'type': 'vm'|'ct', 'status': ...}`` for a
+        guest on this node, or None when it no longer exists here. Same
+        rules as `check_vm_running`: a gone guest resolves all its
+        ``vm_/ct_/vmct_`` errors, a running one resolves the transient
+        ones. One SELECT and one transaction for the whole set.
+
+        Returns the error keys that were resolved.
+        """
+        if not guests:
+            return []
+        keys = []
+        for vmid in guests:
+            keys.extend((f'vm_{vmid}', f'ct_{vmid}', f'vmct_{vmid}'))
+        resolved: List[str] = []
+        with self._db_lock, self._db_connection() as conn:
+            cursor = conn.cursor()
+            placeholders = ','.join('?' * len(keys))
+            cursor.execute(f'''
+                SELECT error_key, reason FROM errors
+                WHERE error_key IN ({placeholders}) AND resolved_at IS NULL
+            ''', keys)
+            rows = cursor.fetchall()
+            now = datetime.now().isoformat()
+            for error_key, reason in rows:
+                prefix, vmid = error_key.split('_', 1)
+                guest = guests.get(vmid)
+                if guest is None:
+                    resolution = 'VM/CT deleted'
+                elif guest.get('status') != 'running' or prefix not in (guest['type'], 'vmct'):
+                    continue
+                elif any(h in (reason or '').lower() for h in self._VM_PERSISTENT_ERROR_HINTS):
+                    continue
+                else:
+                    resolution = f"{guest['type'].upper()} started successfully"
+                if error_key not in resolved and \
+                        self._resolve_error_in_cursor(cursor, error_key, resolution, now):
+                    resolved.append(error_key)
+            conn.commit()
+        return resolved
+
     def get_dismissed_errors(self) -> List[Dict[str, Any]]:
         """
         Get errors that were acknowledged/dismissed but still within suppression period.
@@ -0,0 +1,89 @@
+"""Housekeeping for the host-backup inspect harvest cache.
+
+``flask_server`` keeps one harvested staging tree per archive fingerprint
+under a cache root: ``<key>/`` once finished, ``.<key>-XXXX/`` while a
+request is still writing it. The cache is trimmed on every new build.
+
+Age and recency alone can't tell whether a directory is still in use: a
+slow PBS / Borg harvest may outlive the stale limit, and a finished tree
+can be evicted by another archive's build while report scripts still
+read it. Directories in use are therefore pinned in-process and ``gc``
+never touches a pinned one.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+_lock = threading.Lock()
+_pinned: dict[str, int] = {}
+
+
+def _key(path: str) -> str:
+    return os.path.normpath(path)
+
+
+def pin(path: Optional[str]) -> None:
+    """Mark `path` as in use. Pins nest; each needs its own `unpin`."""
+    if not path:
+        return
+    with _lock:
+        _pinned[_key(path)] = _pinned.get(_key(path), 0) + 1
+
+
+def unpin(path: Optional[str]) -> None:
+    if not path:
+        return
+    with _lock:
+        count = _pinned.get(_key(path), 0) - 1
+        if count > 0:
+            _pinned[_key(path)] = count
+        else:
+            _pinned.pop(_key(path), None)
+
+
+def is_pinned(path: str) -> bool:
+    with _lock:
+        return _key(path) in _pinned
+
+
+def gc(root: str, max_entries: int, stale_after: float) -> list[str]:
+    """Keep the `max_entries` most recently used finished harvests (mtime
+    is bumped on every hit) and drop half-built ones older than
+    `stale_after` seconds — those come from a crashed request. Pinned
+    directories are skipped either way (and don't count towards the
+    limit), so the cache may briefly hold more. Returns what was
+    removed."""
+    try:
+        entries = [os.path.join(root, e) for e in os.listdir(root)]
+    except OSError:
+        return []
+    removed = []
+    done = []
+    now = time.time()
+    # Held throughout, so a pin can't land between the check and the
+    # rmtree; a request pinning meanwhile waits and then sees the tree
+    # either intact or gone.
+    with _lock:
+        for full in entries:
+            if _key(full) in _pinned:
+                continue
+            try:
+                mtime = os.path.getmtime(full)
+            except OSError:
+                continue
+            if os.path.basename(full).startswith('.'):
+                if now - mtime > stale_after:
+                    shutil.rmtree(full, ignore_errors=True)
+                    removed.append(full)
+                continue
+            done.append((mtime, full))
+        done.sort(reverse=True)
+        for _mtime, full in done[max_entries:]:
+            shutil.rmtree(full, ignore_errors=True)
+            removed.append(full)
+    return removed
@@ -0,0 +1,107 @@
+"""Flask JSON provider backed by ``orjson`` when it's importable.
+
+The heavy routes (hardware inventory, per-disk SMART, ``/api/node/metrics``
+RRD series with thousands of points, ``/api/logs`` with up to 10k
+entries) spend a noticeable share of each request inside the stdlib
+encoder — serializing a 10k-line logs response took longer than the
+``journalctl`` call that produced it. ``orjson`` does the same work an
+order of magnitude faster and hands back ``bytes``, which go straight
+into the response without a str → bytes round trip.
+
+``orjson`` is optional: it's a compiled (Rust/PyO3) wheel, and the
+AppImage build can't always ship one matching the host's Python, so
+without it — or for the rare object orjson refuses (ints beyond 64 bits)
+— everything goes through Flask's stdlib provider exactly as before.
+
+Both paths share one ``default`` hook so output stays the same whichever
+encoder ran: dates keep Flask's HTTP-date format, ``Path`` becomes its
+string, ``bytes`` UTF-8 text (base64 when it isn't text), sets become
+lists. Keys stay sorted (Flask's default), which also keeps the payload
+hash the JSON ETag layer computes stable across polls.
+
+``bench_json_provider.py`` next to this file compares the two encoders on
+recorded or synthetic payloads.
+"""
+
+import base64
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+from pathlib import PurePath
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    """Serialize the types neither encoder handles natively (for orjson,
+    also the datetimes it's told to pass through)."""
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, PurePath):
+        return str(o)
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        raw = bytes(o)
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return base64.b64encode(raw).decode("ascii")
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class ProxMenuxJSONProvider(DefaultJSONProvider):
+    """`DefaultJSONProvider` with an orjson fast path."""
+
+    default = staticmethod(_default)
+
+    def _orjson_options(self, indent=False):
+        option = (orjson.OPT_NON_STR_KEYS
+                  | orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS)
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj, indent=False):
+        """UTF-8 JSON for `obj` as bytes — orjson when available."""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=_default,
+                                    option=self._orjson_options(indent))
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        kwargs = {"indent": 2} if indent else {}
+        return super().dumps(obj, **kwargs).encode("utf-8")
+
+    def dumps(self, obj, **kwargs):
+        # Callers passing encoder-specific kwargs (cls=, separators=, …)
+        # get the stdlib path untouched.
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.dumps(obj, default=_default,
+                                    option=self._orjson_options()).decode("utf-8")
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = self.dumps_bytes(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
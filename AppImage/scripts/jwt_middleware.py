@@ -6,7 +6,7 @@ Automatically checks auth status and validates tokens
 
 from flask import request, jsonify
 from functools import wraps
-from auth_manager import load_auth_config, verify_token, verify_token_full
+from auth_manager import get_auth_state, verify_token, verify_token_full
 
 
 def require_auth(f):
@@ -26,11 +26,10 @@ def require_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Check if authentication is enabled
-        config = load_auth_config()
-        
+        # Check if authentication is enabled (parsed auth.json, cached
+        # until the file changes)
         # If auth is disabled or declined, allow access
-        if not config.get("enabled", False) or config.get("declined", False):
+        if not get_auth_state()['required']:
             return f(*args, **kwargs)
         
         # Auth is enabled, require token
@@ -79,8 +78,7 @@ def require_auth_or_ticket(f):
     on plain Bearer-token auth."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        config = load_auth_config()
-        if not config.get("enabled", False) or config.get("declined", False):
+        if not get_auth_state()['required']:
             return f(*args, **kwargs)
 
         # First try the Bearer header (fetch from JS uses this).
@@ -118,8 +116,7 @@ def require_admin_scope(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        config = load_auth_config()
-        if not config.get("enabled", False) or config.get("declined", False):
+        if not get_auth_state()['required']:
             return f(*args, **kwargs)
         auth_header = request.headers.get('Authorization')
         if not auth_header:
@@ -155,10 +152,9 @@ def optional_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        config = load_auth_config()
         username = None
         
-        if config.get("enabled", False):
+        if get_auth_state()['enabled']:
             auth_header = request.headers.get('Authorization')
             if auth_header:
                 parts = auth_header.split()
@@ -0,0 +1,215 @@
+"""One tailer per log file, fanned out to any number of subscribers.
+
+Script sessions write their progress to a log file that was being watched
+by several independent polling loops: `ScriptRunner.execute_script`'s
+monitor thread (re-reading the file every 100 ms to spot interactions),
+one `stream_logs` generator per SSE viewer (``readline`` + 100 ms sleep,
+``json.loads`` on every line for every viewer) and, for the WebSocket
+runner, `monitor_web_log` polling its web log every 10 ms.
+
+`LogBroadcaster` replaces all of them for a given file: a single thread
+follows the file, woken by inotify when the kernel offers it (polling
+otherwise), turns each complete line into an entry exactly once with the
+caller's ``parse`` and appends it to an in-memory list. Subscribers
+iterate `subscribe(offset)` — replaying from any index, then following
+live — without touching the file themselves. When the writer is done and
+the tail is drained the broadcaster closes: the thread and inotify fd go
+away and the entries are compacted into a tuple that later subscribers
+(or a reconnecting EventSource) replay from.
+"""
+
+import ctypes
+import os
+import select
+import threading
+import time
+
+_POLL_INTERVAL = 0.1       # only when inotify isn't available
+_INOTIFY_WAIT = 1.0        # re-check `is_done` at least this often
+_READ_SIZE = 64 * 1024
+_MAX_ENTRIES = 50000       # per log; older entries are dropped first
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_ATTRIB = 0x00000004
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _inotify_init1 = _libc.inotify_init1
+    _inotify_add_watch = _libc.inotify_add_watch
+    _inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+except (OSError, AttributeError):
+    _inotify_init1 = None
+
+
+class _FileWatch:
+    """inotify watch on one file; `wait` returns when it was written to."""
+
+    def __init__(self, path):
+        self.fd = -1
+        if _inotify_init1 is None:
+            return
+        fd = _inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return
+        if _inotify_add_watch(fd, os.fsencode(path), _IN_MODIFY | _IN_CLOSE_WRITE | _IN_ATTRIB) < 0:
+            os.close(fd)
+            return
+        self.fd = fd
+
+    def wait(self, timeout):
+        if self.fd < 0:
+            time.sleep(min(timeout, _POLL_INTERVAL))
+            return
+        try:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if ready:
+                while os.read(self.fd, 4096):
+                    pass
+        except BlockingIOError:
+            pass
+        except OSError:
+            time.sleep(min(timeout, _POLL_INTERVAL))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class LogBroadcaster:
+    """Follow `path`, parse each line once, serve it to every subscriber.
+
+    `parse(line)` gets each line (str, newline stripped) and returns the
+    entry to publish, or None to skip it. `is_done()` tells the tailer the
+    writer has finished; once it returns True and the file is drained the
+    broadcaster closes. `close()` stops it early.
+    """
+
+    def __init__(self, path, parse=None, is_done=None, max_entries=_MAX_ENTRIES):
+        self.path = path
+        self._parse = parse or (lambda line: line)
+        self._is_done = is_done
+        self._max_entries = max_entries
+        self._cond = threading.Condition()
+        self._entries = []
+        self._base = 0           # index of _entries[0]
+        self._closed = False
+        self._stop = False
+        self.closed_at = None
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"log-tail:{os.path.basename(path)}")
+        self._thread.start()
+
+    # ── tailer ──────────────────────────────────────────────────────────
+
+    def _publish(self, lines):
+        entries = []
+        for line in lines:
+            try:
+                entry = self._parse(line)
+            except Exception:
+                entry = None
+            if entry is not None:
+                entries.append(entry)
+        if not entries:
+            return
+        with self._cond:
+            self._entries.extend(entries)
+            overflow = len(self._entries) - self._max_entries
+            if overflow > 0:
+                del self._entries[:overflow]
+                self._base += overflow
+            self._cond.notify_all()
+
+    def _run(self):
+        f = None
+        watch = None
+        partial = b""
+        try:
+            while not self._stop:
+                if f is None:
+                    try:
+                        f = open(self.path, "rb")
+                        watch = _FileWatch(self.path)
+                    except OSError:
+                        if self._is_done is not None and self._is_done():
+                            break
+                        time.sleep(_POLL_INTERVAL)
+                        continue
+
+                # Sample `done` before reading so the read after it is final.
+                done = self._is_done is not None and self._is_done()
+                try:
+                    if os.fstat(f.fileno()).st_size < f.tell():
+                        f.seek(0)  # truncated / rewritten
+                        partial = b""
+                    data = f.read(_READ_SIZE)
+                except OSError:
+                    break
+                if data:
+                    chunk = partial + data
+                    *complete, partial = chunk.split(b"\n")
+                    self._publish(l.decode("utf-8", errors="replace").rstrip("\r") for l in complete)
+                    continue
+                if done:
+                    break
+                watch.wait(_INOTIFY_WAIT)
+        finally:
+            if partial:
+                self._publish([partial.decode("utf-8", errors="replace").rstrip("\r")])
+            if watch is not None:
+                watch.close()
+            if f is not None:
+                f.close()
+            with self._cond:
+                self._entries = tuple(self._entries)
+                self._closed = True
+                self.closed_at = time.time()
+                self._cond.notify_all()
+
+    # ── consumers ───────────────────────────────────────────────────────
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return self._base + len(self._entries)
+
+    def subscribe(self, offset=0, keepalive=None):
+        """
+        Yield ``(index, entry)`` from `offset` on, following the log live
+        until it closes. With `keepalive` (seconds), yields ``(None, None)``
+        when nothing arrived for that long so SSE handlers can send a
+        comment and notice a gone client.
+        """
+        idx = max(0, int(offset))
+        while True:
+            with self._cond:
+                while idx >= self._base + len(self._entries) and not self._closed:
+                    if not self._cond.wait(timeout=keepalive) and keepalive is not None:
+                        break
+                idx = max(idx, self._base)
+                batch = self._entries[idx - self._base:]
+                finished = self._closed
+            if not batch:
+                if finished:
+                    return
+                yield None, None
+                continue
+            for entry in batch:
+                yield idx, entry
+                idx += 1
+
+    def wait_closed(self, timeout=None):
+        self._thread.join(timeout)
+        return self._closed
+
+    def close(self):
+        """Stop following the file (entries already read stay available)."""
+        self._stop = True
+        self._thread.join(timeout=_INOTIFY_WAIT + 1)
@@ -0,0 +1,598 @@
+"""Shared inventory of running LXCs and the mounts inside them.
+
+``mount_monitor.scan_lxc_mounts`` (stale remote mounts),
+``mount_monitor.scan_lxc_mount_capacity`` (mount capacity check),
+``lxc_mount_points.get_lxc_mount_points`` (Mount Points tab) and the
+rootfs check's "any CT running?" probe each found the running CTs on
+their own — a full ``/proc`` walk for ``lxc-start`` per call — then read
+every CT's ``/proc/<pid>/mounts``, and the Mount Points tab also parsed
+the CT config and ran ``pvesm status`` + ``pct status --verbose`` per
+request. On a host with 80 CTs the same walk ran three times per health
+cycle.
+
+This module keeps that state once for all of them:
+
+  * running CTs — ``(vmid, lxc-start pid, CT init pid)``. The ``/proc``
+    walk only runs again when the set of CT cgroups changes (a CT
+    started or stopped) or a known ``lxc-start`` is gone / was
+    replaced (checked by pid start time). Without a cgroup listing to
+    watch, it runs at most every ``_RUNNING_TTL`` seconds;
+  * per CT, the parsed config (``mpX:`` entries, hostname), re-read when
+    the file changes, and the mount table, re-read only when the kernel
+    flags ``/proc/<pid>/mounts`` as changed (``poll`` → ``POLLPRI``);
+  * per mount, reachability (``stat`` through ``/proc/<pid>/root``) and
+    capacity (``statvfs``), each with its own age so callers ask for the
+    freshness they need. Expired entries of a sweep go to the
+    ``fs_probe`` worker pool as one batch — a stale NFS handle blocks
+    the syscall, the pool times it out. Capacity of a remote mount is
+    only read while the mount is reachable;
+  * the ``pvesm status`` storage table for ``_STORAGES_TTL``.
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import re
+import select
+import subprocess
+import threading
+import time
+from typing import Any, Optional
+
+import fs_probe
+
+_PROC = "/proc"
+_CGROUP_LXC_DIRS = (
+    "/sys/fs/cgroup/lxc",          # cgroup v2 (PVE 7+)
+    "/sys/fs/cgroup/pids/lxc",     # cgroup v1
+    "/sys/fs/cgroup/systemd/lxc",
+)
+_LXC_CONF_DIR = "/etc/pve/lxc"
+_PVESM = "/usr/sbin/pvesm"
+
+_RUNNING_TTL = 5           # only when no cgroup listing is available
+_REACH_TTL = 60
+_CAPACITY_TTL = 60
+_STORAGES_TTL = 60
+_STAT_TIMEOUT = int(os.environ.get("PROXMENUX_MOUNT_STAT_TIMEOUT", "2"))
+_EXEC_TIMEOUT = int(os.environ.get("PROXMENUX_LXC_EXEC_TIMEOUT", "3"))
+
+# `nfs`, `nfs4`, `cifs`, `smbfs`, `smb3`, ...
+_REMOTE_FS_RE = re.compile(r"^(nfs|cifs|smb)", re.IGNORECASE)
+_MP_LINE_RE = re.compile(r"^(?P<key>mp\d+):\s*(?P<rest>.+)$")
+
+# Pseudo / virtual filesystems never reported for capacity — their
+# statvfs numbers are kernel bookkeeping (cgroup, sysfs) or change too
+# fast to alert on (tmpfs).
+_PSEUDO_FS = frozenset({
+    "proc", "sysfs", "devpts", "devtmpfs", "tmpfs", "mqueue", "pstore",
+    "cgroup", "cgroup2", "bpf", "tracefs", "debugfs", "configfs",
+    "securityfs", "fuse.lxcfs", "fusectl", "autofs", "binfmt_misc",
+    "hugetlbfs", "efivarfs", "rpc_pipefs", "nsfs", "overlay",
+})
+
+_EMPTY_CAPACITY = {"total_bytes": None, "used_bytes": None, "available_bytes": None}
+
+_lock = threading.RLock()
+_running: dict[str, "_Container"] = {}
+_running_state: dict[str, Any] = {"signature": None, "walked_at": 0.0}
+_configs: dict[str, tuple] = {}
+_mount_state: dict[tuple, dict[str, Any]] = {}
+_storages: dict[str, Any] = {"at": 0.0, "data": {}}
+
+
+# ─── Running containers ──────────────────────────────────────────────────────
+
+def _proc_start_time(pid: str) -> Optional[str]:
+    """Start time (clock ticks since boot) of `pid` — tells a live
+    process from a recycled pid."""
+    try:
+        with open(f"{_PROC}/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+class _Container:
+    """A running CT and its mount table."""
+
+    def __init__(self, vmid: str, sup_pid: str, sup_start: Optional[str], pid: str):
+        self.vmid = vmid
+        self.sup_pid = sup_pid
+        self.sup_start = sup_start
+        self.pid = pid
+        self._mounts: Optional[list[dict[str, Any]]] = None
+        self._file = None
+        self._poll = None
+
+    def alive(self) -> bool:
+        return _proc_start_time(self.sup_pid) == self.sup_start
+
+    def mount_table(self) -> list[dict[str, Any]]:
+        """Parsed mount table; re-read only after the kernel reports a
+        change in the CT's mount namespace."""
+        if not self.pid:
+            return []
+        if self._file is not None and self._mounts is not None:
+            try:
+                if not self._poll.poll(0):
+                    return self._mounts
+            except (OSError, ValueError):
+                pass
+        try:
+            if self._file is None:
+                self._file = open(f"{_PROC}/{self.pid}/mounts", "r",
+                                  encoding="utf-8", errors="replace")
+                self._poll = select.poll()
+                self._poll.register(self._file, select.POLLPRI | select.POLLERR)
+            self._file.seek(0)
+            text = self._file.read()
+        except OSError:
+            self.close()
+            self._mounts = []
+            return self._mounts
+        mounts = []
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) < 4:
+                continue
+            mounts.append({
+                "source": parts[0],
+                "target": parts[1],
+                "fstype": parts[2],
+                "options": parts[3],
+                "readonly": "ro" in parts[3].split(","),
+            })
+        self._mounts = mounts
+        return mounts
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+        self._file = None
+        self._poll = None
+
+
+def _cgroup_signature() -> Optional[tuple]:
+    for path in _CGROUP_LXC_DIRS:
+        try:
+            names = os.listdir(path)
+        except OSError:
+            continue
+        return tuple(sorted(n for n in names if n.isdigit()))
+    return None
+
+
+def _walk_supervisors() -> dict[str, tuple[str, Optional[str], str]]:
+    """``{vmid: (lxc-start pid, its start time, CT init pid)}`` from one
+    ``/proc`` walk for ``lxc-start -F -n <vmid>`` processes."""
+    out: dict[str, tuple[str, Optional[str], str]] = {}
+    try:
+        proc_entries = list(os.scandir(_PROC))
+    except OSError:
+        return out
+
+    for entry in proc_entries:
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"{_PROC}/{entry.name}/comm", "r") as f:
+                if f.read().strip() != "lxc-start":
+                    continue
+            with open(f"{_PROC}/{entry.name}/cmdline", "rb") as f:
+                cmdline = f.read().split(b"\x00")
+        except (OSError, IOError):
+            continue
+
+        # cmdline like [b'/usr/bin/lxc-start', b'-F', b'-n', b'<vmid>', b'']
+        try:
+            idx = cmdline.index(b"-n")
+        except ValueError:
+            continue
+        vmid = cmdline[idx + 1].decode("utf-8", errors="replace").strip() if idx + 1 < len(cmdline) else ""
+        if not vmid:
+            continue
+
+        # The CT init is the first child of its lxc-start supervisor.
+        pid = ""
+        try:
+            with open(f"{_PROC}/{entry.name}/task/{entry.name}/children", "r") as f:
+                children = f.read().split()
+            if children:
+                pid = children[0]
+        except (OSError, IOError):
+            # Kernel without CONFIG_PROC_CHILDREN or a race with CT stop.
+            try:
+                p2 = subprocess.run(
+                    ["lxc-info", "-n", vmid, "-p"],
+                    capture_output=True, text=True, timeout=2,
+                )
+                if p2.returncode == 0:
+                    for ln in p2.stdout.splitlines():
+                        if ln.strip().lower().startswith("pid:"):
+                            pid = ln.split(":", 1)[1].strip()
+                            break
+            except (subprocess.TimeoutExpired, OSError):
+                pass
+
+        out[vmid] = (entry.name, _proc_start_time(entry.name), pid)
+    return out
+
+
+def _refresh_running(force: bool = False) -> dict[str, _Container]:
+    with _lock:
+        signature = _cgroup_signature()
+        now = time.time()
+        if _running_state["walked_at"] and not force:
+            if signature is not None:
+                unchanged = signature == _running_state["signature"]
+            else:
+                unchanged = now - _running_state["walked_at"] < _RUNNING_TTL
+            if unchanged and all(ct.alive() for ct in _running.values()):
+                return _running
+
+        found = _walk_supervisors()
+        for vmid, ct in list(_running.items()):
+            current = found.get(vmid)
+            if current is None or current[0] != ct.sup_pid or current[1] != ct.sup_start:
+                ct.close()
+                del _running[vmid]
+        for vmid, (sup_pid, sup_start, pid) in found.items():
+            ct = _running.get(vmid)
+            if ct is None:
+                _running[vmid] = _Container(vmid, sup_pid, sup_start, pid)
+            elif not ct.pid and pid:
+                ct.pid = pid
+        # Per-mount state of CTs that stopped (or restarted) goes with them.
+        live = {(ct.vmid, ct.pid) for ct in _running.values()}
+        for key in [k for k in _mount_state if (k[0], k[1]) not in live]:
+            del _mount_state[key]
+        _running_state.update(signature=signature, walked_at=now)
+        return _running
+
+
+def running(force: bool = False) -> list[dict[str, str]]:
+    """``[{vmid, name, pid}]`` for every running CT, ordered by vmid.
+    ``pid`` is the CT init as seen from the host."""
+    with _lock:
+        cts = list(_refresh_running(force).values())
+    out = [{"vmid": ct.vmid, "name": config(ct.vmid)["name"], "pid": ct.pid} for ct in cts]
+    out.sort(key=lambda c: int(c["vmid"]) if c["vmid"].isdigit() else 0)
+    return out
+
+
+def has_running() -> bool:
+    """True when at least one CT is running. Cheap when the cgroup
+    listing is available (no ``/proc`` walk unless something changed)."""
+    with _lock:
+        return bool(_refresh_running())
+
+
+def container(vmid: str) -> Optional[dict[str, str]]:
+    """``{vmid, name, pid}`` when `vmid` is running, else None."""
+    with _lock:
+        ct = _refresh_running().get(str(vmid))
+        if ct is None:
+            return None
+        pid = ct.pid
+    return {"vmid": str(vmid), "name": config(vmid)["name"], "pid": pid}
+
+
+def mount_table(vmid: str) -> list[dict[str, Any]]:
+    """Mount table of a running CT (``[]`` when it isn't running):
+    ``[{source, target, fstype, options, readonly}]``."""
+    with _lock:
+        ct = _refresh_running().get(str(vmid))
+        return copy.deepcopy(ct.mount_table()) if ct is not None else []
+
+
+# ─── Config ──────────────────────────────────────────────────────────────────
+
+def parse_mp_line(rest: str) -> dict[str, Any]:
+    """Parse the value side of an ``mpX:`` line.
+
+    Format: ``<source>,mp=<target>[,opt1=val1,opt2,...]``
+
+    The first comma-separated token is the source — either an absolute
+    path (host bind) or ``storage_id:vol-id`` (PVE volume). Subsequent
+    tokens are key=value pairs; ``mp=`` carries the target path inside
+    the CT, the rest are mount options (acl, backup, ro, replicate,
+    quota, shared, size, etc).
+    """
+    parts = rest.strip().split(",")
+    if not parts:
+        return {}
+    source = parts[0].strip()
+    out: dict[str, Any] = {"source": source}
+    options: list[str] = []
+    for token in parts[1:]:
+        token = token.strip()
+        if not token:
+            continue
+        if "=" in token:
+            k, v = token.split("=", 1)
+            k = k.strip()
+            v = v.strip()
+            if k == "mp":
+                out["target"] = v
+            else:
+                # Numeric-looking values pass through as strings. Frontend
+                # treats them as opaque badges.
+                out.setdefault("config_options", {})[k] = v
+        else:
+            options.append(token)
+    if options:
+        out.setdefault("config_flags", []).extend(options)
+    return out
+
+
+def _parse_config(text: str) -> dict[str, Any]:
+    """Hostname and active ``mpX:`` entries. Stops at the first snapshot
+    section (``[name]``): mp lines below it are history, not active."""
+    name = ""
+    mounts: list[dict[str, Any]] = []
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith("["):
+            break
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("hostname:"):
+            name = line.split(":", 1)[1].strip()
+            continue
+        m = _MP_LINE_RE.match(line)
+        if not m:
+            continue
+        parsed = parse_mp_line(m.group("rest"))
+        parsed["mp_index"] = m.group("key")  # mp0, mp1, ...
+        mounts.append(parsed)
+    return {"name": name, "mounts": mounts}
+
+
+def config(vmid: str) -> dict[str, Any]:
+    """``{name, mounts}`` from ``/etc/pve/lxc/<vmid>.conf`` — ``mounts``
+    are the parsed ``mpX:`` entries. Parsed once per file change."""
+    vmid = str(vmid)
+    path = os.path.join(_LXC_CONF_DIR, f"{vmid}.conf")
+    try:
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+    except OSError:
+        sig = None
+    with _lock:
+        cached = _configs.get(vmid)
+        if cached is not None and cached[0] == sig:
+            return copy.deepcopy(cached[1])
+    parsed = {"name": "", "mounts": []}
+    if sig is not None:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                parsed = _parse_config(f.read())
+        except OSError:
+            sig = None
+    with _lock:
+        _configs[vmid] = (sig, parsed)
+    return copy.deepcopy(parsed)
+
+
+# ─── Per-mount reachability and capacity ─────────────────────────────────────
+
+def _stat_reachable(paths: list[str]) -> list[dict[str, Any]]:
+    """Stat CT paths (``/proc/<pid>/root/...``) in the ``fs_probe`` pool:
+    a stale NFS handle blocks the syscall, a pool worker can be timed
+    out and replaced."""
+    out = []
+    for r in fs_probe.stat_paths(paths, timeout=_STAT_TIMEOUT):
+        error = r["error"]
+        if r["timed_out"]:
+            error = f"stat timed out after {_STAT_TIMEOUT}s (likely stale handle inside CT)"
+        out.append({"reachable": r["reachable"], "error": error})
+    return out
+
+
+def _statvfs(paths: list[str]) -> list[Optional[dict[str, Any]]]:
+    return [
+        cap if cap["total_bytes"] is not None else None
+        for cap in fs_probe.statvfs_paths(paths, timeout=_STAT_TIMEOUT)
+    ]
+
+
+def _state_for(vmid: str, pid: str, target: str) -> dict[str, Any]:
+    return _mount_state.setdefault((vmid, pid, target), {})
+
+
+def _reachability(items: list[tuple[str, str, str]], max_age: float) -> list[dict[str, Any]]:
+    """Reachability for ``(vmid, pid, target)`` items; results older than
+    `max_age` are re-checked together in one pool batch."""
+    results: list[Optional[dict[str, Any]]] = [None] * len(items)
+    misses = []
+    now = time.time()
+    with _lock:
+        for i, (vmid, pid, target) in enumerate(items):
+            cached = _state_for(vmid, pid, target).get("reach")
+            if not pid:
+                results[i] = {"reachable": False, "error": "CT pid unknown", "at": now}
+            elif cached is not None and now - cached["at"] <= max_age:
+                results[i] = cached
+            else:
+                misses.append(i)
+    fresh = _stat_reachable([f"{_PROC}/{items[i][1]}/root{items[i][2]}" for i in misses])
+    with _lock:
+        for i, r in zip(misses, fresh):
+            results[i] = dict(r, at=time.time())
+            _state_for(*items[i])["reach"] = results[i]
+    return results  # type: ignore[return-value]
+
+
+def _capacity(items: list[tuple[str, str, dict[str, Any]]], max_age: float,
+              reach_max_age: float) -> list[Optional[dict[str, Any]]]:
+    """Capacity for ``(vmid, pid, mount)`` items. Remote mounts are only
+    statvfs'd while reachable; stale results are re-read in one batch."""
+    remote = [i for i, (_, _, m) in enumerate(items) if _REMOTE_FS_RE.match(m["fstype"])]
+    reach = _reachability([(items[i][0], items[i][1], items[i][2]["target"]) for i in remote],
+                          reach_max_age)
+    unreachable = {i for i, r in zip(remote, reach) if not r["reachable"]}
+
+    results: list[Optional[dict[str, Any]]] = [None] * len(items)
+    misses = []
+    now = time.time()
+    with _lock:
+        for i, (vmid, pid, m) in enumerate(items):
+            if i in unreachable:
+                continue
+            cached = _state_for(vmid, pid, m["target"]).get("capacity")
+            if cached is not None and now - cached["at"] <= max_age:
+                results[i] = cached["value"]
+            else:
+                misses.append(i)
+    fresh = _statvfs([f"{_PROC}/{items[i][1]}/root{items[i][2]['target']}" for i in misses])
+    with _lock:
+        for i, value in zip(misses, fresh):
+            vmid, pid, m = items[i]
+            _state_for(vmid, pid, m["target"])["capacity"] = {"value": value, "at": time.time()}
+            results[i] = value
+    return results
+
+
+def reachability(vmid: str, target: str, max_age: float = _REACH_TTL) -> dict[str, Any]:
+    """``{reachable, error}`` for `target` inside running CT `vmid`,
+    re-checked when the last result is older than `max_age` seconds."""
+    ct = container(vmid)
+    if ct is None or not ct["pid"]:
+        return {"reachable": False, "error": "CT pid unknown"}
+    r = _reachability([(str(vmid), ct["pid"], target)], max_age)[0]
+    return {"reachable": r["reachable"], "error": r["error"]}
+
+
+def capacity(vmid: str, target: str, max_age: float = _CAPACITY_TTL) -> dict[str, Optional[int]]:
+    """``{total_bytes, used_bytes, available_bytes}`` of `target` as the
+    running CT sees it; None values when it can't be read (CT down,
+    unreachable remote mount, statvfs error)."""
+    ct = container(vmid)
+    if ct is None or not ct["pid"]:
+        return dict(_EMPTY_CAPACITY)
+    for m in mount_table(vmid):
+        if m["target"] == target:
+            value = _capacity([(str(vmid), ct["pid"], m)], max_age, _REACH_TTL)[0]
+            return dict(value) if value else dict(_EMPTY_CAPACITY)
+    value = _statvfs([f"{_PROC}/{ct['pid']}/root{target}"])[0]
+    return value or dict(_EMPTY_CAPACITY)
+
+
+def remote_mounts(max_age: float = _REACH_TTL) -> list[dict[str, Any]]:
+    """NFS/CIFS/SMB mounts inside every running CT with reachability.
+
+    Rows follow `mount_monitor.scan_remote_mounts` plus ``lxc_id``,
+    ``lxc_name``, ``lxc_pid``; ``status`` is ``ok``/``stale``/``readonly``.
+    """
+    rows = []
+    for ct in running():
+        for m in mount_table(ct["vmid"]):
+            if _REMOTE_FS_RE.match(m["fstype"]):
+                rows.append((ct, m))
+
+    health_rows = _reachability([(ct["vmid"], ct["pid"], m["target"]) for ct, m in rows], max_age)
+    out = []
+    for (ct, m), health in zip(rows, health_rows):
+        entry = dict(m)
+        entry.update({
+            "lxc_id": ct["vmid"],
+            "lxc_name": ct["name"],
+            "lxc_pid": ct["pid"],
+            "proxmox_managed": False,
+            "reachable": health["reachable"],
+            "error": health["error"],
+            # Capacity lives in `capacity_rows`; the stale-mount view
+            # never shows it.
+            **_EMPTY_CAPACITY,
+        })
+        if not health["reachable"]:
+            entry["status"] = "stale"
+        elif m["readonly"]:
+            entry["status"] = "readonly"
+        else:
+            entry["status"] = "ok"
+        out.append(entry)
+    return out
+
+
+def capacity_rows(max_age: float = _CAPACITY_TTL,
+                  reach_max_age: float = _REACH_TTL) -> list[dict[str, Any]]:
+    """Capacity of every real filesystem mounted in a running CT.
+
+    Skips pseudo filesystems, FUSE, the CT rootfs (``/`` — covered by
+    the rootfs check) and zero-size mounts. Returns ``[{vmid, name,
+    mount, source, fstype, readonly, total_bytes, used_bytes,
+    available_bytes, usage_percent}]``.
+    """
+    rows = []
+    for ct in running():
+        if not ct["pid"]:
+            continue
+        for m in mount_table(ct["vmid"]):
+            if m["fstype"] in _PSEUDO_FS or m["fstype"].startswith("fuse.") or m["target"] == "/":
+                continue
+            rows.append((ct, m))
+
+    caps = _capacity([(ct["vmid"], ct["pid"], m) for ct, m in rows], max_age, reach_max_age)
+    out = []
+    for (ct, m), cap in zip(rows, caps):
+        if not cap or not cap["total_bytes"]:
+            continue
+        total = cap["total_bytes"]
+        out.append({
+            "vmid": ct["vmid"],
+            "name": ct["name"],
+            "mount": m["target"],
+            "source": m["source"],
+            "fstype": m["fstype"],
+            "readonly": m["readonly"],
+            "total_bytes": total,
+            "used_bytes": cap["used_bytes"],
+            "available_bytes": cap["available_bytes"],
+            "usage_percent": round(cap["used_bytes"] / total * 100, 1),
+        })
+    return out
+
+
+# ─── PVE storages ────────────────────────────────────────────────────────────
+
+def pve_storages(max_age: float = _STORAGES_TTL) -> dict[str, dict[str, Any]]:
+    """storage_id → ``{type, status, total_kib, used_kib, avail_kib}``
+    from ``pvesm status``."""
+    with _lock:
+        if _storages["at"] and time.time() - _storages["at"] <= max_age:
+            return copy.deepcopy(_storages["data"])
+    out: dict[str, dict[str, Any]] = {}
+    ok = False
+    try:
+        proc = subprocess.run(
+            [_PVESM, "status"],
+            capture_output=True, text=True, timeout=_EXEC_TIMEOUT,
+        )
+        ok = proc.returncode == 0
+        # Header: Name Type Status Total(KiB) Used Available %
+        for line in (proc.stdout.strip().splitlines()[1:] if ok else []):
+            parts = line.split()
+            if len(parts) < 6:
+                continue
+            try:
+                out[parts[0]] = {
+                    "type": parts[1],
+                    "status": parts[2],
+                    "total_kib": int(parts[3]),
+                    "used_kib": int(parts[4]),
+                    "avail_kib": int(parts[5]),
+                }
+            except ValueError:
+                continue
+    except (subprocess.TimeoutExpired, OSError):
+        pass
+    if ok:
+        with _lock:
+            _storages.update(at=time.time(), data=out)
+    return copy.deepcopy(out)
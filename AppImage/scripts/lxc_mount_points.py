@@ -33,94 +33,35 @@ import os
 import re
 import shlex
 import subprocess
-from pathlib import Path
 from typing import Any, Optional
 
-_LXC_CONF_DIR = Path("/etc/pve/lxc")
+import fs_probe
+import lxc_mount_inventory
+
 _PCT = "/usr/sbin/pct"
-_PVESH = "/usr/sbin/pvesh"
-_PVESM = "/usr/sbin/pvesm"
 
-_MP_LINE_RE = re.compile(r"^(?P<key>mp\d+):\s*(?P<rest>.+)$")
 _REMOTE_FS_RE = re.compile(r"^(nfs|cifs|smb)", re.IGNORECASE)
 
-# Hard timeouts so a stuck `pct exec` or `pvesm status` never freezes
-# the request. Same defaults as mount_monitor.
-_EXEC_TIMEOUT = int(os.environ.get("PROXMENUX_LXC_EXEC_TIMEOUT", "3"))
+# Hard timeout so a stuck stat/statvfs never freezes the request. Same
+# default as mount_monitor.
 _STAT_TIMEOUT = int(os.environ.get("PROXMENUX_MOUNT_STAT_TIMEOUT", "2"))
 
+# The tab is opened by a user looking at this CT right now: stale-mount
+# stats older than this are re-run, younger ones (e.g. from the health
+# cycle) are reused.
+_RUNTIME_MAX_AGE = 10
+
 
 # ---------------------------------------------------------------------------
 # Config parsing
 # ---------------------------------------------------------------------------
 
 
-def _parse_mp_line(rest: str) -> dict[str, Any]:
-    """Parse the value side of an ``mpX:`` line.
-
-    Format: ``<source>,mp=<target>[,opt1=val1,opt2,...]``
-
-    The first comma-separated token is the source — either an absolute
-    path (host bind) or ``storage_id:vol-id`` (PVE volume). Subsequent
-    tokens are key=value pairs; ``mp=`` carries the target path inside
-    the CT, the rest are mount options (acl, backup, ro, replicate,
-    quota, shared, size, etc).
-    """
-    parts = rest.strip().split(",")
-    if not parts:
-        return {}
-    source = parts[0].strip()
-    out: dict[str, Any] = {"source": source}
-    options: list[str] = []
-    for token in parts[1:]:
-        token = token.strip()
-        if not token:
-            continue
-        if "=" in token:
-            k, v = token.split("=", 1)
-            k = k.strip()
-            v = v.strip()
-            if k == "mp":
-                out["target"] = v
-            else:
-                # Numeric-looking values pass through as strings. Frontend
-                # treats them as opaque badges.
-                out.setdefault("config_options", {})[k] = v
-        else:
-            options.append(token)
-    if options:
-        out.setdefault("config_flags", []).extend(options)
-    return out
-
-
 def _read_lxc_config(vmid: str) -> list[dict[str, Any]]:
-    """Return the parsed mpX entries from /etc/pve/lxc/<vmid>.conf.
-
-    Skips comment lines and the rootfs entry (per Sprint 13.29 scope).
-    Stops at the first snapshot section header (``[snapshot_name]``)
-    because mp lines below that point are config history, not active.
-    """
-    conf = _LXC_CONF_DIR / f"{vmid}.conf"
-    out: list[dict[str, Any]] = []
-    try:
-        text = conf.read_text(encoding="utf-8", errors="replace")
-    except OSError:
-        return out
-
-    for raw in text.splitlines():
-        line = raw.strip()
-        if line.startswith("["):
-            # Snapshot section — stop reading active config.
-            break
-        if not line or line.startswith("#"):
-            continue
-        m = _MP_LINE_RE.match(line)
-        if not m:
-            continue
-        parsed = _parse_mp_line(m.group("rest"))
-        parsed["mp_index"] = m.group("key")  # mp0, mp1, ...
-        out.append(parsed)
-    return out
+    """Return the parsed mpX entries from /etc/pve/lxc/<vmid>.conf
+    (rootfs excluded, snapshot sections ignored). Parsing and caching
+    live in `lxc_mount_inventory`."""
+    return lxc_mount_inventory.config(vmid)["mounts"]
 
 
 # ---------------------------------------------------------------------------
@@ -129,35 +70,10 @@ def _read_lxc_config(vmid: str) -> list[dict[str, Any]]:
 
 
 def _list_pve_storages() -> dict[str, dict[str, Any]]:
-    """Map storage_id → ``{type, content, total_kib, used_kib, avail_kib}``
-    from ``pvesm status``. One subprocess call covers every classifier
-    decision below."""
-    out: dict[str, dict[str, Any]] = {}
-    try:
-        proc = subprocess.run(
-            [_PVESM, "status"],
-            capture_output=True, text=True, timeout=_EXEC_TIMEOUT,
-        )
-        if proc.returncode != 0:
-            return out
-        # Header: Name Type Status Total(KiB) Used Available %
-        for line in proc.stdout.strip().splitlines()[1:]:
-            parts = line.split()
-            if len(parts) < 6:
-                continue
-            try:
-                out[parts[0]] = {
-                    "type": parts[1],
-                    "status": parts[2],
-                    "total_kib": int(parts[3]),
-                    "used_kib": int(parts[4]),
-                    "avail_kib": int(parts[5]),
-                }
-            except ValueError:
-                continue
-    except (subprocess.TimeoutExpired, OSError):
-        pass
-    return out
+    """Map storage_id → ``{type, status, total_kib, used_kib, avail_kib}``
+    from ``pvesm status`` (shared, short-lived cache in
+    `lxc_mount_inventory`)."""
+    return lxc_mount_inventory.pve_storages()
 
 
 def _classify(source: str, pve_storages: dict[str, dict[str, Any]]) -> dict[str, Any]:
@@ -188,7 +104,7 @@ def _classify(source: str, pve_storages: dict[str, dict[str, Any]]) -> dict[str,
             }
 
     # Anything else absolute is a plain host bind. Origin label is the
-    # path itself; capacity comes from `df` of that path.
+    # path itself; capacity comes from `statvfs` of that path.
     return {
         "type": "host_bind",
         "origin_storage": "",
@@ -203,32 +119,9 @@ def _classify(source: str, pve_storages: dict[str, dict[str, Any]]) -> dict[str,
 
 
 def _df_path(path: str) -> dict[str, Optional[int]]:
-    """``df`` against a host path with timeout. Same pattern as
-    mount_monitor — used here for ``host_bind`` origins."""
-    empty = {"total_bytes": None, "used_bytes": None, "available_bytes": None}
-    try:
-        proc = subprocess.run(
-            ["df", "-B1", "--output=size,used,avail", path],
-            capture_output=True, text=True, timeout=_STAT_TIMEOUT,
-        )
-        if proc.returncode != 0:
-            return empty
-        lines = [ln for ln in proc.stdout.strip().splitlines() if ln.strip()]
-        if len(lines) < 2:
-            return empty
-        parts = lines[-1].split()
-        if len(parts) < 3:
-            return empty
-        try:
-            return {
-                "total_bytes": int(parts[0]),
-                "used_bytes": int(parts[1]),
-                "available_bytes": int(parts[2]),
-            }
-        except ValueError:
-            return empty
-    except (subprocess.TimeoutExpired, OSError):
-        return empty
+    """Capacity of a host path, read in the ``fs_probe`` pool with the
+    same timeout as mount_monitor — used here for ``host_bind`` origins."""
+    return fs_probe.statvfs_paths([path], timeout=_STAT_TIMEOUT)[0]
 
 
 _SIZE_UNIT_TO_BYTES = {
@@ -268,51 +161,28 @@ def _parse_pve_size(value: str) -> Optional[int]:
 
 
 def _df_via_host_pid(host_pid: str, ct_target: str) -> dict[str, Optional[int]]:
-    """``df`` the CT-internal path via ``/proc/<pid>/root`` so we get
-    the filesystem as the container sees it, including ZFS dataset
+    """Capacity of the CT-internal path via ``/proc/<pid>/root`` so we
+    get the filesystem as the container sees it, including ZFS dataset
     quotas. Used for ``pve_volume`` mounts whose ``pvesm status``
     numbers reflect the whole storage pool instead of the per-subvol
     quota — without this the UI showed 851 GB total for a 150 GB ZFS
     subvol because pvesm reports the rpool's free space.
 
-    Note: this path does NOT measure NFS/CIFS mounts that were set up
-    from INSIDE the CT (`mount -t nfs` / `/etc/fstab` inside the
-    container). Those live in the CT's own mount namespace and aren't
-    visible to the host's `df` even through `/proc/<pid>/root`. Use
-    `_df_via_pct_exec` for ad-hoc mounts.
+    ``statvfs`` on the ``/proc/<pid>/root`` path resolves it in the
+    CT's mount namespace, so mounts done from INSIDE the CT are seen
+    too; `_df_via_pct_exec` remains the fallback for ad-hoc mounts
+    when this comes back empty.
     """
-    empty = {"total_bytes": None, "used_bytes": None, "available_bytes": None}
     if not host_pid or not ct_target:
-        return empty
-    full = f"/proc/{host_pid}/root{ct_target}"
-    try:
-        proc = subprocess.run(
-            ["df", "-B1", "--output=size,used,avail", full],
-            capture_output=True, text=True, timeout=_STAT_TIMEOUT,
-        )
-        if proc.returncode != 0:
-            return empty
-        lines = [ln for ln in proc.stdout.strip().splitlines() if ln.strip()]
-        if len(lines) < 2:
-            return empty
-        parts = lines[-1].split()
-        if len(parts) < 3:
-            return empty
-        return {
-            "total_bytes": int(parts[0]),
-            "used_bytes": int(parts[1]),
-            "available_bytes": int(parts[2]),
-        }
-    except (subprocess.TimeoutExpired, OSError, ValueError):
-        return empty
+        return {"total_bytes": None, "used_bytes": None, "available_bytes": None}
+    return fs_probe.statvfs_paths([f"/proc/{host_pid}/root{ct_target}"], timeout=_STAT_TIMEOUT)[0]
 
 
 def _df_via_pct_exec(vmid: str, ct_target: str,
                      timeout: int = 6) -> dict[str, Optional[int]]:
     """``df`` a path from INSIDE the CT via ``pct exec``. Needed for
     ad-hoc NFS/CIFS mounts that live in the CT's own mount namespace
-    and aren't visible from the host (so `_df_via_host_pid` returns
-    empty for them).
+    and that statvfs through ``/proc/<pid>/root`` couldn't read.
 
     Heavier than the host-side df (full `pct exec` round-trip ~1-3s),
     so we only use it for ad-hoc mounts. The 6s timeout is generous
@@ -358,7 +228,7 @@ def _capacity_for(source: str, classification: dict[str, Any],
       ``pvesm status local-zfs`` and reported 851 GB total / 19% used —
       reflecting the whole pool, not the subvol. We now prefer, in
       order:
-        1) ``df`` of ``/proc/<host_pid>/root/<target>`` when the CT is
+        1) ``statvfs`` of ``/proc/<host_pid>/root/<target>`` when the CT is
            up — gives the correct view-from-inside numbers including
            the quota.
         2) ``size=<N>`` from lxc.conf as the total; usage is unknown
@@ -371,7 +241,7 @@ def _capacity_for(source: str, classification: dict[str, Any],
     the pvesm-based numbers because the storage IS the source of truth
     for those.
 
-    ``host_bind`` falls back to ``df`` of the host path. None values
+    ``host_bind`` falls back to ``statvfs`` of the host path. None values
     mean the lookup didn't succeed and the UI will render n/a.
     """
     ctype = classification.get("type")
@@ -384,7 +254,7 @@ def _capacity_for(source: str, classification: dict[str, Any],
             live = _df_via_host_pid(host_pid, target)
             if live.get("total_bytes") is not None:
                 return live
-        # 2) CT down (or df failed): expose declared quota as total.
+        # 2) CT down (or statvfs failed): expose declared quota as total.
         if declared_size_bytes is not None:
             return {
                 "total_bytes": declared_size_bytes,
@@ -426,51 +296,25 @@ def _capacity_for(source: str, classification: dict[str, Any],
 
 def _ct_status(vmid: str) -> tuple[bool, str]:
     """Return (running, init_pid). pid is empty string when stopped."""
-    try:
-        proc = subprocess.run(
-            [_PCT, "status", vmid, "--verbose"],
-            capture_output=True, text=True, timeout=_EXEC_TIMEOUT,
-        )
-        if proc.returncode != 0:
-            return False, ""
-        running = False
-        pid = ""
-        for line in proc.stdout.splitlines():
-            low = line.strip().lower()
-            if low.startswith("status:"):
-                running = "running" in low
-            elif low.startswith("pid:"):
-                pid = line.split(":", 1)[1].strip()
-        return running, pid
-    except (subprocess.TimeoutExpired, OSError):
+    ct = lxc_mount_inventory.container(vmid)
+    if ct is None:
         return False, ""
-
-
-def _read_ct_proc_mounts(host_pid: str) -> list[dict[str, Any]]:
-    """Read /proc/<pid>/mounts from the host side — works because the
-    kernel exposes every namespace's mount table under that path. We
-    don't need a second pct exec.
-    """
-    out: list[dict[str, Any]] = []
-    if not host_pid:
-        return out
-    try:
-        with open(f"/proc/{host_pid}/mounts", "r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) < 4:
-                    continue
-                source, target, fstype, options = parts[0], parts[1], parts[2], parts[3]
-                out.append({
-                    "rt_source": source,
-                    "rt_target": target,
-                    "rt_fstype": fstype,
-                    "rt_options": options,
-                    "rt_readonly": "ro" in set(options.split(",")),
-                })
-    except OSError:
-        pass
-    return out
+    return True, ct["pid"]
+
+
+def _read_ct_proc_mounts(vmid: str) -> list[dict[str, Any]]:
+    """The running CT's mount table (read from /proc/<pid>/mounts on
+    the host side, re-read only when it changes)."""
+    return [
+        {
+            "rt_source": m["source"],
+            "rt_target": m["target"],
+            "rt_fstype": m["fstype"],
+            "rt_options": m["options"],
+            "rt_readonly": m["readonly"],
+        }
+        for m in lxc_mount_inventory.mount_table(vmid)
+    ]
 
 
 def _host_source_state(source: str) -> dict[str, Any]:
@@ -495,43 +339,18 @@ def _host_source_state(source: str) -> dict[str, Any]:
     empty = {"exists": None, "is_mountpoint": None, "error": None}
     if not source or not source.startswith("/"):
         return empty
-    try:
-        st_exists = os.path.exists(source)
-    except OSError as e:
-        return {"exists": None, "is_mountpoint": None, "error": str(e)}
-    if not st_exists:
-        return {"exists": False, "is_mountpoint": False, "error": "path missing"}
-    try:
-        proc = subprocess.run(
-            ["mountpoint", "-q", source],
-            capture_output=True, text=True, timeout=_STAT_TIMEOUT,
-        )
-        is_mp = (proc.returncode == 0)
-        return {"exists": True, "is_mountpoint": is_mp, "error": None}
-    except (subprocess.TimeoutExpired, OSError) as e:
-        return {"exists": True, "is_mountpoint": None, "error": str(e)}
+    # Both checks run in the fs_probe pool: `os.path.exists` on a path
+    # under a stale mount blocks just like `stat` does.
+    state = fs_probe.mountpoint_paths([source], timeout=_STAT_TIMEOUT)[0]
+    if state["exists"] is False:
+        state["error"] = "path missing"
+    return state
 
 
-def _stat_via_host(host_pid: str, ct_target: str,
-                   timeout: int = _STAT_TIMEOUT) -> dict[str, Any]:
+def _stat_via_host(vmid: str, ct_target: str) -> dict[str, Any]:
     """Stat the container-internal target through /proc/<pid>/root —
     detects stale NFS without another pct exec round-trip."""
-    if not host_pid:
-        return {"reachable": False, "error": "CT pid unknown"}
-    full = f"/proc/{host_pid}/root{ct_target}"
-    try:
-        result = subprocess.run(
-            ["stat", "-c", "%i", full],
-            capture_output=True, text=True, timeout=timeout,
-        )
-        if result.returncode == 0:
-            return {"reachable": True, "error": None}
-        err = (result.stderr or result.stdout).strip() or "stat returned non-zero"
-        return {"reachable": False, "error": err}
-    except subprocess.TimeoutExpired:
-        return {"reachable": False, "error": f"stat timed out after {timeout}s"}
-    except OSError as e:
-        return {"reachable": False, "error": str(e)}
+    return lxc_mount_inventory.reachability(vmid, ct_target, max_age=_RUNTIME_MAX_AGE)
 
 
 # ---------------------------------------------------------------------------
@@ -557,7 +376,7 @@ def get_lxc_mount_points(vmid: str) -> dict[str, Any]:
     config_entries = _read_lxc_config(vmid)
     pve_storages = _list_pve_storages()
     running, host_pid = _ct_status(vmid)
-    rt_mounts = _read_ct_proc_mounts(host_pid) if running else []
+    rt_mounts = _read_ct_proc_mounts(vmid) if running else []
 
     # Index runtime mounts by their CT-side target path so we can
     # match a config entry to its current realised state in O(1).
@@ -566,13 +385,13 @@ def get_lxc_mount_points(vmid: str) -> dict[str, Any]:
     out: list[dict[str, Any]] = []
     matched_targets: set[str] = set()
 
-    # Pre-compute per-entry subprocess work in parallel so a CT with
-    # many mountpoints doesn't pay N×(_STAT_TIMEOUT + _STAT_TIMEOUT)
+    # Pre-compute per-entry probe work in parallel so a CT with many
+    # mountpoints doesn't pay N×(_STAT_TIMEOUT + _STAT_TIMEOUT)
     # serialised cost. The previous serial path tripped Caddy's 3s
     # reverse-proxy timeout (Ignacio Seijo 11/05: "/api/lxc/210/
-    # mount-points → 502 (3.00s)") on hosts with 5+ binds. ThreadPool
-    # is the right primitive — these are all I/O-bound `df`/`stat`
-    # calls hitting independent paths.
+    # mount-points → 502 (3.00s)") on hosts with 5+ binds. The stat /
+    # statvfs calls themselves go to the fs_probe worker pool; the
+    # threads only keep one stale path from queueing the others.
     from concurrent.futures import ThreadPoolExecutor
 
     def _gather_one(entry):
@@ -587,7 +406,7 @@ def get_lxc_mount_points(vmid: str) -> dict[str, Any]:
         )
         host_src = _host_source_state(src)
         live_target = bool(running and tgt and tgt in rt_by_target)
-        health = _stat_via_host(host_pid, tgt) if live_target else None
+        health = _stat_via_host(vmid, tgt) if live_target else None
         return entry, classification, capacity, host_src, live_target, health
 
     max_workers = max(2, min(8, len(config_entries) or 1))
@@ -650,22 +469,24 @@ def get_lxc_mount_points(vmid: str) -> dict[str, Any]:
         ]
         # Same parallelisation as the configured-mp loop: stat'ing
         # stale NFS exports serially can dominate the request and
-        # push it past the proxy timeout. Capacity (`df`) is fetched
-        # in the SAME pool so the UI can render the usage bar for
-        # ad-hoc NFS/CIFS mounts too — null capacity was a regression
-        # spotted on CT 103 /mnt/Media. Skip df when stat already
-        # showed the mount as unreachable, otherwise the df subprocess
-        # blocks on the same broken export.
+        # push it past the proxy timeout. Capacity is fetched in the
+        # SAME pool so the UI can render the usage bar for ad-hoc
+        # NFS/CIFS mounts too — null capacity was a regression spotted
+        # on CT 103 /mnt/Media. Skip it when stat already showed the
+        # mount as unreachable, otherwise statvfs blocks on the same
+        # broken export.
         if ad_hoc_candidates:
             with ThreadPoolExecutor(max_workers=max_workers) as pool:
                 def _gather_adhoc(rt):
-                    h = _stat_via_host(host_pid, rt["rt_target"])
+                    h = _stat_via_host(vmid, rt["rt_target"])
                     if h.get("reachable"):
-                        # NFS/CIFS mounts done inside the CT live in the
-                        # container's own mount namespace and aren't
-                        # visible to `df` from the host even via
-                        # /proc/<pid>/root — use `pct exec df` instead.
-                        cap = _df_via_pct_exec(vmid, rt["rt_target"])
+                        # statvfs through /proc/<pid>/root resolves the
+                        # path in the CT's own mount namespace; `df` from
+                        # the host doesn't, so `pct exec df` stays as the
+                        # fallback when statvfs gives nothing.
+                        cap = lxc_mount_inventory.capacity(vmid, rt["rt_target"])
+                        if cap["total_bytes"] is None:
+                            cap = _df_via_pct_exec(vmid, rt["rt_target"])
                     else:
                         cap = {"total_bytes": None, "used_bytes": None,
                                "available_bytes": None}
@@ -0,0 +1,543 @@
+"""Read an LXC's package state from the host, without ``pct exec``.
+
+LXC update detection used to start processes inside every CT: ``pct
+exec cat /etc/os-release`` on first sight, ``stat`` of the apt/apk cache
+and ``apt list --upgradable`` / ``apk list -u`` on every sweep — each a
+namespace attach plus, for apt, a Python/libapt start-up. With 60 CTs
+that's 120+ launches per sweep.
+
+The same information is on the container's filesystem, which the host
+can read through ``/proc/<pid>/root`` of any process in the CT (or
+``/var/lib/lxc/<vmid>/rootfs`` while a stopped CT is ``pct mount``-ed):
+
+  * ``/etc/os-release`` → distribution family;
+  * ``/var/lib/dpkg/status`` + ``/var/lib/apt/lists/*_Packages`` →
+    installed vs candidate versions, compared with dpkg's ordering;
+  * ``/lib/apk/db/installed`` + ``/var/cache/apk/APKINDEX.*.tar.gz`` →
+    the same for Alpine.
+
+Candidates come either from the shared upstream tables in
+``pkg_index_cache`` (``shared=True``: one fetch per suite for every CT,
+no refresh inside the CT needed) or from the CT's own lists. Parsed
+local lists are keyed by (name, size, mtime) — apt and apk keep the
+server's timestamp — so CTs on the same suite share one parse per
+sweep; ``clear_index_cache`` drops them afterwards.
+
+Every path is resolved component by component inside the CT's root with
+``O_NOFOLLOW``: a symlink in the CT (``status -> /etc/shadow``) resolves
+against the CT root, never the host's.
+
+Anything this can't answer faithfully (unreadable root, compressed
+indexes we can't open, apt preferences, tagged apk repos)
+returns None so the caller falls back to the ``pct exec`` path.
+"""
+
+from __future__ import annotations
+
+import collections
+import errno
+import gzip
+import lzma
+import os
+import stat
+import tarfile
+import threading
+from typing import Optional
+
+from pkg_index_cache import (
+    apk_blocks, apk_table, apk_version_compare, deb_stanzas, deb_table,
+    deb_version_compare, parse_apk_repositories, parse_apkindex,
+    parse_apt_sources, parse_deb_packages, release_priority,
+)
+
+_CGROUP_ROOTS = (
+    "/sys/fs/cgroup/lxc/{vmid}",            # cgroup v2 (PVE 7+)
+    "/sys/fs/cgroup/pids/lxc/{vmid}",       # cgroup v1
+    "/sys/fs/cgroup/systemd/lxc/{vmid}",
+)
+_MOUNTED_ROOTFS = "/var/lib/lxc/{vmid}/rootfs"
+
+_MAX_SYMLINKS = 40
+_MAX_FILE_BYTES = 256 * 1024 * 1024
+_INDEX_CACHE_MAX = 12
+
+_index_cache: "collections.OrderedDict[tuple, tuple]" = collections.OrderedDict()
+_index_lock = threading.Lock()
+
+
+# ─── Container root ──────────────────────────────────────────────────────────
+
+def _first_pid(cgroup_dir: str) -> Optional[int]:
+    for dirpath, _dirs, files in os.walk(cgroup_dir):
+        if "cgroup.procs" not in files:
+            continue
+        try:
+            with open(os.path.join(dirpath, "cgroup.procs")) as f:
+                for line in f:
+                    if line.strip().isdigit():
+                        return int(line)
+        except OSError:
+            continue
+    return None
+
+
+def container_root(vmid: str) -> Optional[str]:
+    """Host path of the CT's root filesystem, or None if not reachable."""
+    vmid = str(vmid)
+    if not vmid.isdigit():
+        return None
+    for tmpl in _CGROUP_ROOTS:
+        pid = _first_pid(tmpl.format(vmid=vmid))
+        if pid is None:
+            continue
+        root = f"/proc/{pid}/root"
+        if os.path.isdir(os.path.join(root, "etc")):
+            return root
+    rootfs = _MOUNTED_ROOTFS.format(vmid=vmid)
+    if os.path.isdir(os.path.join(rootfs, "etc")):
+        return rootfs
+    return None
+
+
+class _RootFS:
+    """Read-only access to paths inside a CT root, symlinks confined."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._root_st = os.stat(root)
+
+    def _is_root(self, fd: int) -> bool:
+        st = os.fstat(fd)
+        return (st.st_dev, st.st_ino) == (self._root_st.st_dev, self._root_st.st_ino)
+
+    def _walk(self, rel: str) -> tuple[int, str]:
+        """Return ``(dir_fd, name)`` for `rel`; the caller closes dir_fd."""
+        fd = os.open(self.root, os.O_RDONLY | os.O_DIRECTORY)
+        parts = collections.deque(rel.split("/"))
+        links = 0
+        try:
+            while parts:
+                part = parts.popleft()
+                if part in ("", "."):
+                    continue
+                if part == "..":
+                    if not self._is_root(fd):
+                        nfd = os.open("..", os.O_RDONLY | os.O_DIRECTORY, dir_fd=fd)
+                        os.close(fd)
+                        fd = nfd
+                    continue
+                st = os.stat(part, dir_fd=fd, follow_symlinks=False)
+                if stat.S_ISLNK(st.st_mode):
+                    links += 1
+                    if links > _MAX_SYMLINKS:
+                        raise OSError(errno.ELOOP, "too many symlinks", rel)
+                    target = os.readlink(part, dir_fd=fd)
+                    if target.startswith("/"):
+                        os.close(fd)
+                        fd = os.open(self.root, os.O_RDONLY | os.O_DIRECTORY)
+                    parts.extendleft(reversed(target.split("/")))
+                    continue
+                if not parts:
+                    return fd, part
+                nfd = os.open(part, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=fd)
+                os.close(fd)
+                fd = nfd
+            return fd, "."
+        except BaseException:
+            os.close(fd)
+            raise
+
+    def stat(self, rel: str) -> os.stat_result:
+        fd, name = self._walk(rel)
+        try:
+            return os.stat(name, dir_fd=fd, follow_symlinks=False)
+        finally:
+            os.close(fd)
+
+    def listdir(self, rel: str) -> list[str]:
+        fd, name = self._walk(rel)
+        try:
+            dfd = os.open(name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=fd)
+        finally:
+            os.close(fd)
+        try:
+            return os.listdir(dfd)
+        finally:
+            os.close(dfd)
+
+    def read_bytes(self, rel: str) -> bytes:
+        fd, name = self._walk(rel)
+        try:
+            ffd = os.open(name, os.O_RDONLY | os.O_NOFOLLOW, dir_fd=fd)
+        finally:
+            os.close(fd)
+        with os.fdopen(ffd, "rb") as f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode) or st.st_size > _MAX_FILE_BYTES:
+                raise OSError(errno.EINVAL, "not a regular file of sane size", rel)
+            return f.read(_MAX_FILE_BYTES)
+
+
+def _rootfs(vmid: str) -> Optional[_RootFS]:
+    root = container_root(vmid)
+    if root is None:
+        return None
+    try:
+        return _RootFS(root)
+    except OSError:
+        return None
+
+
+# ─── OS family / cache age ───────────────────────────────────────────────────
+
+def os_family(vmid: str) -> Optional[str]:
+    """``debian`` / ``ubuntu`` / ``alpine`` / ``other``, None if unreadable."""
+    fs = _rootfs(vmid)
+    if fs is None:
+        return None
+    text = None
+    for rel in ("etc/os-release", "usr/lib/os-release"):
+        try:
+            text = fs.read_bytes(rel).decode("utf-8", "replace").lower()
+            break
+        except OSError:
+            continue
+    if text is None:
+        return None
+    if "id=ubuntu" in text:
+        return "ubuntu"
+    if "id=debian" in text or "id_like=debian" in text:
+        return "debian"
+    if "id=alpine" in text:
+        return "alpine"
+    return "other"
+
+
+def pkg_cache_mtime(vmid: str, family: str) -> Optional[int]:
+    """mtime of the CT's package index cache (0 = never refreshed), None
+    if the CT isn't readable from the host."""
+    fs = _rootfs(vmid)
+    if fs is None:
+        return None
+    if family in ("debian", "ubuntu"):
+        try:
+            return int(fs.stat("var/cache/apt/pkgcache.bin").st_mtime)
+        except OSError:
+            return 0
+    if family == "alpine":
+        newest = 0
+        try:
+            for name in fs.listdir("var/cache/apk"):
+                if name.endswith(".tar.gz"):
+                    newest = max(newest, int(fs.stat(f"var/cache/apk/{name}").st_mtime))
+        except OSError:
+            pass
+        if newest:
+            return newest
+        try:
+            return int(fs.stat("etc/apk/world").st_mtime)
+        except OSError:
+            return 0
+    return None
+
+
+# ─── Index parsing (per-CT lists) ─────────────────────────────────────────────
+
+def _cached_index(fs: _RootFS, rel: str, parser) -> dict:
+    st = fs.stat(rel)
+    key = (parser.__name__, os.path.basename(rel), st.st_size, st.st_mtime_ns)
+    with _index_lock:
+        hit = _index_cache.get(key)
+        if hit is not None:
+            _index_cache.move_to_end(key)
+            return hit
+    data = fs.read_bytes(rel)
+    if rel.endswith(".gz") and parser is parse_deb_packages:
+        data = gzip.decompress(data)
+    elif rel.endswith(".xz"):
+        data = lzma.decompress(data)
+    parsed = parser(data)
+    with _index_lock:
+        _index_cache[key] = parsed
+        while len(_index_cache) > _INDEX_CACHE_MAX:
+            _index_cache.popitem(last=False)
+    return parsed
+
+
+def clear_index_cache() -> None:
+    with _index_lock:
+        _index_cache.clear()
+
+
+# ─── Upgradable listing ──────────────────────────────────────────────────────
+
+_APT_LISTS = "var/lib/apt/lists"
+
+
+def _apt_uses_pinning(fs: _RootFS) -> bool:
+    """Preferences change the candidate; leave those CTs to apt itself."""
+    try:
+        if fs.stat("etc/apt/preferences").st_size > 0:
+            return True
+    except OSError:
+        pass
+    try:
+        return any(not n.startswith(".") for n in fs.listdir("etc/apt/preferences.d"))
+    except OSError:
+        return False
+
+
+def _list_release_priority(fs: _RootFS, packages_name: str, lists: list[str]) -> str:
+    """Pin class of the suite a local Packages file belongs to."""
+    marker = "_dists_"
+    if marker not in packages_name:
+        return "normal"
+    head_part, tail_part = packages_name.split(marker, 1)
+    suite_prefix = head_part + marker + tail_part.split("_", 1)[0] + "_"
+    for name in (suite_prefix + "InRelease", suite_prefix + "Release"):
+        if name in lists:
+            try:
+                return release_priority(fs.read_bytes(f"{_APT_LISTS}/{name}")[:8192])
+            except OSError:
+                return "normal"
+    return "normal"
+
+
+def _apt_local_indexes(fs: _RootFS) -> Optional[list[tuple]]:
+    """``[(lookup, security, low)]`` from the CT's own apt lists."""
+    try:
+        lists = fs.listdir(_APT_LISTS)
+    except OSError:
+        return None
+    indexes = []
+    for name in sorted(lists):
+        base = name
+        for ext in (".gz", ".xz", ".lz4", ".zst"):
+            if name.endswith(ext):
+                base = name[: -len(ext)]
+        if not base.endswith("_Packages"):
+            continue
+        if name.endswith((".lz4", ".zst")):
+            return None  # compressed with a codec we can't read here
+        priority = _list_release_priority(fs, base, lists)
+        if priority == "skip":
+            continue
+        try:
+            parsed = _cached_index(fs, f"{_APT_LISTS}/{name}", parse_deb_packages)
+        except (OSError, EOFError, lzma.LZMAError):
+            return None
+        security = "-security" in base.lower() or "_security_" in base.lower()
+        indexes.append((lambda n, a, p=parsed: p.get((n, a)), security, priority == "low"))
+    return indexes
+
+
+def _apt_sources(fs: _RootFS) -> list[tuple[str, str, list[str]]]:
+    sources = []
+    try:
+        sources += parse_apt_sources(fs.read_bytes("etc/apt/sources.list").decode("utf-8", "replace"))
+    except OSError:
+        pass
+    try:
+        names = sorted(fs.listdir("etc/apt/sources.list.d"))
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith((".list", ".sources")):
+            continue
+        try:
+            text = fs.read_bytes(f"etc/apt/sources.list.d/{name}").decode("utf-8", "replace")
+        except OSError:
+            continue
+        sources += parse_apt_sources(text, deb822=name.endswith(".sources"))
+    return sources
+
+
+def _dpkg_arches(fs: _RootFS, status: bytes) -> list[str]:
+    native = ""
+    for st in deb_stanzas(status):
+        if st.get(b"Package") == b"dpkg":
+            native = st.get(b"Architecture", b"").decode("ascii", "replace")
+            break
+    arches = [native] if native else []
+    try:
+        for line in fs.read_bytes("var/lib/dpkg/arch").decode("ascii", "replace").split():
+            if line not in arches:
+                arches.append(line)
+    except OSError:
+        pass
+    return arches
+
+
+def _apt_shared_indexes(fs: _RootFS, status: bytes) -> Optional[list[tuple]]:
+    """``[(lookup, security, low)]`` from the shared upstream cache for
+    every source the CT has configured; None if any can't be had."""
+    sources = _apt_sources(fs)
+    arches = _dpkg_arches(fs, status)
+    if not sources or not arches:
+        return None
+    indexes = []
+    for uri, suite, components in sources:
+        for component in components:
+            for arch in arches:
+                table = deb_table(uri, suite, component, arch)
+                if table is None:
+                    return None
+                if table["priority"] == "skip":
+                    continue
+                indexes.append((
+                    lambda n, a, v=table["versions"], t=arch: v.get(n) if a in (t, "all") else None,
+                    bool(table["security"]), table["priority"] == "low",
+                ))
+    return indexes
+
+
+def _apt_upgradable(status: bytes, indexes: list[tuple]) -> list[dict]:
+    def best(name: str, arch: str, low: bool) -> tuple[Optional[str], bool]:
+        top, top_sec = None, False
+        for lookup, is_sec, is_low in indexes:
+            if is_low != low:
+                continue
+            ver = lookup(name, arch)
+            if ver is None:
+                continue
+            cmp = 1 if top is None else deb_version_compare(ver, top)
+            if cmp > 0:
+                top, top_sec = ver, is_sec
+            elif cmp == 0 and is_sec:
+                top_sec = True
+        return top, top_sec
+
+    rows: list[dict] = []
+    for st in deb_stanzas(status):
+        if not st.get(b"Status", b"").endswith(b" installed"):
+            continue
+        try:
+            name = st[b"Package"].decode()
+            arch = st.get(b"Architecture", b"").decode()
+            installed = st[b"Version"].decode()
+        except (KeyError, UnicodeDecodeError):
+            continue
+        # Same choice apt makes with default pins: a newer version from a
+        # normal suite wins; backports-style suites only upgrade packages
+        # whose installed version didn't come from a normal suite.
+        candidate, security = best(name, arch, low=False)
+        if candidate is None or deb_version_compare(candidate, installed) <= 0:
+            low_ver, low_sec = best(name, arch, low=True)
+            if (candidate is None or deb_version_compare(candidate, installed) < 0) \
+                    and low_ver is not None and deb_version_compare(low_ver, installed) > 0:
+                candidate, security = low_ver, low_sec
+            else:
+                continue
+        rows.append({"name": name, "current": installed,
+                     "latest": candidate, "security": security})
+    return rows
+
+
+def _list_upgradable_apt(fs: _RootFS, shared: bool) -> Optional[list[dict]]:
+    if _apt_uses_pinning(fs):
+        return None
+    try:
+        status = fs.read_bytes("var/lib/dpkg/status")
+    except OSError:
+        return None
+    indexes = _apt_shared_indexes(fs, status) if shared else _apt_local_indexes(fs)
+    if indexes is None:
+        return None
+    return _apt_upgradable(status, indexes)
+
+
+def _apk_installed(fs: _RootFS) -> list[tuple[str, str, str]]:
+    out = []
+    for fields in apk_blocks(fs.read_bytes("lib/apk/db/installed")):
+        try:
+            out.append((fields[b"P"].decode(), fields.get(b"A", b"").decode(), fields[b"V"].decode()))
+        except (KeyError, UnicodeDecodeError):
+            continue
+    return out
+
+
+def _list_upgradable_apk(fs: _RootFS, shared: bool) -> Optional[list[dict]]:
+    try:
+        repos = parse_apk_repositories(fs.read_bytes("etc/apk/repositories").decode("utf-8", "replace"))
+        if repos is None:
+            return None  # tagged repos only apply to pinned packages
+        installed = _apk_installed(fs)
+        if shared:
+            arch = fs.read_bytes("etc/apk/arch").decode("ascii", "replace").strip()
+        else:
+            names = [n for n in fs.listdir("var/cache/apk")
+                     if n.startswith("APKINDEX.") and n.endswith(".tar.gz")]
+    except OSError:
+        return None
+
+    lookups = []
+    if shared:
+        if not repos or not arch:
+            return None
+        for base, version, repo in repos:
+            table = apk_table(base, version, repo, arch)
+            if table is None:
+                return None
+            lookups.append(lambda n, a, v=table["versions"]: v.get(n))
+    else:
+        if not names:
+            return None
+        for name in sorted(names):
+            try:
+                parsed = _cached_index(fs, f"var/cache/apk/{name}", parse_apkindex)
+            except (OSError, EOFError, tarfile.TarError):
+                return None
+            lookups.append(lambda n, a, p=parsed: p.get((n, a)))
+
+    rows: list[dict] = []
+    for name, arch, current in installed:
+        candidate = current
+        for lookup in lookups:
+            ver = lookup(name, arch)
+            if ver is not None and (apk_version_compare(ver, candidate) or 0) > 0:
+                candidate = ver
+        if candidate != current:
+            rows.append({"name": name, "current": current,
+                         "latest": candidate, "security": False})
+    return rows
+
+
+def list_upgradable(vmid: str, family: str, shared: bool = False) -> Optional[list[dict]]:
+    """``[{name, current, latest, security}]`` like the ``apt list
+    --upgradable`` / ``apk list -u`` parsers, or None when the CT can't
+    be answered from the host.
+
+    With ``shared`` the candidates come from ``pkg_index_cache`` (one
+    upstream fetch per suite for all CTs, no refresh inside the CT);
+    otherwise from the CT's own apt lists / apk index cache.
+    """
+    fs = _rootfs(vmid)
+    if fs is None:
+        return None
+    try:
+        if family in ("debian", "ubuntu"):
+            return _list_upgradable_apt(fs, shared)
+        if family == "alpine":
+            return _list_upgradable_apk(fs, shared)
+    except OSError:
+        return None
+    return None
+
+
+def installed_version(vmid: str, family: str, package: str) -> Optional[str]:
+    """Installed version of one package, read from the host."""
+    fs = _rootfs(vmid)
+    if fs is None:
+        return None
+    try:
+        if family == "alpine":
+            for name, _arch, ver in _apk_installed(fs):
+                if name == package:
+                    return ver
+        elif family in ("debian", "ubuntu"):
+            for st in deb_stanzas(fs.read_bytes("var/lib/dpkg/status")):
+                if st.get(b"Package") == package.encode() and st.get(b"Status", b"").endswith(b" installed"):
+                    return st.get(b"Version", b"").decode() or None
+    except OSError:
+        return None
+    return None
@@ -31,7 +31,13 @@ via tmp+rename so a crash mid-write can't leave a half-written file.
 The module is concurrency-safe: a single ``threading.RLock`` guards
 every read-modify-write so the periodic detector and a request handler
 calling ``get_registry()`` can run in parallel without stepping on
-each other.
+each other. The lock is never held across a subprocess or network call:
+``check_for_updates`` snapshots the items, runs the checkers in a
+bounded pool (LXC probes additionally capped, niced and gated on load
+average) and merges results back in small batches. Sweep progress is
+recorded in the registry so an interrupted sweep resumes where it
+stopped, and the in-CT ``apt update`` refreshes are spread across the
+day by a background scheduler instead of all landing in the sweep.
 """
 
 from __future__ import annotations
@@ -40,13 +46,18 @@ import datetime
 import json
 import os
 import re
+import shutil
 import sqlite3
 import subprocess
 import threading
 import time
 import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Callable, Optional
 
+import lxc_pkg_state
+
 # ─── Storage ──────────────────────────────────────────────────────────────────
 
 _DB_DIR = "/usr/local/share/proxmenux"
@@ -322,6 +333,22 @@ _PCT_BIN = "/usr/sbin/pct"
 _LXC_EXEC_TIMEOUT_SEC = 10
 _LXC_OS_PROBE_TIMEOUT_SEC = 5
 
+# Package scans run `pct exec` under the lowest best-effort I/O class and
+# nice 10. lxc-attach forks into the CT, so the command inside (apt,
+# apk, stat) inherits both and a sweep never competes with guest load.
+_LOW_PRIO_PREFIX: list[str] = (
+    (["nice", "-n", "10"] if shutil.which("nice") else [])
+    + (["ionice", "-c", "2", "-n", "7"] if shutil.which("ionice") else [])
+)
+
+
+def _pct_exec_scan(vmid: str, cmd: str, timeout: int) -> subprocess.CompletedProcess:
+    """``pct exec <vmid> -- sh -c <cmd>`` at scan priority."""
+    return subprocess.run(
+        _LOW_PRIO_PREFIX + [_PCT_BIN, "exec", vmid, "--", "sh", "-c", cmd],
+        capture_output=True, text=True, timeout=timeout,
+    )
+
 # User-toggle storage. The setting lives in the same SQLite DB that
 # notification_manager uses for user_settings, so we get atomic writes
 # and the table is already created at startup by health_persistence.
@@ -472,7 +499,13 @@ def _probe_lxc_os(vmid: str) -> Optional[str]:
     Cached per CT in the registry — re-probed only when the entry has
     no ``_os_family`` yet, since the OS rarely changes for the life of
     a CT.
+
+    Read from the host through the CT's root filesystem when possible
+    (``lxc_pkg_state``); ``pct exec`` is only the fallback.
     """
+    family = lxc_pkg_state.os_family(vmid)
+    if family is not None:
+        return family if family in _SUPPORTED_OS_FAMILIES else None
     try:
         r = subprocess.run(
             [_PCT_BIN, "exec", vmid, "--", "cat", "/etc/os-release"],
@@ -500,10 +533,10 @@ def _detect_lxc_containers() -> list[dict]:
     """Enumerate running Debian/Ubuntu CTs as registry entries.
 
     OS detection is cached in the registry entry (`_os_family`), so the
-    expensive ``pct exec cat /etc/os-release`` only runs the first time
-    a CT is seen. CT reinstalls with a different OS will keep the old
-    family cached until the user resets the registry — acceptable
-    trade-off vs paying the probe cost every 24h cycle.
+    os-release probe only runs the first time a CT is seen. CT
+    reinstalls with a different OS will keep the old family cached
+    until the user resets the registry — acceptable trade-off vs paying
+    the probe cost every 24h cycle.
 
     Detection respects the dedicated `lxc_updates.detection_enabled`
     toggle (Settings → LXC Update Detection). When OFF, this returns []
@@ -975,11 +1008,7 @@ def _run_pct_pkg_listing(vmid: str, cmd: str) -> tuple[bool, str, str]:
     and stderr handling so apt/apk callers stay symmetric.
     """
     try:
-        r = subprocess.run(
-            [_PCT_BIN, "exec", vmid, "--", "sh", "-c", cmd],
-            capture_output=True, text=True,
-            timeout=_LXC_EXEC_TIMEOUT_SEC,
-        )
+        r = _pct_exec_scan(vmid, cmd, _LXC_EXEC_TIMEOUT_SEC)
     except subprocess.TimeoutExpired:
         return False, "", f"{cmd.split()[0]} listing timed out"
     except (FileNotFoundError, OSError) as e:
@@ -995,12 +1024,20 @@ def _run_pct_pkg_listing(vmid: str, cmd: str) -> tuple[bool, str, str]:
 # the upstream state and proactively refresh once before listing.
 _LXC_CACHE_STALE_THRESHOLD_SEC = 24 * 3600
 _LXC_CACHE_REFRESH_TIMEOUT_SEC = 60
+# At most this many `apt-get update` / `apk update` at once on the node —
+# each one is a burst of network + disk I/O inside the CT.
+_LXC_REFRESH_CONCURRENCY = 2
+_lxc_refresh_sem = threading.BoundedSemaphore(_LXC_REFRESH_CONCURRENCY)
+# Refreshes normally happen in each CT's daily slot (see "Scan
+# scheduler" below); the sweep only refreshes caches older than this.
+_LXC_SWEEP_REFRESH_THRESHOLD_SEC = 36 * 3600
 
 
-def _refresh_lxc_pkg_cache_if_stale(vmid: str, family: str) -> dict:
+def _refresh_lxc_pkg_cache_if_stale(vmid: str, family: str,
+                                    max_age: int = _LXC_CACHE_STALE_THRESHOLD_SEC) -> dict:
     """Best-effort refresh of the CT's package-manager metadata cache.
 
-    If the local cache is older than ``_LXC_CACHE_STALE_THRESHOLD_SEC``,
+    If the local cache is older than ``max_age`` seconds,
     run ``apt-get update`` / ``apk update`` from outside the CT once
     before the upgradable listing. Any failure (no network, broken
     repo, timeout) is swallowed silently — the listing below still
@@ -1036,25 +1073,27 @@ def _refresh_lxc_pkg_cache_if_stale(vmid: str, family: str) -> dict:
     else:
         return {"refreshed": False, "was_stale": False, "cache_age_seconds": None, "error": None}
 
-    ok, stdout, _ = _run_pct_pkg_listing(vmid, cmd_age)
-    if not ok:
-        return {"refreshed": False, "was_stale": False, "cache_age_seconds": None, "error": "stat failed"}
-    try:
-        # Use the last numeric line in case the command emitted stderr
-        # noise that snuck into stdout (e.g. some shells route warnings).
-        cache_mtime = 0
-        for ln in stdout.strip().splitlines():
-            try:
-                cache_mtime = int(ln.strip())
-                break
-            except ValueError:
-                continue
-    except Exception:
-        cache_mtime = 0
+    cache_mtime = lxc_pkg_state.pkg_cache_mtime(vmid, family)
+    if cache_mtime is None:
+        ok, stdout, _ = _run_pct_pkg_listing(vmid, cmd_age)
+        if not ok:
+            return {"refreshed": False, "was_stale": False, "cache_age_seconds": None, "error": "stat failed"}
+        try:
+            # Use the last numeric line in case the command emitted stderr
+            # noise that snuck into stdout (e.g. some shells route warnings).
+            cache_mtime = 0
+            for ln in stdout.strip().splitlines():
+                try:
+                    cache_mtime = int(ln.strip())
+                    break
+                except ValueError:
+                    continue
+        except Exception:
+            cache_mtime = 0
 
     now = int(time.time())
     cache_age = (now - cache_mtime) if cache_mtime > 0 else None
-    was_stale = cache_age is None or cache_age > _LXC_CACHE_STALE_THRESHOLD_SEC
+    was_stale = cache_age is None or cache_age > max_age
 
     if not was_stale:
         return {
@@ -1063,11 +1102,8 @@ def _refresh_lxc_pkg_cache_if_stale(vmid: str, family: str) -> dict:
         }
 
     try:
-        r = subprocess.run(
-            [_PCT_BIN, "exec", vmid, "--", "sh", "-c", cmd_refresh],
-            capture_output=True, text=True,
-            timeout=_LXC_CACHE_REFRESH_TIMEOUT_SEC,
-        )
+        with _lxc_refresh_sem:
+            r = _pct_exec_scan(vmid, cmd_refresh, _LXC_CACHE_REFRESH_TIMEOUT_SEC)
         if r.returncode == 0:
             return {
                 "refreshed": True, "was_stale": True,
@@ -1113,9 +1149,26 @@ def _check_lxc_updates(entry: dict) -> dict:
             "last_check": _now_iso(), "error": "no vmid in entry",
         }
 
-    refresh_diag = _refresh_lxc_pkg_cache_if_stale(vmid, family)
-
-    if family in ("debian", "ubuntu"):
+    # Preferred: installed state read from the host, candidates from the
+    # shared upstream index cache — nothing runs in the CT and its own
+    # lists don't need refreshing.
+    packages = lxc_pkg_state.list_upgradable(vmid, family, shared=True)
+    index_source = "shared"
+    refresh_diag: dict = {}
+    if packages is None:
+        index_source = "ct"
+        # The staggered scheduler keeps caches under ~24h; the sweep itself
+        # only refreshes CTs it missed (new CT, AppImage restarted, ...).
+        refresh_diag = _refresh_lxc_pkg_cache_if_stale(
+            vmid, family, max_age=_LXC_SWEEP_REFRESH_THRESHOLD_SEC,
+        )
+        # Host-side read of dpkg/apk state + the CT's own indexes next; it
+        # answers None for anything it can't compute faithfully (pinning,
+        # unreadable root...) and we ask the package manager inside the CT.
+        packages = lxc_pkg_state.list_upgradable(vmid, family)
+    if packages is not None:
+        ok, err = True, ""
+    elif family in ("debian", "ubuntu"):
         ok, stdout, err = _run_pct_pkg_listing(
             vmid, "apt list --upgradable 2>/dev/null"
         )
@@ -1157,6 +1210,7 @@ def _check_lxc_updates(entry: dict) -> dict:
         "_cache_age_seconds": refresh_diag.get("cache_age_seconds"),
         "_cache_refreshed": refresh_diag.get("refreshed"),
         "_cache_refresh_error": refresh_diag.get("error"),
+        "_index_source": index_source,
     }
 
 
@@ -1329,6 +1383,151 @@ _CHECKERS: dict[str, Callable[[dict], dict]] = {
 }
 
 
+# ─── Scan scheduler ──────────────────────────────────────────────────────────
+#
+# A sweep used to hold `_lock` while running every checker serially; on a
+# node with dozens of CTs (each a `pct exec apt list`, possibly preceded
+# by a 60s `apt-get update`) that took tens of minutes and blocked every
+# registry read meanwhile. Now:
+#
+#   * the items are snapshotted under the lock and checked in a pool of
+#     ``_SCAN_WORKERS`` threads, LXC probes additionally capped by
+#     ``_LXC_SCAN_CONCURRENCY`` and held back while the node's load
+#     average is above ``_SCAN_MAX_LOAD_PER_CPU``;
+#   * results are merged back into a freshly read registry every
+#     ``_SCAN_FLUSH_EVERY`` items / ``_SCAN_FLUSH_INTERVAL_SEC``, so the
+#     lock is only held for the read-modify-write itself;
+#   * ``scan_state`` in the registry records which ids the running sweep
+#     has finished; a sweep that was interrupted (AppImage restart) is
+#     resumed with the remaining items instead of starting over;
+#   * `apt-get update` inside CTs is moved out of the sweep: each CT gets
+#     a fixed slot in the day (hash of its vmid) and a background thread
+#     refreshes it once that slot passes.
+
+_SCAN_WORKERS = 4
+_LXC_SCAN_CONCURRENCY = max(1, min(4, (os.cpu_count() or 2) // 2))
+_SCAN_MAX_LOAD_PER_CPU = 0.8
+_SCAN_LOAD_WAIT_MAX_SEC = 120
+_SCAN_FLUSH_EVERY = 8
+_SCAN_FLUSH_INTERVAL_SEC = 5
+_SCAN_RESUME_WINDOW_SEC = 12 * 3600
+
+_LXC_REFRESH_PERIOD_SEC = 24 * 3600
+_LXC_REFRESH_TICK_SEC = 600
+# A slot only refreshes caches older than this (the sweep or the user may
+# have refreshed it recently).
+_LXC_REFRESH_SLOT_MIN_AGE_SEC = 12 * 3600
+
+_scan_lock = threading.Lock()
+_lxc_scan_sem = threading.BoundedSemaphore(_LXC_SCAN_CONCURRENCY)
+
+_refresh_scheduler_started = False
+_refresh_scheduler_lock = threading.Lock()
+_lxc_refresh_handled: dict[str, float] = {}  # vmid → slot start already handled
+
+
+def _wait_for_load() -> None:
+    """Hold an LXC probe back while the node is busy (bounded wait)."""
+    limit = (os.cpu_count() or 1) * _SCAN_MAX_LOAD_PER_CPU
+    deadline = time.time() + _SCAN_LOAD_WAIT_MAX_SEC
+    while time.time() < deadline:
+        try:
+            if os.getloadavg()[0] <= limit:
+                return
+        except OSError:
+            return
+        time.sleep(5)
+
+
+def _run_checker(it: dict) -> dict:
+    checker = _CHECKERS[it.get("type")]
+    try:
+        if it.get("type") == "lxc":
+            _wait_for_load()
+            with _lxc_scan_sem:
+                return checker(it)
+        return checker(it)
+    except Exception as e:
+        print(f"[ProxMenux] managed_installs checker failed for "
+              f"{it.get('id')}: {e}")
+        return {"available": False, "latest": None,
+                "last_check": _now_iso(), "error": str(e)}
+
+
+def _apply_check_result(it: dict, result: dict) -> None:
+    it["update_check"] = {
+        "available": bool(result.get("available")),
+        "latest": result.get("latest"),
+        "last_check": result.get("last_check") or _now_iso(),
+        "error": result.get("error"),
+    }
+    if result.get("current") and not it.get("current_version"):
+        it["current_version"] = result["current"]
+    # Per-checker extras carried through into the persisted
+    # `update_check` blob. Add new keys here when a future
+    # checker needs to surface fields beyond available/latest.
+    # `_count` + `_security_count` were missing originally, so
+    # the LXC checker's counts dropped on the floor and the
+    # frontend badge couldn't render.
+    for extra_key in ("_packages", "_upgrade_kind", "_kernel",
+                      "_kernel_note", "_count", "_security_count",
+                      "_coral_variant", "_coral_pkg", "_index_source"):
+        if extra_key in result:
+            it["update_check"][extra_key] = result[extra_key]
+
+
+def _flush_check_results(results: dict[str, dict], finished: bool = False) -> None:
+    """Merge checker results into the on-disk registry and record them
+    as done in ``scan_state``. Items removed meanwhile are skipped."""
+    with _lock:
+        reg = _read_registry()
+        for it in reg.get("items", []):
+            result = results.get(it.get("id"))
+            if result is not None:
+                _apply_check_result(it, result)
+        state = reg.setdefault("scan_state", {})
+        done = state.setdefault("done", [])
+        done.extend(item_id for item_id in results if item_id not in done)
+        if finished:
+            state["finished_at"] = _now_iso()
+            state["done"] = []
+            reg["last_check_run"] = state["finished_at"]
+        _write_registry(reg)
+
+
+def _begin_sweep(force: bool) -> list[dict]:
+    """Start (or resume) a sweep; returns snapshots of the items to check."""
+    with _lock:
+        reg = _read_registry()
+        state = reg.get("scan_state") or {}
+        resume = (
+            not force
+            and state.get("started_ts")
+            and not state.get("finished_at")
+            and time.time() - state["started_ts"] < _SCAN_RESUME_WINDOW_SEC
+        )
+        done = set(state.get("done") or []) if resume else set()
+        if not resume:
+            reg["scan_state"] = {
+                "started_at": _now_iso(), "started_ts": time.time(),
+                "finished_at": None, "done": [],
+            }
+            _write_registry(reg)
+        todo = [
+            json.loads(json.dumps(it)) for it in reg.get("items", [])
+            if not it.get("removed_at")
+            and it.get("type") in _CHECKERS
+            and it.get("id") not in done
+        ]
+    if resume:
+        print(f"[ProxMenux] managed_installs resuming interrupted sweep "
+              f"({len(done)} done, {len(todo)} left)")
+    # Cheap checkers first, then the CTs checked longest ago.
+    todo.sort(key=lambda it: (it.get("type") == "lxc",
+                              (it.get("update_check") or {}).get("last_check") or ""))
+    return todo
+
+
 def check_for_updates(force: bool = False) -> list[dict]:
     """Run every type-specific checker over active items, persist
     the updated state, return the list of items that have an update
@@ -1339,55 +1538,89 @@ def check_for_updates(force: bool = False) -> list[dict]:
     available" line.
 
     ``force`` invalidates the per-source caches (currently only the
-    NVIDIA versions list — OCI keeps its own internal cache).
+    NVIDIA versions list — OCI keeps its own internal cache) and starts
+    a fresh sweep instead of resuming an interrupted one. Concurrent
+    calls are serialised; registry reads are not blocked meanwhile.
     """
     if force:
         _nvidia_cache["versions"] = []
         _nvidia_cache["fetched_at"] = 0
 
-    updates_available: list[dict] = []
-    with _lock:
-        reg = _read_registry()
-        items = reg.get("items", [])
-        for it in items:
-            if it.get("removed_at"):
-                continue
-            checker = _CHECKERS.get(it.get("type"))
-            if not checker:
-                continue
-            try:
-                result = checker(it)
-            except Exception as e:
-                print(f"[ProxMenux] managed_installs checker failed for "
-                      f"{it.get('id')}: {e}")
-                result = {"available": False, "latest": None,
-                          "last_check": _now_iso(), "error": str(e)}
-
-            it["update_check"] = {
-                "available": bool(result.get("available")),
-                "latest": result.get("latest"),
-                "last_check": result.get("last_check") or _now_iso(),
-                "error": result.get("error"),
-            }
-            if result.get("current") and not it.get("current_version"):
-                it["current_version"] = result["current"]
-            # Per-checker extras carried through into the persisted
-            # `update_check` blob. Add new keys here when a future
-            # checker needs to surface fields beyond available/latest.
-            # `_count` + `_security_count` were missing originally, so
-            # the LXC checker's counts dropped on the floor and the
-            # frontend badge couldn't render.
-            for extra_key in ("_packages", "_upgrade_kind", "_kernel",
-                              "_kernel_note", "_count", "_security_count",
-                              "_coral_variant", "_coral_pkg"):
-                if extra_key in result:
-                    it["update_check"][extra_key] = result[extra_key]
-
-            if it["update_check"]["available"]:
-                updates_available.append(it)
+    _ensure_refresh_scheduler()
+
+    with _scan_lock:
+        todo = _begin_sweep(force)
+        pending: dict[str, dict] = {}
+        last_flush = time.time()
+        with ThreadPoolExecutor(max_workers=_SCAN_WORKERS,
+                                thread_name_prefix="managed-scan") as pool:
+            futures = {pool.submit(_run_checker, it): it["id"] for it in todo}
+            for fut in as_completed(futures):
+                pending[futures[fut]] = fut.result()
+                if (len(pending) >= _SCAN_FLUSH_EVERY
+                        or time.time() - last_flush >= _SCAN_FLUSH_INTERVAL_SEC):
+                    _flush_check_results(pending)
+                    pending = {}
+                    last_flush = time.time()
+        _flush_check_results(pending, finished=True)
+        lxc_pkg_state.clear_index_cache()
+
+    return [it for it in get_active_items()
+            if (it.get("update_check") or {}).get("available")]
+
+
+def _lxc_refresh_slot_start(vmid: str, now: float) -> float:
+    """Start of the most recent daily refresh slot for ``vmid``."""
+    offset = zlib.crc32(str(vmid).encode()) % _LXC_REFRESH_PERIOD_SEC
+    return now - ((now - offset) % _LXC_REFRESH_PERIOD_SEC)
+
+
+def _staggered_refresh_tick(seed: bool = False) -> Optional[int]:
+    """Refresh the package cache of every CT whose slot passed since we
+    last handled it. With ``seed`` only record the current slots (so an
+    AppImage start doesn't refresh every CT at once). Returns the
+    number of refreshes attempted, None while detection is off."""
+    if not _lxc_updates_detection_enabled():
+        return None
+    now = time.time()
+    attempted = 0
+    for it in get_active_items():
+        if it.get("type") != "lxc" or not it.get("_vmid"):
+            continue
+        if (it.get("update_check") or {}).get("_index_source") == "shared":
+            continue  # answered from the shared index cache, nothing to refresh
+        vmid = str(it["_vmid"])
+        slot = _lxc_refresh_slot_start(vmid, now)
+        if _lxc_refresh_handled.get(vmid, 0) >= slot:
+            continue
+        _lxc_refresh_handled[vmid] = slot
+        if seed:
+            continue
+        _wait_for_load()
+        _refresh_lxc_pkg_cache_if_stale(
+            vmid, (it.get("_os_family") or "").lower(),
+            max_age=_LXC_REFRESH_SLOT_MIN_AGE_SEC,
+        )
+        attempted += 1
+    return attempted
 
-        reg["items"] = items
-        reg["last_check_run"] = _now_iso()
-        _write_registry(reg)
 
-    return updates_available
+def _refresh_scheduler_loop() -> None:
+    seed = True
+    while True:
+        try:
+            if _staggered_refresh_tick(seed=seed) is not None:
+                seed = False
+        except Exception as e:
+            print(f"[ProxMenux] managed_installs refresh scheduler: {e}")
+        time.sleep(_LXC_REFRESH_TICK_SEC)
+
+
+def _ensure_refresh_scheduler() -> None:
+    global _refresh_scheduler_started
+    with _refresh_scheduler_lock:
+        if _refresh_scheduler_started:
+            return
+        _refresh_scheduler_started = True
+    threading.Thread(target=_refresh_scheduler_loop, daemon=True,
+                     name="managed-installs-refresh").start()
@@ -32,6 +32,7 @@ from pathlib import Path
 # Import centralized startup grace management
 # This provides a single source of truth for all grace period logic
 import startup_grace
+import guest_registry
 
 class _SharedState:
     """Wrapper around centralized startup_grace module for backwards compatibility.
@@ -1173,22 +1174,6 @@ class JournalWatcher:
                 }, entity='node', entity_id=service_name)
                 return
     
-    def _resolve_vm_name(self, vmid: str) -> str:
-        """Try to resolve VMID to a guest name from PVE config files."""
-        if not vmid:
-            return ''
-        # Check QEMU configs
-        for base in ['/etc/pve/qemu-server', '/etc/pve/lxc']:
-            conf = os.path.join(base, f'{vmid}.conf')
-            try:
-                with open(conf) as f:
-                    for line in f:
-                        if line.startswith('hostname:') or line.startswith('name:'):
-                            return line.split(':', 1)[1].strip()
-            except (OSError, IOError):
-                continue
-        return ''
-    
     def _check_disk_io(self, msg: str, syslog_id: str, priority: int):
         """
         Detect disk I/O errors from kernel messages.
@@ -1626,29 +1611,16 @@ class JournalWatcher:
         return info[0] if info else ''
 
     def _resolve_vm_info(self, vmid: str):
-        """Resolve a VMID to (name, type) from PVE config files.
+        """Resolve a VMID to (name, type) from the parsed PVE configs.
         
-        Returns tuple (name, 'VM'|'CT') or None if not found.
-        type is determined by which config directory the ID was found in:
-          /etc/pve/qemu-server -> VM
-          /etc/pve/lxc         -> CT
+        Returns tuple (name, 'VM'|'CT') or None if not found or unnamed.
         """
         if not vmid or not vmid.isdigit():
             return None
-        type_map = [
-            ('/etc/pve/qemu-server', 'VM'),
-            ('/etc/pve/lxc', 'CT'),
-        ]
-        for base, gtype in type_map:
-            conf = f'{base}/{vmid}.conf'
-            try:
-                with open(conf, 'r') as f:
-                    for line in f:
-                        if line.startswith('name:') or line.startswith('hostname:'):
-                            return (line.split(':', 1)[1].strip(), gtype)
-            except (OSError, IOError):
-                pass
-        return None
+        guest = guest_registry.get(vmid)
+        if not guest or not guest['name']:
+            return None
+        return (guest['name'], 'VM' if guest['type'] == 'vm' else 'CT')
     
     def _check_cluster_events(self, msg: str, syslog_id: str):
         """Detect cluster split-brain and node disconnect."""
@@ -1797,6 +1769,45 @@ class JournalWatcher:
         self._queue.put(event)
 
 
+# ─── Task Feed Listeners ─────────────────────────────────────────
+# Other modules (flask_server's backup index, the PVE task index, …) need
+# to know about PVE tasks without polling /var/log/pve/tasks themselves.
+# TaskWatcher already tails the index and the active file, so it fans
+# what it reads out to whoever registered here. Callbacks run on the
+# watcher thread — keep them cheap.
+
+_task_completion_listeners: list = []
+_task_active_listeners: list = []
+_task_listeners_lock = threading.Lock()
+
+
+def register_task_completion_listener(callback) -> None:
+    """Register `callback(task_type, vmid, status, upid, endtime)` to be
+    called for every task TaskWatcher sees finish (index line with a
+    status). `endtime` is epoch seconds, 0 when the line didn't carry one."""
+    with _task_listeners_lock:
+        if callback not in _task_completion_listeners:
+            _task_completion_listeners.append(callback)
+
+
+def register_task_active_listener(callback) -> None:
+    """Register `callback(upids)` to be called with the list of UPIDs
+    still running each time TaskWatcher re-reads the active file."""
+    with _task_listeners_lock:
+        if callback not in _task_active_listeners:
+            _task_active_listeners.append(callback)
+
+
+def _notify_task_listeners(listeners: list, *args) -> None:
+    with _task_listeners_lock:
+        listeners = list(listeners)
+    for callback in listeners:
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"[TaskWatcher] Task listener failed: {e}")
+
+
 # ─── Task Watcher (Real-time) ────────────────────────────────────
 
 class TaskWatcher:
@@ -2094,6 +2105,7 @@ class TaskWatcher:
         
         try:
             current_upids = set()
+            running_upids = []
             found_vzdump = False
             with open(self.TASK_ACTIVE, 'r') as f:
                 for line in f:
@@ -2105,6 +2117,9 @@ class TaskWatcher:
                         continue
                     upid = parts[0]
                     current_upids.add(upid)
+                    # Same "≤ 2 fields = still running" rule as below.
+                    if len(parts) <= 2:
+                        running_upids.append(upid)
 
                     if ':vzdump:' not in upid:
                         continue
@@ -2128,6 +2143,8 @@ class TaskWatcher:
             # Keep _vzdump_running_since fresh as long as vzdump is in active
             if found_vzdump:
                 self._vzdump_running_since = time.time()
+
+            _notify_task_listeners(_task_active_listeners, running_upids)
             
             # Cleanup stale UPIDs
             stale = self._seen_active_upids - current_upids
@@ -2166,6 +2183,14 @@ class TaskWatcher:
         task_type = upid_parts[5]
         vmid = upid_parts[6]
         user = upid_parts[7]
+
+        if status:
+            try:
+                endtime = int(parts[1], 16)
+            except (IndexError, ValueError):
+                endtime = 0
+            _notify_task_listeners(_task_completion_listeners,
+                                   task_type, vmid, status, upid, endtime)
         
         # Get VM/CT name
         vmname = self._get_vm_name(vmid) if vmid else ''
@@ -2310,23 +2335,10 @@ class TaskWatcher:
         ))
     
     def _get_vm_name(self, vmid: str) -> str:
-        """Try to resolve VMID to name via config files."""
+        """Try to resolve VMID to name via the parsed PVE configs."""
         if not vmid:
             return ''
-
-        # Try QEMU
-        conf_path = f'/etc/pve/qemu-server/{vmid}.conf'
-        name = self._read_name_from_conf(conf_path)
-        if name:
-            return name
-
-        # Try LXC
-        conf_path = f'/etc/pve/lxc/{vmid}.conf'
-        name = self._read_name_from_conf(conf_path)
-        if name:
-            return name
-
-        return ''
+        return guest_registry.name(vmid)
 
     @staticmethod
     def _is_autostart_vm(vmid: str, vm_type: str) -> bool:
@@ -2335,44 +2347,16 @@ class TaskWatcher:
         Used to decide whether a start during the boot grace period is part
         of the autostart sweep (aggregate into the summary) or a manual
         action by the user (deliver individually). When in doubt — the
-        config can't be read or the line is missing — assume autostart so
-        we err on the quiet side.
+        config can't be found — assume autostart so we err on the quiet
+        side.
         """
         if not vmid:
             return True
-        conf_path = (
-            f'/etc/pve/qemu-server/{vmid}.conf'
-            if vm_type == 'vm'
-            else f'/etc/pve/lxc/{vmid}.conf'
-        )
-        try:
-            if not os.path.exists(conf_path):
-                return True
-            with open(conf_path, 'r') as f:
-                for line in f:
-                    if line.startswith('onboot:'):
-                        val = line.split(':', 1)[1].strip()
-                        return val == '1'
-            # No `onboot` key => default is 0 (not autostart).
-            return False
-        except (IOError, PermissionError):
+        guest = guest_registry.get(vmid)
+        if guest is None:
             return True
-    
-    @staticmethod
-    def _read_name_from_conf(path: str) -> str:
-        """Read 'name:' or 'hostname:' from PVE config file."""
-        try:
-            if not os.path.exists(path):
-                return ''
-            with open(path, 'r') as f:
-                for line in f:
-                    if line.startswith('name:'):
-                        return line.split(':', 1)[1].strip()
-                    if line.startswith('hostname:'):
-                        return line.split(':', 1)[1].strip()
-        except (IOError, PermissionError):
-            pass
-        return ''
+        # No `onboot` key => default is 0 (not autostart).
+        return guest['onboot']
 
 
 # ─── Polling Collector ────────────────────────────────────────────
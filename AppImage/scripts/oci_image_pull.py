@@ -0,0 +1,571 @@
+"""Background OCI image pulls with progress and layer reuse.
+
+`oci_manager.pull_oci_image` asked PVE to download the image
+(``pvesh create .../download-url``) and blocked the deploy request for
+the whole transfer with no progress, and deploying the same image:tag
+again downloaded it again even when a template for it was sitting on
+another storage.
+
+Pulls now run as jobs (`start_pull`):
+
+  * the reference is resolved to the platform manifest digest first
+    (one small manifest request); if a template built from that digest
+    still exists on any storage it is reused as-is;
+  * otherwise the config and layer blobs are fetched straight from the
+    registry — a few at a time, verified against their digest — into a
+    blob cache shared by every pull (``_BLOB_DIR``), so images built on
+    the same base only download the shared layers once, and then
+    assembled into a ``docker-archive`` template, the same format the
+    skopeo fallback produces and PVE imports;
+  * progress (bytes and layers) is published on the job, a second
+    request for the same reference + storage attaches to the running
+    job instead of starting another, and up to ``_PULL_WORKERS`` jobs
+    run side by side;
+  * if the native pull fails (auth we don't speak, zstd layers, ...)
+    the caller's ``fallback`` — the PVE download-url / skopeo path —
+    runs instead, and its template is recorded under the digest too.
+
+``_REGISTRY_OVERRIDE`` sends every registry request to one base URL
+(``http://127.0.0.1:5000``) for tests against a local stand-in registry.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+_OCI_DIR = "/usr/local/share/proxmenux/oci"
+_BLOB_DIR = os.path.join(_OCI_DIR, "blobs")
+_TEMPLATES_INDEX = os.path.join(_OCI_DIR, "templates.json")
+_DEFAULT_TEMPLATE_DIR = "/var/lib/vz/template/cache"
+_PULL_WORKERS = 3          # jobs downloading at the same time
+_LAYER_WORKERS = 3         # blobs per job fetched at the same time
+_FETCH_TIMEOUT = 60
+_CHUNK = 256 * 1024
+_JOB_TTL = 3600            # finished jobs stay queryable this long
+_BLOB_MAX_AGE = 14 * 86400  # unused cached layers are dropped after this
+_REGISTRY_OVERRIDE: Optional[str] = None
+
+_REGISTRY_HOSTS = {"docker.io": "registry-1.docker.io"}
+_MANIFEST_ACCEPT = ", ".join((
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+))
+_ARCH = {"x86_64": "amd64", "aarch64": "arm64", "armv7l": "arm", "i686": "386"}
+
+_jobs: dict[str, "PullJob"] = {}
+_active: dict[tuple, "PullJob"] = {}
+_jobs_lock = threading.Lock()
+_pull_slots = threading.BoundedSemaphore(_PULL_WORKERS)
+_blob_locks: dict[str, threading.Lock] = {}
+_index_lock = threading.Lock()
+
+
+# ─── References ──────────────────────────────────────────────────────────────
+
+def normalize_image(image: str) -> str:
+    """Full registry path: ``tailscale/tailscale`` → ``docker.io/tailscale/tailscale``,
+    ``alpine`` → ``docker.io/library/alpine``."""
+    if not image.startswith(("docker.io/", "ghcr.io/", "quay.io/", "registry.")):
+        image = f"docker.io/{image}"
+    parts = image.split("/")
+    if parts[0] == "docker.io" and len(parts) == 2:
+        image = f"docker.io/library/{parts[1]}"
+    return image
+
+
+def template_filename(image: str, tag: str) -> str:
+    """docker.io/tailscale/tailscale:stable → tailscale-tailscale-stable.tar"""
+    name = normalize_image(image)
+    name = name.replace("docker.io/", "").replace("ghcr.io/", "").replace("library/", "").replace("/", "-")
+    return f"{name}-{tag}.tar"
+
+
+def _split(image: str) -> tuple[str, str]:
+    registry, _, repository = normalize_image(image).partition("/")
+    return registry, repository
+
+
+def _host_arch() -> str:
+    machine = os.uname().machine
+    return _ARCH.get(machine, machine)
+
+
+# ─── Registry client ─────────────────────────────────────────────────────────
+
+class _NoAuthOnRedirect(urllib.request.HTTPRedirectHandler):
+    """Blob downloads redirect to a CDN / object store that rejects (or
+    must not see) the registry bearer token."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new is not None and urllib.parse.urlsplit(newurl).netloc != urllib.parse.urlsplit(req.full_url).netloc:
+            new.remove_header("Authorization")
+        return new
+
+
+_opener = urllib.request.build_opener(_NoAuthOnRedirect)
+
+
+class _Registry:
+    def __init__(self, registry: str, repository: str):
+        self.base = (_REGISTRY_OVERRIDE or f"https://{_REGISTRY_HOSTS.get(registry, registry)}").rstrip("/")
+        self.repository = repository
+        self._token: Optional[str] = None
+
+    def _request(self, path: str, accept: Optional[str]):
+        headers = {"User-Agent": "ProxMenux-Monitor"}
+        if accept:
+            headers["Accept"] = accept
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+        req = urllib.request.Request(self.base + path, headers=headers)
+        return _opener.open(req, timeout=_FETCH_TIMEOUT)
+
+    def open(self, path: str, accept: Optional[str] = None):
+        try:
+            return self._request(path, accept)
+        except urllib.error.HTTPError as e:
+            if e.code != 401 or self._token:
+                raise
+            challenge = e.headers.get("WWW-Authenticate", "")
+        self._token = self._fetch_token(challenge)
+        return self._request(path, accept)
+
+    def _fetch_token(self, challenge: str) -> str:
+        scheme, _, params = challenge.partition(" ")
+        if scheme.lower() != "bearer":
+            raise RuntimeError(f"unsupported registry auth: {scheme or 'none'}")
+        fields = dict(re.findall(r'(\w+)="([^"]*)"', params))
+        realm = fields.pop("realm", "")
+        if not realm:
+            raise RuntimeError("registry auth challenge without realm")
+        query = {"scope": f"repository:{self.repository}:pull"}
+        if fields.get("service"):
+            query["service"] = fields["service"]
+        req = urllib.request.Request(f"{realm}?{urllib.parse.urlencode(query)}",
+                                     headers={"User-Agent": "ProxMenux-Monitor"})
+        with urllib.request.urlopen(req, timeout=_FETCH_TIMEOUT) as resp:
+            data = json.loads(resp.read())
+        token = data.get("token") or data.get("access_token")
+        if not token:
+            raise RuntimeError("registry returned no token")
+        return token
+
+    def manifest(self, reference: str) -> tuple[str, dict]:
+        """``(digest, manifest)`` for a tag or digest."""
+        with self.open(f"/v2/{self.repository}/manifests/{reference}", _MANIFEST_ACCEPT) as resp:
+            body = resp.read()
+        return "sha256:" + hashlib.sha256(body).hexdigest(), json.loads(body)
+
+
+def resolve(image: str, tag: str, arch: Optional[str] = None) -> tuple["_Registry", str, dict]:
+    """Resolve ``image:tag`` to the manifest for this host's platform:
+    ``(registry, manifest digest, manifest)``."""
+    registry, repository = _split(image)
+    reg = _Registry(registry, repository)
+    digest, manifest = reg.manifest(tag)
+    if "manifests" in manifest:  # image index / manifest list
+        arch = arch or _host_arch()
+        chosen = None
+        for entry in manifest["manifests"]:
+            platform = entry.get("platform") or {}
+            if platform.get("os") == "linux" and platform.get("architecture") == arch:
+                chosen = entry
+                break
+        if chosen is None:
+            raise RuntimeError(f"{image}:{tag} has no linux/{arch} image")
+        digest, manifest = reg.manifest(chosen["digest"])
+    if "layers" not in manifest or "config" not in manifest:
+        raise RuntimeError(f"unsupported manifest type {manifest.get('mediaType')}")
+    return reg, digest, manifest
+
+
+# ─── Blob cache ──────────────────────────────────────────────────────────────
+
+def _blob_path(digest: str) -> str:
+    algo, _, hexd = digest.partition(":")
+    if algo != "sha256" or not re.fullmatch(r"[0-9a-f]{64}", hexd):
+        raise ValueError(f"unsupported digest {digest}")
+    return os.path.join(_BLOB_DIR, "sha256", hexd)
+
+
+def _ensure_blob(reg: _Registry, desc: dict, progress: Callable[[int, bool], None]) -> str:
+    """Path of the verified blob for descriptor `desc`, downloading it
+    unless cached. Concurrent pulls of the same blob download it once."""
+    digest = desc["digest"]
+    path = _blob_path(digest)
+    with _jobs_lock:
+        lock = _blob_locks.setdefault(digest, threading.Lock())
+    with lock:
+        if os.path.exists(path):
+            os.utime(path)
+            progress(int(desc.get("size") or 0), True)
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.part"
+        h = hashlib.sha256()
+        try:
+            with reg.open(f"/v2/{reg.repository}/blobs/{digest}") as resp, open(tmp, "wb") as f:
+                while True:
+                    chunk = resp.read(_CHUNK)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    f.write(chunk)
+                    progress(len(chunk), False)
+            if "sha256:" + h.hexdigest() != digest:
+                raise RuntimeError(f"digest mismatch for {digest}")
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+    return path
+
+
+def _prune_blobs(max_age: float = _BLOB_MAX_AGE) -> None:
+    """Drop cached blobs no pull has used for `max_age` seconds."""
+    root = os.path.join(_BLOB_DIR, "sha256")
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        path = os.path.join(root, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.unlink(path)
+        except OSError:
+            continue
+
+
+# ─── Templates ───────────────────────────────────────────────────────────────
+
+def _template_dir(storage: str) -> str:
+    try:
+        proc = subprocess.run(["pvesm", "path", f"{storage}:vztmpl/test"],
+                              capture_output=True, text=True, timeout=15)
+        if proc.returncode == 0 and proc.stdout.strip():
+            return os.path.dirname(proc.stdout.strip())
+    except Exception:
+        pass
+    return _DEFAULT_TEMPLATE_DIR
+
+
+def _load_index() -> dict:
+    try:
+        with open(_TEMPLATES_INDEX, "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def find_template(digest: str) -> Optional[str]:
+    """Volid of an existing template built from manifest `digest`."""
+    with _index_lock:
+        entries = _load_index().get(digest) or []
+    for entry in entries:
+        if entry.get("path") and os.path.exists(entry["path"]):
+            return entry.get("volid")
+    return None
+
+
+def record_template(digest: str, volid: str, path: str) -> None:
+    with _index_lock:
+        index = _load_index()
+        entries = [e for e in index.get(digest) or []
+                   if e.get("volid") != volid and e.get("path") and os.path.exists(e["path"])]
+        entries.append({"volid": volid, "path": path, "recorded_at": int(time.time())})
+        index[digest] = entries
+        os.makedirs(os.path.dirname(_TEMPLATES_INDEX), exist_ok=True)
+        tmp = _TEMPLATES_INDEX + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, _TEMPLATES_INDEX)
+
+
+def _write_docker_archive(dest: str, repo_tag: str, config_path: str,
+                          config_digest: str, layers: list[tuple[str, str]]) -> None:
+    """Assemble a docker-archive tarball at `dest` from cached blobs.
+    `layers` is ``[(blob path, media type)]``; layers go in uncompressed."""
+    tmp = dest + ".part"
+    with open(config_path, "rb") as f:
+        config_bytes = f.read()
+    diff_ids = (json.loads(config_bytes).get("rootfs") or {}).get("diff_ids") or []
+    config_name = config_digest.partition(":")[2] + ".json"
+    layer_names = []
+    try:
+        with tarfile.open(tmp, "w", format=tarfile.PAX_FORMAT) as tar:
+            info = tarfile.TarInfo(config_name)
+            info.size = len(config_bytes)
+            tar.addfile(info, io.BytesIO(config_bytes))
+            for i, (path, media_type) in enumerate(layers):
+                if "zstd" in media_type:
+                    raise RuntimeError("zstd-compressed layers are not supported")
+                if i < len(diff_ids):
+                    name = diff_ids[i].partition(":")[2] + ".tar"
+                else:
+                    name = os.path.basename(path) + ".tar"
+                if "gzip" in media_type:  # +gzip (OCI) / .tar.gzip (Docker)
+                    # tarfile needs the size up front: inflate to a scratch
+                    # file next to the template first.
+                    scratch = f"{dest}.layer{i}"
+                    try:
+                        with gzip.open(path, "rb") as src, open(scratch, "wb") as out:
+                            shutil.copyfileobj(src, out, _CHUNK)
+                        tar.add(scratch, arcname=name)
+                    finally:
+                        try:
+                            os.unlink(scratch)
+                        except OSError:
+                            pass
+                else:
+                    tar.add(path, arcname=name)
+                layer_names.append(name)
+            manifest = json.dumps([{"Config": config_name, "RepoTags": [repo_tag],
+                                    "Layers": layer_names}]).encode()
+            info = tarfile.TarInfo("manifest.json")
+            info.size = len(manifest)
+            tar.addfile(info, io.BytesIO(manifest))
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ─── Jobs ────────────────────────────────────────────────────────────────────
+
+class PullJob:
+    """One pull of ``image:tag`` into a template on ``storage``.
+
+    Poll `snapshot()`, block on `wait()`, or follow `watch()`. The
+    outcome is `result()`: ``{success, message, template, digest, reused}``.
+    """
+
+    def __init__(self, image: str, tag: str, storage: str, fallback=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.image = normalize_image(image)
+        self.tag = tag
+        self.storage = storage
+        self._fallback = fallback
+        self._cond = threading.Condition()
+        self._version = 0
+        self._state = {
+            "state": "queued", "message": "", "template": None, "digest": None,
+            "reused": False, "bytes_done": 0, "bytes_total": 0,
+            "layers_done": 0, "layers_total": 0, "layers_cached": 0,
+            "started_at": time.time(), "finished_at": None,
+        }
+
+    @property
+    def ref(self) -> str:
+        return f"{self.image}:{self.tag}"
+
+    @property
+    def finished(self) -> bool:
+        return self._state["state"] in ("done", "error")
+
+    def _update(self, **changes) -> None:
+        with self._cond:
+            self._state.update(changes)
+            self._version += 1
+            self._cond.notify_all()
+
+    def _add_bytes(self, n: int) -> None:
+        with self._cond:
+            self._state["bytes_done"] += n
+            self._version += 1
+            self._cond.notify_all()
+
+    def _layer_done(self, cached: bool) -> None:
+        with self._cond:
+            self._state["layers_done"] += 1
+            if cached:
+                self._state["layers_cached"] += 1
+            self._version += 1
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return dict(self._state, id=self.id, image=self.image, tag=self.tag, storage=self.storage)
+
+    def result(self) -> dict:
+        s = self.snapshot()
+        return {"success": s["state"] == "done", "message": s["message"],
+                "template": s["template"], "digest": s["digest"], "reused": s["reused"],
+                "job_id": self.id}
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self.finished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def watch(self, keepalive: Optional[float] = None):
+        """Yield a snapshot on every change until the job finishes; with
+        `keepalive` yields None after that many idle seconds."""
+        seen = -1
+        while True:
+            with self._cond:
+                if self._version == seen and not self.finished:
+                    self._cond.wait(keepalive)
+                changed = self._version != seen
+                seen = self._version
+                finished = self.finished
+            if changed:
+                yield self.snapshot()
+            elif not finished:
+                yield None
+            if finished:
+                return
+
+    # ── worker ──────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        try:
+            with _pull_slots:
+                self._pull()
+        except Exception as e:
+            self._update(state="error", message=str(e) or e.__class__.__name__,
+                         finished_at=time.time())
+        finally:
+            with _jobs_lock:
+                if _active.get((self.ref, self.storage)) is self:
+                    del _active[(self.ref, self.storage)]
+            _prune_blobs()
+
+    def _pull(self) -> None:
+        filename = template_filename(self.image, self.tag)
+        self._update(state="resolving")
+        try:
+            reg, digest, manifest = resolve(self.image, self.tag)
+        except Exception as e:
+            self._run_fallback(None, filename, f"resolve failed: {e}")
+            return
+        self._update(digest=digest)
+
+        existing = find_template(digest)
+        if existing:
+            self._update(state="done", template=existing, reused=True,
+                         message="Existing template reused", finished_at=time.time())
+            return
+
+        layers = manifest["layers"]
+        blobs = [manifest["config"]] + layers
+        self._update(state="downloading", layers_total=len(layers),
+                     bytes_total=sum(int(b.get("size") or 0) for b in blobs))
+        try:
+            with ThreadPoolExecutor(max_workers=_LAYER_WORKERS,
+                                    thread_name_prefix=f"oci-pull-{self.id}") as pool:
+                def fetch(desc, is_layer):
+                    cached = []
+
+                    def progress(n, from_cache):
+                        cached.append(from_cache)
+                        self._add_bytes(n)
+                    path = _ensure_blob(reg, desc, progress)
+                    if is_layer:
+                        self._layer_done(bool(cached) and all(cached))
+                    return path
+                config_f = pool.submit(fetch, manifest["config"], False)
+                layer_fs = [pool.submit(fetch, d, True) for d in layers]
+                config_path = config_f.result()
+                layer_paths = [f.result() for f in layer_fs]
+
+            self._update(state="assembling")
+            template_dir = _template_dir(self.storage)
+            os.makedirs(template_dir, exist_ok=True)
+            dest = os.path.join(template_dir, filename)
+            _write_docker_archive(
+                dest, f"{self.image.partition('/')[2]}:{self.tag}", config_path,
+                manifest["config"]["digest"],
+                [(p, d.get("mediaType", "")) for p, d in zip(layer_paths, layers)])
+        except Exception as e:
+            self._run_fallback(digest, filename, f"native pull failed: {e}")
+            return
+
+        volid = f"{self.storage}:vztmpl/{filename}"
+        record_template(digest, volid, dest)
+        self._update(state="done", template=volid, message="Image pulled successfully",
+                     finished_at=time.time())
+
+    def _run_fallback(self, digest: Optional[str], filename: str, reason: str) -> None:
+        if self._fallback is None:
+            raise RuntimeError(reason)
+        self._update(state="downloading", message=f"{reason}; using PVE download")
+        res = self._fallback(self.ref, filename, self.storage) or {}
+        if not res.get("success"):
+            raise RuntimeError(res.get("message") or reason)
+        if digest:
+            try:
+                record_template(digest, res["template"],
+                                os.path.join(_template_dir(self.storage), filename))
+            except OSError:
+                pass
+        self._update(state="done", template=res["template"],
+                     message=res.get("message") or "Image pulled successfully",
+                     finished_at=time.time())
+
+
+def start_pull(image: str, tag: str = "latest", storage: str = "local",
+               fallback: Optional[Callable[[str, str, str], dict]] = None) -> PullJob:
+    """Start (or join) a background pull of ``image:tag`` to `storage`.
+
+    `fallback(full_ref, filename, storage)` is called when the native
+    pull fails and must return ``{success, message, template}``.
+    """
+    job = PullJob(image, tag, storage, fallback)
+    key = (job.ref, storage)
+    now = time.time()
+    with _jobs_lock:
+        for job_id, old in list(_jobs.items()):
+            finished_at = old._state["finished_at"]
+            if finished_at and now - finished_at > _JOB_TTL:
+                del _jobs[job_id]
+        running = _active.get(key)
+        if running is not None:
+            return running
+        _active[key] = job
+        _jobs[job.id] = job
+    threading.Thread(target=job._run, daemon=True, name=f"oci-pull:{job.id}").start()
+    return job
+
+
+def get_job(job_id: str) -> Optional[PullJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> list[dict]:
+    with _jobs_lock:
+        jobs = list(_jobs.values())
+    return [j.snapshot() for j in sorted(jobs, key=lambda j: j._state["started_at"])]
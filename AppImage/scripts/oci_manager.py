@@ -12,6 +12,7 @@ Usage:
 """
 
 import base64
+import copy
 import json
 import logging
 import os
@@ -19,11 +20,15 @@ import re
 import secrets
 import shutil
 import subprocess
+import tempfile
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import oci_image_pull
+
 # Note: We use a simple XOR-based encryption for local token storage
 # This avoids the cryptography dependency which has Python version compatibility issues
 # (PyO3 modules compiled for specific Python versions cause ImportError on different versions)
@@ -257,8 +262,7 @@ def _get_next_vmid() -> int:
 
 def _get_vmid_for_app(app_id: str) -> Optional[int]:
     """Get the VMID for an installed app."""
-    installed = _load_installed()
-    instance = installed.get("instances", {}).get(app_id)
+    instance = _installed_snapshot().get("instances", {}).get(app_id)
     return instance.get("vmid") if instance else None
 
 
@@ -524,15 +528,21 @@ def _configure_tailscale(vmid: int, config: Dict[str, Any]) -> bool:
 # =================================================================
 # OCI Image Management
 # =================================================================
-def pull_oci_image(image: str, tag: str = "latest", storage: str = DEFAULT_STORAGE) -> Dict[str, Any]:
+def pull_oci_image(image: str, tag: str = "latest", storage: str = DEFAULT_STORAGE,
+                   wait: bool = True) -> Dict[str, Any]:
     """
     Pull an OCI image from a registry and store as LXC template.
-    Uses Proxmox's pvesh API to download OCI images (same as GUI).
+    
+    The pull runs as a background job in `oci_image_pull` (progress,
+    dedup of concurrent pulls, template reuse by digest, shared layer
+    cache); Proxmox's download-url API and skopeo are its fallback.
     
     Args:
         image: Image name (e.g., "docker.io/tailscale/tailscale")
         tag: Image tag (e.g., "stable")
         storage: Proxmox storage to save template
+        wait: Block until the pull finishes. With False the result
+            carries the ``job_id`` to follow (see `wait_for_pull`).
     
     Returns:
         Dict with success status and template path
@@ -549,25 +559,40 @@ def pull_oci_image(image: str, tag: str = "latest", storage: str = DEFAULT_STORA
         result["message"] = pve_info.get("error", "OCI not supported")
         return result
     
-    # Normalize image name - ensure full registry path
-    if not image.startswith(("docker.io/", "ghcr.io/", "quay.io/", "registry.")):
-        image = f"docker.io/{image}"
-    
-    # For docker.io, library images need explicit library/ prefix
-    parts = image.split("/")
-    if parts[0] == "docker.io" and len(parts) == 2:
-        image = f"docker.io/library/{parts[1]}"
-    
-    full_ref = f"{image}:{tag}"
-    
+    full_ref = f"{oci_image_pull.normalize_image(image)}:{tag}"
     logger.info(f"Pulling OCI image: {full_ref}")
     print(f"[*] Pulling OCI image: {full_ref}")
     
-    # Create a safe filename from the image reference
-    # e.g., docker.io/tailscale/tailscale:stable -> tailscale-tailscale-stable.tar
-    # Note: Use .tar extension (not .tar.zst) - skopeo creates uncompressed tar
-    filename = image.replace("docker.io/", "").replace("ghcr.io/", "").replace("library/", "").replace("/", "-")
-    filename = f"{filename}-{tag}.tar"
+    job = oci_image_pull.start_pull(image, tag, storage, fallback=_pull_via_pve)
+    result["job_id"] = job.id
+    if not wait:
+        result["success"] = True
+        result["message"] = "Pull started"
+        return result
+    return wait_for_pull(result)
+
+
+def wait_for_pull(started: Dict[str, Any]) -> Dict[str, Any]:
+    """Block on a pull started with ``pull_oci_image(..., wait=False)``."""
+    job = oci_image_pull.get_job(started.get("job_id") or "")
+    if job is None:
+        return started
+    job.wait()
+    result = job.result()
+    if result["success"]:
+        print(f"[OK] Image ready: {result['template']}"
+              + (" (existing template reused)" if result["reused"] else ""))
+    return result
+
+
+def _pull_via_pve(full_ref: str, filename: str, storage: str) -> Dict[str, Any]:
+    """Download ``full_ref`` as template `filename` through PVE's
+    download-url API, or skopeo if that fails."""
+    result = {
+        "success": False,
+        "message": "",
+        "template": None
+    }
     
     # Get hostname for API
     hostname = os.uname().nodename
@@ -633,33 +658,39 @@ def pull_oci_image(image: str, tag: str = "latest", storage: str = DEFAULT_STORA
 # =================================================================
 # Catalog Management
 # =================================================================
-def load_catalog() -> Dict[str, Any]:
-    """Load the OCI app catalog."""
-    ensure_oci_directories()
-    
-    for path in [CATALOG_FILE, SCRIPTS_CATALOG, DEV_SCRIPTS_CATALOG]:
-        if os.path.exists(path):
-            try:
-                with open(path, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load catalog from {path}: {e}")
-    
-    return {"version": "1.0.0", "apps": {}}
+# catalog.json and installed.json are read by almost every OCI call (the
+# apps page alone did one catalog read per request plus one installed.json
+# read per app). Both are kept parsed in memory and revalidated with a
+# stat() — (mtime_ns, size, inode) — so an edit on disk, a ProxMenux
+# update replacing the catalog, or a write from another process is still
+# picked up on the next call. Writes go through `_save_installed`, which
+# replaces the file atomically and refreshes the cache in the same step;
+# a read-modify-write of the registry holds `_installed_write_lock` from
+# `_load_installed` to `_save_installed` so concurrent deploys and
+# removals don't drop each other's entries.
+#
+# The cached objects are shared: internal lookups read them directly,
+# anything handed to a caller that may modify it is a deep copy.
 
+_files_lock = threading.Lock()
+_installed_write_lock = threading.Lock()
+_catalog_cache: Dict[str, Any] = {"sig": None, "data": None, "index": None}
+_installed_cache: Dict[str, Any] = {"sig": None, "data": None}
 
-def get_app_definition(app_id: str) -> Optional[Dict[str, Any]]:
-    """Get the definition for a specific app."""
-    catalog = load_catalog()
-    return catalog.get("apps", {}).get(app_id)
 
+def _file_sig(path: str) -> Optional[Tuple[str, int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size, st.st_ino)
 
-def list_available_apps() -> List[Dict[str, Any]]:
-    """List all available apps from the catalog."""
-    catalog = load_catalog()
-    apps = []
+
+def _build_catalog_index(catalog: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-app summary rows for the apps page, plus a lowercase search blob."""
+    index = []
     for app_id, app_def in catalog.get("apps", {}).items():
-        apps.append({
+        row = {
             "id": app_id,
             "name": app_def.get("name", app_id),
             "short_name": app_def.get("short_name", app_def.get("name", app_id)),
@@ -668,49 +699,140 @@ def list_available_apps() -> List[Dict[str, Any]]:
             "icon": app_def.get("icon", "box"),
             "color": app_def.get("color", "#6366F1"),
             "summary": app_def.get("summary", ""),
-            "installed": is_installed(app_id)
-        })
+        }
+        search = " ".join(str(row[k]) for k in ("id", "name", "short_name", "category",
+                                                 "subcategory", "summary"))
+        search += " " + str(app_def.get("subtitle", ""))
+        index.append({"row": row, "search": search.lower()})
+    return index
+
+
+def _catalog() -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Cached ``(catalog, index)``. Shared objects — don't modify."""
+    if _file_sig(CATALOG_FILE) is None:
+        ensure_oci_directories()
+
+    for path in [CATALOG_FILE, SCRIPTS_CATALOG, DEV_SCRIPTS_CATALOG]:
+        sig = _file_sig(path)
+        if sig is None:
+            continue
+        with _files_lock:
+            if _catalog_cache["sig"] == sig:
+                return _catalog_cache["data"], _catalog_cache["index"]
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load catalog from {path}: {e}")
+            continue
+        index = _build_catalog_index(data)
+        with _files_lock:
+            _catalog_cache.update(sig=sig, data=data, index=index)
+        return data, index
+
+    return {"version": "1.0.0", "apps": {}}, []
+
+
+def load_catalog() -> Dict[str, Any]:
+    """Load the OCI app catalog."""
+    return copy.deepcopy(_catalog()[0])
+
+
+def get_app_definition(app_id: str) -> Optional[Dict[str, Any]]:
+    """Get the definition for a specific app."""
+    app_def = _catalog()[0].get("apps", {}).get(app_id)
+    return copy.deepcopy(app_def) if app_def is not None else None
+
+
+def list_available_apps(category: Optional[str] = None,
+                        query: Optional[str] = None) -> List[Dict[str, Any]]:
+    """List all available apps from the catalog.
+
+    ``category`` keeps apps of that category, ``query`` does a
+    case-insensitive substring match on id, names, category and summary.
+    """
+    _, index = _catalog()
+    instances = _installed_snapshot().get("instances", {})
+    needle = (query or "").strip().lower()
+    apps = []
+    for entry in index:
+        row = entry["row"]
+        if category and row["category"] != category:
+            continue
+        if needle and needle not in entry["search"]:
+            continue
+        apps.append(dict(row, installed=row["id"] in instances))
     return apps
 
 
 # =================================================================
 # Installed Apps Management
 # =================================================================
-def _load_installed() -> Dict[str, Any]:
-    """Load the installed apps registry."""
-    ensure_oci_directories()
-    if not os.path.exists(INSTALLED_FILE):
-        return {"version": "1.0.0", "instances": {}}
+def _installed_snapshot() -> Dict[str, Any]:
+    """Cached installed registry. Shared object — don't modify; use
+    `_load_installed` for read-modify-write."""
+    sig = _file_sig(INSTALLED_FILE)
+    if sig is None:
+        ensure_oci_directories()
+        sig = _file_sig(INSTALLED_FILE)
+        if sig is None:
+            return {"version": "1.0.0", "instances": {}}
+    with _files_lock:
+        if _installed_cache["sig"] == sig:
+            return _installed_cache["data"]
     try:
         with open(INSTALLED_FILE, 'r') as f:
-            return json.load(f)
+            data = json.load(f)
     except Exception:
         return {"version": "1.0.0", "instances": {}}
+    with _files_lock:
+        _installed_cache.update(sig=sig, data=data)
+    return data
+
+
+def _load_installed() -> Dict[str, Any]:
+    """Load the installed apps registry."""
+    return copy.deepcopy(_installed_snapshot())
 
 
 def _save_installed(data: Dict[str, Any]) -> bool:
-    """Save the installed apps registry."""
+    """Save the installed apps registry (atomically, unique tmp + fsync +
+    rename). Callers doing read-modify-write hold `_installed_write_lock`."""
+    tmp = None
     try:
-        with open(INSTALLED_FILE, 'w') as f:
+        fd, tmp = tempfile.mkstemp(prefix=".installed.", suffix=".tmp",
+                                   dir=os.path.dirname(INSTALLED_FILE))
+        with os.fdopen(fd, 'w') as f:
             json.dump(data, f, indent=2)
-        return True
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, INSTALLED_FILE)
     except Exception as e:
         logger.error(f"Failed to save installed: {e}")
+        if tmp:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
         return False
+    with _files_lock:
+        _installed_cache.update(sig=_file_sig(INSTALLED_FILE), data=copy.deepcopy(data))
+    return True
 
 
 def is_installed(app_id: str) -> bool:
     """Check if an app is installed."""
-    installed = _load_installed()
-    return app_id in installed.get("instances", {})
+    return app_id in _installed_snapshot().get("instances", {})
 
 
 def list_installed_apps() -> List[Dict[str, Any]]:
     """List all installed apps with their status."""
-    installed = _load_installed()
+    installed = _installed_snapshot()
+    statuses = get_apps_status()
     apps = []
     for app_id, instance in installed.get("instances", {}).items():
-        status = get_app_status(app_id)
+        status = statuses[app_id]
         apps.append({
             "id": app_id,
             "instance_name": instance.get("instance_name", app_id),
@@ -724,10 +846,10 @@ def list_installed_apps() -> List[Dict[str, Any]]:
 
 def get_installed_app(app_id: str) -> Optional[Dict[str, Any]]:
     """Get details of an installed app."""
-    installed = _load_installed()
-    instance = installed.get("instances", {}).get(app_id)
+    instance = _installed_snapshot().get("instances", {}).get(app_id)
     if not instance:
         return None
+    instance = copy.deepcopy(instance)
     instance["status"] = get_app_status(app_id)
     return instance
 
@@ -735,25 +857,47 @@ def get_installed_app(app_id: str) -> Optional[Dict[str, Any]]:
 # =================================================================
 # Container Status
 # =================================================================
-def get_app_status(app_id: str) -> Dict[str, Any]:
-    """Get the current status of an app's LXC container."""
-    result = {
-        "state": "not_installed",
-        "health": "unknown",
-        "uptime_seconds": 0,
-        "last_check": datetime.now().isoformat()
-    }
-    
-    if not is_installed(app_id):
-        return result
-    
-    vmid = _get_vmid_for_app(app_id)
-    if not vmid:
-        result["state"] = "error"
-        result["health"] = "unknown"
-        return result
-    
-    # Get LXC status using pct
+# State for every OCI app comes from one `pvesh get /cluster/resources
+# --type vm` read (status + uptime for all guests) instead of a
+# `pct status` + `pct exec cat /proc/uptime` pair per app. The read is
+# shared for a few seconds so a page listing every app, the update
+# fan-out below and the notification poll landing together cost one
+# pvesh call. When pvesh is unavailable we fall back to `pct status`.
+
+_CT_STATES_TTL = 5
+_ct_states_lock = threading.Lock()
+_ct_states_cache: Dict[str, Any] = {"ts": 0.0, "states": None}
+
+
+def _ct_states() -> Optional[Dict[int, Dict[str, Any]]]:
+    """``{vmid: resource}`` for every LXC in the cluster, or None when
+    pvesh couldn't be read."""
+    with _ct_states_lock:
+        if (_ct_states_cache["states"] is not None
+                and time.time() - _ct_states_cache["ts"] < _CT_STATES_TTL):
+            return _ct_states_cache["states"]
+        rc, out, _ = _run_pve_cmd(
+            ["pvesh", "get", "/cluster/resources", "--type", "vm", "--output-format", "json"],
+            timeout=15,
+        )
+        if rc != 0:
+            return None
+        try:
+            resources = json.loads(out)
+        except ValueError:
+            return None
+        states = {}
+        for r in resources:
+            if r.get("type") == "lxc" and r.get("vmid") is not None:
+                try:
+                    states[int(r["vmid"])] = r
+                except (TypeError, ValueError):
+                    continue
+        _ct_states_cache.update(ts=time.time(), states=states)
+        return states
+
+
+def _status_from_pct(vmid: int, result: Dict[str, Any]) -> Dict[str, Any]:
     rc, out, _ = _run_pve_cmd(["pct", "status", str(vmid)])
     
     if rc != 0:
@@ -783,9 +927,65 @@ def get_app_status(app_id: str) -> Dict[str, Any]:
     return result
 
 
+def get_apps_status(app_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Status of several apps (default: every installed app) from a
+    single cluster-resources read."""
+    instances = _installed_snapshot().get("instances", {})
+    if app_ids is None:
+        app_ids = list(instances)
+    states = _ct_states()
+    now_iso = datetime.now().isoformat()
+    out: Dict[str, Dict[str, Any]] = {}
+    
+    for app_id in app_ids:
+        result = {
+            "state": "not_installed",
+            "health": "unknown",
+            "uptime_seconds": 0,
+            "last_check": now_iso
+        }
+        out[app_id] = result
+        
+        instance = instances.get(app_id)
+        if not instance:
+            continue
+        vmid = instance.get("vmid")
+        if not vmid:
+            result["state"] = "error"
+            continue
+        
+        if states is None:
+            _status_from_pct(vmid, result)
+            continue
+        res = states.get(int(vmid))
+        if res is None:
+            # Not in the cluster view: the CT is gone.
+            result["state"] = "error"
+            result["health"] = "unhealthy"
+        elif res.get("status") == "running":
+            result["state"] = "running"
+            result["health"] = "healthy"
+            result["uptime_seconds"] = int(res.get("uptime") or 0)
+        elif res.get("status") == "stopped":
+            result["state"] = "stopped"
+            result["health"] = "stopped"
+        else:
+            result["state"] = "unknown"
+    
+    return out
+
+
+def get_app_status(app_id: str) -> Dict[str, Any]:
+    """Get the current status of an app's LXC container."""
+    return get_apps_status([app_id])[app_id]
+
+
 # =================================================================
 # Deployment
 # =================================================================
+_create_lock = threading.Lock()
+
+
 def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -> Dict[str, Any]:
     """
     Deploy an OCI app as a Proxmox LXC container.
@@ -822,6 +1022,17 @@ def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -
     container_def = app_def.get("container", {})
     container_type = container_def.get("type", "oci")
     
+    # Start the image download right away so it overlaps the rest of
+    # the prep (and other deploys); it's awaited before `pct create`.
+    pull_started = None
+    if container_type != "lxc" and container_def.get("image"):
+        image = container_def["image"]
+        if ":" in image:
+            image_name, tag = image.rsplit(":", 1)
+        else:
+            image_name, tag = image, "latest"
+        pull_started = pull_oci_image(image_name, tag, wait=False)
+    
     # Get storage for rootfs - from config or auto-detect
     rootfs_storage = config.get("storage")
     if not rootfs_storage:
@@ -835,15 +1046,8 @@ def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -
             rootfs_storage = DEFAULT_ROOTFS_STORAGE
             logger.warning(f"No storage detected, using default: {rootfs_storage}")
     
-    # Get next available VMID
-    vmid = _get_next_vmid()
-    result["vmid"] = vmid
-    
     hostname = config.get("hostname", f"proxmenux-{app_id}")
     
-    logger.info(f"Deploying {app_id} as LXC {vmid}")
-    print(f"[*] Deploying {app_id} as LXC container (VMID: {vmid})")
-    
     # Determine deployment method: LXC traditional or OCI image
     if container_type == "lxc":
         # Use traditional LXC with Alpine template + package installation
@@ -857,18 +1061,12 @@ def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -
         use_oci = False
     else:
         # OCI image deployment (may have issues with multi-layer images)
-        image = container_def.get("image", "")
-        if not image:
+        if pull_started is None:
             result["message"] = "No container image specified in app definition"
             return result
         
-        if ":" in image:
-            image_name, tag = image.rsplit(":", 1)
-        else:
-            image_name, tag = image, "latest"
-        
-        print(f"[*] Pulling OCI image: {image}")
-        pull_result = pull_oci_image(image_name, tag)
+        print(f"[*] Waiting for OCI image: {container_def['image']}")
+        pull_result = wait_for_pull(pull_started)
         
         if not pull_result["success"]:
             result["message"] = pull_result["message"]
@@ -877,33 +1075,41 @@ def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -
         template = pull_result["template"]
         use_oci = True
     
-    # Step 2: Create LXC container
-    print(f"[*] Creating LXC container...")
-    
-    pct_cmd = [
-        "pct", "create", str(vmid), template,
-        "--hostname", hostname,
-        "--memory", str(container_def.get("memory", 512)),
-        "--cores", str(container_def.get("cores", 1)),
-        "--rootfs", f"{rootfs_storage}:{container_def.get('disk_size', 4)}",
-        "--unprivileged", "0" if container_def.get("privileged") else "1",
-        "--onboot", "1"
-    ]
+    # Step 2: Create LXC container. The VMID is picked and claimed under
+    # one lock so deploys running side by side don't pick the same one.
+    with _create_lock:
+        vmid = _get_next_vmid()
+        result["vmid"] = vmid
+        
+        logger.info(f"Deploying {app_id} as LXC {vmid}")
+        print(f"[*] Deploying {app_id} as LXC container (VMID: {vmid})")
+        
+        print(f"[*] Creating LXC container...")
     
-    # Add ostype for OCI containers
-    if use_oci:
-        pct_cmd.extend(["--ostype", "unmanaged"])
+        pct_cmd = [
+            "pct", "create", str(vmid), template,
+            "--hostname", hostname,
+            "--memory", str(container_def.get("memory", 512)),
+            "--cores", str(container_def.get("cores", 1)),
+            "--rootfs", f"{rootfs_storage}:{container_def.get('disk_size', 4)}",
+            "--unprivileged", "0" if container_def.get("privileged") else "1",
+            "--onboot", "1"
+        ]
     
-    # Add features (nesting, etc.)
-    features = container_def.get("features", [])
-    if features:
-        pct_cmd.extend(["--features", ",".join(features)])
+        # Add ostype for OCI containers
+        if use_oci:
+            pct_cmd.extend(["--ostype", "unmanaged"])
     
-    # Network configuration - use simple bridge with DHCP
-    pct_cmd.extend(["--net0", "name=eth0,bridge=vmbr0,ip=dhcp"])
+        # Add features (nesting, etc.)
+        features = container_def.get("features", [])
+        if features:
+            pct_cmd.extend(["--features", ",".join(features)])
     
-    # Run pct create
-    rc, out, err = _run_pve_cmd(pct_cmd, timeout=120)
+        # Network configuration - use simple bridge with DHCP
+        pct_cmd.extend(["--net0", "name=eth0,bridge=vmbr0,ip=dhcp"])
+    
+        # Run pct create
+        rc, out, err = _run_pve_cmd(pct_cmd, timeout=120)
     
     if rc != 0:
         result["message"] = f"Failed to create container: {err}"
@@ -999,17 +1205,18 @@ def deploy_app(app_id: str, config: Dict[str, Any], installed_by: str = "web") -
     os.chmod(config_file, 0o600)
     
     # Update installed registry
-    installed = _load_installed()
-    installed["instances"][app_id] = {
-        "app_id": app_id,
-        "vmid": vmid,
-        "instance_name": hostname,
-        "installed_at": datetime.now().isoformat(),
-        "installed_by": installed_by,
-        "template": template,
-        "container_type": container_type
-    }
-    _save_installed(installed)
+    with _installed_write_lock:
+        installed = _load_installed()
+        installed["instances"][app_id] = {
+            "app_id": app_id,
+            "vmid": vmid,
+            "instance_name": hostname,
+            "installed_at": datetime.now().isoformat(),
+            "installed_by": installed_by,
+            "template": template,
+            "container_type": container_type
+        }
+        _save_installed(installed)
     
     result["success"] = True
     result["message"] = f"App deployed successfully as LXC {vmid}"
@@ -1222,10 +1429,11 @@ def remove_app(app_id: str, remove_data: bool = True) -> Dict[str, Any]:
         return result
     
     # Remove from installed registry
-    installed = _load_installed()
-    if app_id in installed.get("instances", {}):
-        del installed["instances"][app_id]
-        _save_installed(installed)
+    with _installed_write_lock:
+        installed = _load_installed()
+        if app_id in installed.get("instances", {}):
+            del installed["instances"][app_id]
+            _save_installed(installed)
     
     # Remove instance data
     if remove_data:
@@ -1381,8 +1589,68 @@ def detect_networks() -> List[Dict[str, str]]:
 #     tailscale package itself moved, we restart the service so the
 #     new daemon picks up.
 
+#
+# The cache is persisted to `update_cache.json` so an AppImage / monitor
+# restart serves the last results instead of re-probing every app, and
+# `check_apps_updates` runs the probes for several apps side by side
+# (bounded, one probe per app at a time).
+
 _APP_UPDATE_CACHE_TTL = 86400  # 24h — Tailscale ships maybe twice a month
+_UPDATE_CACHE_FILE = os.path.join(OCI_BASE_DIR, "update_cache.json")
+_UPDATE_CHECK_WORKERS = 3
 _app_update_cache: Dict[str, Dict[str, Any]] = {}
+_update_cache_lock = threading.Lock()
+_update_cache_loaded = False
+_app_check_locks: Dict[str, threading.Lock] = {}
+
+
+def _load_update_cache_locked() -> None:
+    """Merge the on-disk entries once (caller holds `_update_cache_lock`)
+    so a later `_persist_update_cache` doesn't drop them."""
+    global _update_cache_loaded
+    if _update_cache_loaded:
+        return
+    _update_cache_loaded = True
+    try:
+        with open(_UPDATE_CACHE_FILE, 'r') as f:
+            stored = json.load(f)
+        now = time.time()
+        for key, entry in (stored.get("apps") or {}).items():
+            if now - entry.get("_cached_at", 0) < _APP_UPDATE_CACHE_TTL:
+                _app_update_cache.setdefault(key, entry)
+    except (OSError, ValueError, AttributeError):
+        pass
+
+
+def _update_cache_get(app_id: str) -> Optional[Dict[str, Any]]:
+    with _update_cache_lock:
+        _load_update_cache_locked()
+        return _app_update_cache.get(app_id)
+
+
+def _persist_update_cache() -> None:
+    """Write the cache out (caller holds `_update_cache_lock`)."""
+    tmp = _UPDATE_CACHE_FILE + ".tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump({"version": 1, "apps": _app_update_cache}, f, indent=2)
+        os.replace(tmp, _UPDATE_CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"Failed to persist update cache: {e}")
+
+
+def _update_cache_put(app_id: str, result: Dict[str, Any]) -> None:
+    with _update_cache_lock:
+        _load_update_cache_locked()
+        _app_update_cache[app_id] = result
+        _persist_update_cache()
+
+
+def _update_cache_drop(app_id: str) -> None:
+    with _update_cache_lock:
+        _load_update_cache_locked()
+        if _app_update_cache.pop(app_id, None) is not None:
+            _persist_update_cache()
 
 
 def _check_running(app_id: str) -> Tuple[bool, Optional[int], str]:
@@ -1410,13 +1678,53 @@ def check_app_update_available(app_id: str, force: bool = False) -> Dict[str, An
     ``force=False`` so it doesn't hammer apk; the user clicking
     "re-check" in the UI passes ``force=True``.
     """
+    cached = _update_cache_get(app_id)
+    if not force and cached and time.time() - cached.get("_cached_at", 0) < _APP_UPDATE_CACHE_TTL:
+        return cached
+
+    with _update_cache_lock:
+        lock = _app_check_locks.setdefault(app_id, threading.Lock())
+    started = time.time()
+    with lock:
+        # Another caller may have probed while we waited for the lock.
+        cached = _update_cache_get(app_id)
+        if cached and cached.get("_cached_at", 0) >= started:
+            return cached
+        result = _probe_app_update(app_id)
+        if not result.get("error"):
+            _update_cache_put(app_id, result)
+        return result
+
+
+def check_apps_updates(app_ids: Optional[List[str]] = None,
+                       force: bool = False) -> Dict[str, Dict[str, Any]]:
+    """`check_app_update_available` for several apps (default: every
+    installed app), probing up to `_UPDATE_CHECK_WORKERS` at once."""
+    if app_ids is None:
+        app_ids = list(_installed_snapshot().get("instances", {}))
+    if not app_ids:
+        return {}
+    _ct_states()  # one cluster read shared by every probe's running check
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(_UPDATE_CHECK_WORKERS, len(app_ids)),
+                            thread_name_prefix="oci-update-check") as pool:
+        futures = {app_id: pool.submit(check_app_update_available, app_id, force)
+                   for app_id in app_ids}
+    results = {}
+    for app_id, fut in futures.items():
+        try:
+            results[app_id] = fut.result()
+        except Exception as e:
+            results[app_id] = {"app_id": app_id, "available": False, "packages": [],
+                               "error": str(e)}
+    return results
+
+
+def _probe_app_update(app_id: str) -> Dict[str, Any]:
+    """One uncached update probe for `check_app_update_available`."""
     import datetime as _dt
 
     now = time.time()
-    cached = _app_update_cache.get(app_id)
-    if not force and cached and now - cached.get("_cached_at", 0) < _APP_UPDATE_CACHE_TTL:
-        return cached
-
     result: Dict[str, Any] = {
         "app_id": app_id,
         "available": False,
@@ -1433,6 +1741,29 @@ def check_app_update_available(app_id: str, force: bool = False) -> Dict[str, An
         result["error"] = msg
         return result
 
+    # Preferred path: installed packages read from the host, candidates
+    # from the shared upstream APKINDEX cache (fetched once for every
+    # app/CT on the same Alpine release) — no `apk update` per container.
+    try:
+        import lxc_pkg_state
+        shared = lxc_pkg_state.list_upgradable(str(vmid), "alpine", shared=True)
+    except Exception:
+        shared = None
+    if shared is not None:
+        packages = [{"name": p["name"], "current": p["current"], "latest": p["latest"]}
+                    for p in shared]
+        for p in packages:
+            if p["name"] == "tailscale":
+                result["current_version"] = p["current"]
+                result["latest_version"] = p["latest"]
+        if not result["current_version"]:
+            result["current_version"] = lxc_pkg_state.installed_version(str(vmid), "alpine", "tailscale")
+        if result["current_version"] and not result["latest_version"]:
+            result["latest_version"] = result["current_version"]
+        result["packages"] = packages
+        result["available"] = bool(packages)
+        return result
+
     # Step 1: refresh the apk index. Without this `apk version` checks
     # against whatever was cached at install time and reports stale data.
     rc, _, err = _run_pve_cmd(
@@ -1517,7 +1848,6 @@ def check_app_update_available(app_id: str, force: bool = False) -> Dict[str, An
     if result["current_version"] and not result["latest_version"]:
         result["latest_version"] = result["current_version"]
 
-    _app_update_cache[app_id] = result
     return result
 
 
@@ -1554,7 +1884,7 @@ def update_app(app_id: str) -> Dict[str, Any]:
         # serving an older "available: true" entry from before another
         # process or admin upgraded the CT manually — invalidating
         # ensures the next probe rebuilds from reality.
-        _app_update_cache.pop(app_id, None)
+        _update_cache_drop(app_id)
         result["success"] = True
         result["message"] = "No updates pending"
         return result
@@ -1596,7 +1926,7 @@ def update_app(app_id: str) -> Dict[str, Any]:
     # Drop the cached availability so the next probe picks up the new
     # state. Don't re-probe synchronously — the user just spent up to a
     # few minutes waiting; the UI can fetch when it's ready.
-    _app_update_cache.pop(app_id, None)
+    _update_cache_drop(app_id)
 
     result["success"] = True
     if not result["message"]:
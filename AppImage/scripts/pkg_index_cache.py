@@ -0,0 +1,519 @@
+"""Shared upstream package-index cache for update checks.
+
+Each Debian/Ubuntu CT refreshed its own apt lists (``apt-get update``
+inside the CT), every Alpine OCI app ran ``apk update`` in its container,
+and the host keeps its own lists too — the same ``Packages`` /
+``APKINDEX`` data downloaded and parsed once per consumer.
+
+This module keeps one compact version table per index, keyed by
+``(origin, suite, arch, component)``:
+
+  * ``origin`` is the distribution archive (``debian``,
+    ``debian-security``, ``ubuntu``, ``ubuntu-ports``, ``alpine``) when
+    the repository is one of the official archives or their mirrors,
+    and the repository URI otherwise (a third-party repo is still shared
+    by every CT that uses it, but never mixed with a distro suite);
+  * the table is ``{package: highest version}`` for that index (plus
+    whether the suite is a security suite and apt's default pin class),
+    stored as JSON under ``_CACHE_DIR`` and kept in a small in-memory
+    LRU.
+
+A table is fetched at most once per ``_INDEX_TTL`` — first from the
+host's own apt lists when the host tracks the same suite (no download
+at all: PVE refreshes those daily), otherwise from the repository the
+consumer uses (``Packages.xz`` / ``.gz`` / plain, ``APKINDEX.tar.gz``).
+Those URIs come from a container's own config while the fetch runs as
+root on the host, so only ``http``/``https`` repositories on a
+non-loopback host are fetched; anything else (``file:``, ``127.0.0.1``,
+link-local) gets None and the caller falls back to the in-CT path.
+Concurrent requests for the same key wait for one fetch. If a refresh
+fails the previous table is served for up to ``_INDEX_MAX_STALE``.
+
+The data only feeds "update available" reporting; nothing is installed
+from it, so the detached InRelease signatures aren't verified here
+(fetches use the repository's own scheme, https where configured).
+
+``_MIRROR_OVERRIDE`` points every fetch at a local directory laid out
+like a mirror (``dists/<suite>/<comp>/binary-<arch>/Packages`` and
+``<suite>/<comp>/<arch>/APKINDEX.tar.gz``) for tests; it is the only
+case in which a ``file://`` URL is read.
+
+Version ordering (``deb_version_compare`` / ``apk_version_compare``) and
+the raw index parsers live here too, shared with ``lxc_pkg_state``.
+"""
+
+from __future__ import annotations
+
+import collections
+import gzip
+import io
+import ipaddress
+import json
+import lzma
+import os
+import re
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Optional
+
+_CACHE_DIR = "/usr/local/share/proxmenux/pkg_index"
+_HOST_APT_LISTS = "/var/lib/apt/lists"
+_INDEX_TTL = 6 * 3600
+_INDEX_MAX_STALE = 7 * 86400
+_FETCH_TIMEOUT = 30
+_MEM_TABLES_MAX = 16
+_MIRROR_OVERRIDE: Optional[str] = None
+
+_OFFICIAL_HOST_SUFFIXES = ("debian.org", "ubuntu.com", "canonical.com", "alpinelinux.org")
+
+_tables: "collections.OrderedDict[tuple, dict]" = collections.OrderedDict()
+_tables_lock = threading.Lock()
+_key_locks: dict[tuple, threading.Lock] = {}
+
+
+# ─── Version ordering ────────────────────────────────────────────────────────
+
+def _deb_order(c: str) -> int:
+    if c == "~":
+        return -1
+    if c.isdigit():
+        return 0
+    if c.isalpha():
+        return ord(c)
+    return ord(c) + 256
+
+
+def _deb_cmp_part(a: str, b: str) -> int:
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _deb_order(a[i]) if i < len(a) and not a[i].isdigit() else 0
+            bc = _deb_order(b[j]) if j < len(b) and not b[j].isdigit() else 0
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == "0":
+            i += 1
+        while j < len(b) and b[j] == "0":
+            j += 1
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+
+def _deb_split(v: str) -> tuple[int, str, str]:
+    epoch = 0
+    if ":" in v:
+        e, v = v.split(":", 1)
+        epoch = int(e) if e.isdigit() else 0
+    upstream, _, revision = v.rpartition("-") if "-" in v else (v, "", "")
+    return epoch, upstream, revision
+
+
+def deb_version_compare(a: str, b: str) -> int:
+    """dpkg's version ordering: <0, 0, >0 like ``dpkg --compare-versions``."""
+    ea, ua, ra = _deb_split(a)
+    eb, ub, rb = _deb_split(b)
+    if ea != eb:
+        return ea - eb
+    return _deb_cmp_part(ua, ub) or _deb_cmp_part(ra, rb)
+
+
+_APK_SUFFIX = {"alpha": 0, "beta": 1, "pre": 2, "rc": 3, "": 4,
+               "cvs": 5, "svn": 6, "git": 7, "hg": 8, "p": 9}
+_APK_VER_RE = re.compile(r"^([0-9]+(?:\.[0-9]+)*)([a-z]?)((?:_[a-z]+[0-9]*)*)(?:-r([0-9]+))?$")
+
+
+def _apk_key(v: str) -> Optional[tuple]:
+    m = _APK_VER_RE.match(v)
+    if not m:
+        return None
+    nums = tuple(int(x) for x in m.group(1).split("."))
+    letter = m.group(2)
+    suffixes = []
+    for s in m.group(3).split("_")[1:]:
+        name = s.rstrip("0123456789")
+        if name not in _APK_SUFFIX:
+            return None
+        suffixes.append((_APK_SUFFIX[name], int(s[len(name):] or 0)))
+    suffixes.append((_APK_SUFFIX[""], 0))
+    return nums, letter, tuple(suffixes), int(m.group(4) or 0)
+
+
+def apk_version_compare(a: str, b: str) -> Optional[int]:
+    """apk version ordering, None when either side doesn't parse."""
+    ka, kb = _apk_key(a), _apk_key(b)
+    if ka is None or kb is None:
+        return None
+    return (ka > kb) - (ka < kb)
+
+
+# ─── Raw index parsing ───────────────────────────────────────────────────────
+
+_DEB_FIELD_RE = re.compile(rb"^(Package|Version|Architecture|Status): *(.*?)\s*$", re.M)
+
+
+def deb_stanzas(data: bytes):
+    """Yield ``{b"Package": ..., b"Version": ..., ...}`` per stanza of a
+    dpkg status / apt Packages file (only the fields we use)."""
+    cur: dict = {}
+    for m in _DEB_FIELD_RE.finditer(data):
+        key, val = m.group(1), m.group(2)
+        if key == b"Package":
+            if cur:
+                yield cur
+            cur = {}
+        cur[key] = val
+    if cur:
+        yield cur
+
+
+def parse_deb_packages(data: bytes) -> dict:
+    """``{(name, arch): highest_version}`` for one Packages file."""
+    best: dict = {}
+    for st in deb_stanzas(data):
+        try:
+            key = (st[b"Package"].decode(), st.get(b"Architecture", b"").decode())
+            ver = st[b"Version"].decode()
+        except (KeyError, UnicodeDecodeError):
+            continue
+        cur = best.get(key)
+        if cur is None or deb_version_compare(ver, cur) > 0:
+            best[key] = ver
+    return best
+
+
+def apk_blocks(text: bytes):
+    """Yield ``{b"P": ..., b"V": ..., ...}`` per package of an APKINDEX
+    or ``lib/apk/db/installed``."""
+    for block in text.split(b"\n\n"):
+        yield dict(line.split(b":", 1) for line in block.splitlines() if b":" in line[:2])
+
+
+def parse_apkindex(data: bytes) -> dict:
+    """``{(name, arch): highest_version}`` for one APKINDEX.tar.gz."""
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        member = tar.extractfile("APKINDEX")
+        text = member.read() if member else b""
+    best: dict = {}
+    for fields in apk_blocks(text):
+        try:
+            key = (fields[b"P"].decode(), fields.get(b"A", b"").decode())
+            ver = fields[b"V"].decode()
+        except (KeyError, UnicodeDecodeError):
+            continue
+        cur = best.get(key)
+        if cur is None or (apk_version_compare(ver, cur) or 0) > 0:
+            best[key] = ver
+    return best
+
+
+def release_priority(release_head: bytes) -> str:
+    """apt's default pin class from a suite's (In)Release header:
+    ``normal`` (500), ``low`` (100 — NotAutomatic + ButAutomaticUpgrades,
+    e.g. backports) or ``skip`` (1 — NotAutomatic only, e.g. experimental).
+    """
+    if b"NotAutomatic: yes" not in release_head:
+        return "normal"
+    return "low" if b"ButAutomaticUpgrades: yes" in release_head else "skip"
+
+
+# ─── Sources ─────────────────────────────────────────────────────────────────
+
+def origin_for(uri: str) -> str:
+    """Archive identity for a repository URI (see module docstring)."""
+    parsed = urllib.parse.urlsplit(uri.rstrip("/"))
+    host = (parsed.hostname or "").lower()
+    path = parsed.path.strip("/")
+    official = next((s for s in _OFFICIAL_HOST_SUFFIXES
+                     if host == s or host.endswith("." + s)), None)
+    if official and path:
+        if official == "alpinelinux.org":
+            return "alpine"
+        return path.rsplit("/", 1)[-1]
+    return f"{host}/{path}" if host else uri.rstrip("/")
+
+
+def parse_apt_sources(text: str, deb822: bool = False) -> list[tuple[str, str, list[str]]]:
+    """``[(uri, suite, [components])]`` of the ``deb`` entries in a
+    sources.list (one-line) or ``*.sources`` (deb822) file."""
+    out: list[tuple[str, str, list[str]]] = []
+    if deb822:
+        for para in re.split(r"\n\s*\n", text):
+            fields: dict[str, str] = {}
+            last = None
+            for line in para.splitlines():
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                if line[:1] in (" ", "\t") and last:
+                    fields[last] += " " + line.strip()
+                    continue
+                k, _, v = line.partition(":")
+                last = k.strip().lower()
+                fields[last] = v.strip()
+            if "deb" not in fields.get("types", "").split():
+                continue
+            if fields.get("enabled", "yes").lower() == "no":
+                continue
+            for uri in fields.get("uris", "").split():
+                for suite in fields.get("suites", "").split():
+                    out.append((uri, suite, fields.get("components", "").split()))
+        return out
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line.startswith("deb "):
+            continue
+        line = re.sub(r"\[[^\]]*\]", " ", line[4:])
+        parts = line.split()
+        if len(parts) >= 2:
+            out.append((parts[0], parts[1], parts[2:]))
+    return out
+
+
+def parse_apk_repositories(text: str) -> Optional[list[tuple[str, str, str]]]:
+    """``[(base_uri, version, repo)]`` from /etc/apk/repositories, None
+    if it uses tagged (``@name``) repositories."""
+    out: list[tuple[str, str, str]] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("@"):
+            return None
+        m = re.match(r"^(.*?)/(v\d+\.\d+|edge|latest-stable)/([A-Za-z0-9_-]+)/?$", line)
+        if not m:
+            return None
+        out.append((m.group(1), m.group(2), m.group(3)))
+    return out
+
+
+# ─── Tables ──────────────────────────────────────────────────────────────────
+
+def _table_path(key: tuple) -> str:
+    name = "_".join(re.sub(r"[^A-Za-z0-9.+-]", "-", part) for part in key)
+    return os.path.join(_CACHE_DIR, name + ".json")
+
+
+def _load_table(key: tuple) -> Optional[dict]:
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            _tables.move_to_end(key)
+            return table
+    try:
+        with open(_table_path(key), "r", encoding="utf-8") as f:
+            table = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(table, dict) or tuple(table.get("key") or ()) != key:
+        return None
+    _remember(key, table)
+    return table
+
+
+def _remember(key: tuple, table: dict) -> None:
+    with _tables_lock:
+        _tables[key] = table
+        _tables.move_to_end(key)
+        while len(_tables) > _MEM_TABLES_MAX:
+            _tables.popitem(last=False)
+
+
+def _store_table(key: tuple, table: dict) -> None:
+    _remember(key, table)
+    try:
+        os.makedirs(_CACHE_DIR, exist_ok=True)
+        path = _table_path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(table, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[ProxMenux] pkg_index_cache write failed: {e}")
+
+
+def _build_table(key: tuple, versions: dict, priority: str, source: str, fetched_at: float) -> dict:
+    origin, suite, _arch, _component = key
+    return {
+        "key": list(key),
+        "fetched_at": fetched_at,
+        "source": source,
+        "priority": priority,
+        "security": suite.endswith("-security") or suite.endswith("/updates")
+                    or origin.endswith("-security"),
+        "versions": versions,
+    }
+
+
+def _flatten(parsed: dict, arch: str) -> dict:
+    """``{(name, arch): ver}`` → ``{name: ver}`` for one arch index."""
+    out = {}
+    for (name, pkg_arch), ver in parsed.items():
+        if pkg_arch in (arch, "all", "noarch", ""):
+            out[name] = ver
+    return out
+
+
+def _fetchable(uri: str) -> bool:
+    """A repository the host may fetch on a CT's behalf: http(s) only,
+    and not a loopback / link-local / unspecified host — those would
+    reach the host's own services, not what the CT means."""
+    parsed = urllib.parse.urlsplit(uri)
+    if parsed.scheme not in ("http", "https"):
+        return False
+    host = (parsed.hostname or "").lower()
+    if not host or host == "localhost" or host.endswith(".localhost"):
+        return False
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return True
+    return not (ip.is_loopback or ip.is_link_local or ip.is_unspecified)
+
+
+def _read_url(url: str) -> bytes:
+    if url.startswith("file://"):
+        if not _MIRROR_OVERRIDE:
+            raise ValueError(f"refusing to read {url} outside a mirror override")
+        with open(urllib.parse.urlsplit(url).path, "rb") as f:
+            return f.read()
+    req = urllib.request.Request(url, headers={"User-Agent": "ProxMenux-Monitor"})
+    with urllib.request.urlopen(req, timeout=_FETCH_TIMEOUT) as resp:
+        return resp.read()
+
+
+def _base_for(uri: str) -> str:
+    if _MIRROR_OVERRIDE:
+        base = _MIRROR_OVERRIDE
+        return base if "://" in base else "file://" + os.path.abspath(base)
+    return uri.rstrip("/")
+
+
+def _from_host_lists(key: tuple, uri: str) -> Optional[dict]:
+    """Build the table from the host's own apt lists when the host tracks
+    the same suite and they're recent enough."""
+    origin, suite, arch, component = key
+    try:
+        names = os.listdir(_HOST_APT_LISTS)
+    except OSError:
+        return None
+    # Any mirror of the same archive will do: match on origin via the
+    # URI encoded in the file name.
+    want_tail = f"_dists_{suite.replace('/', '_')}_{component}_binary-{arch}_Packages"
+    for name in names:
+        if not name.endswith(want_tail):
+            continue
+        host_uri = "http://" + name[: -len(want_tail)].replace("_", "/")
+        if origin_for(host_uri) != origin:
+            continue
+        path = os.path.join(_HOST_APT_LISTS, name)
+        try:
+            mtime = os.path.getmtime(path)
+            if time.time() - mtime > _INDEX_TTL * 4:
+                return None
+            with open(path, "rb") as f:
+                parsed = parse_deb_packages(f.read())
+        except OSError:
+            return None
+        priority = "normal"
+        release_prefix = name[: -len(f"_{component}_binary-{arch}_Packages")]
+        for rel in (release_prefix + "_InRelease", release_prefix + "_Release"):
+            try:
+                with open(os.path.join(_HOST_APT_LISTS, rel), "rb") as f:
+                    priority = release_priority(f.read(8192))
+                break
+            except OSError:
+                continue
+        return _build_table(key, _flatten(parsed, arch), priority, f"host:{name}", mtime)
+    return None
+
+
+def _fetch_deb(key: tuple, uri: str) -> Optional[dict]:
+    _origin, suite, arch, component = key
+    base = _base_for(uri)
+    dist = f"{base}/dists/{suite}"
+    priority = "normal"
+    for rel in ("InRelease", "Release"):
+        try:
+            priority = release_priority(_read_url(f"{dist}/{rel}")[:8192])
+            break
+        except (OSError, urllib.error.URLError, ValueError):
+            continue
+    for ext, decode in ((".xz", lzma.decompress), (".gz", gzip.decompress), ("", bytes)):
+        url = f"{dist}/{component}/binary-{arch}/Packages{ext}"
+        try:
+            data = decode(_read_url(url))
+        except (OSError, urllib.error.URLError, ValueError, EOFError, lzma.LZMAError):
+            continue
+        return _build_table(key, _flatten(parse_deb_packages(data), arch), priority, url, time.time())
+    return None
+
+
+def _fetch_apk(key: tuple, uri: str) -> Optional[dict]:
+    _origin, version, arch, repo = key
+    url = f"{_base_for(uri)}/{version}/{repo}/{arch}/APKINDEX.tar.gz"
+    try:
+        parsed = parse_apkindex(_read_url(url))
+    except (OSError, urllib.error.URLError, ValueError, EOFError, tarfile.TarError):
+        return None
+    return _build_table(key, _flatten(parsed, arch), "normal", url, time.time())
+
+
+def _get(key: tuple, uri: str, fetch, use_host: bool) -> Optional[dict]:
+    table = _load_table(key)
+    if table is not None and time.time() - table.get("fetched_at", 0) < _INDEX_TTL:
+        return table
+    with _tables_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        # Another caller may have refreshed it while we waited.
+        table = _load_table(key)
+        if table is not None and time.time() - table.get("fetched_at", 0) < _INDEX_TTL:
+            return table
+        fresh = (_from_host_lists(key, uri) if use_host and not _MIRROR_OVERRIDE else None) \
+            or fetch(key, uri)
+        if fresh is not None:
+            _store_table(key, fresh)
+            return fresh
+    if table is not None and time.time() - table.get("fetched_at", 0) < _INDEX_MAX_STALE:
+        return table
+    return None
+
+
+def deb_table(uri: str, suite: str, component: str, arch: str) -> Optional[dict]:
+    """Version table for one apt index, or None if it can't be obtained."""
+    if suite.endswith("/"):
+        return None  # flat repository: no dists/ layout to fetch
+    if not _MIRROR_OVERRIDE and not _fetchable(uri):
+        return None
+    key = (origin_for(uri), suite, arch, component)
+    return _get(key, uri, _fetch_deb, use_host=True)
+
+
+def apk_table(base_uri: str, version: str, repo: str, arch: str) -> Optional[dict]:
+    """Version table for one Alpine repository index."""
+    if not _MIRROR_OVERRIDE and not _fetchable(base_uri):
+        return None
+    key = (origin_for(base_uri + "/"), version, arch, repo)
+    return _get(key, base_uri, _fetch_apk, use_host=False)
+
+
+def clear_memory() -> None:
+    """Drop the in-memory tables (the on-disk copies stay)."""
+    with _tables_lock:
+        _tables.clear()
@@ -0,0 +1,407 @@
+"""Incremental index of PVE tasks for ``/api/events``.
+
+``/api/events`` used to shell out to ``pvesh get /cluster/tasks`` (~1 s)
+and re-format the whole list on every dashboard refresh, while
+``notification_events.TaskWatcher`` was already tailing the very files
+that list is built from. This module turns what TaskWatcher reads into a
+queryable index:
+
+  * a ring of the most recent tasks in memory (running + finished), each
+    row carrying a monotonically increasing ``seq`` so clients can poll
+    with ``since=<cursor>`` and only receive what changed;
+  * finished tasks persisted to ``pve_task_history`` in ``monitor.db`` so
+    pagination can go further back than the ring (and than PVE's own
+    rotated index) without touching pvesh.
+
+Seeding happens lazily on first use from ``/var/log/pve/tasks/index``,
+``index.1`` and ``active``; after that TaskWatcher's listeners keep it
+current. Every ingest is an upsert keyed on UPID, so re-reading a line
+TaskWatcher already delivered is harmless.
+
+Only tasks of the local node are visible — the same scope the rest of
+the Monitor's ``/nodes/localhost`` calls have.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+_TASK_DIR = "/var/log/pve/tasks"
+_TASK_INDEX_FILES = (
+    os.path.join(_TASK_DIR, "index.1"),  # rotated — oldest first
+    os.path.join(_TASK_DIR, "index"),
+)
+_TASK_ACTIVE_FILE = os.path.join(_TASK_DIR, "active")
+
+_DB_DIR = "/usr/local/share/proxmenux"
+_DB_PATH = os.path.join(_DB_DIR, "monitor.db")
+
+_RING_SIZE = 2000
+_RETENTION_DAYS = 90
+_CLEANUP_INTERVAL = 3600
+# A row still flagged running that has been missing from the active file
+# this long lost its index line (rotation race, watcher restart) — stop
+# reporting it as running.
+_RUNNING_MISSING_GRACE = 60
+
+_lock = threading.Lock()
+_ring: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+_state: dict[str, Any] = {
+    "loaded": False,
+    "seq": 0,
+    "evicted_seq": 0,      # highest seq that has fallen out of the ring
+    "db_ok": False,
+    "last_cleanup": 0.0,
+    "missing_since": {},   # upid -> first time it wasn't in the active file
+}
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def _parse_upid(upid: str) -> Optional[dict[str, Any]]:
+    """``UPID:node:pid:pstart:starttime:type:id:user:`` → row skeleton."""
+    parts = upid.split(":")
+    if len(parts) < 8 or parts[0] != "UPID":
+        return None
+    try:
+        starttime = int(parts[4], 16)
+    except ValueError:
+        return None
+    return {
+        "upid": upid,
+        "node": parts[1],
+        "type": parts[5],
+        "vmid": parts[6],
+        "user": parts[7],
+        "starttime": starttime,
+        "endtime": 0,
+        "status": "running",
+    }
+
+
+def _parse_index_line(line: str) -> Optional[dict[str, Any]]:
+    """Index lines are ``UPID endtime_hex status…``; active lines are
+    ``UPID 1`` while running and ``UPID 1 endtime_hex status…`` after."""
+    parts = line.split()
+    if not parts:
+        return None
+    row = _parse_upid(parts[0])
+    if row is None:
+        return None
+    rest = parts[1:]
+    if rest and rest[0] == "1" and len(rest) != 2:
+        # Active-file layout: drop the version column.
+        rest = rest[1:]
+    if len(rest) >= 2:
+        try:
+            row["endtime"] = int(rest[0], 16)
+        except ValueError:
+            return row
+        row["status"] = " ".join(rest[1:])
+    return row
+
+
+def status_category(status: str) -> str:
+    """Collapse PVE's free-form task status into running/ok/warning/error."""
+    if status == "running":
+        return "running"
+    if status == "OK":
+        return "ok"
+    if status.upper().startswith("WARNINGS"):
+        return "warning"
+    if status == "unknown":
+        return "warning"
+    return "error"
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+def _db_connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(_DB_PATH, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _init_db() -> bool:
+    try:
+        os.makedirs(_DB_DIR, exist_ok=True)
+        conn = _db_connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pve_task_history (
+                upid TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                type TEXT NOT NULL,
+                vmid TEXT NOT NULL,
+                user TEXT NOT NULL,
+                starttime INTEGER NOT NULL,
+                endtime INTEGER NOT NULL,
+                status TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pve_task_start "
+            "ON pve_task_history(starttime)"
+        )
+        conn.commit()
+        conn.close()
+        return True
+    except Exception as e:
+        print(f"[ProxMenux] PVE task history DB init failed: {e}")
+        return False
+
+
+_ROW_COLUMNS = ("upid", "node", "type", "vmid", "user", "starttime", "endtime", "status")
+
+
+def _persist(rows: list[dict[str, Any]]) -> None:
+    finished = [r for r in rows if r["status"] != "running"]
+    if not finished or not _state["db_ok"]:
+        return
+    try:
+        conn = _db_connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO pve_task_history "
+            f"({', '.join(_ROW_COLUMNS)}) VALUES ({', '.join('?' * len(_ROW_COLUMNS))})",
+            [tuple(r[c] for c in _ROW_COLUMNS) for r in finished],
+        )
+        now = time.time()
+        if now - _state["last_cleanup"] >= _CLEANUP_INTERVAL:
+            conn.execute(
+                "DELETE FROM pve_task_history WHERE starttime < ?",
+                (int(now - _RETENTION_DAYS * 86400),),
+            )
+            _state["last_cleanup"] = now
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        print(f"[ProxMenux] PVE task history write failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Ring maintenance
+# ---------------------------------------------------------------------------
+
+def _upsert(row: dict[str, Any]) -> bool:
+    """Insert or update one row in the ring. Caller holds `_lock`.
+    Returns True when something actually changed."""
+    current = _ring.get(row["upid"])
+    if current is not None:
+        if current["status"] == row["status"] and current["endtime"] == row["endtime"]:
+            return False
+        # A finished row never goes back to running (late active read).
+        if row["status"] == "running" and current["status"] != "running":
+            return False
+    _state["seq"] += 1
+    row = dict(row, seq=_state["seq"])
+    _ring.pop(row["upid"], None)
+    _ring[row["upid"]] = row
+    while len(_ring) > _RING_SIZE:
+        _upid, old = _ring.popitem(last=False)
+        _state["evicted_seq"] = max(_state["evicted_seq"], old["seq"])
+    return True
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, "r", errors="replace") as f:
+            return f.readlines()
+    except OSError:
+        return []
+
+
+def _ensure_loaded() -> None:
+    if _state["loaded"]:
+        return
+    with _lock:
+        if _state["loaded"]:
+            return
+        _state["db_ok"] = _init_db()
+        rows = []
+        for path in _TASK_INDEX_FILES + (_TASK_ACTIVE_FILE,):
+            for line in _read_lines(path):
+                row = _parse_index_line(line.strip())
+                if row is not None:
+                    rows.append(row)
+        # Oldest first so the ring keeps the newest `_RING_SIZE` tasks.
+        rows.sort(key=lambda r: r["starttime"])
+        for row in rows:
+            _upsert(row)
+        _persist(rows)
+        _state["loaded"] = True
+
+
+# ---------------------------------------------------------------------------
+# TaskWatcher feed
+# ---------------------------------------------------------------------------
+
+def _on_task_completed(task_type: str, vmid: str, status: str, upid: str,
+                       endtime: int) -> None:
+    _ensure_loaded()
+    row = _parse_upid(upid)
+    if row is None:
+        return
+    row["status"] = status
+    row["endtime"] = endtime or int(time.time())
+    with _lock:
+        _state["missing_since"].pop(upid, None)
+        changed = _upsert(row)
+    if changed:
+        _persist([row])
+
+
+def _on_active_tasks(upids: list[str]) -> None:
+    _ensure_loaded()
+    now = time.time()
+    running = set(upids)
+    with _lock:
+        for upid in upids:
+            if upid not in _ring:
+                row = _parse_upid(upid)
+                if row is not None:
+                    _upsert(row)
+        missing = _state["missing_since"]
+        for upid, row in list(_ring.items()):
+            if row["status"] != "running":
+                continue
+            if upid in running:
+                missing.pop(upid, None)
+                continue
+            first = missing.setdefault(upid, now)
+            if now - first >= _RUNNING_MISSING_GRACE:
+                missing.pop(upid, None)
+                _upsert(dict(row, status="unknown"))
+
+
+def start() -> None:
+    """Hook the index into TaskWatcher. Idempotent; cheap — seeding from
+    the task files is deferred to the first query or feed callback."""
+    try:
+        from notification_events import (
+            register_task_active_listener,
+            register_task_completion_listener,
+        )
+        register_task_completion_listener(_on_task_completed)
+        register_task_active_listener(_on_active_tasks)
+    except Exception as e:
+        print(f"[ProxMenux] PVE task index feed unavailable: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def _matches(row: dict[str, Any], types, vmid, statuses) -> bool:
+    if types and row["type"] not in types:
+        return False
+    if vmid and row["vmid"] != vmid:
+        return False
+    if statuses and status_category(row["status"]) not in statuses:
+        return False
+    return True
+
+
+def _query_db(types, vmid, statuses, limit: int) -> list[dict[str, Any]]:
+    if not _state["db_ok"]:
+        return []
+    where, params = [], []
+    if types:
+        where.append(f"type IN ({', '.join('?' * len(types))})")
+        params.extend(types)
+    if vmid:
+        where.append("vmid = ?")
+        params.append(vmid)
+    sql = f"SELECT {', '.join(_ROW_COLUMNS)} FROM pve_task_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY starttime DESC"
+    # Status categories aren't a column — filter in Python, so over-fetch.
+    if not statuses:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        conn = _db_connect()
+        cur = conn.execute(sql, params)
+        out = []
+        for rec in cur:
+            row = dict(zip(_ROW_COLUMNS, rec))
+            if statuses and status_category(row["status"]) not in statuses:
+                continue
+            out.append(row)
+            if len(out) >= limit:
+                break
+        conn.close()
+        return out
+    except Exception as e:
+        print(f"[ProxMenux] PVE task history read failed: {e}")
+        return []
+
+
+def query_tasks(types=None, vmid: Optional[str] = None, statuses=None,
+                limit: int = 50, offset: int = 0,
+                since: Optional[int] = None) -> dict[str, Any]:
+    """Return ``{'tasks', 'cursor', 'has_more', 'reset'}``.
+
+    With ``since`` the result is the matching tasks whose row changed
+    after that cursor (newest first). When more than ``limit`` changed,
+    the oldest changes come back with ``has_more`` and a cursor that
+    points at the last one delivered, so polling on picks up the rest.
+    ``reset`` is True when the cursor predates the ring and the client
+    should drop what it has and treat the result as a fresh page.
+    Without ``since`` it's a plain ``offset``/``limit`` page ordered by
+    start time, falling through to SQLite history when the ring doesn't
+    reach that far back.
+    """
+    _ensure_loaded()
+    types = set(types) if types else None
+    statuses = set(statuses) if statuses else None
+    vmid = str(vmid) if vmid else None
+
+    with _lock:
+        cursor = _state["seq"]
+        # A cursor past ours comes from before a Monitor restart (seq
+        # restarts at 0) — treat it like one that fell off the ring.
+        if since is not None and _state["evicted_seq"] <= since <= cursor:
+            changed = [r for r in _ring.values()
+                       if r["seq"] > since and _matches(r, types, vmid, statuses)]
+            # Deliver the oldest changes first and move the cursor only
+            # past what was sent, so a capped delta leaves the rest for
+            # the next poll instead of skipping it.
+            changed.sort(key=lambda r: r["seq"])
+            has_more = len(changed) > limit
+            page = changed[:limit]
+            if has_more:
+                cursor = page[-1]["seq"]
+            page.sort(key=lambda r: r["starttime"], reverse=True)
+            return {"tasks": page, "cursor": cursor,
+                    "has_more": has_more, "reset": False}
+        ring_rows = [r for r in _ring.values() if _matches(r, types, vmid, statuses)]
+
+    ring_rows.sort(key=lambda r: r["starttime"], reverse=True)
+    wanted = offset + limit
+    if len(ring_rows) > wanted or not _state["db_ok"]:
+        page = ring_rows[offset:wanted]
+        has_more = len(ring_rows) > wanted
+    else:
+        # Running rows only live in the ring; history has the rest. The
+        # ring's finished rows are in the DB too, so dedupe on UPID.
+        merged = {r["upid"]: r for r in _query_db(types, vmid, statuses, wanted + 1)}
+        for r in ring_rows:
+            merged[r["upid"]] = r
+        rows = sorted(merged.values(), key=lambda r: r["starttime"], reverse=True)
+        page = rows[offset:wanted]
+        has_more = len(rows) > wanted
+    return {"tasks": page, "cursor": cursor, "has_more": has_more,
+            "reset": since is not None}
+
@@ -11,7 +11,10 @@ import subprocess
 import re
 import fcntl
 import threading
-from contextlib import contextmanager
+import time
+from contextlib import ExitStack, contextmanager
+
+import fail2ban_socket
 
 # =================================================================
 # Proxmox Firewall Management
@@ -162,35 +165,14 @@ def get_firewall_status():
         rc2, _, _ = _run_cmd(["systemctl", "cat", "pve-firewall"])
         result["pve_firewall_installed"] = rc2 == 0
 
-    # Parse cluster firewall config
-    if os.path.isfile(CLUSTER_FW):
+    # Enable flags come from the same cached parse as the rules below.
+    for level, key in (("cluster", "cluster_fw_enabled"), ("host", "host_fw_enabled")):
         try:
-            with open(CLUSTER_FW, 'r') as f:
-                content = f.read()
-            # Check if firewall is enabled at cluster level
-            for line in content.splitlines():
-                line = line.strip()
-                if line.lower().startswith("enable:"):
-                    val = line.split(":", 1)[1].strip()
-                    result["cluster_fw_enabled"] = val == "1"
-                    break
+            model = _load_fw_model(_fw_file_for_level(level), level)
         except Exception:
-            pass
-
-    # Parse host firewall config
-    host_fw = os.path.join(HOST_FW_DIR, "host.fw")
-    if os.path.isfile(host_fw):
-        try:
-            with open(host_fw, 'r') as f:
-                content = f.read()
-            for line in content.splitlines():
-                line = line.strip()
-                if line.lower().startswith("enable:"):
-                    val = line.split(":", 1)[1].strip()
-                    result["host_fw_enabled"] = val == "1"
-                    break
-        except Exception:
-            pass
+            model = None
+        if model and model["enabled"] is not None:
+            result[key] = model["enabled"]
 
     # Get rules
     rules = _parse_firewall_rules()
@@ -207,46 +189,136 @@ def get_firewall_status():
     return result
 
 
-def _parse_firewall_rules():
-    """Parse all firewall rules from cluster and host configs"""
-    rules = []
-    rule_idx_by_file = {}  # Track rule index per file for deletion
+# Parsed host.fw / cluster.fw, keyed by path. get_firewall_status and every
+# add/edit/delete used to re-read and re-parse the files on their own; now
+# they share one parse per file version. Writers go through
+# `apply_firewall_changes`, which applies any number of rule changes to a
+# file under one lock and one write, and validates the result with a
+# single `pve-firewall compile` before the reload.
+_FW_RULE_SECTIONS = ("RULES", "IN", "OUT")
+_FW_MAX_BATCH = 500
+# /etc/pve (pmxcfs) only keeps whole-second mtimes, so a file rewritten in
+# the same second it was parsed can keep its (mtime, size). Models of
+# files modified this recently are re-read instead of trusted.
+_FW_RACY_WINDOW = 2.0
+# Batches lock a sidecar file, not the .fw itself: opening host.fw with
+# O_CREAT for the lock would leave an empty host.fw behind on a node that
+# had none once a batch is rejected or rolled back.
+_FW_LOCK_DIR = "/run/lock/proxmenux"
+
+_fw_model_lock = threading.Lock()
+_fw_models = {}  # path -> model (see _build_fw_model)
+
+
+def _fw_file_for_level(level):
+    if level == "cluster":
+        return CLUSTER_FW
+    return os.path.join(HOST_FW_DIR, "host.fw")
 
-    for fw_file, source in [(CLUSTER_FW, "cluster"), (os.path.join(HOST_FW_DIR, "host.fw"), "host")]:
-        if not os.path.isfile(fw_file):
-            continue
-        rule_idx_by_file[source] = 0
-        try:
-            with open(fw_file, 'r') as f:
-                content = f.read()
 
-            in_rules = False
-            section = ""
-            for line in content.splitlines():
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
+def _fw_lock_path(fw_file):
+    return os.path.join(_FW_LOCK_DIR, os.path.basename(fw_file) + ".lock")
 
-                # Detect section headers
-                if line.startswith('['):
-                    section_match = re.match(r'\[(\w+)\]', line)
-                    if section_match:
-                        section = section_match.group(1).upper()
-                        in_rules = section in ("RULES", "IN", "OUT")
-                    continue
 
-                if in_rules or section in ("RULES", "IN", "OUT"):
-                    rule = _parse_rule_line(line, source, section)
-                    if rule:
-                        rule["rule_index"] = rule_idx_by_file[source]
-                        rules.append(rule)
-                        rule_idx_by_file[source] += 1
-                    # else: malformed line — don't bump the index. The
-                    # delete/edit paths use the same `_is_pve_rule_line`
-                    # gate so this stays consistent across read and write.
-        except Exception:
+def _fw_restore(originals):
+    """Put back what a batch overwrote; files it created are removed."""
+    for fw_file, content in originals.items():
+        try:
+            if content is None:
+                os.remove(fw_file)
+            else:
+                with open(fw_file, 'w') as f:
+                    f.write(content)
+        except OSError:
             pass
+        _invalidate_fw_model(fw_file)
+
+
+def _fw_file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
 
+
+def _build_fw_model(lines, source):
+    """Parse the lines of a .fw file.
+
+    Rules are the lines in [RULES]/[IN]/[OUT] that pass `_is_pve_rule_line`
+    — the same gate for reads and writes, so a rule_index from the status
+    endpoint always points at the line edit/delete will touch.
+    `rule_lines[i]` is the line number of rule i.
+    """
+    model = {
+        "lines": lines,
+        "enabled": None,
+        "rules": [],
+        "rule_lines": [],
+        "rules_header": None,
+    }
+    section = ""
+    in_rules = False
+    for lineno, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith('['):
+            section_match = re.match(r'\[(\w+)\]', stripped)
+            if section_match:
+                section = section_match.group(1).upper()
+                in_rules = section in _FW_RULE_SECTIONS
+                if stripped == "[RULES]" and model["rules_header"] is None:
+                    model["rules_header"] = lineno
+            continue
+        if model["enabled"] is None and stripped.lower().startswith("enable:"):
+            model["enabled"] = stripped.split(":", 1)[1].strip() == "1"
+        if in_rules and _is_pve_rule_line(stripped):
+            rule = _parse_rule_line(stripped, source, section)
+            if rule:
+                rule["rule_index"] = len(model["rules"])
+                model["rules"].append(rule)
+                model["rule_lines"].append(lineno)
+    return model
+
+
+def _store_fw_model(path, lines, source):
+    model = _build_fw_model(lines, source)
+    model["sig"] = _fw_file_signature(path)
+    model["read_at"] = time.time()
+    with _fw_model_lock:
+        _fw_models[path] = model
+    return model
+
+
+def _invalidate_fw_model(path):
+    with _fw_model_lock:
+        _fw_models.pop(path, None)
+
+
+def _load_fw_model(path, source):
+    """Parsed model of `path` (shared — don't mutate), or None if missing."""
+    sig = _fw_file_signature(path)
+    if sig is None:
+        return None
+    with _fw_model_lock:
+        cached = _fw_models.get(path)
+    if (cached is not None and cached["sig"] == sig
+            and sig[1] / 1e9 < cached["read_at"] - _FW_RACY_WINDOW):
+        return cached
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+    return _store_fw_model(path, lines, source)
+
+
+def _parse_firewall_rules():
+    """Parse all firewall rules from cluster and host configs"""
+    rules = []
+    for level in ("cluster", "host"):
+        try:
+            model = _load_fw_model(_fw_file_for_level(level), level)
+        except Exception:
+            continue
+        if model:
+            rules.extend(dict(rule) for rule in model["rules"])
     return rules
 
 
@@ -292,53 +364,56 @@ def _parse_rule_line(line, source, section):
     return rule
 
 
-def add_firewall_rule(direction="IN", action="ACCEPT", protocol="tcp", dport="", sport="",
-                      source="", dest="", iface="", comment="", level="host"):
+_FW_RULE_FIELDS = {
+    "direction": "IN", "action": "ACCEPT", "protocol": "tcp", "dport": "",
+    "sport": "", "source": "", "dest": "", "iface": "", "comment": "",
+}
+
+
+def _build_fw_rule_line(direction="IN", action="ACCEPT", protocol="tcp", dport="", sport="",
+                        source="", dest="", iface="", comment=""):
     """
-    Add a custom firewall rule to host or cluster firewall config.
-    Returns (success, message)
+    Validate rule fields and build the pve-firewall rule line.
+    Returns (line, summary, error) — error is None when valid.
     """
-    # Validate inputs
-    action = action.upper()
+    action = str(action).upper()
     if action not in ("ACCEPT", "DROP", "REJECT"):
-        return False, f"Invalid action: {action}. Must be ACCEPT, DROP, or REJECT"
+        return None, None, f"Invalid action: {action}. Must be ACCEPT, DROP, or REJECT"
 
-    direction = direction.upper()
+    direction = str(direction).upper()
     if direction not in ("IN", "OUT"):
-        return False, f"Invalid direction: {direction}. Must be IN or OUT"
-
-    if level not in _FIREWALL_LEVELS:
-        return False, f"Invalid level: {level}. Must be one of {_FIREWALL_LEVELS}"
+        return None, None, f"Invalid direction: {direction}. Must be IN or OUT"
 
     # Per-field input hardening — rejects newline / `#` / shell metas which would
     # otherwise let a caller inject extra rule lines into host.fw / cluster.fw.
     # See audit Tier 1 #12c.
     if not _is_valid_fw_endpoint(source):
-        return False, "Invalid source (only IP/CIDR/ipset/alias chars allowed)"
+        return None, None, "Invalid source (only IP/CIDR/ipset/alias chars allowed)"
     if not _is_valid_fw_endpoint(dest):
-        return False, "Invalid destination (only IP/CIDR/ipset/alias chars allowed)"
+        return None, None, "Invalid destination (only IP/CIDR/ipset/alias chars allowed)"
     if not _is_valid_fw_iface(iface):
-        return False, "Invalid interface name"
+        return None, None, "Invalid interface name"
 
-    # Build rule line
     parts = [direction, action]
 
     if protocol:
-        proto = protocol.lower()
+        proto = str(protocol).lower()
         if proto not in _FIREWALL_PROTOCOLS:
-            return False, f"Invalid protocol: {protocol}. Must be one of {_FIREWALL_PROTOCOLS}"
+            return None, None, f"Invalid protocol: {protocol}. Must be one of {_FIREWALL_PROTOCOLS}"
         parts.extend(["-p", proto])
     if dport:
         # Validate port
-        if not re.match(r'^[\d:,]+$', dport):
-            return False, f"Invalid destination port: {dport}"
-        parts.extend(["-dport", dport])
+        if not re.match(r'^[\d:,]+$', str(dport)):
+            return None, None, f"Invalid destination port: {dport}"
+        parts.extend(["-dport", str(dport)])
     if sport:
-        if not re.match(r'^[\d:,]+$', sport):
-            return False, f"Invalid source port: {sport}"
-        parts.extend(["-sport", sport])
+        if not re.match(r'^[\d:,]+$', str(sport)):
+            return None, None, f"Invalid source port: {sport}"
+        parts.extend(["-sport", str(sport)])
     if source:
         parts.extend(["-source", source])
+    # `dest` was previously dropped silently from edit_firewall_rule — that's
+    # the registered audit issue "edit_firewall_rule IGNORA dest". Honor it.
     if dest:
         parts.extend(["-dest", dest])
     if iface:
@@ -351,233 +426,215 @@ def add_firewall_rule(direction="IN", action="ACCEPT", protocol="tcp", dport="",
         # accepts `\n` / `\r` — letting a malicious comment terminate the rule
         # line and inject a fresh one. We use a literal space in the negation
         # so newlines / tabs are stripped. See audit Tier 1 #12c.
-        safe_comment = re.sub(r'[^\w \-._/():]', '', comment)
+        safe_comment = re.sub(r'[^\w \-._/():]', '', str(comment))
         parts.append(f"# {safe_comment}")
 
-    rule_line = " ".join(parts)
+    summary = f"{direction} {action} {protocol}{':' + str(dport) if dport else ''}"
+    return " ".join(parts), summary, None
 
-    # Determine target file
-    if level == "cluster":
-        fw_file = CLUSTER_FW
-    else:
-        fw_file = os.path.join(HOST_FW_DIR, "host.fw")
 
-    try:
-        with _exclusive_file_lock(fw_file):
-            content = ""
-            has_rules_section = False
-
-            if os.path.isfile(fw_file):
-                with open(fw_file, 'r') as f:
-                    content = f.read()
-                has_rules_section = "[RULES]" in content
-
-            if has_rules_section:
-                lines = content.splitlines()
-                new_lines = []
-                inserted = False
-                for line in lines:
-                    new_lines.append(line)
-                    if not inserted and line.strip() == "[RULES]":
-                        new_lines.append(rule_line)
-                        inserted = True
-                content = "\n".join(new_lines) + "\n"
-            else:
-                if content and not content.endswith("\n"):
-                    content += "\n"
-                content += "\n[RULES]\n"
-                content += rule_line + "\n"
-
-            os.makedirs(os.path.dirname(fw_file), exist_ok=True)
-            with open(fw_file, 'w') as f:
-                f.write(content)
-
-        _run_cmd(["pve-firewall", "reload"])
+def _fw_compile_errors(written):
+    """
+    Run `pve-firewall compile` once and return an error string, or None.
 
-        return True, f"Firewall rule added: {direction} {action} {protocol}{':' + dport if dport else ''}"
-    except PermissionError:
-        return False, "Permission denied. Cannot write to firewall config."
-    except Exception as e:
-        return False, f"Failed to add firewall rule: {str(e)}"
+    `written` maps fw file → set of 1-based line numbers we just wrote.
+    pve-firewall skips rules it can't parse with a "<file> (line N)"
+    warning instead of failing, so those warnings are matched against the
+    lines of this batch; pre-existing bad lines don't block changes.
+    """
+    rc, out, err = _run_cmd(["pve-firewall", "compile"], timeout=60)
+    if rc == -1 and err.startswith("Command not found"):
+        return None  # not a PVE host (dev box) — nothing to validate with
+    if rc != 0:
+        return (err or out or f"exit code {rc}").strip()[:500]
+    problems = []
+    for line in (err + "\n" + out).splitlines():
+        m = re.search(r'(\S+\.fw)\s*\(line (\d+)\)', line)
+        if not m:
+            continue
+        for fw_file, lines in written.items():
+            if os.path.basename(m.group(1)) == os.path.basename(fw_file) \
+                    and int(m.group(2)) in lines:
+                problems.append(line.strip())
+    if problems:
+        return "; ".join(problems)[:500]
+    return None
 
 
-def edit_firewall_rule(rule_index, level="host", direction="IN", action="ACCEPT",
-                       protocol="tcp", dport="", sport="", source="", dest="", iface="", comment=""):
+def apply_firewall_changes(changes):
     """
-    Edit an existing firewall rule by replacing it in-place.
-    Deletes the old rule at rule_index and inserts the new one at the same position.
-    Returns (success, message)
+    Apply a batch of firewall rule changes in one pass.
+
+    `changes` is a list of dicts with ``op`` ("add", "edit" or "delete"),
+    ``level`` ("host" or "cluster", default host), ``rule_index`` for edit
+    and delete, and the rule fields (direction, action, protocol, dport,
+    sport, source, dest, iface, comment) for add and edit — either inline
+    or under ``new_rule``. Indices refer to the rules as they were before
+    the batch; added rules go to the top of [RULES] in the order given.
+
+    Every change is validated before anything is written. Each touched
+    file is then rewritten once under its lock, the result is checked
+    with one `pve-firewall compile` (files are restored if it fails) and
+    the firewall is reloaded once. Returns (success, message).
     """
-    # Validate inputs
-    action = action.upper()
-    if action not in ("ACCEPT", "DROP", "REJECT"):
-        return False, f"Invalid action: {action}. Must be ACCEPT, DROP, or REJECT"
-    direction = direction.upper()
-    if direction not in ("IN", "OUT"):
-        return False, f"Invalid direction: {direction}. Must be IN or OUT"
-
-    if level not in _FIREWALL_LEVELS:
-        return False, f"Invalid level: {level}. Must be one of {_FIREWALL_LEVELS}"
-
-    # See add_firewall_rule for the same rationale — keep both entry points
-    # consistent so they cannot be exploited via newline / shell-metachar
-    # injection. Audit Tier 1 #12c.
-    if not _is_valid_fw_endpoint(source):
-        return False, "Invalid source (only IP/CIDR/ipset/alias chars allowed)"
-    if not _is_valid_fw_endpoint(dest):
-        return False, "Invalid destination (only IP/CIDR/ipset/alias chars allowed)"
-    if not _is_valid_fw_iface(iface):
-        return False, "Invalid interface name"
-
-    # Build new rule line
-    parts = [direction, action]
-    if protocol:
-        proto = protocol.lower()
-        if proto not in _FIREWALL_PROTOCOLS:
-            return False, f"Invalid protocol: {protocol}. Must be one of {_FIREWALL_PROTOCOLS}"
-        parts.extend(["-p", proto])
-    if dport:
-        if not re.match(r'^[\d:,]+$', dport):
-            return False, f"Invalid destination port: {dport}"
-        parts.extend(["-dport", dport])
-    if sport:
-        if not re.match(r'^[\d:,]+$', sport):
-            return False, f"Invalid source port: {sport}"
-        parts.extend(["-sport", sport])
-    if source:
-        parts.extend(["-source", source])
-    # `dest` was previously dropped silently from edit_firewall_rule — that's
-    # the registered audit issue "edit_firewall_rule IGNORA dest". Honor it.
-    if dest:
-        parts.extend(["-dest", dest])
-    if iface:
-        parts.extend(["-i", iface])
-    parts.extend(["-log", "nolog"])
-    if comment:
-        # Same fix as add_firewall_rule: literal space, no `\s`, so newlines
-        # cannot escape the comment and inject another rule.
-        safe_comment = re.sub(r'[^\w \-._/():]', '', comment)
-        parts.append(f"# {safe_comment}")
-    new_rule_line = " ".join(parts)
-
-    # Determine target file
-    if level == "cluster":
-        fw_file = CLUSTER_FW
-    else:
-        fw_file = os.path.join(HOST_FW_DIR, "host.fw")
+    if not isinstance(changes, list) or not changes:
+        return False, "No firewall changes given"
+    if len(changes) > _FW_MAX_BATCH:
+        return False, f"Too many changes in one batch (max {_FW_MAX_BATCH})"
+
+    single = len(changes) == 1
+    planned = {}  # fw_file -> (level, [(prefix, op, rule_index, line, summary)])
+    for n, change in enumerate(changes):
+        prefix = "" if single else f"Change {n}: "
+        if not isinstance(change, dict):
+            return False, f"{prefix}must be an object"
+        op = str(change.get("op", "")).lower()
+        if op not in ("add", "edit", "delete"):
+            return False, f"{prefix}Invalid op: {op}. Must be add, edit, or delete"
+        level = change.get("level", "host")
+        if level not in _FIREWALL_LEVELS:
+            return False, f"{prefix}Invalid level: {level}. Must be one of {_FIREWALL_LEVELS}"
+
+        rule_index = None
+        if op in ("edit", "delete"):
+            try:
+                rule_index = int(change.get("rule_index"))
+            except (TypeError, ValueError):
+                return False, f"{prefix}rule_index is required"
+
+        line = summary = None
+        if op in ("add", "edit"):
+            fields = change.get("new_rule") if isinstance(change.get("new_rule"), dict) else change
+            line, summary, error = _build_fw_rule_line(
+                **{k: fields.get(k, default) for k, default in _FW_RULE_FIELDS.items()}
+            )
+            if error:
+                return False, f"{prefix}{error}"
 
-    if not os.path.isfile(fw_file):
-        return False, "Firewall config file not found"
+        fw_file = _fw_file_for_level(level)
+        planned.setdefault(fw_file, (level, []))[1].append((prefix, op, rule_index, line, summary))
 
+    done = {"add": [], "edit": [], "delete": []}
+    pending = {}    # fw_file -> (level, old content, new lines, new line numbers)
+    originals = {}  # fw_file -> previous content (None if it didn't exist)
+    written = {}
     try:
-        with _exclusive_file_lock(fw_file):
-            with open(fw_file, 'r') as f:
-                content = f.read()
-
-            lines = content.splitlines()
-            new_lines = []
-            in_rules = False
-            current_rule_idx = 0
-            replaced = False
-
-            for line in lines:
-                stripped = line.strip()
-                if stripped.startswith('['):
-                    section_match = re.match(r'\[(\w+)\]', stripped)
-                    if section_match:
-                        section = section_match.group(1).upper()
-                        in_rules = section in ("RULES", "IN", "OUT")
-
-                # Only count lines that look like real PVE firewall rules
-                # (`<DIR> <ACTION> ...`). Random malformed lines that pve-
-                # firewall would skip used to bump our index, which made
-                # "delete rule N" hit the wrong rule. Audit Tier 6 —
-                # delete/edit_firewall_rule desync de índices.
-                if in_rules and stripped and _is_pve_rule_line(stripped):
-                    if current_rule_idx == rule_index:
-                        new_lines.append(new_rule_line)
-                        replaced = True
-                        current_rule_idx += 1
+        with ExitStack() as stack:
+            # Fixed lock order so two batches touching both files can't deadlock.
+            for fw_file in sorted(planned):
+                level, ops = planned[fw_file]
+                if not os.path.isfile(fw_file) and any(op != "add" for _, op, _, _, _ in ops):
+                    return False, "Firewall config file not found"
+                stack.enter_context(_exclusive_file_lock(_fw_lock_path(fw_file)))
+
+            for fw_file in sorted(planned):
+                level, ops = planned[fw_file]
+                content = None
+                if os.path.isfile(fw_file):
+                    with open(fw_file, 'r') as f:
+                        content = f.read()
+                model = _build_fw_model((content or "").splitlines(), level)
+
+                adds = []
+                targets = {}  # line number -> (op, new line)
+                for prefix, op, rule_index, line, summary in ops:
+                    if op == "add":
+                        adds.append(line)
+                        done["add"].append(summary)
                         continue
-                    current_rule_idx += 1
+                    if not 0 <= rule_index < len(model["rule_lines"]):
+                        return False, f"{prefix}Rule index {rule_index} not found"
+                    lineno = model["rule_lines"][rule_index]
+                    if lineno in targets:
+                        return False, f"{prefix}Rule index {rule_index} is changed twice in this batch"
+                    targets[lineno] = (op, line)
+                    done[op].append(summary if op == "edit" else model["lines"][lineno].strip())
 
-                new_lines.append(line)
-
-            if not replaced:
-                return False, f"Rule index {rule_index} not found"
-
-            with open(fw_file, 'w') as f:
-                f.write("\n".join(new_lines) + "\n")
+                new_lines = []
+                new_linenos = set()
+                for lineno, old in enumerate(model["lines"]):
+                    if lineno in targets:
+                        op, line = targets[lineno]
+                        if op == "delete":
+                            continue
+                        new_lines.append(line)
+                        new_linenos.add(len(new_lines))
+                        continue
+                    new_lines.append(old)
+                    if lineno == model["rules_header"]:
+                        for line in adds:
+                            new_lines.append(line)
+                            new_linenos.add(len(new_lines))
+                if adds and model["rules_header"] is None:
+                    new_lines.extend(["", "[RULES]"])
+                    for line in adds:
+                        new_lines.append(line)
+                        new_linenos.add(len(new_lines))
+
+                pending[fw_file] = (level, content, new_lines, new_linenos)
+
+            for fw_file, (level, content, new_lines, new_linenos) in pending.items():
+                os.makedirs(os.path.dirname(fw_file), exist_ok=True)
+                originals[fw_file] = content
+                with open(fw_file, 'w') as f:
+                    f.write("\n".join(new_lines) + "\n")
+                written[fw_file] = new_linenos
+                _store_fw_model(fw_file, new_lines, level)
+
+            error = _fw_compile_errors(written)
+            if error:
+                _fw_restore(originals)
+                return False, f"pve-firewall rejected the changes, nothing applied: {error}"
 
         _run_cmd(["pve-firewall", "reload"])
-
-        return True, f"Firewall rule updated: {direction} {action} {protocol}{':' + dport if dport else ''}"
     except PermissionError:
+        _fw_restore(originals)
         return False, "Permission denied. Cannot modify firewall config."
     except Exception as e:
-        return False, f"Failed to edit rule: {str(e)}"
+        _fw_restore(originals)
+        return False, f"Failed to apply firewall changes: {str(e)}"
 
+    if single:
+        op = changes[0]["op"].lower()
+        verb = {"add": "added", "edit": "updated", "delete": "deleted"}[op]
+        return True, f"Firewall rule {verb}: {done[op][0]}"
+    return True, (f"Applied {len(changes)} firewall changes: {len(done['add'])} added, "
+                  f"{len(done['edit'])} updated, {len(done['delete'])} deleted")
 
-def delete_firewall_rule(rule_index, level="host"):
+
+def add_firewall_rule(direction="IN", action="ACCEPT", protocol="tcp", dport="", sport="",
+                      source="", dest="", iface="", comment="", level="host"):
     """
-    Delete a firewall rule by index from host or cluster config.
-    The index corresponds to the order of rules in [RULES] section.
+    Add a custom firewall rule to host or cluster firewall config.
     Returns (success, message)
     """
-    if level not in _FIREWALL_LEVELS:
-        return False, f"Invalid level: {level}. Must be one of {_FIREWALL_LEVELS}"
-    if level == "cluster":
-        fw_file = CLUSTER_FW
-    else:
-        fw_file = os.path.join(HOST_FW_DIR, "host.fw")
-
-    if not os.path.isfile(fw_file):
-        return False, "Firewall config file not found"
-
-    try:
-        with _exclusive_file_lock(fw_file):
-            with open(fw_file, 'r') as f:
-                content = f.read()
-
-            lines = content.splitlines()
-            new_lines = []
-            in_rules = False
-            current_rule_idx = 0
-            removed_rule = None
+    return apply_firewall_changes([{
+        "op": "add", "level": level, "direction": direction, "action": action,
+        "protocol": protocol, "dport": dport, "sport": sport, "source": source,
+        "dest": dest, "iface": iface, "comment": comment,
+    }])
 
-            for line in lines:
-                stripped = line.strip()
-                if stripped.startswith('['):
-                    section_match = re.match(r'\[(\w+)\]', stripped)
-                    if section_match:
-                        section = section_match.group(1).upper()
-                        in_rules = section in ("RULES", "IN", "OUT")
-
-                # Same rule-shape gate as edit_firewall_rule above — skip
-                # malformed lines so the index stays aligned with the
-                # rules pve-firewall actually reports.
-                if in_rules and stripped and _is_pve_rule_line(stripped):
-                    if current_rule_idx == rule_index:
-                        removed_rule = stripped
-                        current_rule_idx += 1
-                        continue  # Skip this line (delete it)
-                    current_rule_idx += 1
-
-                new_lines.append(line)
-
-            if removed_rule is None:
-                return False, f"Rule index {rule_index} not found"
 
-            with open(fw_file, 'w') as f:
-                f.write("\n".join(new_lines) + "\n")
+def edit_firewall_rule(rule_index, level="host", direction="IN", action="ACCEPT",
+                       protocol="tcp", dport="", sport="", source="", dest="", iface="", comment=""):
+    """
+    Edit an existing firewall rule by replacing it in-place.
+    Returns (success, message)
+    """
+    return apply_firewall_changes([{
+        "op": "edit", "level": level, "rule_index": rule_index, "direction": direction,
+        "action": action, "protocol": protocol, "dport": dport, "sport": sport,
+        "source": source, "dest": dest, "iface": iface, "comment": comment,
+    }])
 
-        _run_cmd(["pve-firewall", "reload"])
 
-        return True, f"Firewall rule deleted: {removed_rule}"
-    except PermissionError:
-        return False, "Permission denied. Cannot modify firewall config."
-    except Exception as e:
-        return False, f"Failed to delete rule: {str(e)}"
+def delete_firewall_rule(rule_index, level="host"):
+    """
+    Delete a firewall rule by index from host or cluster config.
+    The index corresponds to the order of rules in [RULES] section.
+    Returns (success, message)
+    """
+    return apply_firewall_changes([{"op": "delete", "level": level, "rule_index": rule_index}])
 
 
 def add_monitor_port_rule():
@@ -623,6 +680,7 @@ def add_monitor_port_rule():
 
         with open(host_fw, 'w') as f:
             f.write(content)
+        _invalidate_fw_model(host_fw)
 
         # Reload firewall
         _run_cmd(["pve-firewall", "reload"])
@@ -661,6 +719,7 @@ def remove_monitor_port_rule():
 
         with open(host_fw, 'w') as f:
             f.writelines(new_lines)
+        _invalidate_fw_model(host_fw)
 
         _run_cmd(["pve-firewall", "reload"])
 
@@ -744,6 +803,7 @@ def _set_firewall_enabled(fw_file, enabled):
 
         with open(fw_file, 'w') as f:
             f.write("\n".join(new_lines) + "\n")
+        _invalidate_fw_model(fw_file)
 
         # Reload or start the firewall service
         if enabled:
@@ -774,89 +834,19 @@ def get_fail2ban_details():
     Get detailed Fail2Ban info: per-jail banned IPs, ban times, etc.
     Returns dict with detailed jail information.
     """
+    snap = fail2ban_socket.get_snapshot()
     result = {
-        "installed": False,
-        "active": False,
-        "version": "",
+        "installed": snap["installed"],
+        "active": snap["active"],
+        "version": snap["version"],
         "jails": [],
     }
-
-    rc, out, _ = _run_cmd(["fail2ban-client", "--version"])
-    if rc != 0:
-        return result
-
-    result["installed"] = True
-    result["version"] = out.split("\n")[0].strip() if out else ""
-
-    rc2, out2, _ = _run_cmd(["systemctl", "is-active", "fail2ban"])
-    result["active"] = (rc2 == 0 and out2 == "active")
-
-    if not result["active"]:
-        return result
-
-    # Get jail list
-    rc3, out3, _ = _run_cmd(["fail2ban-client", "status"])
-    jail_names = []
-    if rc3 == 0:
-        for line in out3.splitlines():
-            if "Jail list:" in line:
-                jails_str = line.split(":", 1)[1].strip()
-                jail_names = [j.strip() for j in jails_str.split(",") if j.strip()]
-
-    # Get detailed info per jail
-    for jail_name in jail_names:
-        jail_info = {
-            "name": jail_name,
-            "currently_failed": 0,
-            "total_failed": 0,
-            "currently_banned": 0,
-            "total_banned": 0,
-            "banned_ips": [],
-            "findtime": "",
-            "bantime": "",
-            "maxretry": "",
-        }
-
-        rc4, out4, _ = _run_cmd(["fail2ban-client", "status", jail_name])
-        if rc4 == 0:
-            for line in out4.splitlines():
-                line = line.strip()
-                if "Currently failed:" in line:
-                    try:
-                        jail_info["currently_failed"] = int(line.split(":", 1)[1].strip())
-                    except ValueError:
-                        pass
-                elif "Total failed:" in line:
-                    try:
-                        jail_info["total_failed"] = int(line.split(":", 1)[1].strip())
-                    except ValueError:
-                        pass
-                elif "Currently banned:" in line:
-                    try:
-                        jail_info["currently_banned"] = int(line.split(":", 1)[1].strip())
-                    except ValueError:
-                        pass
-                elif "Total banned:" in line:
-                    try:
-                        jail_info["total_banned"] = int(line.split(":", 1)[1].strip())
-                    except ValueError:
-                        pass
-                elif "Banned IP list:" in line:
-                    ips_str = line.split(":", 1)[1].strip()
-                    if ips_str:
-                        raw_ips = [ip.strip() for ip in ips_str.split() if ip.strip()]
-                        jail_info["banned_ips"] = [
-                            {"ip": ip, "type": classify_ip(ip)} for ip in raw_ips
-                        ]
-
-        # Get jail config values
-        for key in ["findtime", "bantime", "maxretry"]:
-            rc5, out5, _ = _run_cmd(["fail2ban-client", "get", jail_name, key])
-            if rc5 == 0 and out5:
-                jail_info[key] = out5.strip()
-
+    for jail in snap["jails"]:
+        jail_info = dict(jail)
+        jail_info["banned_ips"] = [
+            {"ip": ip, "type": classify_ip(ip)} for ip in jail["banned_ips"]
+        ]
         result["jails"].append(jail_info)
-
     return result
 
 
@@ -948,6 +938,7 @@ def update_jail_config(jail_name, maxretry=None, bantime=None, findtime=None):
     # Also persist to jail.local so changes survive restart
     if changes:
         _persist_jail_config(jail_name, maxretry, bantime, findtime)
+        fail2ban_socket.invalidate()
 
     if errors:
         return False, "Errors: " + "; ".join(errors)
@@ -1169,6 +1160,7 @@ findtime = 600
         _run_cmd(["systemctl", "restart", "fail2ban"])
         import time
         time.sleep(2)
+        fail2ban_socket.invalidate()
 
     if errors:
         return False, "Errors: " + "; ".join(errors), applied
@@ -1191,12 +1183,42 @@ def unban_ip(jail_name, ip_address):
         return False, f"Invalid IP address format: {ip_address}"
 
     rc, out, err = _run_cmd(["fail2ban-client", "set", jail_name, "unbanip", ip_address])
+    fail2ban_socket.invalidate()
     if rc == 0:
         return True, f"IP {ip_address} has been unbanned from jail '{jail_name}'"
     else:
         return False, f"Failed to unban IP: {err or out}"
 
 
+# `2026-05-19 10:42:01,123 fail2ban.actions [812]: NOTICE  [proxmenux] Ban 203.0.113.7`
+# Also matches `Restore Ban` (replayed at fail2ban start) and CIDR targets
+# banned by hand with `banip 198.51.100.0/24`.
+_F2B_LOG_EVENT_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})[,\d]*\s+.*\[([\w.-]+)\]\s+'
+    r'(Restore\s+Ban|Ban|Unban|Found)\s+([\d.:a-fA-F/]+)'
+)
+_F2B_LOG_ACTIONS = {"Ban": "ban", "Unban": "unban", "Found": "found"}
+
+
+def parse_fail2ban_log_line(line):
+    """Parse one /var/log/fail2ban.log line into an event dict
+    (`timestamp`, `jail`, `ip`, `action` in ban/unban/found, plus
+    `restored: True` for `Restore Ban`), or None for anything else."""
+    m = _F2B_LOG_EVENT_RE.search(line)
+    if not m:
+        return None
+    verb = m.group(3)
+    event = {
+        "timestamp": m.group(1),
+        "jail": m.group(2),
+        "ip": m.group(4),
+        "action": _F2B_LOG_ACTIONS.get(verb, "ban"),
+    }
+    if verb.startswith("Restore"):
+        event["restored"] = True
+    return event
+
+
 def get_fail2ban_recent_activity(lines=50):
     """
     Get recent Fail2Ban log activity (bans and unbans).
@@ -1226,50 +1248,10 @@ def get_fail2ban_recent_activity(lines=50):
             return events
 
         for line in out.splitlines():
-            event = None
-
-            # Parse ban events
-            ban_match = re.search(
-                r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})[,\d]*\s+.*\[(\w+)\]\s+Ban\s+([\d.:a-fA-F]+)',
-                line
-            )
-            if ban_match:
-                event = {
-                    "timestamp": ban_match.group(1),
-                    "jail": ban_match.group(2),
-                    "ip": ban_match.group(3),
-                    "action": "ban",
-                }
-
-            # Parse unban events
-            if not event:
-                unban_match = re.search(
-                    r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})[,\d]*\s+.*\[(\w+)\]\s+Unban\s+([\d.:a-fA-F]+)',
-                    line
-                )
-                if unban_match:
-                    event = {
-                        "timestamp": unban_match.group(1),
-                        "jail": unban_match.group(2),
-                        "ip": unban_match.group(3),
-                        "action": "unban",
-                    }
-
-            # Parse found (failed attempt) events
-            if not event:
-                found_match = re.search(
-                    r'(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2})[,\d]*\s+.*\[(\w+)\]\s+Found\s+([\d.:a-fA-F]+)',
-                    line
-                )
-                if found_match:
-                    event = {
-                        "timestamp": found_match.group(1),
-                        "jail": found_match.group(2),
-                        "ip": found_match.group(3),
-                        "action": "found",
-                    }
-
-            if event:
+            event = parse_fail2ban_log_line(line)
+            # Restored bans are replayed on every fail2ban restart — they
+            # aren't new activity.
+            if event and not event.get("restored"):
                 events.append(event)
 
         # Return most recent first
@@ -1299,48 +1281,15 @@ def detect_security_tools():
 
 def _detect_fail2ban():
     """Detect Fail2Ban installation and status"""
-    info = {
-        "installed": False,
-        "active": False,
-        "version": "",
-        "jails": [],
-        "banned_ips_count": 0,
+    snap = fail2ban_socket.get_snapshot()
+    return {
+        "installed": snap["installed"],
+        "active": snap["active"],
+        "version": snap["version"],
+        "jails": [jail["name"] for jail in snap["jails"]],
+        "banned_ips_count": sum(jail["currently_banned"] for jail in snap["jails"]),
     }
 
-    rc, out, _ = _run_cmd(["fail2ban-client", "--version"])
-    if rc == 0:
-        info["installed"] = True
-        info["version"] = out.split("\n")[0].strip() if out else ""
-
-        # Check service status
-        rc2, out2, _ = _run_cmd(["systemctl", "is-active", "fail2ban"])
-        info["active"] = (rc2 == 0 and out2 == "active")
-
-        if info["active"]:
-            # Get jails
-            rc3, out3, _ = _run_cmd(["fail2ban-client", "status"])
-            if rc3 == 0:
-                for line in out3.splitlines():
-                    if "Jail list:" in line:
-                        jails_str = line.split(":", 1)[1].strip()
-                        info["jails"] = [j.strip() for j in jails_str.split(",") if j.strip()]
-
-            # Count banned IPs across all jails
-            total_banned = 0
-            for jail in info["jails"]:
-                rc4, out4, _ = _run_cmd(["fail2ban-client", "status", jail])
-                if rc4 == 0:
-                    for line in out4.splitlines():
-                        if "Currently banned:" in line:
-                            try:
-                                count = int(line.split(":", 1)[1].strip())
-                                total_banned += count
-                            except ValueError:
-                                pass
-            info["banned_ips_count"] = total_banned
-
-    return info
-
 
 def _find_lynis_cmd():
     """Find the lynis binary path"""
@@ -1516,6 +1465,12 @@ def run_lynis_audit():
             _lynis_audit_progress = f"error: {str(e)}"
         finally:
             _lynis_audit_running = False
+            # Rebuild the cached report (and its diff against the previous
+            # audit) now, so the next page load doesn't pay for the parse.
+            try:
+                parse_lynis_report()
+            except Exception:
+                pass
 
     t = threading.Thread(target=_run_audit, daemon=True)
     t.start()
@@ -1530,11 +1485,14 @@ def get_lynis_audit_status():
     }
 
 
-def parse_lynis_report():
+def _parse_lynis_report_files():
     """
     Parse /var/log/lynis-report.dat into structured report data.
     Also enriches with data from lynis.log when report.dat is sparse.
     Returns a dict with all audit findings.
+
+    Does the full parse every time — callers want `parse_lynis_report`,
+    which caches the result.
     """
     report_file = "/var/log/lynis-report.dat"
     output_file = "/var/log/lynis-output.log"
@@ -2195,6 +2153,130 @@ def parse_lynis_report():
     return report
 
 
+# The report only changes when an audit finishes (or someone runs lynis by
+# hand), but the Security page and `_detect_lynis` asked for it on every
+# load — each time re-reading report.dat, the multi-MB output log and
+# shelling out to `dpkg -l`. The parsed report is kept in memory and in
+# `_LYNIS_CACHE_FILE`, keyed by the (mtime, size) of the source files, so
+# it survives restarts and is only rebuilt when those files change. A
+# rebuild also diffs the findings against the report it replaces.
+_LYNIS_SOURCE_FILES = (
+    "/var/log/lynis-report.dat",
+    "/var/log/lynis-output.log",
+    "/var/log/lynis.log",
+)
+_LYNIS_CACHE_FILE = "/usr/local/share/proxmenux/lynis_report_cache.json"
+_LYNIS_CACHE_VERSION = 1
+
+_lynis_cache_lock = threading.Lock()
+_lynis_cache = {"loaded": False, "signature": None, "report": None}
+
+
+def _lynis_source_signature():
+    """[(path, mtime_ns, size), ...] for the Lynis files that exist."""
+    sig = []
+    for path in _LYNIS_SOURCE_FILES:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        sig.append([path, st.st_mtime_ns, st.st_size])
+    return sig
+
+
+def _load_lynis_cache_file():
+    try:
+        with open(_LYNIS_CACHE_FILE, 'r') as f:
+            data = json.load(f)
+        if data.get("version") == _LYNIS_CACHE_VERSION and isinstance(data.get("report"), dict):
+            _lynis_cache["signature"] = data.get("signature")
+            _lynis_cache["report"] = data["report"]
+    except (OSError, ValueError):
+        pass
+    _lynis_cache["loaded"] = True
+
+
+def _save_lynis_cache_file():
+    tmp = _LYNIS_CACHE_FILE + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(_LYNIS_CACHE_FILE), exist_ok=True)
+        with open(tmp, 'w') as f:
+            json.dump({
+                "version": _LYNIS_CACHE_VERSION,
+                "signature": _lynis_cache["signature"],
+                "report": _lynis_cache["report"],
+            }, f)
+        os.replace(tmp, _LYNIS_CACHE_FILE)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _lynis_finding_key(finding):
+    return (finding.get("test_id", ""), finding.get("description", ""))
+
+
+def _diff_lynis_reports(previous, current):
+    """New / resolved warnings and suggestions of `current` vs `previous`."""
+    diff = {
+        "previous_scan": previous.get("datetime_start", ""),
+        "previous_hardening_index": previous.get("hardening_index"),
+        "hardening_index_delta": None,
+    }
+    if current.get("hardening_index") is not None and previous.get("hardening_index") is not None:
+        diff["hardening_index_delta"] = current["hardening_index"] - previous["hardening_index"]
+    for kind in ("warnings", "suggestions"):
+        before = {_lynis_finding_key(f): f for f in previous.get(kind, [])}
+        after = {_lynis_finding_key(f): f for f in current.get(kind, [])}
+        diff[f"new_{kind}"] = [f for k, f in after.items() if k not in before]
+        diff[f"resolved_{kind}"] = [f for k, f in before.items() if k not in after]
+    return diff
+
+
+def parse_lynis_report():
+    """
+    Parsed Lynis report (see `_parse_lynis_report_files`), rebuilt only when
+    the report files change. Carries a ``diff`` key comparing it with the
+    previous audit (None when there is nothing to compare against).
+    Returns None when there is no report on disk.
+    """
+    import copy
+
+    with _lynis_cache_lock:
+        if not _lynis_cache["loaded"]:
+            _load_lynis_cache_file()
+
+        # While an audit runs the old report.dat is gone and the output log
+        # is half written — keep serving the last complete report.
+        if _lynis_audit_running and _lynis_cache["report"] is not None:
+            return copy.deepcopy(_lynis_cache["report"])
+
+        sig = _lynis_source_signature()
+        if not sig:
+            return None
+        if sig == _lynis_cache["signature"] and _lynis_cache["report"] is not None:
+            return copy.deepcopy(_lynis_cache["report"])
+
+        report = _parse_lynis_report_files()
+        if report is None:
+            return None
+        previous = _lynis_cache["report"]
+        if previous is not None and previous.get("datetime_start") != report.get("datetime_start"):
+            report["diff"] = _diff_lynis_reports(previous, report)
+        elif previous is not None:
+            # Same audit, files merely touched — keep the diff it already had.
+            report["diff"] = previous.get("diff")
+        else:
+            report["diff"] = None
+
+        _lynis_cache["signature"] = sig
+        _lynis_cache["report"] = report
+        _save_lynis_cache_file()
+        return copy.deepcopy(report)
+
+
 # -------------------------------------------------------------------
 # Uninstall Functions
 # -------------------------------------------------------------------
@@ -2290,6 +2372,7 @@ def uninstall_fail2ban():
             except Exception:
                 pass
         
+        fail2ban_socket.invalidate()
         return True, "Fail2Ban has been uninstalled successfully"
     except Exception as e:
         return False, f"Error uninstalling Fail2Ban: {str(e)}"
@@ -2316,9 +2399,12 @@ def uninstall_lynis():
             "/var/log/lynis-report.dat",
             "/var/log/lynis.log",
             "/var/log/lynis-output.log",
+            _LYNIS_CACHE_FILE,
         ]:
             if os.path.exists(report_file):
                 os.remove(report_file)
+        with _lynis_cache_lock:
+            _lynis_cache.update(loaded=True, signature=None, report=None)
         
         # Update component status
         base_dir = "/usr/local/share/proxmenux"
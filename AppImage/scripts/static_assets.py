@@ -0,0 +1,261 @@
+"""Static asset layer for the Next.js export shipped in ``<APPDIR>/web``.
+
+The dashboard routes in flask_server used to recompute the AppImage root,
+``os.path.exists`` the file and hand it to ``send_file`` on every hit,
+with Flask's default caching headers and no compression — so every
+browser reload pulled the whole ``_next`` bundle over the management
+link again.
+
+Here the ``web/`` tree is indexed once (path → size, mimetype, strong
+ETag from the content hash, precompressed siblings). Requests are then a
+dict lookup:
+
+  * ``_next/static/*`` is content-hashed by Next.js, so it is served with
+    ``Cache-Control: public, max-age=31536000, immutable``; HTML gets
+    ``no-cache`` (always revalidated, so a new release is picked up) and
+    everything else a short max-age.
+  * ``If-None-Match`` is answered with 304 from the index, without
+    touching the file.
+  * ``Accept-Encoding`` picks a ``.br`` / ``.gz`` sibling generated at
+    AppImage build time. When one is missing (dev trees, odd files) a gzip
+    variant is produced on first request and kept in a bounded in-memory
+    cache — the AppImage mount is read-only, so nothing is written back.
+
+Only files that were in the tree when it was indexed are served, which
+also closes off ``..`` tricks in the catch-all routes.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+
+from flask import Response, request, send_file
+
+try:
+    import brotli  # optional — only used for lazily built variants
+except ImportError:
+    brotli = None
+
+_COMPRESSIBLE_EXTS = {
+    ".js", ".mjs", ".css", ".html", ".json", ".map", ".svg", ".txt",
+    ".xml", ".webmanifest", ".ico",
+}
+_MIN_COMPRESS_SIZE = 1024
+_LAZY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_IMMUTABLE_PREFIX = "_next/static/"
+_CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+_CACHE_REVALIDATE = "no-cache"
+_CACHE_DEFAULT = "public, max-age=3600"
+
+_index_lock = threading.Lock()
+_index = None          # relpath -> entry dict
+
+_lazy_lock = threading.Lock()
+_lazy_variants = {}    # (relpath, encoding) -> bytes
+_lazy_bytes = 0
+
+
+def get_web_root():
+    """``<APPDIR>/web``, falling back to the script location when APPDIR
+    isn't set (running from a source checkout)."""
+    appimage_root = os.environ.get("APPDIR")
+    if not appimage_root:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        if base_dir.endswith("usr/bin"):
+            # We're in usr/bin/, go up 2 levels to AppImage root
+            appimage_root = os.path.dirname(os.path.dirname(base_dir))
+        else:
+            appimage_root = os.path.dirname(base_dir)
+    return os.path.join(appimage_root, "web")
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()[:20]
+
+
+def _build_index(root):
+    entries = {}
+    siblings = {}
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            if name.endswith(".br") or name.endswith(".gz"):
+                base, ext = rel.rsplit(".", 1)
+                siblings.setdefault(base, {})["br" if ext == "br" else "gzip"] = full
+                continue
+            try:
+                st = os.stat(full)
+                digest = _hash_file(full)
+            except OSError:
+                continue
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if rel.startswith(_IMMUTABLE_PREFIX):
+                cache_control = _CACHE_IMMUTABLE
+            elif name.endswith(".html"):
+                cache_control = _CACHE_REVALIDATE
+            else:
+                cache_control = _CACHE_DEFAULT
+            entries[rel] = {
+                "path": full,
+                "size": st.st_size,
+                "mimetype": mimetype,
+                "digest": digest,
+                "cache_control": cache_control,
+                "compressible": (os.path.splitext(name)[1].lower() in _COMPRESSIBLE_EXTS
+                                 and st.st_size >= _MIN_COMPRESS_SIZE),
+                "variants": {},
+            }
+    for base, variants in siblings.items():
+        entry = entries.get(base)
+        if entry is not None:
+            entry["variants"] = variants
+        # An orphan `foo.gz` (real gzip download, no `foo` next to it)
+        # is a file in its own right.
+        else:
+            for enc, full in variants.items():
+                rel = os.path.relpath(full, root).replace(os.sep, "/")
+                mimetype = mimetypes.guess_type(full)[0] or "application/octet-stream"
+                try:
+                    entries[rel] = {
+                        "path": full, "size": os.path.getsize(full),
+                        "mimetype": mimetype, "digest": _hash_file(full),
+                        "cache_control": _CACHE_DEFAULT, "compressible": False,
+                        "variants": {},
+                    }
+                except OSError:
+                    continue
+    return entries
+
+
+def _get_index():
+    global _index
+    if _index is not None:
+        return _index
+    with _index_lock:
+        if _index is None:
+            root = get_web_root()
+            _index = _build_index(root) if os.path.isdir(root) else {}
+            print(f"[ProxMenux] Static assets indexed: {len(_index)} files from {root}")
+    return _index
+
+
+def warm_index():
+    """Index the web tree now instead of on the first asset request."""
+    _get_index()
+
+
+def lookup(relpath):
+    """Index entry for a URL path relative to ``web/``, or None."""
+    rel = posixpath.normpath(relpath.lstrip("/"))
+    if rel.startswith("..") or rel == ".":
+        return None
+    return _get_index().get(rel)
+
+
+def accepted_encodings():
+    """Content codings the client accepts (q > 0), lower-cased."""
+    accepted = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return {enc for enc, q in accepted.items() if q > 0}
+
+
+def _lazy_variant(rel, entry, encoding):
+    global _lazy_bytes
+    key = (rel, encoding)
+    with _lazy_lock:
+        data = _lazy_variants.get(key)
+    if data is not None:
+        return data
+    with open(entry["path"], "rb") as f:
+        raw = f.read()
+    if encoding == "br":
+        data = brotli.compress(raw, quality=5)
+    else:
+        data = gzip.compress(raw, compresslevel=6, mtime=0)
+    if len(data) >= len(raw):
+        data = b""  # not worth it — remembered so we don't retry
+    with _lazy_lock:
+        if _lazy_bytes + len(data) <= _LAZY_CACHE_MAX_BYTES:
+            _lazy_variants[key] = data
+            _lazy_bytes += len(data)
+    return data
+
+
+def _if_none_match(etag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def serve(relpath):
+    """Response for ``web/<relpath>``, or None if it isn't in the tree."""
+    entry = lookup(relpath)
+    if entry is None:
+        return None
+    rel = posixpath.normpath(relpath.lstrip("/"))
+
+    encoding = None
+    body = None
+    accepted = accepted_encodings() if entry["compressible"] else set()
+    for enc in ("br", "gzip"):
+        if enc not in accepted:
+            continue
+        if enc in entry["variants"]:
+            encoding = enc
+            break
+        if enc == "br" and brotli is None:
+            continue
+        data = _lazy_variant(rel, entry, enc)
+        if data:
+            encoding, body = enc, data
+            break
+
+    etag = f'"{entry["digest"]}-{encoding}"' if encoding else f'"{entry["digest"]}"'
+    headers = {"ETag": etag, "Cache-Control": entry["cache_control"]}
+    if entry["compressible"]:
+        headers["Vary"] = "Accept-Encoding"
+
+    if _if_none_match(etag):
+        return Response(status=304, headers=headers)
+
+    if body is not None:
+        response = Response(body, mimetype=entry["mimetype"])
+    else:
+        path = entry["variants"][encoding] if encoding else entry["path"]
+        response = send_file(path, mimetype=entry["mimetype"], conditional=False,
+                             etag=False, max_age=None)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    for key, value in headers.items():
+        response.headers[key] = value
+    return response
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Check fail2ban_socket against a stand-in Fail2Ban server.
+Usage: python3 test_fail2ban_socket.py [--real]
+
+Without arguments a small server speaking the fail2ban socket protocol
+(pickled argv + <F2B_END_COMMAND>) is started on a temporary socket with
+two jails, and the adapter's snapshot is checked against it. Ban lists
+are sent as fail2ban-style IPAddr objects, like the real server does.
+
+With --real the snapshot is taken from the local Fail2Ban server and
+printed, together with how long it took.
+"""
+
+import os
+import pickle
+import socket
+import sys
+import tempfile
+import threading
+import time
+import types
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import fail2ban_socket
+
+END = b"<F2B_END_COMMAND>"
+CLOSE = b"<F2B_CLOSE_COMMAND>"
+
+# Give the stand-in an importable `fail2ban.server.ipdns.IPAddr` so its
+# replies pickle the same global the real server sends.
+_ipdns = types.ModuleType("fail2ban.server.ipdns")
+
+
+class IPAddr:
+    __slots__ = ("_raw", "_family")
+
+    def __init__(self, raw):
+        self._raw = raw
+        self._family = socket.AF_INET6 if ":" in raw else socket.AF_INET
+
+    def __reduce__(self):
+        return (IPAddr, (self._raw,))
+
+
+IPAddr.__module__ = "fail2ban.server.ipdns"
+_ipdns.IPAddr = IPAddr
+sys.modules.setdefault("fail2ban", types.ModuleType("fail2ban"))
+sys.modules.setdefault("fail2ban.server", types.ModuleType("fail2ban.server"))
+sys.modules["fail2ban.server.ipdns"] = _ipdns
+
+JAILS = {
+    "sshd": {"failed": (2, 40), "banned": ["203.0.113.7", "2001:db8::1"], "total_banned": 9,
+             "findtime": 600, "bantime": 3600, "maxretry": 5},
+    "proxmenux": {"failed": (0, 3), "banned": [], "total_banned": 1,
+                  "findtime": 600, "bantime": 3600, "maxretry": 3},
+}
+
+
+def answer(cmd):
+    if cmd == ["version"]:
+        return 0, "1.0.2"
+    if cmd == ["status"]:
+        return 0, [("Number of jail", len(JAILS)), ("Jail list", ", ".join(JAILS))]
+    if len(cmd) == 2 and cmd[0] == "status" and cmd[1] in JAILS:
+        j = JAILS[cmd[1]]
+        return 0, [
+            ("Filter", [("Currently failed", j["failed"][0]), ("Total failed", j["failed"][1]),
+                        ("File list", ["/var/log/auth.log"])]),
+            ("Actions", [("Currently banned", len(j["banned"])), ("Total banned", j["total_banned"]),
+                         ("Banned IP list", [IPAddr(ip) for ip in j["banned"]])]),
+        ]
+    if len(cmd) == 3 and cmd[0] == "get" and cmd[1] in JAILS and cmd[2] in JAILS[cmd[1]]:
+        return 0, JAILS[cmd[1]][cmd[2]]
+    return 1, KeyError(f"unknown command {cmd}")
+
+
+def serve(server_sock):
+    while True:
+        try:
+            conn, _ = server_sock.accept()
+        except OSError:
+            return
+        buf = b""
+        with conn:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                buf += chunk
+                while END in buf:
+                    msg, buf = buf.split(END, 1)
+                    if msg == CLOSE:
+                        break
+                    conn.sendall(pickle.dumps(answer(pickle.loads(msg)), 4) + END)
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def run_standin():
+    tmpdir = tempfile.mkdtemp()
+    path = os.path.join(tmpdir, "fail2ban.sock")
+    server_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server_sock.bind(path)
+    server_sock.listen(4)
+    threading.Thread(target=serve, args=(server_sock,), daemon=True).start()
+
+    fail2ban_socket._F2B_CONF_FILES = ()
+    fail2ban_socket.DEFAULT_SOCKET_PATH = path
+
+    snap = {"installed": True, "active": False, "version": "", "jails": [], "source": None}
+    start = time.perf_counter()
+    fail2ban_socket._collect_socket(snap)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    jails = {j["name"]: j for j in snap["jails"]}
+    results = [
+        check("version", snap["version"] == "Fail2Ban v1.0.2"),
+        check("active via socket", snap["active"] and snap["source"] == "socket"),
+        check("jail list", list(jails) == ["sshd", "proxmenux"]),
+        check("counters", jails["sshd"]["currently_failed"] == 2 and jails["sshd"]["total_failed"] == 40
+              and jails["sshd"]["currently_banned"] == 2 and jails["sshd"]["total_banned"] == 9),
+        check("banned IPs decoded", jails["sshd"]["banned_ips"] == ["203.0.113.7", "2001:db8::1"]),
+        check("settings", jails["proxmenux"]["maxretry"] == "3" and jails["sshd"]["bantime"] == "3600"),
+        check("jail_banned_ips", fail2ban_socket.jail_banned_ips("sshd") == {"203.0.113.7", "2001:db8::1"}),
+    ]
+    try:
+        with fail2ban_socket.Fail2BanSocket() as conn:
+            conn.send("status", "nope")
+        results.append(check("server error raised", False))
+    except fail2ban_socket.Fail2BanError:
+        results.append(check("server error raised", True))
+
+    print(f"snapshot over the socket: {elapsed:.1f} ms")
+    server_sock.close()
+    return all(results)
+
+
+def run_real():
+    start = time.perf_counter()
+    snap = fail2ban_socket.get_snapshot(max_age=0)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"source={snap['source']} installed={snap['installed']} active={snap['active']} "
+          f"version={snap['version']!r} ({elapsed:.0f} ms)")
+    for jail in snap["jails"]:
+        print(f"  {jail['name']}: banned {jail['currently_banned']} {jail['banned_ips'][:5]} "
+              f"failed {jail['currently_failed']} maxretry={jail['maxretry']} "
+              f"bantime={jail['bantime']} findtime={jail['findtime']}")
+
+
+def main():
+    if "--real" in sys.argv[1:]:
+        run_real()
+        return
+    sys.exit(0 if run_standin() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Check the fs_probe worker pool.
+Usage: python3 test_fs_probe.py
+
+A hung mount is simulated by stopping a pooled worker with SIGSTOP so it
+never answers. Checks that:
+
+  * stat / statvfs / mountpoint results match what the syscalls say;
+  * a second sweep reuses the same worker processes (no forks);
+  * a stuck worker costs one timeout for its path, is replaced, and the
+    rest of the batch still completes.
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import fs_probe
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def pool_pids():
+    with fs_probe._pool:
+        return sorted(w.proc.pid for w in fs_probe._idle)
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    missing = os.path.join(tmp, "missing")
+    results = []
+
+    stats = fs_probe.stat_paths(["/", tmp, missing])
+    results.append(check("stat results", [s["reachable"] for s in stats] == [True, True, False]
+                         and "No such file" in stats[2]["error"]))
+
+    st = os.statvfs(tmp)
+    cap = fs_probe.statvfs_paths([tmp])[0]
+    results.append(check("statvfs matches df semantics",
+                         cap["total_bytes"] == st.f_blocks * st.f_frsize
+                         and cap["available_bytes"] is not None))
+
+    probes = fs_probe.probe_paths([tmp, missing])
+    results.append(check("probe skips capacity for unreachable paths",
+                         probes[0]["reachable"] and probes[0]["total_bytes"]
+                         and not probes[1]["reachable"] and probes[1]["total_bytes"] is None))
+
+    mps = fs_probe.mountpoint_paths(["/", tmp, missing])
+    results.append(check("mountpoint results",
+                         mps[0] == {"exists": True, "is_mountpoint": True, "error": None}
+                         and mps[2]["exists"] is False))
+
+    before = pool_pids()
+    fs_probe.stat_paths([tmp] * 20)
+    results.append(check(f"sweep reuses the pool ({len(before)} workers)",
+                         before and pool_pids() == before))
+
+    stuck = before[0]
+    os.kill(stuck, signal.SIGSTOP)
+    start = time.monotonic()
+    out = fs_probe.stat_paths([tmp] * 12, timeout=1)
+    elapsed = time.monotonic() - start
+    timed_out = [r for r in out if r["timed_out"]]
+    results.append(check(f"stuck worker times out once ({elapsed:.2f}s)",
+                         len(timed_out) == 1 and sum(r["reachable"] for r in out) == 11
+                         and elapsed < 2))
+    fs_probe.stat_paths([tmp] * 12)
+    after = pool_pids()
+    results.append(check("stuck worker replaced", stuck not in after
+                         and len(after) == len(before)))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
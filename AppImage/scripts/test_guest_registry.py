@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Check guest_registry against a fake /etc/pve tree.
+Usage: python3 test_guest_registry.py
+
+Builds a two-node layout with .version/.vmlist like pmxcfs exposes and
+checks that:
+
+  * lookups by vmid, name, MAC, PCI address, device and storage work,
+    ignoring snapshot sections;
+  * nothing is re-read while .version doesn't move;
+  * a version bump re-parses only the config that changed, and drops
+    deleted guests;
+  * a same-size edit that keeps the mtime (pmxcfs stores seconds) is
+    still picked up through the guest's .vmlist version;
+  * without .vmlist/.version the node directories are scanned instead.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import guest_registry
+
+VM_100 = """boot: order=scsi0
+hostpci0: 0000:03:00.1,pcie=1
+name: web
+net0: virtio=BC:24:11:AA:BB:01,bridge=vmbr0
+onboot: 1
+scsi0: local-lvm:vm-100-disk-0,size=32G
+ide2: none,media=cdrom
+
+[pre-upgrade]
+hostpci1: 0000:04:00.0
+name: old-web
+"""
+
+CT_101 = """hostname: db
+dev0: /dev/dri/renderD128,gid=104
+net0: name=eth0,bridge=vmbr0,hwaddr=BC:24:11:AA:BB:02,ip=dhcp
+rootfs: local-zfs:subvol-101-disk-0,size=8G
+mp0: /srv/share,mp=/mnt/share
+"""
+
+VM_200 = """name: remote
+scsi0: ceph:vm-200-disk-0,size=8G
+hostpci0: 05:00.0
+"""
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def reset(pve):
+    guest_registry._PVE_DIR = pve
+    guest_registry._state.update({"token": None, "checked_at": 0.0, "node": None})
+    guest_registry._guests.clear()
+    guest_registry._sigs.clear()
+
+
+def main():
+    pve = tempfile.mkdtemp()
+    write(f"{pve}/nodes/pve1/qemu-server/100.conf", VM_100)
+    write(f"{pve}/nodes/pve1/lxc/101.conf", CT_101)
+    write(f"{pve}/nodes/pve2/qemu-server/200.conf", VM_200)
+    os.symlink(f"{pve}/nodes/pve1", f"{pve}/local")
+    write(f"{pve}/.version", json.dumps({"version": 10}))
+    write(f"{pve}/.vmlist", json.dumps({"version": 3, "ids": {
+        "100": {"node": "pve1", "type": "qemu", "version": 1},
+        "101": {"node": "pve1", "type": "lxc", "version": 2},
+        "200": {"node": "pve2", "type": "qemu", "version": 3},
+    }}))
+    reset(pve)
+
+    reads = []
+    real_parse = guest_registry.parse_config
+
+    def counting(text, gtype):
+        reads.append(gtype)
+        return real_parse(text, gtype)
+
+    guest_registry.parse_config = counting
+    results = []
+
+    vm = guest_registry.get("100")
+    results.append(check("VM parsed, snapshot section ignored",
+                         vm["name"] == "web" and vm["onboot"] and vm["pci"] == ["03:00.1"]
+                         and vm["storages"] == ["local-lvm"] and vm["local"]))
+    results.append(check("lookups by name / MAC / PCI / device / storage",
+                         guest_registry.by_name("WEB") == ["100"]
+                         and guest_registry.by_mac("bc:24:11:aa:bb:02") == "101"
+                         and guest_registry.by_pci("0000:03:00.1") == "100"
+                         and guest_registry.by_pci("04:00.0") is None
+                         and guest_registry.by_device("/dev/dri/renderD128") == "101"
+                         and guest_registry.by_storage("local-zfs") == ["101"]))
+    results.append(check("remote guests exist but are not local",
+                         guest_registry.exists("200") and not guest_registry.exists("200", local=True)
+                         and guest_registry.by_pci("05:00.0") is None
+                         and not guest_registry.exists("999")))
+
+    reads.clear()
+    guest_registry._state["checked_at"] = 0.0
+    for _ in range(50):
+        guest_registry.name("100")
+    results.append(check("no re-read while .version is unchanged", reads == []))
+
+    write(f"{pve}/nodes/pve1/lxc/101.conf", CT_101.replace("hostname: db", "hostname: db2") + "#x\n")
+    os.remove(f"{pve}/nodes/pve2/qemu-server/200.conf")
+    write(f"{pve}/.vmlist", json.dumps({"version": 4, "ids": {
+        "100": {"node": "pve1", "type": "qemu", "version": 1},
+        "101": {"node": "pve1", "type": "lxc", "version": 5},
+    }}))
+    write(f"{pve}/.version", json.dumps({"version": 11}))
+    guest_registry._state["checked_at"] = 0.0
+    results.append(check("version bump re-parses only the changed config",
+                         guest_registry.name("101") == "db2" and reads == ["ct"]
+                         and not guest_registry.exists("200")))
+
+    conf = f"{pve}/nodes/pve1/lxc/101.conf"
+    st = os.stat(conf)
+    write(conf, open(conf).read().replace("hostname: db2", "hostname: db3"))
+    os.utime(conf, ns=(st.st_atime_ns, st.st_mtime_ns))
+    write(f"{pve}/.vmlist", json.dumps({"version": 5, "ids": {
+        "100": {"node": "pve1", "type": "qemu", "version": 1},
+        "101": {"node": "pve1", "type": "lxc", "version": 6},
+    }}))
+    write(f"{pve}/.version", json.dumps({"version": 12}))
+    guest_registry._state["checked_at"] = 0.0
+    results.append(check("same-size edit with an unchanged mtime is caught by version",
+                         guest_registry.name("101") == "db3"))
+
+    os.remove(f"{pve}/.vmlist")
+    os.remove(f"{pve}/.version")
+    reset(pve)
+    results.append(check("directory scan without pmxcfs files",
+                         [g["vmid"] for g in guest_registry.all_guests()] == ["100", "101"]
+                         and guest_registry.get("101")["type"] == "ct"))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
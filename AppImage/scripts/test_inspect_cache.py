@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Check the inspect harvest cache GC.
+Usage: python3 test_inspect_cache.py
+
+Lays out a cache root with finished and half-built harvests, all aged
+past the limits, and checks that:
+
+  * an abandoned half-built harvest is removed;
+  * one a running build still writes to (pinned) survives, however old;
+  * a finished harvest that is pinned while reports read it survives
+    eviction, and is fair game again once the last pin is released.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import inspect_cache
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def make(root, name, age):
+    path = os.path.join(root, name)
+    os.makedirs(os.path.join(path, "rootfs"))
+    t = time.time() - age
+    os.utime(path, (t, t))
+    return path
+
+
+def main():
+    root = tempfile.mkdtemp()
+    stale = make(root, ".aaa-dead", 7200)
+    building = make(root, ".bbb-live", 7200)
+    newest = make(root, "k1", 10)
+    reading = make(root, "k2", 5000)
+    oldest = make(root, "k3", 6000)
+
+    inspect_cache.pin(building)
+    inspect_cache.pin(reading)
+    inspect_cache.pin(reading)
+    removed = inspect_cache.gc(root, max_entries=1, stale_after=1800)
+
+    results = []
+    results.append(check("abandoned half-built harvest removed",
+                         stale in removed and not os.path.exists(stale)))
+    results.append(check("pinned build in progress kept",
+                         os.path.isdir(os.path.join(building, "rootfs"))))
+    results.append(check("pinned finished harvest kept, unpinned one evicted",
+                         os.path.isdir(reading) and os.path.isdir(newest)
+                         and not os.path.exists(oldest)))
+
+    inspect_cache.unpin(reading)
+    inspect_cache.gc(root, max_entries=1, stale_after=1800)
+    results.append(check("still pinned after one of two unpins", os.path.isdir(reading)))
+
+    inspect_cache.unpin(reading)
+    inspect_cache.unpin(building)
+    inspect_cache.gc(root, max_entries=1, stale_after=1800)
+    results.append(check("released entries collected again",
+                         sorted(os.listdir(root)) == ["k1"]))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Check oci_image_pull against a local stand-in registry.
+Usage: python3 test_oci_image_pull.py
+
+Serves two small images that share a base layer (one behind a
+multi-arch index, both behind bearer-token auth with the blobs
+redirected to a second "CDN" port) and checks that:
+
+  * a pull produces a docker-archive template with the layers
+    uncompressed and named by diff_id;
+  * two concurrent requests for the same reference share one job;
+  * the second image only downloads its own layer (shared base reused
+    from the blob cache) and both pulls overlap;
+  * pulling a reference again reuses the template by digest without
+    touching any blob;
+  * when the registry is unreachable the fallback runs and its result
+    is reported.
+"""
+
+import gzip
+import hashlib
+import http.server
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import oci_image_pull
+
+BLOBS = {}
+MANIFESTS = {}
+HITS = []
+TOKEN = "test-token"
+
+
+def layer(files):
+    bio = io.BytesIO()
+    with tarfile.open(fileobj=bio, mode="w") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    raw = bio.getvalue()
+    gz = gzip.compress(raw)
+    digest = "sha256:" + hashlib.sha256(gz).hexdigest()
+    BLOBS[digest] = gz
+    return {"mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+            "digest": digest, "size": len(gz)}, "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+def image(repo, tag, layers, indexed=False):
+    descs, diff_ids = zip(*layers)
+    config = json.dumps({"architecture": "amd64", "os": "linux",
+                         "rootfs": {"type": "layers", "diff_ids": list(diff_ids)}}).encode()
+    config_digest = "sha256:" + hashlib.sha256(config).hexdigest()
+    BLOBS[config_digest] = config
+    manifest = json.dumps({
+        "schemaVersion": 2, "mediaType": "application/vnd.oci.image.manifest.v1+json",
+        "config": {"mediaType": "application/vnd.oci.image.config.v1+json",
+                   "digest": config_digest, "size": len(config)},
+        "layers": list(descs)}).encode()
+    digest = "sha256:" + hashlib.sha256(manifest).hexdigest()
+    MANIFESTS[(repo, digest)] = manifest
+    if indexed:
+        index = json.dumps({"schemaVersion": 2,
+                            "mediaType": "application/vnd.oci.image.index.v1+json",
+                            "manifests": [
+                                {"digest": "sha256:" + "0" * 64, "platform": {"os": "linux", "architecture": "s390x"}},
+                                {"digest": digest, "platform": {"os": "linux", "architecture": "amd64"}},
+                            ]}).encode()
+        MANIFESTS[(repo, tag)] = index
+    else:
+        MANIFESTS[(repo, tag)] = manifest
+    return digest
+
+
+class Registry(http.server.BaseHTTPRequestHandler):
+    cdn = None
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, code, body=b"", headers=None):
+        self.send_response(code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        if self.path.startswith("/token"):
+            return self.send(200, json.dumps({"token": TOKEN}).encode())
+        if self.path.startswith("/cdn/"):
+            if self.headers.get("Authorization"):
+                return self.send(400, b"auth header leaked to cdn")
+            digest = self.path[len("/cdn/"):]
+            HITS.append(digest)
+            time.sleep(0.3)
+            return self.send(200, BLOBS[digest])
+        if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+            return self.send(401, headers={"WWW-Authenticate":
+                             f'Bearer realm="{host}/token",service="test"'})
+        parts = self.path.split("/")
+        repo = "/".join(parts[2:-2])
+        kind, ref = parts[-2], parts[-1]
+        if kind == "manifests" and (repo, ref) in MANIFESTS:
+            return self.send(200, MANIFESTS[(repo, ref)])
+        if kind == "blobs" and ref in BLOBS:
+            return self.send(307, headers={"Location": f"{Registry.cdn}/cdn/{ref}"})
+        self.send(404)
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    base = layer({"etc/os-release": b"ID=alpine\n"})
+    app_a = layer({"usr/bin/a": b"a" * 4096})
+    app_b = layer({"usr/bin/b": b"b" * 4096})
+    image("test/app-a", "stable", [base, app_a], indexed=True)
+    image("test/app-b", "1.0", [base, app_b])
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Registry)
+    cdn = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Registry)
+    Registry.cdn = f"http://127.0.0.1:{cdn.server_address[1]}"
+    for srv in (server, cdn):
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+
+    oci_image_pull._REGISTRY_OVERRIDE = f"http://127.0.0.1:{server.server_address[1]}"
+    oci_image_pull._BLOB_DIR = os.path.join(tmp, "blobs")
+    oci_image_pull._TEMPLATES_INDEX = os.path.join(tmp, "templates.json")
+    oci_image_pull._template_dir = lambda storage: os.path.join(tmp, storage, "template", "cache")
+
+    results = []
+    j1 = oci_image_pull.start_pull("test/app-a", "stable", "local")
+    j2 = oci_image_pull.start_pull("docker.io/test/app-a", "stable", "local")
+    results.append(check("concurrent pulls of one reference share a job", j1 is j2))
+    j1.wait(30)
+    r1 = j1.result()
+    results.append(check("first pull succeeds", r1["success"] and r1["template"] == "local:vztmpl/test-app-a-stable.tar"))
+    path = os.path.join(tmp, "local", "template", "cache", "test-app-a-stable.tar")
+    with tarfile.open(path) as tar:
+        manifest = json.load(tar.extractfile("manifest.json"))[0]
+        names = manifest["Layers"]
+        inner = tarfile.open(fileobj=tar.extractfile(names[1]))
+        results.append(check("docker-archive layers uncompressed and named by diff_id",
+                             names == [base[1][7:] + ".tar", app_a[1][7:] + ".tar"]
+                             and inner.getnames() == ["usr/bin/a"]))
+    snap = j1.snapshot()
+    results.append(check("progress reported", snap["layers_done"] == 2
+                         and snap["bytes_done"] == snap["bytes_total"] > 0))
+
+    HITS.clear()
+    jb = oci_image_pull.start_pull("test/app-b", "1.0", "local")
+    jb.wait(30)
+    results.append(check("shared base layer served from the blob cache",
+                         jb.result()["success"] and base[0]["digest"] not in HITS
+                         and app_b[0]["digest"] in HITS and jb.snapshot()["layers_cached"] == 1))
+
+    # Two cold pulls at once overlap: with a 0.3s delay per blob they take
+    # well under the serial time (2 images x 3 blobs).
+    oci_image_pull._BLOB_DIR = os.path.join(tmp, "blobs-cold")
+    oci_image_pull._TEMPLATES_INDEX = os.path.join(tmp, "templates-cold.json")
+    start = time.time()
+    jobs = [oci_image_pull.start_pull("test/app-a", "stable", "other"),
+            oci_image_pull.start_pull("test/app-b", "1.0", "other")]
+    for j in jobs:
+        j.wait(30)
+    elapsed = time.time() - start
+    results.append(check(f"two pulls overlap ({elapsed:.2f}s)",
+                         all(j.result()["success"] for j in jobs) and elapsed < 1.5))
+
+    HITS.clear()
+    again = oci_image_pull.start_pull("test/app-a", "stable", "elsewhere")
+    again.wait(30)
+    r = again.result()
+    results.append(check("template reused by digest", r["reused"]
+                         and r["template"] == "other:vztmpl/test-app-a-stable.tar" and not HITS))
+
+    oci_image_pull._REGISTRY_OVERRIDE = "http://127.0.0.1:9"
+    calls = []
+
+    def fallback(ref, filename, storage):
+        calls.append((ref, filename, storage))
+        return {"success": True, "message": "via pve", "template": f"{storage}:vztmpl/{filename}"}
+
+    fb = oci_image_pull.start_pull("test/app-c", "2", "local", fallback=fallback)
+    fb.wait(30)
+    results.append(check("fallback used when the registry is unreachable",
+                         fb.result()["success"] and calls == [("docker.io/test/app-c:2", "test-app-c-2.tar", "local")]))
+
+    server.shutdown()
+    cdn.shutdown()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Check the OCI app update-check cache.
+Usage: python3 test_oci_update_cache.py
+
+Points the cache at a temp file and checks that:
+
+  * dropping a cached app returns (no self-deadlock on the cache lock)
+    and removes it from memory and disk;
+  * entries only on disk survive a put/drop of another app;
+  * the cache stays usable after a drop.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import oci_manager
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def returns_within(fn, timeout=5):
+    t = threading.Thread(target=fn, daemon=True)
+    t.start()
+    t.join(timeout)
+    return not t.is_alive()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    cache_file = os.path.join(tmp, "update_cache.json")
+    now = time.time()
+    with open(cache_file, "w") as f:
+        json.dump({"version": 1, "apps": {
+            "on-disk": {"update_available": False, "_cached_at": now},
+        }}, f)
+    oci_manager._UPDATE_CACHE_FILE = cache_file
+    oci_manager._app_update_cache.clear()
+    oci_manager._update_cache_loaded = False
+
+    results = []
+    oci_manager._update_cache_put("tailscale", {"update_available": True, "_cached_at": now})
+    results.append(check("put keeps on-disk entries",
+                         set(json.load(open(cache_file))["apps"]) == {"on-disk", "tailscale"}))
+
+    results.append(check("drop of a cached app returns",
+                         returns_within(lambda: oci_manager._update_cache_drop("tailscale"))))
+    on_disk = json.load(open(cache_file))["apps"]
+    results.append(check("dropped app gone from memory and disk",
+                         oci_manager._update_cache_get("tailscale") is None
+                         and set(on_disk) == {"on-disk"}))
+    results.append(check("drop of an unknown app returns",
+                         returns_within(lambda: oci_manager._update_cache_drop("missing"))))
+    results.append(check("cache usable after drop",
+                         returns_within(lambda: oci_manager._update_cache_get("on-disk"))
+                         and oci_manager._update_cache_get("on-disk") is not None))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
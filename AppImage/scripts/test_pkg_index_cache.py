@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Check pkg_index_cache + lxc_pkg_state against a stand-in mirror.
+Usage: python3 test_pkg_index_cache.py
+
+Builds, in a temporary directory, a local mirror (Debian bookworm +
+bookworm-security + bookworm-backports, Alpine v3.19 main) and three
+fake CT root filesystems (two Debian CTs on the same suites, one Alpine
+OCI app), points the cache at them and checks that:
+
+  * the upgradable lists match what apt / apk would report;
+  * each index is fetched once and then served to every CT from the
+    shared table (memory and on-disk);
+  * the host's own apt lists are used instead of a download when the
+    host tracks the same suite.
+"""
+
+import gzip
+import io
+import lzma
+import os
+import sys
+import tarfile
+import tempfile
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import lxc_pkg_state
+import pkg_index_cache
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+
+
+def packages(*entries):
+    return "\n".join(f"Package: {n}\nVersion: {v}\nArchitecture: {a}\n" for n, v, a in entries)
+
+
+def apkindex(*entries):
+    text = "\n".join(f"P:{n}\nV:{v}\nA:x86_64\n" for n, v in entries).encode()
+    bio = io.BytesIO()
+    with tarfile.open(fileobj=bio, mode="w:gz") as tar:
+        info = tarfile.TarInfo("APKINDEX")
+        info.size = len(text)
+        tar.addfile(info, io.BytesIO(text))
+    return bio.getvalue()
+
+
+def build_mirror(mirror):
+    dists = os.path.join(mirror, "dists")
+    write(f"{dists}/bookworm/InRelease", "Suite: stable\n")
+    write(f"{dists}/bookworm/main/binary-amd64/Packages.xz", lzma.compress(packages(
+        ("curl", "7.88.1-10+deb12u5", "amd64"),
+        ("libc6", "2.36-9+deb12u7", "amd64"),
+        ("tzdata", "2025a-0+deb12u1", "all"),
+        ("bpo-tool", "1.0-1", "amd64"),
+    ).encode()))
+    write(f"{dists}/bookworm-security/InRelease", "Suite: stable-security\n")
+    write(f"{dists}/bookworm-security/main/binary-amd64/Packages.gz", gzip.compress(packages(
+        ("curl", "7.88.1-10+deb12u12", "amd64"),
+    ).encode()))
+    write(f"{dists}/bookworm-backports/InRelease",
+          "Suite: stable-backports\nNotAutomatic: yes\nButAutomaticUpgrades: yes\n")
+    write(f"{dists}/bookworm-backports/main/binary-amd64/Packages", packages(
+        ("bpo-tool", "2.1-1~bpo12+1", "amd64"),
+        ("libc6", "2.40-1~bpo12+1", "amd64"),
+    ))
+    write(f"{mirror}/v3.19/main/x86_64/APKINDEX.tar.gz", apkindex(
+        ("tailscale", "1.78.3-r0"), ("musl", "1.2.4_git20230717-r5"), ("busybox", "1.36.1-r15"),
+    ))
+
+
+def build_debian_ct(root, bpo_version):
+    write(f"{root}/etc/os-release", 'ID=debian\nVERSION_ID="12"\n')
+    write(f"{root}/etc/apt/sources.list",
+          "deb http://deb.debian.org/debian bookworm main\n"
+          "deb [signed-by=/x.gpg] http://security.debian.org/debian-security bookworm-security main\n")
+    write(f"{root}/etc/apt/sources.list.d/backports.sources",
+          "Types: deb\nURIs: http://deb.debian.org/debian\nSuites: bookworm-backports\nComponents: main\n")
+    status = [
+        ("dpkg", "1.21.22", "amd64"), ("curl", "7.88.1-10+deb12u5", "amd64"),
+        ("libc6", "2.36-9+deb12u3", "amd64"), ("tzdata", "2024a-0+deb12u1", "all"),
+        ("bpo-tool", bpo_version, "amd64"),
+    ]
+    write(f"{root}/var/lib/dpkg/status", "\n".join(
+        f"Package: {n}\nStatus: install ok installed\nArchitecture: {a}\nVersion: {v}\n"
+        for n, v, a in status))
+
+
+def build_alpine_ct(root):
+    write(f"{root}/etc/os-release", "ID=alpine\n")
+    write(f"{root}/etc/apk/arch", "x86_64\n")
+    write(f"{root}/etc/apk/repositories", "https://dl-cdn.alpinelinux.org/alpine/v3.19/main\n")
+    write(f"{root}/lib/apk/db/installed",
+          "P:tailscale\nV:1.74.0-r1\nA:x86_64\n\nP:musl\nV:1.2.4-r2\nA:x86_64\n\n"
+          "P:busybox\nV:1.36.1-r15\nA:x86_64\n")
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    mirror = os.path.join(tmp, "mirror")
+    build_mirror(mirror)
+    build_debian_ct(os.path.join(tmp, "cts", "101", "rootfs"), "1.0-1")
+    build_debian_ct(os.path.join(tmp, "cts", "102", "rootfs"), "2.0-1~bpo12+1")
+    build_alpine_ct(os.path.join(tmp, "cts", "201", "rootfs"))
+
+    lxc_pkg_state._CGROUP_ROOTS = ()
+    lxc_pkg_state._MOUNTED_ROOTFS = os.path.join(tmp, "cts", "{vmid}", "rootfs")
+    pkg_index_cache._CACHE_DIR = os.path.join(tmp, "cache")
+    pkg_index_cache._HOST_APT_LISTS = os.path.join(tmp, "host-lists")
+    pkg_index_cache._MIRROR_OVERRIDE = mirror
+
+    fetched = []
+    real_read = pkg_index_cache._read_url
+
+    def counting_read(url):
+        fetched.append(url)
+        return real_read(url)
+
+    pkg_index_cache._read_url = counting_read
+
+    results = []
+    ct101 = {r["name"]: r for r in lxc_pkg_state.list_upgradable("101", "debian", shared=True)}
+    results.append(check("security update flagged",
+                         ct101.get("curl", {}).get("latest") == "7.88.1-10+deb12u12"
+                         and ct101["curl"]["security"]))
+    results.append(check("point release + arch:all",
+                         ct101.get("libc6", {}).get("latest") == "2.36-9+deb12u7"
+                         and ct101.get("tzdata", {}).get("latest") == "2025a-0+deb12u1"))
+    results.append(check("stable package not pulled to backports", "bpo-tool" not in ct101))
+    first_fetches = len(fetched)
+
+    ct102 = {r["name"]: r for r in lxc_pkg_state.list_upgradable("102", "debian", shared=True)}
+    results.append(check("backports package follows backports",
+                         ct102.get("bpo-tool", {}).get("latest") == "2.1-1~bpo12+1"))
+    results.append(check("second CT served from the shared tables", len(fetched) == first_fetches))
+
+    pkg_index_cache.clear_memory()
+    lxc_pkg_state.list_upgradable("101", "debian", shared=True)
+    results.append(check("tables reloaded from disk, not refetched", len(fetched) == first_fetches))
+
+    alpine = {r["name"]: r for r in lxc_pkg_state.list_upgradable("201", "alpine", shared=True)}
+    results.append(check("alpine upgradable", sorted(alpine) == ["musl", "tailscale"]
+                         and alpine["tailscale"]["latest"] == "1.78.3-r0"))
+    results.append(check("alpine installed_version",
+                         lxc_pkg_state.installed_version("201", "alpine", "tailscale") == "1.74.0-r1"))
+
+    # Host tracks bookworm main itself: a fresh cache builds that table
+    # from the host's lists instead of downloading it.
+    pkg_index_cache.clear_memory()
+    pkg_index_cache._CACHE_DIR = os.path.join(tmp, "cache2")
+    pkg_index_cache._MIRROR_OVERRIDE = None
+    write(os.path.join(pkg_index_cache._HOST_APT_LISTS,
+                       "ftp.de.debian.org_debian_dists_bookworm_main_binary-amd64_Packages"),
+          packages(("curl", "7.88.1-10+deb12u5", "amd64"), ("libc6", "2.36-9+deb12u8", "amd64")))
+    fetched.clear()
+    table = pkg_index_cache.deb_table("http://deb.debian.org/debian", "bookworm", "main", "amd64")
+    results.append(check("host lists reused for the same suite",
+                         table is not None and table["source"].startswith("host:")
+                         and table["versions"]["libc6"] == "2.36-9+deb12u8" and not fetched))
+
+    # Repository URIs come from the CT: nothing but http(s) to a
+    # non-loopback host is fetched on its behalf.
+    fetched.clear()
+    refused = [pkg_index_cache.deb_table(uri, "bookworm", "main", "amd64")
+               for uri in ("file:///etc", "http://127.0.0.1:8006/debian",
+                           "http://localhost/debian", "http://169.254.169.254/debian")]
+    try:
+        real_read("file:///etc/hostname")
+        file_read = True
+    except ValueError:
+        file_read = False
+    results.append(check("CT-supplied file: / loopback repositories refused",
+                         refused == [None] * 4 and not fetched and not file_read
+                         and pkg_index_cache.apk_table("file:///srv/apk", "v3.20", "main",
+                                                       "x86_64") is None))
+    results.append(check("official archive matched on whole host labels",
+                         pkg_index_cache.origin_for("http://evildebian.org/debian") != "debian"
+                         and pkg_index_cache.origin_for("http://ftp.de.debian.org/debian") == "debian"))
+
+    print(f"downloads for 3 CTs: {first_fetches}")
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Check the per-cycle VM/CT error reconciliation.
+Usage: python3 test_vm_error_reconcile.py
+
+Records guest errors in a temp health DB (guest configs from a fake
+/etc/pve tree), then runs two monitor cycles the way
+HealthMonitor._check_vms_cts_with_persistence does — changed_vm_guests
+diff, then reconcile_vm_errors — and checks that:
+
+  * a deleted guest has all its errors resolved, config errors included;
+  * a guest that started has only its transient errors resolved;
+  * a guest whose state didn't change is not passed to reconcile;
+  * an error key that appeared since the last cycle is reconciled even
+    though its guest's state didn't change.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+
+import guest_registry
+from health_persistence import HealthPersistence, changed_vm_guests
+
+
+def check(label, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {label}")
+    return ok
+
+
+def fake_pve(root):
+    guests = {"100": "qemu", "101": "lxc", "102": "qemu", "103": "qemu"}
+    for vmid, gtype in guests.items():
+        sub = "qemu-server" if gtype == "qemu" else "lxc"
+        os.makedirs(f"{root}/nodes/pve1/{sub}", exist_ok=True)
+        with open(f"{root}/nodes/pve1/{sub}/{vmid}.conf", "w") as f:
+            f.write(f"name: guest{vmid}\n")
+    os.symlink(f"{root}/nodes/pve1", f"{root}/local")
+    with open(f"{root}/.version", "w") as f:
+        json.dump({"version": 1}, f)
+    with open(f"{root}/.vmlist", "w") as f:
+        json.dump({"version": 1, "ids": {
+            v: {"node": "pve1", "type": t, "version": 1} for v, t in guests.items()
+        }}, f)
+    guest_registry._PVE_DIR = root
+
+
+def temp_persistence(root):
+    hp = HealthPersistence.__new__(HealthPersistence)
+    hp.data_dir = Path(root)
+    hp.db_path = hp.data_dir / "health_monitor.db"
+    hp._db_lock = threading.RLock()
+    hp._init_database()
+    return hp
+
+
+def open_keys(hp):
+    conn = sqlite3.connect(str(hp.db_path))
+    rows = conn.execute("SELECT error_key FROM errors WHERE resolved_at IS NULL").fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    fake_pve(os.path.join(tmp, "pve"))
+    hp = temp_persistence(tmp)
+
+    hp.record_error("vm_100", "vms", "WARNING", "VM 100: QMP command failed")
+    hp.record_error("vmct_100", "vms", "WARNING", "VM 100: device /dev/vfio/12 missing")
+    hp.record_error("vm_102", "vms", "WARNING", "VM 102: QMP command failed")
+    hp.record_error("vm_103", "vms", "WARNING", "VM 103: QMP command failed")
+    hp.record_error("vmct_103", "vms", "WARNING", "VM 103: device /dev/vfio/3 missing")
+
+    states = {
+        "100": {"type": "vm", "status": "stopped"},
+        "101": {"type": "ct", "status": "running"},
+        "102": {"type": "vm", "status": "stopped"},
+        "103": {"type": "vm", "status": "stopped"},
+    }
+    results = []
+
+    # Cycle 1: VM 100 started, VM 103 deleted, 101/102 unchanged.
+    active = open_keys(hp)
+    current = dict(states, **{"100": {"type": "vm", "status": "running"}})
+    del current["103"]
+    changed = changed_vm_guests(current, states, active, active)
+    results.append(check("only guests whose state changed are reconciled",
+                         changed == {"100": current["100"], "103": None}))
+    resolved = set(hp.reconcile_vm_errors(changed))
+    results.append(check("deleted guest: all errors resolved",
+                         {"vm_103", "vmct_103"} <= resolved))
+    results.append(check("started guest: transient resolved, config error kept",
+                         "vm_100" in resolved and "vmct_100" not in resolved))
+    results.append(check("unchanged guest untouched", "vm_102" in open_keys(hp)))
+    seen = active - resolved
+
+    # Cycle 2: nothing changed, but a new error was recorded for CT 101.
+    hp.record_error("ct_101", "vms", "WARNING", "CT 101: startup hook timed out")
+    active = open_keys(hp)
+    changed = changed_vm_guests(current, current, active, seen)
+    results.append(check("new error key reconciled without a state change",
+                         changed == {"101": current["101"]}
+                         and hp.reconcile_vm_errors(changed) == ["ct_101"]))
+    results.append(check("remaining open errors",
+                         open_keys(hp) == {"vmct_100", "vm_102"}))
+
+    results.append(check("no guest states → nothing to reconcile",
+                         changed_vm_guests(None, current, active, seen) == {}))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()